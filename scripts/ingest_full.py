@@ -8,6 +8,7 @@ sys.path.append(os.getcwd())
 from src.pipelines.ingestion.core_loader import CoreLoader
 from src.kg_model.knowledge_graph_model import KnowledgeGraphModel, KnowledgeGraphModelConfig
 from src.kg_model.graph_model import GraphModelConfig
+from src.kg_model.embeddings_model import EmbeddingsModelConfig
 from src.db_drivers.graph_driver.GraphDriver import GraphDriverConfig
 from src.db_drivers.graph_driver.utils import GraphDBConnectionConfig
 from src.utils import Logger
@@ -20,18 +21,21 @@ def run_full_ingestion():
         db_config=GraphDBConnectionConfig(
             host='localhost', 
             port=7687, 
-            params={'user': 'neo4j', 'pwd': 'password'},
+            params={'user': 'neo4j', 'pwd': 'password',
+                    'bulk_write': True, 'bulk_batch_size': 1000, 'bulk_tx_size': 10000},
             db_info={'db': 'neo4j'} # Default DB
         )
     )
 
     graph_conf = GraphModelConfig(
-        driver_config=driver_conf
+        driver_config=driver_conf,
+        create_batch_size=5000
     )
 
     # Use KnowledgeGraphModelConfig
     config = KnowledgeGraphModelConfig(
         graph_config=graph_conf,
+        embeddings_config=EmbeddingsModelConfig(pipelined_ingestion=True, encode_batch_size=64),
         log=Logger('ingestion_full_log') 
     )
 
@@ -62,13 +62,15 @@ def run_neo4j_ingestion():
         db_config=GraphDBConnectionConfig(
             host='localhost', 
             port=7687, 
-            params={'user': 'neo4j', 'pwd': 'password'},
+            params={'user': 'neo4j', 'pwd': 'password',
+                    'bulk_write': True, 'bulk_batch_size': 1000, 'bulk_tx_size': 10000},
             db_info={'db': 'neo4j'}
         )
     )
 
     graph_conf = GraphModelConfig(
-        driver_config=driver_conf
+        driver_config=driver_conf,
+        create_batch_size=5000
     )
 
     # Use KnowledgeGraphModelConfig
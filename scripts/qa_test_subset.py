@@ -59,7 +59,8 @@ def run_test():
     query = f"Who is {s_name}?"
     print(f"Running QA for query: '{query}'")
 
-    results = qa_engine.get_ranked_results(query, top_k=3)
+    with qa_engine:
+        results = qa_engine.get_ranked_results(query, top_k=3)
     
     print("\n--- Results ---")
     for res in results:
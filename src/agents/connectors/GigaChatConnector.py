@@ -35,12 +35,15 @@ class GigaChatConnector(AbstractAgentConnector):
     def close_connection(self):
         self.giga_model.close()
 
-    def generate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
+    def get_chat(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> Chat:
         msgs = [Messages(role='system', content=system_prompt), Messages(role='user', content=user_prompt)]
         if assistant_prompt is not None:
             msgs.append(Messages(role='assistant', content=assistant_prompt))
 
-        chat = Chat(messages=msgs, **self.gen_strategy)
+        return Chat(messages=msgs, **self.gen_strategy)
+
+    def _generate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
+        chat = self.get_chat(system_prompt, user_prompt, assistant_prompt)
 
         flag, counter = True, 0
         while flag:
@@ -55,3 +58,20 @@ class GigaChatConnector(AbstractAgentConnector):
                     self.open_connection()
 
         return response.choices[0].message.content
+
+    async def _agenerate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
+        chat = self.get_chat(system_prompt, user_prompt, assistant_prompt)
+
+        flag, counter = True, 0
+        while flag:
+            try:
+                response = await self.giga_model.achat(chat)
+                flag = False
+            except (ConnectError, RemoteProtocolError, ResponseError) as e:
+                counter += 1
+                if counter > self.trials:
+                    raise e
+                else:
+                    self.open_connection()
+
+        return response.choices[0].message.content
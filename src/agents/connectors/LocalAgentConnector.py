@@ -25,7 +25,7 @@ class LocalAgentConnector(AbstractAgentConnector):
     def close_connection(self):
         pass
 
-    def generate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
+    def _generate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user","content": user_prompt}]
@@ -40,7 +40,7 @@ class LocalAgentConnector(AbstractAgentConnector):
             self.pipeline.tokenizer.eos_token_id,
             self.pipeline.tokenizer.convert_tokens_to_ids("<|eot_id|>")
         ]
-        gen_strategy = self.config.gen_strategy if gen_strategy is None else gen_strategy
+        gen_strategy = self.config.gen_strategy
 
         outputs = self.pipeline(
             prompt,
@@ -1,5 +1,8 @@
+import asyncio
+import weakref
+
 from ..utils import AbstractAgentConnector, AgentConnectorConfig
-from ollama import Client
+from ollama import Client, AsyncClient
 
 DEFAULT_OLLAMA_CONFIG = AgentConnectorConfig(
     gen_strategy={'num_predict': 2048, 'seed': 42, 'top_k': 1, 'temperature': 0.0},
@@ -20,18 +23,32 @@ class OLlamaConnector(AbstractAgentConnector):
         self.client = Client(
             host=f"http://{self.config.ext_params['host']}:{self.config.ext_params['port']}",
             timeout=self.config.ext_params['timeout'])
+        # асинхронный клиент привязан к event loop'у, в котором создан
+        self.async_clients = weakref.WeakKeyDictionary()
+
+    def get_async_client(self) -> AsyncClient:
+        loop = asyncio.get_running_loop()
+        if loop not in self.async_clients:
+            self.async_clients[loop] = AsyncClient(
+                host=f"http://{self.config.ext_params['host']}:{self.config.ext_params['port']}",
+                timeout=self.config.ext_params['timeout'])
+        return self.async_clients[loop]
 
     def check_connection(self) -> bool:
         pass
 
     def close_connection(self):
         del self.client
+        self.async_clients.clear()
 
-    def generate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
-
+    def get_messages(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None):
         msgs = [{'role':'system', 'content': system_prompt}, {'role':'user', 'content':user_prompt}]
         if assistant_prompt is not None:
             msgs.append({'role':'assistant', 'content': assistant_prompt})
+        return msgs
+
+    def _generate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
+        msgs = self.get_messages(system_prompt, user_prompt, assistant_prompt)
 
         raw_output = self.client.chat(
             model=self.config.credentials['model'],
@@ -41,3 +58,15 @@ class OLlamaConnector(AbstractAgentConnector):
 
         response = raw_output['message']['content']
         return response
+
+    async def _agenerate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
+        msgs = self.get_messages(system_prompt, user_prompt, assistant_prompt)
+
+        raw_output = await self.get_async_client().chat(
+            model=self.config.credentials['model'],
+            options=self.config.gen_strategy,
+            messages=msgs,
+            keep_alive=self.config.ext_params['keep_alive'])
+
+        response = raw_output['message']['content']
+        return response
@@ -1,5 +1,7 @@
 import os
-from openai import OpenAI
+import asyncio
+import weakref
+from openai import OpenAI, AsyncOpenAI
 
 from ..utils import AbstractAgentConnector, AgentConnectorConfig
 
@@ -26,6 +28,16 @@ class OpenAIConnector(AbstractAgentConnector):
         self.client = OpenAI(
             api_key=os.environ.get("OPENAI_API_KEY", config.credentials['token']),
             base_url=config.credentials['base_url'])
+        # асинхронный клиент привязан к event loop'у, в котором создан
+        self.async_clients = weakref.WeakKeyDictionary()
+
+    def get_async_client(self) -> AsyncOpenAI:
+        loop = asyncio.get_running_loop()
+        if loop not in self.async_clients:
+            self.async_clients[loop] = AsyncOpenAI(
+                api_key=os.environ.get("OPENAI_API_KEY", self.config.credentials['token']),
+                base_url=self.config.credentials['base_url'])
+        return self.async_clients[loop]
 
     def check_connection(self):
         # TODO
@@ -34,13 +46,22 @@ class OpenAIConnector(AbstractAgentConnector):
     def close_connection(self):
         self.client.close()
 
-    def generate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
+    def get_messages(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None):
         msgs = [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}]
         if assistant_prompt is not None:
             msgs.append({"role": "assistant", "content": assistant_prompt})
+        return msgs
 
+    def _generate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
         completion = self.client.chat.completions.create(
             model=self.config.credentials['model'],
-            messages=msgs, **self.config.gen_strategy)
+            messages=self.get_messages(system_prompt, user_prompt, assistant_prompt), **self.config.gen_strategy)
+
+        return completion.choices[0].message.content
+
+    async def _agenerate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
+        completion = await self.get_async_client().chat.completions.create(
+            model=self.config.credentials['model'],
+            messages=self.get_messages(system_prompt, user_prompt, assistant_prompt), **self.config.gen_strategy)
 
         return completion.choices[0].message.content
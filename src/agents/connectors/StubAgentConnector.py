@@ -1,14 +1,19 @@
 from collections import deque
 from typing import List
+import threading
+import asyncio
+import time
 
 from ..utils import AbstractAgentConnector, AgentConnectorConfig
 
+# ext_params['latency'] - искусственная задержка (в секундах) каждого ответа, эмулирующая обращение к бэкенду
 DEFAULT_STUBAGENT_CONFIG = AgentConnectorConfig()
 
 class StubAgentConnector(AbstractAgentConnector):
     def __init__(self, config: AgentConnectorConfig = DEFAULT_STUBAGENT_CONFIG, stub_answers: List[str] = list()) -> None:
         self.config = config
         self.looped_answers = deque(stub_answers)
+        self.lock = threading.Lock()
 
     def check_connection(self) -> bool:
         return True
@@ -16,9 +21,26 @@ class StubAgentConnector(AbstractAgentConnector):
     def close_connection(self):
         pass
 
-    def generate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
+    def get_backend_key(self) -> None:
+        # каждая заглушка - отдельный бэкенд
+        return None
+
+    def next_answer(self) -> str:
         answer = ''
-        if len(self.looped_answers):
-            answer = self.looped_answers.popleft()
-            self.looped_answers.append(answer)
+        with self.lock:
+            if len(self.looped_answers):
+                answer = self.looped_answers.popleft()
+                self.looped_answers.append(answer)
         return answer
+
+    def _generate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
+        latency = self.config.ext_params.get('latency', 0)
+        if latency > 0:
+            time.sleep(latency)
+        return self.next_answer()
+
+    async def _agenerate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
+        latency = self.config.ext_params.get('latency', 0)
+        if latency > 0:
+            await asyncio.sleep(latency)
+        return self.next_answer()
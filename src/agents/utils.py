@@ -1,6 +1,13 @@
 from abc import abstractmethod
 from dataclasses import dataclass, field
-from typing import Dict
+from contextlib import contextmanager, asynccontextmanager, nullcontext
+from collections import deque
+from functools import partial
+from typing import Dict, Union
+import threading
+import asyncio
+
+DEFAULT_MAX_CONCURRENCY = 4
 
 @dataclass
 class AgentConnectorConfig:
@@ -13,15 +20,168 @@ class AgentConnectorConfig:
         str_creds = ";".join(list(map(lambda p: f"{p[0]}={p[1]}", sorted([(k, str(v)) for k, v in self.credentials.items()], key=lambda p: p[0]))))
         return f"{str_genstrat}|{str_creds}"
 
+class _LimiterWaiter:
+    def __init__(self, event: threading.Event = None, loop: asyncio.AbstractEventLoop = None) -> None:
+        self.event = event
+        self.loop = loop
+        self.future = loop.create_future() if loop is not None else None
+        self.granted = False
+
+    def grant(self) -> None:
+        self.granted = True
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._set_future)
+
+    def _set_future(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+class AgentConcurrencyLimiter:
+    """Ограничение количества одновременных (in-flight) запросов к одному бэкенду LLM-агента.
+    Лимит общий для блокирующих вызовов из разных потоков и для корутин из любых event loop'ов:
+    ожидающие запросы обслуживаются в порядке поступления.
+
+    :param max_concurrency: Максимальное количество одновременных запросов.
+    :type max_concurrency: int
+    """
+    limiters: Dict[str, 'AgentConcurrencyLimiter'] = dict()
+    registry_lock = threading.Lock()
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> None:
+        if max_concurrency < 1:
+            raise ValueError
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.waiters = deque()
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'waited': 0, 'max_in_flight': 0}
+
+    @staticmethod
+    def get(backend_key: str, max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> 'AgentConcurrencyLimiter':
+        """Метод предназначен для получения общего для всех коннекторов лимитера заданного бэкенда.
+        Лимит определяется первым коннектором, обратившимся к бэкенду.
+        """
+        with AgentConcurrencyLimiter.registry_lock:
+            limiter = AgentConcurrencyLimiter.limiters.get(backend_key, None)
+            if limiter is None:
+                limiter = AgentConcurrencyLimiter(max_concurrency)
+                AgentConcurrencyLimiter.limiters[backend_key] = limiter
+            return limiter
+
+    def _try_acquire(self, waiter: _LimiterWaiter) -> bool:
+        self.stats['requests'] += 1
+        if self.in_flight < self.max_concurrency and len(self.waiters) < 1:
+            self._occupy()
+            return True
+
+        self.stats['waited'] += 1
+        self.waiters.append(waiter)
+        return False
+
+    def _occupy(self) -> None:
+        self.in_flight += 1
+        self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self.in_flight)
+
+    def _release(self) -> None:
+        # освободившийся слот сразу передаётся первому ожидающему запросу
+        self.in_flight -= 1
+        if len(self.waiters) > 0:
+            self._occupy()
+            self.waiters.popleft().grant()
+
+    @contextmanager
+    def slot(self):
+        waiter = _LimiterWaiter(event=threading.Event())
+        with self.lock:
+            acquired = self._try_acquire(waiter)
+        if not acquired:
+            waiter.event.wait()
+
+        try:
+            yield
+        finally:
+            with self.lock:
+                self._release()
+
+    @asynccontextmanager
+    async def aslot(self):
+        waiter = _LimiterWaiter(loop=asyncio.get_running_loop())
+        with self.lock:
+            acquired = self._try_acquire(waiter)
+        if not acquired:
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                with self.lock:
+                    # слот мог быть выделен до отмены ожидания
+                    if waiter.granted:
+                        self._release()
+                    else:
+                        self.waiters.remove(waiter)
+                raise
+
+        try:
+            yield
+        finally:
+            with self.lock:
+                self._release()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {**self.stats, 'in_flight': self.in_flight, 'queued': len(self.waiters)}
+
 class AbstractAgentConnector:
+    """Интерфейс взаимодействия с LLM-агентом. Коннекторы реализуют одиночный запрос к бэкенду (_generate и,
+    при наличии нативного асинхронного клиента, _agenerate). Если задан ext_params['max_concurrency'], то generate/agenerate
+    ограничивают количество одновременных запросов к бэкенду этим значением, иначе количество запросов не ограничивается.
+    """
     @abstractmethod
     def check_connection(self) -> bool:
         pass
 
     @abstractmethod
-    def generate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
+    def close_connection(self) -> None:
         pass
 
     @abstractmethod
-    def close_connection(self) -> None:
+    def _generate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
         pass
+
+    async def _agenerate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
+        # коннекторы без асинхронного клиента выполняют блокирующий запрос в пуле потоков
+        return await asyncio.get_running_loop().run_in_executor(
+            None, partial(self._generate, system_prompt, user_prompt, assistant_prompt))
+
+    def get_backend_key(self) -> Union[str, None]:
+        # коннекторы с одинаковым ключом разделяют общий лимит; коннектор, переопределивший метод
+        # и вернувший None (например, StubAgentConnector), получает собственный лимит
+        ext_params = self.config.ext_params
+        endpoint = ext_params.get('host', self.config.credentials.get('base_url', None))
+        return f"{type(self).__name__}|{endpoint}:{ext_params.get('port', None)}|{self.config.credentials.get('model', None)}"
+
+    @property
+    def limiter(self) -> Union[AgentConcurrencyLimiter, None]:
+        max_concurrency = self.config.ext_params.get('max_concurrency', None)
+        if max_concurrency is None:
+            return None
+
+        backend_key = self.get_backend_key()
+        if backend_key is not None:
+            return AgentConcurrencyLimiter.get(backend_key, max_concurrency)
+
+        with AgentConcurrencyLimiter.registry_lock:
+            if getattr(self, 'own_limiter', None) is None:
+                self.own_limiter = AgentConcurrencyLimiter(max_concurrency)
+            return self.own_limiter
+
+    def generate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
+        limiter = self.limiter
+        with (limiter.slot() if limiter is not None else nullcontext()):
+            return self._generate(system_prompt, user_prompt, assistant_prompt)
+
+    async def agenerate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
+        limiter = self.limiter
+        async with (limiter.aslot() if limiter is not None else nullcontext()):
+            return await self._agenerate(system_prompt, user_prompt, assistant_prompt)
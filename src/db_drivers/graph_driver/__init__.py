@@ -1,4 +1,5 @@
 from .connectors.Neo4jConnector import Neo4jConnector, DEFAULT_NEO4J_CONFIG
 from .connectors.InMemoryGraphConnector import InMemoryGraphConnector, DEFAULT_INMEMORYGRAPH_CONFIG
+from .connectors.CompactGraphConnector import CompactGraphConnector, DEFAULT_COMPACTGRAPH_CONFIG
 from .GraphDriver import GraphDriver, GraphDriverConfig
 from .utils import GraphDBConnectionConfig
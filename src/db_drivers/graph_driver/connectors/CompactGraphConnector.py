@@ -0,0 +1,485 @@
+from typing import List, Dict, Union, Tuple, Set
+from collections import defaultdict
+from array import array
+import gc
+
+import numpy as np
+
+from ..utils import GraphDBConnectionConfig, AbstractGraphDatabaseConnection
+from ....utils import Quadruplet, NodeType
+from ....utils.data_structs import RelationType, Relation, Node
+
+DEFAULT_COMPACTGRAPH_CONFIG = GraphDBConnectionConfig(params={'delta_buffer_size': 4096})
+
+NODE_TYPE_CODES = {NodeType.object: 0, NodeType.hyper: 1, NodeType.episodic: 2, NodeType.time: 3}
+NODE_CODE_TYPES = {v: k for k, v in NODE_TYPE_CODES.items()}
+DELETED_NODE_CODE = -1
+NO_TIME_NODE = -1
+
+class CompactGraphConnector(AbstractGraphDatabaseConnection):
+    """Графовое хранилище в оперативной памяти с компактным представлением данных.
+    Строковые идентификаторы вершин и квадруплетов интернируются в плотные int32-идентификаторы,
+    смежность хранится в CSR-массивах (indptr/indices), а новые рёбра накапливаются в небольшом
+    delta-буфере, который вливается в CSR-массивы при переполнении. Удаление квадруплетов
+    выполняется через пометку (tombstone) и физически применяется при следующем уплотнении.
+    Поиск по именам выполняется через вторичные (тип, имя)-индексы.
+
+    В отличие от InMemoryGraphConnector, вершины с одинаковым строковым идентификатором хранятся
+    в единственном экземпляре, а при удалении квадруплета его вершина удаляется, только если у неё
+    не осталось других инцидентных рёбер (InMemoryGraphConnector удаляет её безусловно).
+
+    :param config: Конфигурация хранилища. В params можно указать 'delta_buffer_size' - минимальное количество рёбер в delta-буфере (и удалённых рёбер), при котором он вливается в CSR-массивы. Фактический порог растёт вместе с размером CSR-массивов, поэтому суммарная стоимость слияний при загрузке графа остаётся линейной. Значение по умолчанию DEFAULT_COMPACTGRAPH_CONFIG.
+    :type config: GraphDBConnectionConfig
+    """
+
+    def __init__(self, config: GraphDBConnectionConfig = DEFAULT_COMPACTGRAPH_CONFIG) -> None:
+        self.config = config
+        self.delta_buffer_size = self.config.params.get('delta_buffer_size', 4096)
+
+    def open_connection(self) -> None:
+        # nodes
+        self.node_index = dict()
+        self.node_strids = list()
+        self.node_types = array('b')
+        self.node_payloads = list()
+
+        # quadruplets
+        self.quadruplet_index = dict()
+        self.quadruplet_strids = list()
+        self.q_start = array('i')
+        self.q_end = array('i')
+        self.q_time = array('i')
+        self.q_alive = array('b')
+        self.q_relations = list()
+        self.relation_counts = defaultdict(int)
+        self.alive_quadruplets = 0
+
+        # adjacency: CSR + delta-buffer
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.edge_qids = np.zeros(0, dtype=np.int32)
+        self.delta = defaultdict(list)
+        self.delta_size = 0
+        self.tombstones = 0
+
+        # secondary indexes for search by name
+        # (dict-значения используются как упорядоченные множества индексов вершин/квадруплетов)
+        self.name_nodes_index = dict()
+        self.name_relations_index = dict()
+        self.subj_name_quadruplets_index = dict()
+        self.obj_name_quadruplets_index = dict()
+
+    def is_open(self) -> bool:
+        return hasattr(self, 'node_index') and hasattr(self, 'quadruplet_index')
+
+    def close_connection(self) -> None:
+        for field in ['node_index', 'node_strids', 'node_types', 'node_payloads',
+                      'quadruplet_index', 'quadruplet_strids', 'q_start', 'q_end', 'q_time', 'q_alive',
+                      'q_relations', 'relation_counts', 'indptr', 'indices', 'edge_qids', 'delta',
+                      'name_nodes_index', 'name_relations_index', 'subj_name_quadruplets_index', 'obj_name_quadruplets_index']:
+            if hasattr(self, field):
+                delattr(self, field)
+        gc.collect()
+
+    def _intern_node(self, node: Node) -> int:
+        n_idx = self.node_index.get(node.id, None)
+        if n_idx is not None and self.node_types[n_idx] != DELETED_NODE_CODE:
+            return n_idx
+
+        n_idx = len(self.node_strids)
+        self.node_index[node.id] = n_idx
+        self.node_strids.append(node.id)
+        self.node_types.append(NODE_TYPE_CODES[node.type])
+        self.node_payloads.append((node.name, node.prop))
+        self._index_node(n_idx)
+        return n_idx
+
+    @staticmethod
+    def _add_to_index(index: Dict[Tuple, Dict[int, None]], key: Tuple, idx: int) -> None:
+        index.setdefault(key, dict())[idx] = None
+
+    @staticmethod
+    def _remove_from_index(index: Dict[Tuple, Dict[int, None]], key: Tuple, idx: int) -> None:
+        idxs = index.get(key, None)
+        if idxs is None:
+            return
+        idxs.pop(idx, None)
+        # пустые ключи удаляются, чтобы индекс не рос при удалении элементов
+        if len(idxs) < 1:
+            del index[key]
+
+    def _node_key(self, n_idx: int) -> Tuple[NodeType, str]:
+        return (NODE_CODE_TYPES[self.node_types[n_idx]], self.node_payloads[n_idx][0])
+
+    def _quadruplet_keys(self, q_idx: int) -> Tuple[Tuple, Tuple, Tuple]:
+        r_name, r_type, _, _ = self.q_relations[q_idx]
+        end_type = NODE_CODE_TYPES[self.node_types[self.q_end[q_idx]]]
+        return ((r_type, r_name), (end_type, self.node_payloads[self.q_start[q_idx]][0]),
+                (end_type, self.node_payloads[self.q_end[q_idx]][0]))
+
+    def _index_node(self, n_idx: int) -> None:
+        self._add_to_index(self.name_nodes_index, self._node_key(n_idx), n_idx)
+
+    def _unindex_node(self, n_idx: int) -> None:
+        self._remove_from_index(self.name_nodes_index, self._node_key(n_idx), n_idx)
+
+    def _index_quadruplet(self, q_idx: int) -> None:
+        relation_key, subj_key, obj_key = self._quadruplet_keys(q_idx)
+        self._add_to_index(self.name_relations_index, relation_key, q_idx)
+        self._add_to_index(self.subj_name_quadruplets_index, subj_key, q_idx)
+        self._add_to_index(self.obj_name_quadruplets_index, obj_key, q_idx)
+
+    def _unindex_quadruplet(self, q_idx: int) -> None:
+        relation_key, subj_key, obj_key = self._quadruplet_keys(q_idx)
+        self._remove_from_index(self.name_relations_index, relation_key, q_idx)
+        self._remove_from_index(self.subj_name_quadruplets_index, subj_key, q_idx)
+        self._remove_from_index(self.obj_name_quadruplets_index, obj_key, q_idx)
+
+    def _update_node(self, n_idx: int, node: Node) -> None:
+        if self.node_types[n_idx] == NODE_TYPE_CODES[node.type] and self.node_payloads[n_idx] == (node.name, node.prop):
+            return
+
+        # имя и тип вершины входят в ключи индексов инцидентных квадруплетов
+        incident_qidxs = set(q_idx for _, q_idx in self._iter_edges(n_idx))
+        for q_idx in incident_qidxs:
+            self._unindex_quadruplet(q_idx)
+        self._unindex_node(n_idx)
+
+        self.node_types[n_idx] = NODE_TYPE_CODES[node.type]
+        self.node_payloads[n_idx] = (node.name, node.prop)
+
+        self._index_node(n_idx)
+        for q_idx in incident_qidxs:
+            self._index_quadruplet(q_idx)
+
+    def _restore_node(self, n_idx: int) -> Node:
+        name, prop = self.node_payloads[n_idx]
+        return Node(name=name, type=NODE_CODE_TYPES[self.node_types[n_idx]], prop=prop, id=self.node_strids[n_idx])
+
+    def _restore_quadruplet(self, q_idx: int) -> Quadruplet:
+        r_name, r_type, r_prop, r_id = self.q_relations[q_idx]
+        time_idx = self.q_time[q_idx]
+        return Quadruplet(
+            start_node=self._restore_node(self.q_start[q_idx]),
+            relation=Relation(name=r_name, type=r_type, prop=r_prop, id=r_id),
+            end_node=self._restore_node(self.q_end[q_idx]),
+            time=self._restore_node(time_idx) if time_idx != NO_TIME_NODE else None,
+            id=self.quadruplet_strids[q_idx])
+
+    def _get_node_idx(self, node_id: str) -> Union[int, None]:
+        n_idx = self.node_index.get(node_id, None)
+        if n_idx is None or self.node_types[n_idx] == DELETED_NODE_CODE:
+            return None
+        return n_idx
+
+    def _iter_edges(self, n_idx: int) -> List[Tuple[int, int]]:
+        """Метод возвращает живые рёбра вершины в виде пар (индекс смежной вершины, индекс квадруплета)."""
+        edges = []
+        if n_idx + 1 < len(self.indptr):
+            start, end = self.indptr[n_idx], self.indptr[n_idx + 1]
+            edges += zip(self.indices[start:end].tolist(), self.edge_qids[start:end].tolist())
+        edges += self.delta.get(n_idx, [])
+        return [(nbr, q_idx) for nbr, q_idx in edges if self.q_alive[q_idx]]
+
+    def _compact(self) -> None:
+        """Метод вливает delta-буфер в CSR-массивы и физически удаляет помеченные на удаление рёбра."""
+        n_nodes = len(self.node_strids)
+
+        csr_src = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int32), np.diff(self.indptr))
+        delta_src, delta_dst, delta_qid = array('i'), array('i'), array('i')
+        for src, edges in self.delta.items():
+            for dst, q_idx in edges:
+                delta_src.append(src)
+                delta_dst.append(dst)
+                delta_qid.append(q_idx)
+
+        src = np.concatenate([csr_src, np.frombuffer(delta_src, dtype=np.int32)])
+        dst = np.concatenate([self.indices, np.frombuffer(delta_dst, dtype=np.int32)])
+        qid = np.concatenate([self.edge_qids, np.frombuffer(delta_qid, dtype=np.int32)])
+
+        alive_mask = np.frombuffer(self.q_alive, dtype=np.int8)[qid].astype(bool) if len(qid) else np.zeros(0, dtype=bool)
+        src, dst, qid = src[alive_mask], dst[alive_mask], qid[alive_mask]
+
+        order = np.argsort(src, kind='stable')
+        self.indices = dst[order].astype(np.int32)
+        self.edge_qids = qid[order].astype(np.int32)
+        self.indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n_nodes), out=self.indptr[1:])
+
+        self.delta = defaultdict(list)
+        self.delta_size = 0
+        self.tombstones = 0
+
+    def _compaction_limit(self) -> int:
+        # Note: при фиксированном пороге каждое слияние копирует весь CSR-массив,
+        # что даёт квадратичную стоимость загрузки графа
+        return max(self.delta_buffer_size, len(self.indices))
+
+    def _add_edge(self, sn_idx: int, en_idx: int, q_idx: int) -> None:
+        self.delta[sn_idx].append((en_idx, q_idx))
+        self.delta_size += 1
+        if sn_idx != en_idx:
+            self.delta[en_idx].append((sn_idx, q_idx))
+            self.delta_size += 1
+        if self.delta_size >= self._compaction_limit():
+            self._compact()
+
+    def create(self, quadruplets: List[Quadruplet], creation_info: Dict[int,Dict[str,bool]] = dict()) -> None:
+        # quadruplet-ids checking
+        for quadruplet in quadruplets:
+            if type(quadruplet.id) is not str:
+                raise ValueError
+        unique_ids = set(map(lambda quadruplet: quadruplet.id, quadruplets))
+        if len(quadruplets) != len(unique_ids):
+            raise ValueError
+
+        for quadruplet in quadruplets:
+            # Note: вершины с одинаковым строковым идентификатором хранятся в единственном экземпляре,
+            # поэтому creation_info не требуется для дедупликации вершин
+            if quadruplet.id in self.quadruplet_index and self.q_alive[self.quadruplet_index[quadruplet.id]]:
+                continue
+
+            sn_idx = self._intern_node(quadruplet.start_node)
+            en_idx = self._intern_node(quadruplet.end_node)
+            tn_idx = self._intern_node(quadruplet.time) if quadruplet.time else NO_TIME_NODE
+
+            q_idx = len(self.quadruplet_strids)
+            self.quadruplet_index[quadruplet.id] = q_idx
+            self.quadruplet_strids.append(quadruplet.id)
+            self.q_start.append(sn_idx)
+            self.q_end.append(en_idx)
+            self.q_time.append(tn_idx)
+            self.q_alive.append(1)
+            relation = quadruplet.relation
+            self.q_relations.append((relation.name, relation.type, relation.prop, relation.id))
+            self.relation_counts[relation.id] += 1
+            self.alive_quadruplets += 1
+            self._index_quadruplet(q_idx)
+
+            self._add_edge(sn_idx, en_idx, q_idx)
+
+    def read(self, ids: List[str]) -> List[Quadruplet]:
+        quadruplets = []
+        for id in ids:
+            if type(id) is not str:
+                raise ValueError
+            q_idx = self.quadruplet_index.get(id, None)
+            if q_idx is not None and self.q_alive[q_idx]:
+                quadruplets.append(self._restore_quadruplet(q_idx))
+        return quadruplets
+
+    def update(self, items: List[Quadruplet]) -> None:
+        # quadruplet-ids checking
+        for quadruplet in items:
+            if type(quadruplet.id) is not str:
+                raise ValueError
+        unique_ids = set(map(lambda quadruplet: quadruplet.id, items))
+        if len(items) != len(unique_ids):
+            raise ValueError
+
+        # Note: несуществующие квадруплеты пропускаются; существующий квадруплет пересоздаётся
+        # под тем же идентификатором, а имена, типы и свойства его вершин заменяются переданными
+        existing_quadruplets = [
+            quadruplet for quadruplet in items
+            if quadruplet.id in self.quadruplet_index and self.q_alive[self.quadruplet_index[quadruplet.id]]]
+        if len(existing_quadruplets) < 1:
+            return
+
+        self.delete([quadruplet.id for quadruplet in existing_quadruplets])
+        self.create(existing_quadruplets)
+        for quadruplet in existing_quadruplets:
+            for node in [quadruplet.start_node, quadruplet.end_node, quadruplet.time]:
+                if node:
+                    self._update_node(self.node_index[node.id], node)
+
+    def _delete_node_if_isolated(self, n_idx: int) -> None:
+        if len(self._iter_edges(n_idx)):
+            return
+        self._unindex_node(n_idx)
+        self.node_types[n_idx] = DELETED_NODE_CODE
+        self.node_payloads[n_idx] = None
+        del self.node_index[self.node_strids[n_idx]]
+
+    def delete(self, ids: List[str], delete_info: Dict[int,Dict[str,bool]] = dict()) -> None:
+        for id in ids:
+            if type(id) is not str:
+                raise ValueError
+
+        for i, q_id in enumerate(ids):
+            cur_info = delete_info.get(i, None)
+
+            q_idx = self.quadruplet_index.pop(q_id, None)
+            if q_idx is None or not self.q_alive[q_idx]:
+                continue
+
+            self._unindex_quadruplet(q_idx)
+            self.q_alive[q_idx] = 0
+            self.alive_quadruplets -= 1
+            self.tombstones += 2
+
+            r_id = self.q_relations[q_idx][3]
+            self.relation_counts[r_id] -= 1
+            if self.relation_counts[r_id] < 1:
+                del self.relation_counts[r_id]
+            self.q_relations[q_idx] = None
+
+            # Note: вершина удаляется, только если у неё не осталось инцидентных рёбер
+            # (в отличие от InMemoryGraphConnector, где она удаляется безусловно)
+            if (cur_info is None) or cur_info['s_node']:
+                self._delete_node_if_isolated(self.q_start[q_idx])
+            if ((cur_info is None) or cur_info['e_node']) and self.node_types[self.q_end[q_idx]] != DELETED_NODE_CODE:
+                self._delete_node_if_isolated(self.q_end[q_idx])
+
+        if self.tombstones >= self._compaction_limit():
+            self._compact()
+
+    def read_by_name(self, name: str, object_type: Union[RelationType, NodeType], object: str = 'relation') -> List[Union[Quadruplet, Node]]:
+        if type(object_type) not in [RelationType, NodeType]:
+            raise ValueError
+
+        if type(name) is not str:
+            raise ValueError
+
+        if len(name) < 1:
+            raise ValueError
+
+        # Note: поиск выполняется по вторичным (тип, имя)-индексам
+        if object == 'relation':
+            q_idxs = self.name_relations_index.get((object_type, name), dict())
+            formated_output = [self._restore_quadruplet(q_idx) for q_idx in q_idxs]
+        elif object == 'node':
+            if object_type not in NODE_TYPE_CODES:
+                raise ValueError
+            n_idxs = self.name_nodes_index.get((object_type, name), dict())
+            formated_output = [self._restore_node(n_idx) for n_idx in n_idxs]
+        else:
+            raise ValueError
+
+        return formated_output
+
+    def get_adjecent_nids(self, base_node_id: str,
+            accepted_n_types: List[NodeType] = [NodeType.object, NodeType.hyper, NodeType.episodic]) -> List[str]:
+        if type(base_node_id) is not str:
+            raise ValueError
+
+        n_idx = self._get_node_idx(base_node_id)
+        if n_idx is None:
+            return []
+
+        accepted_codes = set(NODE_TYPE_CODES[n_type] for n_type in accepted_n_types)
+        adjacent_nids, seen = [], set()
+        for nbr, _ in self._iter_edges(n_idx):
+            if nbr not in seen and self.node_types[nbr] in accepted_codes:
+                seen.add(nbr)
+                adjacent_nids.append(self.node_strids[nbr])
+        return adjacent_nids
+
+    def _get_shared_qidxs(self, node1_id: str, node2_id: str) -> List[int]:
+        n1_idx, n2_idx = self._get_node_idx(node1_id), self._get_node_idx(node2_id)
+        if n1_idx is None or n2_idx is None:
+            return []
+        return [q_idx for nbr, q_idx in self._iter_edges(n1_idx) if nbr == n2_idx]
+
+    def get_adjacent_nids_batch(self, node_ids: List[str],
+            accepted_n_types: List[NodeType] = [NodeType.object, NodeType.hyper, NodeType.episodic]) -> Dict[str, List[str]]:
+        return {node_id: self.get_adjecent_nids(node_id, accepted_n_types) for node_id in node_ids}
+
+    def get_nodes_shared_ids(self, node1_id: str, node2_id: str, id_type: str = 'both') -> List[Dict[str,str]]:
+        if (type(node1_id) is not str) or (type(node2_id) is not str):
+            raise ValueError(node1_id, node2_id)
+        if type(id_type) is not str or id_type not in ['quadruplet', 'relation', 'both']:
+            raise ValueError(id_type)
+
+        formated_info = []
+        for q_idx in self._get_shared_qidxs(node1_id, node2_id):
+            if id_type == 'quadruplet':
+                formated_info.append({'t_id': self.quadruplet_strids[q_idx]})
+            elif id_type == 'relation':
+                formated_info.append({'r_id': self.q_relations[q_idx][3]})
+            else:
+                formated_info.append({'t_id': self.quadruplet_strids[q_idx], 'r_id': self.q_relations[q_idx][3]})
+
+        return formated_info
+
+    def get_quadruplets(self, node1_id: str, node2_id: str) -> List[Quadruplet]:
+        if (type(node1_id) is not str) or (type(node2_id) is not str):
+            raise ValueError
+        if self._get_node_idx(node1_id) is None or self._get_node_idx(node2_id) is None:
+            raise ValueError
+
+        return [self._restore_quadruplet(q_idx) for q_idx in self._get_shared_qidxs(node1_id, node2_id)]
+
+    def get_quadruplets_for_pairs(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], List[Quadruplet]]:
+        for node1_id, node2_id in pairs:
+            if (type(node1_id) is not str) or (type(node2_id) is not str):
+                raise ValueError
+
+        formated_quadruplets = dict()
+        for node1_id, node2_id in pairs:
+            if (node1_id, node2_id) in formated_quadruplets:
+                continue
+            formated_quadruplets[(node1_id, node2_id)] = [
+                self._restore_quadruplet(q_idx) for q_idx in self._get_shared_qidxs(node1_id, node2_id)]
+        return formated_quadruplets
+
+    def get_quadruplets_by_name(self, subj_names: List[str], obj_names: List[str], obj_type: str) -> List[Quadruplet]:
+        end_types = [n_type for n_type in NODE_TYPE_CODES if obj_type in str(n_type)]
+
+        q_idxs = set()
+        for end_type in end_types:
+            for subj_name in (subj_names or []):
+                q_idxs.update(self.subj_name_quadruplets_index.get((end_type, subj_name), dict()))
+            for obj_name in (obj_names or []):
+                q_idxs.update(self.obj_name_quadruplets_index.get((end_type, obj_name), dict()))
+
+        # квадруплеты возвращаются в порядке добавления
+        return [self._restore_quadruplet(q_idx) for q_idx in sorted(q_idxs)]
+
+    def get_node_type(self, id: str) -> NodeType:
+        n_idx = self._get_node_idx(id)
+        if n_idx is None:
+            raise ValueError(f"Node with id {id} not found")
+        return NODE_CODE_TYPES[self.node_types[n_idx]]
+
+    def count_items(self, id: str = None, id_type: str = None) -> Union[Dict[str,int],int]:
+        result = None
+        if id_type is None:
+            result = {'quadruplets': self.alive_quadruplets, 'nodes': len(self.node_index)}
+
+        elif id_type == 'node':
+            result = int(self._get_node_idx(id) is not None)
+
+        elif id_type == 'relation':
+            result = self.relation_counts.get(id, 0)
+
+        elif id_type == 'quadruplet':
+            result = int(id in self.quadruplet_index)
+
+        else:
+            raise ValueError
+
+        return result
+
+    def item_exist(self, item_id: str, id_type: str ='quadruplet') -> bool:
+        if type(item_id) is not str:
+            raise ValueError
+
+        if id_type not in ['node', 'relation', 'quadruplet']:
+            raise ValueError
+
+        return self.count_items(item_id, id_type) > 0
+
+    def items_exist(self, ids: List[str], id_type: str = 'quadruplet') -> Set[str]:
+        for item_id in ids:
+            if type(item_id) is not str:
+                raise ValueError
+
+        if id_type not in ['node', 'relation', 'quadruplet']:
+            raise ValueError
+
+        return {item_id for item_id in ids if self.count_items(item_id, id_type) > 0}
+
+    def clear(self) -> None:
+        self.close_connection()
+        self.open_connection()
+        gc.collect()
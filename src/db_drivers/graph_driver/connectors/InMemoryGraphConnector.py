@@ -1,10 +1,8 @@
-from typing import List, Dict, Union
+from typing import List, Dict, Tuple, Union, Set
 from collections import defaultdict
 import gc
-from time import time
-import hashlib
 
-from ..utils import GraphDBConnectionConfig, AbstractGraphDatabaseConnection
+from ..utils import GraphDBConnectionConfig, AbstractGraphDatabaseConnection, IdAllocator
 from ....utils import Quadruplet, NodeType
 from ....utils.data_structs import RelationType, Node
 
@@ -16,6 +14,8 @@ class InMemoryGraphConnector(AbstractGraphDatabaseConnection):
         self.config = config
 
     def open_connection(self) -> None:
+        self.id_allocator = IdAllocator(keep_reverse_map=self.config.params.get('keep_reverse_ids', False))
+
         self.edges = defaultdict(set)
         self.adjacent_nodes = defaultdict(set)
 
@@ -26,6 +26,13 @@ class InMemoryGraphConnector(AbstractGraphDatabaseConnection):
         self.strid_nodes_index = defaultdict(set)
         self.qid_quadruplets_index = defaultdict(set)
 
+        # secondary indexes for search by name
+        # (dict-значения используются как упорядоченные множества внутренних идентификаторов)
+        self.name_nodes_index = defaultdict(dict)
+        self.name_relations_index = defaultdict(dict)
+        self.subj_name_quadruplets_index = defaultdict(dict)
+        self.obj_name_quadruplets_index = defaultdict(dict)
+
     def is_open(self) -> bool:
         need_to_exist = [
             'edges', 'adjacent_nodes', 'nodes', 'quadruplets',
@@ -45,10 +52,44 @@ class InMemoryGraphConnector(AbstractGraphDatabaseConnection):
         del self.strid_nodes_index
         del self.strid_relation_index
         del self.qid_quadruplets_index
+        del self.id_allocator
+
+        del self.name_nodes_index
+        del self.name_relations_index
+        del self.subj_name_quadruplets_index
+        del self.obj_name_quadruplets_index
         gc.collect()
 
-    def generate_id(self, seed: str = None) -> str:
-        return hashlib.md5((str(time()) if seed is None else seed).encode()).hexdigest()
+    def generate_id(self, owner: str = None) -> int:
+        return self.id_allocator.allocate(owner)
+
+    def index_node(self, internal_id: int, node: Node) -> None:
+        self.name_nodes_index[(node.type, node.name)][internal_id] = None
+
+    @staticmethod
+    def _remove_from_index(index: Dict[Tuple, Dict[int, None]], key: Tuple, internal_id: int) -> None:
+        internal_ids = index.get(key, None)
+        if internal_ids is None:
+            return
+        internal_ids.pop(internal_id, None)
+        # пустые ключи удаляются, чтобы индекс не рос при удалении элементов
+        if len(internal_ids) < 1:
+            del index[key]
+
+    def unindex_node(self, internal_id: int, node: Node) -> None:
+        self._remove_from_index(self.name_nodes_index, (node.type, node.name), internal_id)
+
+    def index_quadruplet(self, internal_id: int, quadruplet: Quadruplet) -> None:
+        end_type = quadruplet.end_node.type
+        self.name_relations_index[(quadruplet.relation.type, quadruplet.relation.name)][internal_id] = None
+        self.subj_name_quadruplets_index[(end_type, quadruplet.start_node.name)][internal_id] = None
+        self.obj_name_quadruplets_index[(end_type, quadruplet.end_node.name)][internal_id] = None
+
+    def unindex_quadruplet(self, internal_id: int, quadruplet: Quadruplet) -> None:
+        end_type = quadruplet.end_node.type
+        self._remove_from_index(self.name_relations_index, (quadruplet.relation.type, quadruplet.relation.name), internal_id)
+        self._remove_from_index(self.subj_name_quadruplets_index, (end_type, quadruplet.start_node.name), internal_id)
+        self._remove_from_index(self.obj_name_quadruplets_index, (end_type, quadruplet.end_node.name), internal_id)
 
     def create(self, quadruplets: List[Quadruplet], creation_info: Dict[int,Dict[str,bool]] = dict()) -> None:
         # quadruplet-ids checking
@@ -59,38 +100,57 @@ class InMemoryGraphConnector(AbstractGraphDatabaseConnection):
         if len(quadruplets) != len(unique_ids):
             raise ValueError
 
+        # резервируем идентификаторы для всех создаваемых вершин одной операцией
+        nodes_to_create = 0
+        for i, quadruplet in enumerate(quadruplets):
+            cur_info = creation_info.get(i, None)
+            nodes_to_create += int(cur_info is None or cur_info['s_node'])
+            nodes_to_create += int(cur_info is None or cur_info['e_node'])
+            nodes_to_create += int((cur_info is None or cur_info.get('t_node', False)) and bool(quadruplet.time))
+        new_node_ids = iter(self.id_allocator.reserve(nodes_to_create))
+
         for i, quadruplet in enumerate(quadruplets):
             cur_info = creation_info.get(i, None)
 
             #
             if cur_info is None or cur_info['s_node']:
-                new_node_id = self.generate_id()
+                new_node_id = next(new_node_ids)
+                self.id_allocator.bind(new_node_id, quadruplet.start_node.id)
                 self.strid_nodes_index[quadruplet.start_node.id].add(new_node_id)
                 self.nodes[new_node_id] = quadruplet.start_node
+                self.index_node(new_node_id, quadruplet.start_node)
 
             if cur_info is None or cur_info['e_node']:
-                new_node_id = self.generate_id()
+                new_node_id = next(new_node_ids)
+                self.id_allocator.bind(new_node_id, quadruplet.end_node.id)
                 self.strid_nodes_index[quadruplet.end_node.id].add(new_node_id)
                 self.nodes[new_node_id] = quadruplet.end_node
+                self.index_node(new_node_id, quadruplet.end_node)
 
             # Time node handling? For in-memory, we might just store it in quadruplet or add node if we want.
             # Following the Neo4j pattern, we should probably add it as a node if it exists.
             if (cur_info is None or cur_info.get('t_node', False)) and quadruplet.time:
-                new_node_id = self.generate_id()
+                new_node_id = next(new_node_ids)
+                self.id_allocator.bind(new_node_id, quadruplet.time.id)
                 self.strid_nodes_index[quadruplet.time.id].add(new_node_id)
                 self.nodes[new_node_id] = quadruplet.time
+                self.index_node(new_node_id, quadruplet.time)
 
 
             sn_ids = list(self.strid_nodes_index[quadruplet.start_node.id])
             en_ids = list(self.strid_nodes_index[quadruplet.end_node.id])
 
+            copy_ids = iter(self.id_allocator.reserve(2 * len(sn_ids) * len(en_ids)))
             for sn_id in sn_ids:
                 for en_id in en_ids:
-                    t_id = self.generate_id()
+                    t_id = next(copy_ids)
+                    self.id_allocator.bind(t_id, quadruplet.id)
                     self.qid_quadruplets_index[quadruplet.id].add(t_id)
                     self.quadruplets[t_id] = quadruplet
+                    self.index_quadruplet(t_id, quadruplet)
 
-                    r_id = self.generate_id()
+                    r_id = next(copy_ids)
+                    self.id_allocator.bind(r_id, quadruplet.relation.id)
                     self.strid_relation_index[quadruplet.relation.id].add(r_id)
 
                     self.edges[sn_id].add(t_id)
@@ -137,7 +197,9 @@ class InMemoryGraphConnector(AbstractGraphDatabaseConnection):
                     if (cur_info is None) or cur_info['s_node']:
                         #assert len(self.edges[sn_id]) == 0
                         #assert self.adjacent_nodes[sn_id] == 0
+                        self.unindex_node(sn_id, self.nodes[sn_id])
                         del self.nodes[sn_id]
+                        self.id_allocator.release(sn_id)
                         nodes_id_to_delete.add(sn_id)
 
                 if ((cur_info is None) or cur_info['s_node']) and len(nodes_id_to_delete):
@@ -151,21 +213,25 @@ class InMemoryGraphConnector(AbstractGraphDatabaseConnection):
                     if (cur_info is None) or cur_info['e_node']:
                         #assert len(self.edges[en_id]) == 0
                         #assert self.adjacent_nodes[en_id] == 0
+                        self.unindex_node(en_id, self.nodes[en_id])
                         del self.nodes[en_id]
+                        self.id_allocator.release(en_id)
                         nodes_id_to_delete.add(en_id)
 
                 if ((cur_info is None) or cur_info['e_node']) and len(nodes_id_to_delete):
                     self.strid_nodes_index[matched_quadruplet.end_node.id].difference_update(nodes_id_to_delete)
 
-                self.strid_relation_index[matched_quadruplet.relation.id].pop()
+                self.id_allocator.release(self.strid_relation_index[matched_quadruplet.relation.id].pop())
+                self.id_allocator.release(internal_q_id)
+                self.unindex_quadruplet(internal_q_id, matched_quadruplet)
                 del self.quadruplets[internal_q_id]
 
             del self.qid_quadruplets_index[q_id]
 
 
     def read_by_name(self, name: str, object_type: Union[RelationType, NodeType], object: str = 'relation') -> List[Union[Quadruplet, Node]]:
-        # Note: Реализован наивный способ поиска элементов в графе
-        # (алгоритмическая сложность O(n), где n - количество квадруплетов/вершин в графе)
+        # Note: поиск выполняется по вторичным (тип, имя)-индексам
+        # (алгоритмическая сложность O(1) + количество найденных элементов)
 
         if type(object_type) not in [RelationType, NodeType]:
             raise ValueError
@@ -177,9 +243,11 @@ class InMemoryGraphConnector(AbstractGraphDatabaseConnection):
             raise ValueError
 
         if object == 'relation':
-            formated_output =  [quadruplet for quadruplet in self.quadruplets.values() if quadruplet.relation.type == object_type and quadruplet.relation.name == name]
+            internal_ids = self.name_relations_index.get((object_type, name), dict())
+            formated_output = [self.quadruplets[internal_id] for internal_id in internal_ids]
         elif object == 'node':
-            formated_output =  [node for node in self.nodes.values() if node.type == object_type and node.name == name]
+            internal_ids = self.name_nodes_index.get((object_type, name), dict())
+            formated_output = [self.nodes[internal_id] for internal_id in internal_ids]
         else:
             raise ValueError
 
@@ -199,6 +267,10 @@ class InMemoryGraphConnector(AbstractGraphDatabaseConnection):
         nodes_str_ids = list(map(lambda db_n_id: self.nodes[db_n_id].id, filtered_adj_n_dbids))
         return nodes_str_ids
 
+    def get_adjacent_nids_batch(self, node_ids: List[str],
+            accepted_n_types: List[NodeType] = [NodeType.object, NodeType.hyper, NodeType.episodic]) -> Dict[str, List[str]]:
+        return {node_id: self.get_adjecent_nids(node_id, accepted_n_types) for node_id in node_ids}
+
     def get_nodes_shared_ids(self, node1_id: str, node2_id: str, id_type: str = 'both') -> List[Dict[str,str]]:
         if (type(node1_id) is not str) or (type(node2_id) is not str):
             raise ValueError(node1_id, node2_id)
@@ -248,15 +320,32 @@ class InMemoryGraphConnector(AbstractGraphDatabaseConnection):
         quadruplets = list(map(lambda id: self.quadruplets[id], shared_quadruplets_ids))
         return quadruplets
 
+    def get_quadruplets_for_pairs(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], List[Quadruplet]]:
+        for node1_id, node2_id in pairs:
+            if (type(node1_id) is not str) or (type(node2_id) is not str):
+                raise ValueError
+
+        formated_quadruplets = dict()
+        for node1_id, node2_id in pairs:
+            if (node1_id, node2_id) in formated_quadruplets:
+                continue
+            if len(self.strid_nodes_index.get(node1_id, [])) < 1 or len(self.strid_nodes_index.get(node2_id, [])) < 1:
+                formated_quadruplets[(node1_id, node2_id)] = []
+            else:
+                formated_quadruplets[(node1_id, node2_id)] = self.get_quadruplets(node1_id, node2_id)
+        return formated_quadruplets
+
     def get_quadruplets_by_name(self, subj_names: List[str], obj_names: List[str], obj_type: str) -> List[Quadruplet]:
-        quadruplets = []
-        for quadruplet in self.quadruplets.values():
-            if obj_type in str(quadruplet.end_node.type):
-                if subj_names and quadruplet.start_node.name in subj_names:
-                    quadruplets.append(quadruplet)
-                elif obj_names and quadruplet.end_node.name in obj_names:
-                    quadruplets.append(quadruplet)
-        return quadruplets
+        end_types = [n_type for n_type in NodeType if obj_type in str(n_type)]
+
+        internal_ids = dict()
+        for end_type in end_types:
+            for subj_name in (subj_names or []):
+                internal_ids.update(self.subj_name_quadruplets_index.get((end_type, subj_name), dict()))
+            for obj_name in (obj_names or []):
+                internal_ids.update(self.obj_name_quadruplets_index.get((end_type, obj_name), dict()))
+
+        return [self.quadruplets[internal_id] for internal_id in internal_ids]
 
     def get_node_type(self, id: str) -> NodeType:
         if id in self.nodes:
@@ -306,6 +395,23 @@ class InMemoryGraphConnector(AbstractGraphDatabaseConnection):
 
         return len(output) > 0
 
+    def items_exist(self, ids: List[str], id_type: str = 'quadruplet') -> Set[str]:
+        for item_id in ids:
+            if type(item_id) is not str:
+                raise ValueError
+
+        if id_type == 'node':
+            index = self.strid_nodes_index
+        elif id_type == 'relation':
+            index = self.strid_relation_index
+        elif id_type == 'quadruplet':
+            index = self.qid_quadruplets_index
+        else:
+            raise ValueError
+
+        # .get не добавляет в defaultdict-индексы пустые записи для отсутствующих идентификаторов
+        return {item_id for item_id in ids if len(index.get(item_id, ())) > 0}
+
     def clear(self) -> None:
         self.close_connection()
         self.open_connection()
@@ -1,4 +1,4 @@
-from typing import List, Dict, Union
+from typing import List, Dict, Tuple, Union, Set
 import kuzu
 import json
 import os
@@ -226,8 +226,10 @@ class KuzuConnector(AbstractGraphDatabaseConnection):
         return formated_nodes
 
     def parse_query_quadruplets_output(self, output: List[object]) -> List[Quadruplet]:
+        return self.parse_quadruplets_df(output.get_as_df())
+
+    def parse_quadruplets_df(self, output: object) -> List[Quadruplet]:
         formated_quadruplets = []
-        output = output.get_as_df()
         if 'rel' not in output: return []
         triplets_count = len(output['rel'])
 
@@ -265,6 +267,25 @@ class KuzuConnector(AbstractGraphDatabaseConnection):
         formated_nodes = [node['str_id'] for node in raw_nodes.get_as_df()['b']]
         return formated_nodes
 
+    def get_adjacent_nids_batch(self, node_ids: List[str],
+            accepted_n_types: List[NodeType] = [NodeType.object, NodeType.hyper, NodeType.episodic]) -> Dict[str, List[str]]:
+        for node_id in node_ids:
+            if type(node_id) is not str:
+                raise ValueError
+
+        formated_nodes = {node_id: [] for node_id in node_ids}
+        if len(formated_nodes) < 1:
+            return formated_nodes
+
+        str_ids = '['+', '.join(list(map(lambda id: f'"{id}"', formated_nodes.keys()))) + ']'
+        str_accepted_nodes = ''.join(list(map(lambda tpe: f':{tpe.value}', accepted_n_types)))
+
+        raw_nodes = self.conn.execute(
+            f'MATCH (a)-[r]-(b{str_accepted_nodes}) WHERE a.str_id IN {str_ids} RETURN a.str_id AS a_id, b.str_id AS b_id;').get_as_df()
+        for a_id, b_id in zip(raw_nodes['a_id'], raw_nodes['b_id']):
+            formated_nodes[a_id].append(b_id)
+        return formated_nodes
+
     def get_nodes_shared_ids(self, node1_id: str, node2_id: str, id_type: str = 'both') -> List[Dict[str,str]]:
          # Similar to InMemory logic
          return []
@@ -275,8 +296,30 @@ class KuzuConnector(AbstractGraphDatabaseConnection):
         return formatted_quadruplets
 
     def get_quadruplets(self, node1_id: str, node2_id: str) -> List[Quadruplet]:
-        # Logic...
-        return []
+        return self.get_quadruplets_for_pairs([(node1_id, node2_id)])[(node1_id, node2_id)]
+
+    def get_quadruplets_for_pairs(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], List[Quadruplet]]:
+        for node1_id, node2_id in pairs:
+            if (type(node1_id) is not str) or (type(node2_id) is not str):
+                raise ValueError
+
+        formated_quadruplets = {(node1_id, node2_id): [] for node1_id, node2_id in pairs}
+        if len(formated_quadruplets) < 1:
+            return formated_quadruplets
+
+        # Note: time-вершины не связаны со связями в текущей схеме, поэтому парсер подставляет "Unknown"-вершину
+        str_pairs = json.dumps([list(pair) for pair in formated_quadruplets.keys()], ensure_ascii=False)
+        query = (
+            f'UNWIND {str_pairs} AS pair '
+            f'MATCH (n1)-[rel]->(n2) WHERE (n1.str_id = pair[1] AND n2.str_id = pair[2]) OR (n1.str_id = pair[2] AND n2.str_id = pair[1]) '
+            f'RETURN pair[1] AS node1_id, pair[2] AS node2_id, n1, rel, n2;'
+        )
+        output = self.conn.execute(query).get_as_df()
+
+        quadruplets = self.parse_quadruplets_df(output)
+        for i, quadruplet in enumerate(quadruplets):
+            formated_quadruplets[(output['node1_id'][i], output['node2_id'][i])].append(quadruplet)
+        return formated_quadruplets
 
     def get_node_type(self, id: str) -> NodeType:
         # TODO
@@ -292,7 +335,31 @@ class KuzuConnector(AbstractGraphDatabaseConnection):
         return result
 
     def item_exist(self, id: str, id_type: str='quadruplet') -> bool:
-        return False
+        if type(id) is not str:
+            raise ValueError
+        return id in self.items_exist([id], id_type)
+
+    def items_exist(self, ids: List[str], id_type: str = 'quadruplet') -> Set[str]:
+        for item_id in ids:
+            if type(item_id) is not str:
+                raise ValueError
+
+        if id_type == 'node':
+            str_match, str_field = 'MATCH (n)', 'n.str_id'
+        elif id_type == 'relation':
+            str_match, str_field = 'MATCH (n1)-[rel]->(n2)', 'rel.str_id'
+        elif id_type == 'quadruplet':
+            str_match, str_field = 'MATCH (n1)-[rel]->(n2)', 'rel.t_id'
+        else:
+            raise ValueError
+
+        if len(ids) < 1:
+            return set()
+
+        str_ids = '['+', '.join(list(map(lambda id: f'"{id}"', set(ids)))) + ']'
+        output = self.conn.execute(
+            f'{str_match} WHERE {str_field} IN {str_ids} RETURN DISTINCT {str_field} AS item_id;').get_as_df()
+        return set(output['item_id'])
         
     def clear(self) -> None:
         self.conn.execute("MATCH (n1)-[rel]->(n2) DELETE rel;")
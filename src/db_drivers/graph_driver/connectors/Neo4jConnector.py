@@ -1,59 +1,77 @@
 from neo4j import GraphDatabase
-from typing import List, Dict, Union
+from typing import List, Dict, Tuple, Union, Set
+from collections import OrderedDict, defaultdict
+from time import time
+import threading
 import json
 
 from ..utils import GraphDBConnectionConfig, AbstractGraphDatabaseConnection
+from ....utils.logger import Logger
 from ....utils.data_structs import Quadruplet, Node, Relation, QuadrupletCreator, NodeCreator, NodeType, RelationCreator, RelationType, NODES_TYPES_MAP, RELATIONS_TYPES_MAP
 
 DEFAULT_NEO4J_CONFIG = GraphDBConnectionConfig(
-    host='localhost', port=7687, params={'user': "neo4j", 'pwd': 'password'})
+    host='localhost', port=7687, params={'user': "neo4j", 'pwd': 'password',
+                                         'max_connection_pool_size': 100, 'query_stats_size': 1000,
+                                         # bulk_write: если True, то create-метод сохраняет квадруплеты
+                                         # UNWIND/MERGE-запросами (по bulk_batch_size строк в запросе, по bulk_tx_size строк в транзакции)
+                                         'bulk_write': False, 'bulk_batch_size': 1000, 'bulk_tx_size': 10000})
+
+NEO4J_LOG_PATH = "log/db_drivers/graph_driver/neo4j"
 
 class Neo4jConnector(AbstractGraphDatabaseConnection):
 
     def __init__(self, config: GraphDBConnectionConfig = DEFAULT_NEO4J_CONFIG):
         self.config = config
+        self.log = Logger(NEO4J_LOG_PATH)
 
     def open_connection(self) -> None:
         self.driver = None
+        # сессии не потокобезопасны, поэтому у каждого потока своя долгоживущая сессия:
+        # ключ - (идентификатор потока, вид сессии)
+        self.sessions = dict()
+        self.sessions_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.reset_query_stats()
         try:
             self.driver = GraphDatabase.driver(
                 f"bolt://{self.config.host}:{self.config.port}",
-                auth=(self.config.params['user'], self.config.params['pwd']))
+                auth=(self.config.params['user'], self.config.params['pwd']),
+                max_connection_pool_size=self.config.params.get('max_connection_pool_size', 100))
         except Exception as e:
-            print("Failed to create the driver:", e)
+            self.log(f"Failed to create the driver: {e}")
 
         #
         try:
-            self.execute_query(f'CREATE DATABASE {self.config.db_info["db"]} IF NOT EXISTS', db_flag=False)
+            self.execute_query(f'CREATE DATABASE {self.config.db_info["db"]} IF NOT EXISTS', db_flag=False, mode='auto')
         except Exception as e:
             # Ignore if database creation is not supported (e.g. Community Edition) or already exists
-            print(f"Warning: Could not create database (might be Community Edition or already exists): {e}")
+            self.log(f"Warning: Could not create database (might be Community Edition or already exists): {e}")
 
         # Creating indexes
-        self.execute_query("CREATE INDEX name_object_node IF NOT EXISTS FOR (n:object) ON n.name")
-        self.execute_query("CREATE INDEX name_hyper_node IF NOT EXISTS FOR (n:hyper) ON n.name ")
-        self.execute_query("CREATE INDEX name_episodic_node IF NOT EXISTS FOR (n:episodic) ON n.name")
-        self.execute_query("CREATE INDEX name_time_node IF NOT EXISTS FOR (n:time) ON n.name") # NEW
-
-        self.execute_query("CREATE INDEX strid_object_node IF NOT EXISTS FOR (n:object) ON n.str_id")
-        self.execute_query("CREATE INDEX strid_hyper_node IF NOT EXISTS FOR (n:hyper) ON n.str_id")
-        self.execute_query("CREATE INDEX strid_episodic_node IF NOT EXISTS FOR (n:episodic) ON n.str_id")
-        self.execute_query("CREATE INDEX strid_time_node IF NOT EXISTS FOR (n:time) ON n.str_id") # NEW
-
-        self.execute_query("CREATE INDEX strid_simple_relation IF NOT EXISTS FOR ()-[r:simple]->() ON r.str_id")
-        self.execute_query("CREATE INDEX strid_hyper_relation IF NOT EXISTS FOR ()-[r:hyper]->() ON r.str_id ")
-        self.execute_query("CREATE INDEX strid_episodic_relation IF NOT EXISTS FOR ()-[r:episodic]->() ON r.str_id")
-        self.execute_query("CREATE INDEX strid_time_relation IF NOT EXISTS FOR ()-[r:time]->() ON r.str_id") # NEW
-
-        self.execute_query("CREATE INDEX tid_simple_relation IF NOT EXISTS FOR ()-[r:simple]->() ON r.t_id")
-        self.execute_query("CREATE INDEX tid_hyper_relation IF NOT EXISTS FOR ()-[r:hyper]->() ON r.t_id")
-        self.execute_query("CREATE INDEX tid_episodic_relation IF NOT EXISTS FOR ()-[r:episodic]->() ON r.t_id")
-        self.execute_query("CREATE INDEX tid_time_relation IF NOT EXISTS FOR ()-[r:time]->() ON r.t_id") # NEW
-
-        self.execute_query("CREATE INDEX name_simple_relation IF NOT EXISTS FOR ()-[r:simple]->() ON r.name")
-        self.execute_query("CREATE INDEX name_hyper_relation IF NOT EXISTS FOR ()-[r:hyper]->() ON r.name")
-        self.execute_query("CREATE INDEX name_episodic_relation IF NOT EXISTS FOR ()-[r:episodic]->() ON r.name")
-        self.execute_query("CREATE INDEX name_time_relation IF NOT EXISTS FOR ()-[r:time]->() ON r.name") # NEW
+        self.execute_query("CREATE INDEX name_object_node IF NOT EXISTS FOR (n:object) ON n.name", mode='auto')
+        self.execute_query("CREATE INDEX name_hyper_node IF NOT EXISTS FOR (n:hyper) ON n.name ", mode='auto')
+        self.execute_query("CREATE INDEX name_episodic_node IF NOT EXISTS FOR (n:episodic) ON n.name", mode='auto')
+        self.execute_query("CREATE INDEX name_time_node IF NOT EXISTS FOR (n:time) ON n.name", mode='auto') # NEW
+
+        self.execute_query("CREATE INDEX strid_object_node IF NOT EXISTS FOR (n:object) ON n.str_id", mode='auto')
+        self.execute_query("CREATE INDEX strid_hyper_node IF NOT EXISTS FOR (n:hyper) ON n.str_id", mode='auto')
+        self.execute_query("CREATE INDEX strid_episodic_node IF NOT EXISTS FOR (n:episodic) ON n.str_id", mode='auto')
+        self.execute_query("CREATE INDEX strid_time_node IF NOT EXISTS FOR (n:time) ON n.str_id", mode='auto') # NEW
+
+        self.execute_query("CREATE INDEX strid_simple_relation IF NOT EXISTS FOR ()-[r:simple]->() ON r.str_id", mode='auto')
+        self.execute_query("CREATE INDEX strid_hyper_relation IF NOT EXISTS FOR ()-[r:hyper]->() ON r.str_id ", mode='auto')
+        self.execute_query("CREATE INDEX strid_episodic_relation IF NOT EXISTS FOR ()-[r:episodic]->() ON r.str_id", mode='auto')
+        self.execute_query("CREATE INDEX strid_time_relation IF NOT EXISTS FOR ()-[r:time]->() ON r.str_id", mode='auto') # NEW
+
+        self.execute_query("CREATE INDEX tid_simple_relation IF NOT EXISTS FOR ()-[r:simple]->() ON r.t_id", mode='auto')
+        self.execute_query("CREATE INDEX tid_hyper_relation IF NOT EXISTS FOR ()-[r:hyper]->() ON r.t_id", mode='auto')
+        self.execute_query("CREATE INDEX tid_episodic_relation IF NOT EXISTS FOR ()-[r:episodic]->() ON r.t_id", mode='auto')
+        self.execute_query("CREATE INDEX tid_time_relation IF NOT EXISTS FOR ()-[r:time]->() ON r.t_id", mode='auto') # NEW
+
+        self.execute_query("CREATE INDEX name_simple_relation IF NOT EXISTS FOR ()-[r:simple]->() ON r.name", mode='auto')
+        self.execute_query("CREATE INDEX name_hyper_relation IF NOT EXISTS FOR ()-[r:hyper]->() ON r.name", mode='auto')
+        self.execute_query("CREATE INDEX name_episodic_relation IF NOT EXISTS FOR ()-[r:episodic]->() ON r.name", mode='auto')
+        self.execute_query("CREATE INDEX name_time_relation IF NOT EXISTS FOR ()-[r:time]->() ON r.name", mode='auto') # NEW
 
         if self.config.need_to_clear:
             self.clear()
@@ -63,27 +81,39 @@ class Neo4jConnector(AbstractGraphDatabaseConnection):
         pass
 
     def close_connection(self) -> None:
-        if self.driver is not None:
+        for session in getattr(self, 'sessions', dict()).values():
+            session.close()
+        self.sessions = dict()
+        if getattr(self, 'driver', None) is not None:
             self.driver.close()
 
     def __del__(self):
         self.close_connection()
 
-    def create_node_query(self, node: Node) -> str:
-        query_props = {}
-        for prop_name, prop_value in node.prop.items():
-            p_name, p_value = prop_name.replace(" ", "_"), json.dumps(prop_value, ensure_ascii=False)
-            query_props[p_name] = p_value
+    @staticmethod
+    def _to_property_value(value: object) -> object:
+        # neo4j хранит в свойствах только примитивы и однородные списки примитивов,
+        # остальные значения сериализуются в json-строку
+        primitives = (str, int, float, bool)
+        if value is None or isinstance(value, primitives):
+            return value
+        if isinstance(value, (list, tuple)) and all(isinstance(v, primitives) for v in value) and len(set(map(type, value))) <= 1:
+            return list(value)
+        return json.dumps(value, ensure_ascii=False)
+
+    def _format_props(self, props: Dict[str, object]) -> Dict[str, object]:
+        return {prop_name.replace(" ", "_"): self._to_property_value(prop_value) for prop_name, prop_value in props.items()}
 
-        query_props['name'] = json.dumps(node.name, ensure_ascii=False)
-        query_props['str_id'] = json.dumps(node.id, ensure_ascii=False)
+    def create_node_query(self, node: Node) -> Tuple[str, Dict[str, object]]:
+        query_props = self._format_props(node.prop)
+        query_props['name'] = node.name
+        query_props['str_id'] = node.id
 
-        str_props = ", ".join([f"{k}: {v}" for k, v in query_props.items()])
-        query = f"CREATE (n:{node.type.value} " + "{" + str_props + "}) RETURN elementId(n) as node_id"
-        return query
+        query = f"CREATE (n:{node.type.value}) SET n = $props RETURN elementId(n) as node_id"
+        return query, {'props': query_props}
 
 
-    def create_rel_query(self, quadruplet: Quadruplet) -> str:
+    def create_rel_query(self, quadruplet: Quadruplet) -> Tuple[str, Dict[str, object]]:
         # This creates the main relation S->O.
         # Ideally for a quadruplet S,R,O,T we might want (Event)-[at]->(Time) or similar,
         # but adhering to the previous schema where T was a property or implicit,
@@ -95,29 +125,23 @@ class Neo4jConnector(AbstractGraphDatabaseConnection):
         # Given the previous code just stored `t_id` as a property, we will continue that for compatibility
         # but we effectively have "Quadruplet" logic now.
 
-        rel_props = {}
-        for prop_name, prop_value in quadruplet.relation.prop.items():
-            p_name, p_value = prop_name.replace(' ', '_'), json.dumps(prop_value, ensure_ascii=False)
-            rel_props[p_name] = p_value
+        rel_props = self._format_props(quadruplet.relation.prop)
+        rel_props['name'] = quadruplet.relation.name
+        rel_props['t_id'] = quadruplet.id # This is the QUADRUPLET ID
+        rel_props['str_id'] = quadruplet.relation.id
 
-        rel_props['name'] = json.dumps(quadruplet.relation.name, ensure_ascii=False)
-        rel_props['t_id'] = json.dumps(quadruplet.id, ensure_ascii=False) # This is the QUADRUPLET ID
-        rel_props['str_id'] = json.dumps(quadruplet.relation.id, ensure_ascii=False)
-        
         # Add Time Node Reference
         if quadruplet.time:
-             rel_props['time_node_id'] = json.dumps(quadruplet.time.id, ensure_ascii=False)
+             rel_props['time_node_id'] = quadruplet.time.id
 
-        str_props = ", ".join([f"{k}: {v}" for k, v in rel_props.items()])
-        subj_t, subj_id = quadruplet.start_node.type.value, quadruplet.start_node.id
-        obj_t, obj_id = quadruplet.end_node.type.value, quadruplet.end_node.id
+        subj_t, obj_t = quadruplet.start_node.type.value, quadruplet.end_node.type.value
         rel_t = quadruplet.relation.type.value
-        
+
         query = ""
-        query += f'MATCH (subj:{subj_t}), (obj:{obj_t}) WHERE subj.str_id = "{subj_id}" AND obj.str_id = "{obj_id}" '
-        query += f'CREATE (subj)-[rel:{rel_t}' + '{' + str_props + '}' + ']->(obj) '
+        query += f'MATCH (subj:{subj_t}), (obj:{obj_t}) WHERE subj.str_id = $subj_id AND obj.str_id = $obj_id '
+        query += f'CREATE (subj)-[rel:{rel_t}]->(obj) SET rel = $props '
         query += 'RETURN elementId(rel) as rel_id'
-        return query
+        return query, {'subj_id': quadruplet.start_node.id, 'obj_id': quadruplet.end_node.id, 'props': rel_props}
 
     def create(self, quadruplets: List[Quadruplet], creation_info: Dict[int, Dict[str, bool]] = dict()) -> None:
         # quadruplet-ids checking
@@ -130,41 +154,97 @@ class Neo4jConnector(AbstractGraphDatabaseConnection):
             # Original code raised ValueError.
             raise ValueError
 
+        if self.config.params.get('bulk_write', False):
+            self.bulk_create(quadruplets, creation_info)
+            return
+
         for i, quadruplet in enumerate(quadruplets):
             cur_info = creation_info.get(i, None)
             
             # Create S
             if cur_info is None or cur_info['s_node']:
                 insert_subj_query = self.create_node_query(quadruplet.start_node)
-                self.execute_query(insert_subj_query)
+                self.execute_query(*insert_subj_query)
             
             # Create O
             if cur_info is None or cur_info['e_node']:
                 insert_obj_query = self.create_node_query(quadruplet.end_node)
-                self.execute_query(insert_obj_query)
+                self.execute_query(*insert_obj_query)
 
             # Create T (New)
             if cur_info is None or cur_info.get('t_node', False):
                  if quadruplet.time:
                     insert_time_query = self.create_node_query(quadruplet.time)
-                    self.execute_query(insert_time_query)
+                    self.execute_query(*insert_time_query)
 
             # Create R
             insert_rel_query = self.create_rel_query(quadruplet)
-            self.execute_query(insert_rel_query)
+            self.execute_query(*insert_rel_query)
 
 
+    def bulk_create(self, quadruplets: List[Quadruplet], creation_info: Dict[int, Dict[str, bool]] = dict()) -> None:
+        # ошибка транзакции пробрасывается: уже выполненные транзакции зафиксированы, но запросы
+        # идемпотентны (MERGE), поэтому create можно безопасно повторить с тем же набором квадруплетов
+        # строки для UNWIND-запросов группируются по меткам, так как метки нельзя передать параметром
+        node_rows = defaultdict(dict)
+        rel_rows = defaultdict(list)
+        for i, quadruplet in enumerate(quadruplets):
+            cur_info = creation_info.get(i, None)
+            nodes_to_create = []
+            if cur_info is None or cur_info['s_node']:
+                nodes_to_create.append(quadruplet.start_node)
+            if cur_info is None or cur_info['e_node']:
+                nodes_to_create.append(quadruplet.end_node)
+            if (cur_info is None or cur_info.get('t_node', False)) and quadruplet.time:
+                nodes_to_create.append(quadruplet.time)
+
+            for node in nodes_to_create:
+                if node.id not in node_rows[node.type.value]:
+                    node_rows[node.type.value][node.id] = self.create_node_query(node)[1]['props']
+
+            _, rel_params = self.create_rel_query(quadruplet)
+            rel_key = (quadruplet.start_node.type.value, quadruplet.end_node.type.value, quadruplet.relation.type.value)
+            rel_rows[rel_key].append(rel_params)
+
+        batch_size = self.config.params.get('bulk_batch_size', 1000)
+        statements = []
+        # вершины сохраняются раньше связей, поэтому MATCH в запросах на связи их найдёт
+        for label, rows in node_rows.items():
+            rows = list(rows.values())
+            query = f'UNWIND $rows AS row MERGE (n:{label} {{str_id: row.str_id}}) ON CREATE SET n = row'
+            for step in range(0, len(rows), batch_size):
+                statements.append((query, {'rows': rows[step:step+batch_size]}))
+
+        for (subj_t, obj_t, rel_t), rows in rel_rows.items():
+            query = (
+                f'UNWIND $rows AS row '
+                f'MATCH (subj:{subj_t} {{str_id: row.subj_id}}) MATCH (obj:{obj_t} {{str_id: row.obj_id}}) '
+                f'MERGE (subj)-[rel:{rel_t} {{t_id: row.props.t_id}}]->(obj) ON CREATE SET rel = row.props'
+            )
+            for step in range(0, len(rows), batch_size):
+                statements.append((query, {'rows': rows[step:step+batch_size]}))
+
+        tx_size = self.config.params.get('bulk_tx_size', 10000)
+        tx_statements, tx_rows = [], 0
+        for query, params in statements:
+            tx_statements.append((query, params))
+            tx_rows += len(params['rows'])
+            if tx_rows >= tx_size:
+                self.execute_transaction(tx_statements)
+                tx_statements, tx_rows = [], 0
+        if tx_statements:
+            self.execute_transaction(tx_statements)
+
     def read(self, ids: List[str]) -> List[Quadruplet]:
         for t_id in ids:
             if type(t_id) is not str:
                 raise ValueError
 
-        str_ids = '['+', '.join(list(map(lambda id: f'"{id}"', ids))) + ']'
         # Note: 'rel.t_id' here refers to the Quadruplet ID stored on the relation
-        query = f"MATCH (n1)-[rel]->(n2) WHERE any(id IN {str_ids} WHERE rel.t_id = id) " \
-                f"OPTIONAL MATCH (t:time) WHERE t.str_id = rel.time_node_id " \
-                f"RETURN n1, rel, n2, t"
-        raw_output = self.execute_query(query)
+        query = "MATCH (n1)-[rel]->(n2) WHERE rel.t_id IN $ids " \
+                "OPTIONAL MATCH (t:time) WHERE t.str_id = rel.time_node_id " \
+                "RETURN n1, rel, n2, t"
+        raw_output = self.execute_query(query, {'ids': list(ids)}, mode='read')
         quadruplets = self.parse_query_triplets_output(raw_output) # Renaming this method below would be better but let's see
         return quadruplets
 
@@ -188,18 +268,17 @@ class Neo4jConnector(AbstractGraphDatabaseConnection):
                 nodes_to_delete.append('en_id')
 
 
-            output = self.execute_query(f'MATCH (s_node)-[rel]->(e_node) WHERE rel.t_id = "{t_id}" DELETE rel RETURN elementId(s_node) as sn_id, elementId(e_node) as en_id')
+            output = self.execute_query(
+                'MATCH (s_node)-[rel]->(e_node) WHERE rel.t_id = $t_id DELETE rel RETURN elementId(s_node) as sn_id, elementId(e_node) as en_id',
+                {'t_id': t_id})
             if len(output) < 1:
                 continue
 
             assert len(output) == 1
 
             if len(nodes_to_delete) > 0:
-                where_statement = []
-                for n_name in nodes_to_delete:
-                    where_statement.append(f'elementId(n) = "{output[0][n_name]}"')
-                where_statement = ' or '.join(where_statement)
-                self.execute_query(f'MATCH (n) WHERE {where_statement} DELETE n')
+                node_element_ids = [output[0][n_name] for n_name in nodes_to_delete]
+                self.execute_query('MATCH (n) WHERE elementId(n) IN $node_ids DELETE n', {'node_ids': node_element_ids})
 
     def read_by_name(self, name: str, object_type: Union[RelationType, NodeType], object: str = 'relation') -> List[Union[Quadruplet, Node]]:
         if type(object_type) not in [RelationType, NodeType]:
@@ -214,31 +293,141 @@ class Neo4jConnector(AbstractGraphDatabaseConnection):
         if len(name) < 1:
             raise ValueError
 
-        dump_name = json.dumps(name, ensure_ascii=False)
         if object == 'relation':
-            output = self.execute_query(f'MATCH (n1)-[rel:{object_type.value}]->(n2) WHERE rel.name = {dump_name} RETURN n1,rel,n2;')
+            output = self.execute_query(f'MATCH (n1)-[rel:{object_type.value}]->(n2) WHERE rel.name = $name RETURN n1,rel,n2;', {'name': name}, mode='read')
             formated_output = self.parse_query_triplets_output(output)
         elif object == 'node':
-            output = self.execute_query(f'MATCH (n:{object_type.value}) WHERE n.name = {dump_name} RETURN n;')
+            output = self.execute_query(f'MATCH (n:{object_type.value}) WHERE n.name = $name RETURN n;', {'name': name}, mode='read')
             formated_output = self.parse_query_nodes_output(output)
         else:
             raise ValueError
 
         return formated_output
 
-    def execute_query(self, query: str, db_flag: bool = True) -> List[object]:
+    def _get_session(self, db_flag: bool = True) -> object:
+        session_key = (threading.get_ident(), 'db_session' if db_flag else 'system_session')
+        with self.sessions_lock:
+            session = self.sessions.get(session_key, None)
+            if session is not None:
+                return session
+
+            # сессии завершившихся потоков закрываются при создании новой сессии
+            alive_idents = set(thread.ident for thread in threading.enumerate())
+            dead_keys = [key for key in self.sessions if key[0] not in alive_idents]
+            dead_sessions = [self.sessions.pop(key) for key in dead_keys]
+
+            session = self.driver.session(database=self.config.db_info['db']) if db_flag else self.driver.session()
+            self.sessions[session_key] = session
+
+        for dead_session in dead_sessions:
+            try:
+                dead_session.close()
+            except Exception:
+                pass
+        return session
+
+    def _drop_session(self, db_flag: bool = True) -> None:
+        session_key = (threading.get_ident(), 'db_session' if db_flag else 'system_session')
+        with self.sessions_lock:
+            session = self.sessions.pop(session_key, None)
+        if session is None:
+            return
+        try:
+            session.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _run_transaction(tx: object, query: str, params: Dict[str, object]) -> List[object]:
+        return list(tx.run(query, params))
+
+    def reset_query_stats(self) -> None:
+        # статистика собирается на стороне клиента по тексту запроса (не более query_stats_size последних текстов);
+        # повторный текст означает, что параметризованный запрос может переиспользовать план из серверного кеша,
+        # но само попадание в кеш планов сервера здесь не измеряется
+        self.query_texts = OrderedDict()
+        self.query_stats = {'queries': 0, 'errors': 0, 'repeated_queries': 0, 'total_time': 0.0}
+
+    def _update_query_stats(self, query: str, elapsed_time: float, failed: bool) -> None:
+        with self.stats_lock:
+            self.query_stats['queries'] += 1
+            self.query_stats['errors'] += int(failed)
+            self.query_stats['total_time'] += elapsed_time
+
+            if query in self.query_texts:
+                self.query_stats['repeated_queries'] += 1
+                self.query_texts.move_to_end(query)
+            else:
+                self.query_texts[query] = {'count': 0, 'total_time': 0.0, 'max_time': 0.0}
+                if len(self.query_texts) > self.config.params.get('query_stats_size', 1000):
+                    self.query_texts.popitem(last=False)
+
+            query_info = self.query_texts[query]
+            query_info['count'] += 1
+            query_info['total_time'] += elapsed_time
+            query_info['max_time'] = max(query_info['max_time'], elapsed_time)
+
+    def get_query_stats(self) -> Dict[str, object]:
+        with self.stats_lock:
+            queries = self.query_stats['queries']
+            return {
+                **self.query_stats,
+                'repeated_query_rate': self.query_stats['repeated_queries'] / queries if queries else 0.0,
+                'avg_latency': self.query_stats['total_time'] / queries if queries else 0.0,
+                'per_query': {query: {**info, 'avg_time': info['total_time'] / info['count']}
+                              for query, info in self.query_texts.items()}}
+
+    def execute_query(self, query: str, params: Dict[str, object] = None, db_flag: bool = True, mode: str = 'write') -> List[object]:
+        """mode: 'read' | 'write' - управляемая транзакция (с повторами при временных ошибках), 'auto' - auto-commit запрос (например, для schema-запросов)."""
         assert self.driver is not None, "Driver not initialized!"
-        session = None
-        response = None
+        if mode not in ['read', 'write', 'auto']:
+            raise ValueError(mode)
+        params = dict() if params is None else params
+        response, failed = None, False
+        s_time = time()
         try:
-            session = self.driver.session(database=self.config.db_info['db']) if db_flag else self.driver.session()
-            response = list(session.run(query))
+            session = self._get_session(db_flag)
+            if mode == 'read':
+                response = session.execute_read(self._run_transaction, query, params)
+            elif mode == 'write':
+                response = session.execute_write(self._run_transaction, query, params)
+            else:
+                response = list(session.run(query, params))
+        except Exception as e:
+            self.log(f"Query failed: {e}\nError query: {query}")
+            failed = True
+            # сессия могла остаться в неконсистентном состоянии, поэтому пересоздаём её
+            self._drop_session(db_flag)
+        self._update_query_stats(query, time() - s_time, failed)
+        return response
+
+    @staticmethod
+    def _run_statements(tx: object, statements: List[Tuple[str, Dict[str, object]]]) -> List[List[object]]:
+        return [list(tx.run(query, params)) for query, params in statements]
+
+    def execute_transaction(self, statements: List[Tuple[str, Dict[str, object]]], mode: str = 'write') -> List[List[object]]:
+        """Выполняет набор параметризованных запросов в рамках одной управляемой транзакции.
+        В отличие от execute_query, ошибка транзакции пробрасывается вызывающей стороне (транзакция при этом откатывается)."""
+        assert self.driver is not None, "Driver not initialized!"
+        if mode not in ['read', 'write']:
+            raise ValueError(mode)
+        response, failed = None, False
+        s_time = time()
+        try:
+            session = self._get_session()
+            if mode == 'read':
+                response = session.execute_read(self._run_statements, statements)
+            else:
+                response = session.execute_write(self._run_statements, statements)
         except Exception as e:
-            print("Query failed:", e)
-            print("Error query: ", query)
+            self.log(f"Transaction failed: {e}\nError queries: {list(dict.fromkeys([query for query, _ in statements]))}")
+            failed = True
+            self._drop_session()
+            raise
         finally:
-            if session is not None:
-                session.close()
+            elapsed_time = (time() - s_time) / max(len(statements), 1)
+            for query, _ in statements:
+                self._update_query_stats(query, elapsed_time, failed)
         return response
 
     def get_adjecent_nids(self, base_node_id: str,
@@ -246,13 +435,30 @@ class Neo4jConnector(AbstractGraphDatabaseConnection):
         if type(base_node_id) is not str:
             raise ValueError
 
-        str_accepted_nodes = ', '.join(list(map(lambda tpe: f'"{tpe.value}"', accepted_n_types)))
-
         raw_nodes = self.execute_query(
-            f'MATCH (a)-[r]-(b) WHERE a.str_id = "{base_node_id}" AND ANY(lbl in [{str_accepted_nodes}] where lbl in labels(b)) RETURN b')
+            'MATCH (a)-[r]-(b) WHERE a.str_id = $base_id AND ANY(lbl in $accepted_labels where lbl in labels(b)) RETURN b',
+            {'base_id': base_node_id, 'accepted_labels': [tpe.value for tpe in accepted_n_types]}, mode='read')
         formated_nodes = [node['b']['str_id'] for node in raw_nodes]
         return formated_nodes
 
+    def get_adjacent_nids_batch(self, node_ids: List[str],
+            accepted_n_types: List[NodeType] = [NodeType.object, NodeType.hyper, NodeType.episodic]) -> Dict[str, List[str]]:
+        for node_id in node_ids:
+            if type(node_id) is not str:
+                raise ValueError
+
+        formated_nodes = {node_id: [] for node_id in node_ids}
+        if len(formated_nodes) < 1:
+            return formated_nodes
+
+        raw_nodes = self.execute_query(
+            'UNWIND $ids AS base_id MATCH (a)-[r]-(b) WHERE a.str_id = base_id AND ANY(lbl in $accepted_labels where lbl in labels(b)) '
+            'RETURN base_id, b.str_id AS b_id',
+            {'ids': list(formated_nodes.keys()), 'accepted_labels': [tpe.value for tpe in accepted_n_types]}, mode='read')
+        for raw_node in raw_nodes:
+            formated_nodes[raw_node['base_id']].append(raw_node['b_id'])
+        return formated_nodes
+
     def get_nodes_shared_ids(self, node1_id: str, node2_id: str, id_type: str = 'both') -> List[Dict[str,str]]:
         if (type(node1_id) is not str) or (type(node2_id) is not str):
             raise ValueError(node1_id, node2_id)
@@ -269,7 +475,8 @@ class Neo4jConnector(AbstractGraphDatabaseConnection):
             raise ValueError(id_type)
 
         raw_rels = self.execute_query(
-            f'MATCH (a)-[r]-(b) WHERE a.str_id = "{node1_id}" AND b.str_id = "{node2_id}" RETURN {str_return_info};')
+            f'MATCH (a)-[r]-(b) WHERE a.str_id = $node1_id AND b.str_id = $node2_id RETURN {str_return_info};',
+            {'node1_id': node1_id, 'node2_id': node2_id}, mode='read')
 
         formated_info = []
         for raw_rel in raw_rels:
@@ -359,11 +566,11 @@ class Neo4jConnector(AbstractGraphDatabaseConnection):
                 
                 # Careful with quotes in the query string itself
                 t_fallback_query = (
-                    f'MATCH (t:time) '
-                    f'WHERE t.str_id = \'{time_node_id}\' OR t.str_id = \'{tid_clean}\' '
-                    f'RETURN t LIMIT 1'
+                    'MATCH (t:time) '
+                    'WHERE t.str_id = $time_node_id OR t.str_id = $tid_clean '
+                    'RETURN t LIMIT 1'
                 )
-                t_res = self.execute_query(t_fallback_query)
+                t_res = self.execute_query(t_fallback_query, {'time_node_id': time_node_id, 'tid_clean': tid_clean}, mode='read')
                 if t_res:
                     t_dict = dict(t_res[0]['t'])
                     time_name = t_dict.get('name', 'Unknown')
@@ -393,67 +600,84 @@ class Neo4jConnector(AbstractGraphDatabaseConnection):
             raise ValueError
 
         # Updated query to optionally fetch the time node linked by time_node_id
-        # We use single quotes for the f-string, so we can use double quotes for string literals in Cypher easily? 
-        # Actually, using tripple quotes is safer for complex strings.
         # We want to execute: replace(rel.time_node_id, '"', '')
-        
         query = (
-            f'MATCH (n1)-[rel]-(n2) WHERE n1.str_id = "{node1_id}" AND n2.str_id = "{node2_id}" '
-            f'OPTIONAL MATCH (t:time) WHERE t.str_id = rel.time_node_id OR t.str_id = replace(rel.time_node_id, \'"\', \'\') '
-            f'RETURN n1, rel, n2, t'
+            'MATCH (n1)-[rel]-(n2) WHERE n1.str_id = $node1_id AND n2.str_id = $node2_id '
+            'OPTIONAL MATCH (t:time) WHERE t.str_id = rel.time_node_id OR t.str_id = replace(rel.time_node_id, \'"\', \'\') '
+            'RETURN n1, rel, n2, t'
         )
-        
-        output = self.execute_query(query)
+
+        output = self.execute_query(query, {'node1_id': node1_id, 'node2_id': node2_id}, mode='read')
 
         formated_quadruplets = self.parse_query_triplets_output(output)
         return formated_quadruplets
 
+    def get_quadruplets_for_pairs(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], List[Quadruplet]]:
+        for node1_id, node2_id in pairs:
+            if (type(node1_id) is not str) or (type(node2_id) is not str):
+                raise ValueError
+
+        formated_quadruplets = {(node1_id, node2_id): [] for node1_id, node2_id in pairs}
+        if len(formated_quadruplets) < 1:
+            return formated_quadruplets
+
+        # несуществующие вершины отдельно не проверяются: для таких пар MATCH ничего не вернёт
+        query = (
+            'UNWIND $pairs AS pair '
+            'MATCH (n1)-[rel]-(n2) WHERE n1.str_id = pair[0] AND n2.str_id = pair[1] '
+            'OPTIONAL MATCH (t:time) WHERE t.str_id = rel.time_node_id OR t.str_id = replace(rel.time_node_id, \'"\', \'\') '
+            'RETURN pair[0] AS node1_id, pair[1] AS node2_id, n1, rel, n2, t'
+        )
+        output = self.execute_query(query, {'pairs': [list(pair) for pair in formated_quadruplets.keys()]}, mode='read')
+
+        for raw_row, quadruplet in zip(output, self.parse_query_triplets_output(output)):
+            formated_quadruplets[(raw_row['node1_id'], raw_row['node2_id'])].append(quadruplet)
+        return formated_quadruplets
+
     def get_quadruplets_by_name(self, subj_names: List[str], obj_names: List[str], obj_type: str) -> List[Quadruplet]:
         formated_quadruplets = []
         if subj_names:
             for subj_name in subj_names:
-                subj_dump = json.dumps(subj_name, ensure_ascii=False)
                 output = self.execute_query(
-                    f'MATCH (n1:object)-[rel]-(n2:{obj_type}) WHERE LOWER(n1.name) = LOWER({subj_dump}) '
+                    f'MATCH (n1:object)-[rel]-(n2:{obj_type}) WHERE LOWER(n1.name) = LOWER($name) '
                     f'OPTIONAL MATCH (t:time) WHERE t.str_id = rel.time_node_id OR t.str_id = replace(rel.time_node_id, "\\"", "") '
-                    f'RETURN n1, rel, n2, t')
+                    f'RETURN n1, rel, n2, t', {'name': subj_name}, mode='read')
                 formated_quadruplets += self.parse_query_triplets_output(output)
         elif obj_names:
             for obj_name in obj_names:
-                obj_dump = json.dumps(obj_name, ensure_ascii=False)
                 output = self.execute_query(
-                    f'MATCH (n1:object)-[rel]-(n2:{obj_type}) WHERE LOWER(n2.name) = LOWER({obj_dump}) '
+                    f'MATCH (n1:object)-[rel]-(n2:{obj_type}) WHERE LOWER(n2.name) = LOWER($name) '
                     f'OPTIONAL MATCH (t:time) WHERE t.str_id = rel.time_node_id OR t.str_id = replace(rel.time_node_id, "\\"", "") '
-                    f'RETURN n1, rel, n2, t')
+                    f'RETURN n1, rel, n2, t', {'name': obj_name}, mode='read')
                 formated_quadruplets += self.parse_query_triplets_output(output)
         else:
             output = self.execute_query(
                 f'MATCH (n1:object)-[rel]-(n2:{obj_type}) '
                 f'OPTIONAL MATCH (t:time) WHERE t.str_id = rel.time_node_id OR t.str_id = replace(rel.time_node_id, "\\"", "") '
-                f'RETURN n1, rel, n2, t')
+                f'RETURN n1, rel, n2, t', mode='read')
             formated_quadruplets += self.parse_query_triplets_output(output)
 
         return formated_quadruplets
 
     def count_items(self, id: str = None, id_type: str = None) -> Union[Dict[str,int],int]:
         if id_type is None:
-            n_raw = self.execute_query("MATCH (a) RETURN count(a) as n_count")
-            r_raw = self.execute_query("MATCH (a)-[rel]->(b) RETURN count(rel) as r_count")
+            n_raw = self.execute_query("MATCH (a) RETURN count(a) as n_count", mode='read')
+            r_raw = self.execute_query("MATCH (a)-[rel]->(b) RETURN count(rel) as r_count", mode='read')
             
             n_count = n_raw[0]['n_count'] if n_raw and len(n_raw) > 0 else 0
             r_count = r_raw[0]['r_count'] if r_raw and len(r_raw) > 0 else 0
             result = {'quadruplets': r_count, 'nodes': n_count}
 
         elif id_type == 'node':
-            n_raw = self.execute_query(f'MATCH (a) WHERE a.str_id = "{id}" RETURN COUNT(a) as n_count')
+            n_raw = self.execute_query('MATCH (a) WHERE a.str_id = $id RETURN COUNT(a) as n_count', {'id': id}, mode='read')
             result = n_raw[0]['n_count'] if n_raw and len(n_raw) > 0 else 0
 
         elif id_type == 'relation':
-            r_raw = self.execute_query(f'MATCH (a)-[rel]->(b) WHERE rel.str_id = "{id}" RETURN COUNT(rel) as r_count')
+            r_raw = self.execute_query('MATCH (a)-[rel]->(b) WHERE rel.str_id = $id RETURN COUNT(rel) as r_count', {'id': id}, mode='read')
             result = r_raw[0]['r_count'] if r_raw and len(r_raw) > 0 else 0
 
         elif id_type == 'quadruplet':
-            r_raw = self.execute_query(f'MATCH (a)-[rel]->(b) WHERE rel.t_id = "{id}" RETURN COUNT(rel) as r_count')
+            r_raw = self.execute_query('MATCH (a)-[rel]->(b) WHERE rel.t_id = $id RETURN COUNT(rel) as r_count', {'id': id}, mode='read')
             result = r_raw[0]['r_count'] if r_raw and len(r_raw) > 0 else 0
 
         else:
@@ -466,22 +690,42 @@ class Neo4jConnector(AbstractGraphDatabaseConnection):
             raise ValueError
 
         if id_type == 'node':
-            query = f'MATCH (n) WHERE n.str_id = "{id}" RETURN n'
+            query = 'MATCH (n) WHERE n.str_id = $id RETURN n'
         elif id_type == 'relation':
-            query = f'MATCH (n1)-[rel]-(n2) WHERE rel.str_id = "{id}" RETURN rel'
+            query = 'MATCH (n1)-[rel]-(n2) WHERE rel.str_id = $id RETURN rel'
         elif id_type == 'quadruplet':
-            query = f'MATCH (n1)-[rel]-(n2) WHERE rel.t_id = "{id}" RETURN rel'
+            query = 'MATCH (n1)-[rel]-(n2) WHERE rel.t_id = $id RETURN rel'
         else:
             raise ValueError
 
-        output = self.execute_query(query)
+        output = self.execute_query(query, {'id': id}, mode='read')
         return len(output) > 0
+
+    def items_exist(self, ids: List[str], id_type: str = 'quadruplet') -> Set[str]:
+        for item_id in ids:
+            if type(item_id) is not str:
+                raise ValueError
+
+        if id_type == 'node':
+            query = 'MATCH (n) WHERE n.str_id IN $ids RETURN DISTINCT n.str_id AS item_id'
+        elif id_type == 'relation':
+            query = 'MATCH (n1)-[rel]-(n2) WHERE rel.str_id IN $ids RETURN DISTINCT rel.str_id AS item_id'
+        elif id_type == 'quadruplet':
+            query = 'MATCH (n1)-[rel]-(n2) WHERE rel.t_id IN $ids RETURN DISTINCT rel.t_id AS item_id'
+        else:
+            raise ValueError
+
+        if len(ids) < 1:
+            return set()
+
+        output = self.execute_query(query, {'ids': list(set(ids))}, mode='read')
+        return {record['item_id'] for record in output}
     
     def get_node_type(self, id: str) -> NodeType:
         if not self.item_exist(id, id_type="node"):
             raise ValueError
         
-        raw_output = self.execute_query(f'MATCH (n) WHERE n.str_id = "{id}" RETURN n')
+        raw_output = self.execute_query('MATCH (n) WHERE n.str_id = $id RETURN n', {'id': id}, mode='read')
         formated_node = self.parse_query_nodes_output(raw_output)[0]
         return formated_node.type
 
@@ -1,4 +1,4 @@
-from typing import Dict, List, Union
+from typing import Dict, List, Tuple, Union, Set
 from dataclasses import dataclass
 from abc import abstractmethod
 
@@ -11,6 +11,66 @@ class GraphDBConnectionConfig(BaseDatabaseConfig):
     host: str = None
     port: str = None
 
+class IdAllocator:
+    """Генератор внутренних идентификаторов для графовых хранилищ в оперативной памяти.
+    Выдаёт монотонно возрастающие целочисленные идентификаторы, поэтому коллизии невозможны.
+
+    :param start: Первый выдаваемый идентификатор. Значение по умолчанию 0.
+    :type start: int
+    :param keep_reverse_map: Если True, то для каждого идентификатора хранится его владелец (строковый идентификатор объекта), иначе False. Значение по умолчанию False.
+    :type keep_reverse_map: bool
+    """
+    def __init__(self, start: int = 0, keep_reverse_map: bool = False) -> None:
+        self.start = start
+        self.next_id = start
+        self.reverse_map = dict() if keep_reverse_map else None
+
+    def allocate(self, owner: str = None) -> int:
+        """Метод предназначен для получения нового идентификатора.
+
+        :param owner: Строковый идентификатор объекта, которому выдаётся идентификатор. Сохраняется только при включённом reverse_map. Значение по умолчанию None.
+        :type owner: str, optional
+        :return: Новый идентификатор.
+        :rtype: int
+        """
+        new_id = self.next_id
+        self.next_id += 1
+        if owner is not None:
+            self.bind(new_id, owner)
+        return new_id
+
+    def reserve(self, n: int) -> range:
+        """Метод предназначен для резервирования непрерывного диапазона из n идентификаторов за одну операцию.
+
+        :param n: Количество резервируемых идентификаторов.
+        :type n: int
+        :return: Диапазон зарезервированных идентификаторов.
+        :rtype: range
+        """
+        if n < 0:
+            raise ValueError(n)
+        reserved = range(self.next_id, self.next_id + n)
+        self.next_id += n
+        return reserved
+
+    def bind(self, id: int, owner: str) -> None:
+        if self.reverse_map is not None:
+            self.reverse_map[id] = owner
+
+    def lookup(self, id: int) -> Union[str, None]:
+        if self.reverse_map is None:
+            raise ValueError("reverse map is disabled")
+        return self.reverse_map.get(id, None)
+
+    def release(self, id: int) -> None:
+        if self.reverse_map is not None:
+            self.reverse_map.pop(id, None)
+
+    def reset(self) -> None:
+        self.next_id = self.start
+        if self.reverse_map is not None:
+            self.reverse_map = dict()
+
 class AbstractGraphDatabaseConnection(AbstractDatabaseConnection):
 
     @abstractmethod
@@ -21,6 +81,19 @@ class AbstractGraphDatabaseConnection(AbstractDatabaseConnection):
     def get_adjecent_nids(self, base_node_id: str, accepted_n_types: List[NodeType] = [NodeType.object, NodeType.hyper, NodeType.episodic]) -> List[str]:
         pass
 
+    @abstractmethod
+    def get_adjacent_nids_batch(self, node_ids: List[str], accepted_n_types: List[NodeType] = [NodeType.object, NodeType.hyper, NodeType.episodic]) -> Dict[str, List[str]]:
+        """Метод предназначен для получения смежных вершин сразу для набора вершин (например, для текущего фронта обхода графа) за один запрос к бд.
+
+        :param node_ids: Идентификаторы вершин, для которых нужно получить смежные вершины.
+        :type node_ids: List[str]
+        :param accepted_n_types: Типы смежных вершин, которые нужно вернуть.
+        :type accepted_n_types: List[NodeType]
+        :return: Словарь, в котором ключи - идентификаторы из node_ids, значения - идентификаторы смежных им вершин (в том же формате, что и у get_adjecent_nids-метода).
+        :rtype: Dict[str, List[str]]
+        """
+        pass
+
     @abstractmethod
     def get_nodes_shared_ids(self, node1_id: str, node2_id: str, id_type: str = 'both') -> List[Dict[str,str]]:
         pass
@@ -33,6 +106,17 @@ class AbstractGraphDatabaseConnection(AbstractDatabaseConnection):
     def get_quadruplets(self, node1_id: str, node2_id: str) -> List[Quadruplet]:
         pass
 
+    @abstractmethod
+    def get_quadruplets_for_pairs(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], List[Quadruplet]]:
+        """Метод предназначен для получения квадруплетов между несколькими парами вершин за один запрос к бд (вместе с time-вершинами).
+
+        :param pairs: Пары идентификаторов вершин.
+        :type pairs: List[Tuple[str, str]]
+        :return: Словарь, в котором ключи - пары из pairs, значения - квадруплеты между вершинами пары (в том же формате, что и у get_quadruplets-метода). Для пар с несуществующими вершинами возвращается пустой список.
+        :rtype: Dict[Tuple[str, str], List[Quadruplet]]
+        """
+        pass
+
     @abstractmethod
     def read_by_name(self, name: str, object_type: Union[RelationType,NodeType],
                      object: str = 'quadruplet') -> List[Union[Quadruplet, Node]]:
@@ -49,3 +133,16 @@ class AbstractGraphDatabaseConnection(AbstractDatabaseConnection):
     @abstractmethod
     def item_exist(self, id: str, id_type: str='quadruplet') -> bool:
         pass
+
+    @abstractmethod
+    def items_exist(self, ids: List[str], id_type: str = 'quadruplet') -> Set[str]:
+        """Метод предназначен для проверки существования набора объектов в графе за один запрос к бд.
+
+        :param ids: Идентификаторы объектов.
+        :type ids: List[str]
+        :param id_type: Тип объектов: 'node', 'relation' или 'quadruplet'.
+        :type id_type: str
+        :return: Подмножество идентификаторов из ids, которые присутствуют в графе.
+        :rtype: Set[str]
+        """
+        pass
@@ -1,4 +1,4 @@
 from .connectors import AerospikeKVConnector, InMemoryKVConnector, RedisKVConnector, \
     MongoKVConnector, MixedKVConnector, DEFAULT_INMEMORYKV_CONFIG
 from .KeyValueDriver import KeyValueDriver, KeyValueDriverConfig
-from .utils import KVDBConnectionConfig, KeyValueDBInstance
+from .utils import KVDBConnectionConfig, KeyValueDBInstance, KVEvictionPolicy
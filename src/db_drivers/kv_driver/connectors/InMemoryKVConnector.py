@@ -5,10 +5,11 @@ import pickle
 import os
 import time
 import hashlib
+import heapq
 import numpy as np
 from collections import defaultdict
 
-from ..utils import KVDBConnectionConfig, AbstractKVDatabaseConnection, KeyValueDBInstance
+from ..utils import KVDBConnectionConfig, AbstractKVDatabaseConnection, KeyValueDBInstance, KVEvictionPolicy
 
 DEFAULT_INMEMORYKV_CONFIG = KVDBConnectionConfig(
     host='localhost',
@@ -35,9 +36,21 @@ class InMemoryKVConnector(AbstractKVDatabaseConnection):
         else:
             self.kv_store = dict()
 
+        self.eviction = KVEvictionPolicy(self.config.params)
+        self._init_eviction_state()
+
         if self.config.need_to_clear:
             self.clear()
 
+    def _init_eviction_state(self) -> None:
+        # метаданные для вытеснения не сохраняются в дамп и восстанавливаются с начальными значениями
+        now = time.time()
+        self.item_scores = {id: self.eviction.initial_score(now) for id in self.kv_store}
+        self.item_sizes = {id: len(value) for id, value in self.kv_store.items()}
+        # порядок вставки совпадает с порядком времени создания
+        self.item_created = {id: now for id in self.kv_store}
+        self.total_bytes = sum(self.item_sizes.values())
+
     def is_open(self) -> bool:
         return hasattr(self, 'kv_store')
 
@@ -66,36 +79,76 @@ class InMemoryKVConnector(AbstractKVDatabaseConnection):
         if len(items) != len(unique_ids):
             raise ValueError
 
-        filtered_items = [item for item in items if not self.item_exist(item.id)]
-
-        # находимся в фиксированном размере хранилища
-        if self.config.params['max_storage'] > 0:
-            n_items_to_delete = (self.count_items() + len(filtered_items)) - self.config.params['max_storage']
-            if n_items_to_delete > 0:
-                self.delete_rare_items(n_items_to_delete)
+        self.delete_expired_items()
+        filtered_items = [item for item in items if item.id not in self.kv_store]
 
+        dumped_values = []
         for item in filtered_items:
             if type(item.value) is bytes:
-                dumped_value = pickle.dumps((item.value, 'bytes'))
+                dumped_values.append(pickle.dumps((item.value, 'bytes')))
             else:
-                dumped_value = pickle.dumps((item.value, 'notbytes'))
+                dumped_values.append(pickle.dumps((item.value, 'notbytes')))
 
+        # находимся в фиксированном размере хранилища
+        n_items_to_delete = self.eviction.items_to_evict(self.count_items(), len(filtered_items))
+        if n_items_to_delete > 0:
+            self.delete_rare_items(n_items_to_delete)
+        n_bytes_to_delete = self.eviction.bytes_to_evict(self.total_bytes, sum(map(len, dumped_values)))
+        if n_bytes_to_delete > 0:
+            self._delete_rare_bytes(n_bytes_to_delete)
+
+        now = time.time()
+        for item, dumped_value in zip(filtered_items, dumped_values):
             self.kv_store[item.id] = dumped_value
-
-    def delete_rare_items(self, num: int) -> None:
-        # TODO
-        pass
+            self.item_scores[item.id] = self.eviction.initial_score(now)
+            self.item_sizes[item.id] = len(dumped_value)
+            self.item_created[item.id] = now
+            self.total_bytes += len(dumped_value)
+
+    def delete_rare_items(self, num: int) -> List[str]:
+        rare_ids = heapq.nsmallest(num, self.item_scores, key=self.item_scores.get)
+        self.delete(rare_ids)
+        return rare_ids
+
+    def _delete_rare_bytes(self, n_bytes: int) -> List[str]:
+        # куча строится за линейное время, извлекаются только вытесняемые элементы
+        rare_heap = [(score, id) for id, score in self.item_scores.items()]
+        heapq.heapify(rare_heap)
+
+        rare_ids, freed_bytes = [], 0
+        while freed_bytes < n_bytes and len(rare_heap) > 0:
+            _, id = heapq.heappop(rare_heap)
+            rare_ids.append(id)
+            freed_bytes += self.item_sizes[id]
+
+        self.delete(rare_ids)
+        return rare_ids
+
+    def delete_expired_items(self) -> List[str]:
+        expiration_time = self.eviction.expiration_time(time.time())
+        if expiration_time is None:
+            return []
+
+        expired_ids = []
+        for id, created in self.item_created.items():
+            if created >= expiration_time:
+                break
+            expired_ids.append(id)
+
+        self.delete(expired_ids)
+        return expired_ids
 
     def read(self, ids: List[str]) -> List[KeyValueDBInstance]:
         for id in ids:
             if (id is None) or (type(id) is not str):
                 raise ValueError
 
+        self.delete_expired_items()
         items = []
         item_scores = defaultdict(lambda: 0)
         for id in ids:
             item = None
-            if self.item_exist(id):
+            if id in self.kv_store:
                 loaded_value = pickle.loads(self.kv_store[id])[0]
                 item = KeyValueDBInstance(id=id, value=loaded_value)
                 item_scores[id] += 1
@@ -107,8 +160,13 @@ class InMemoryKVConnector(AbstractKVDatabaseConnection):
         return items
 
     def update_item_scores(self, mapping: Dict[str, int]) -> None:
-        # TODO
-        pass
+        now = time.time()
+        for id, hits in mapping.items():
+            if id in self.item_scores:
+                if self.eviction.is_incremental():
+                    self.item_scores[id] += self.eviction.updated_score(hits, now)
+                else:
+                    self.item_scores[id] = self.eviction.updated_score(hits, now)
 
     def update(self, items: List[KeyValueDBInstance]) -> None:
         # TODO
@@ -120,18 +178,27 @@ class InMemoryKVConnector(AbstractKVDatabaseConnection):
                 raise ValueError
 
         for id in ids:
-            if self.item_exist(id):
+            if id in self.kv_store:
                 del self.kv_store[id]
+                del self.item_scores[id]
+                del self.item_created[id]
+                self.total_bytes -= self.item_sizes.pop(id)
 
     def clear(self):
         del self.kv_store
         gc.collect()
         self.kv_store = dict()
+        self._init_eviction_state()
 
     def count_items(self) -> int:
         return len(self.kv_store)
 
+    def count_bytes(self) -> int:
+        return self.total_bytes
+
     def item_exist(self, id: str):
         if type(id) is not str:
             raise ValueError
+        if self.eviction.ttl is not None:
+            self.delete_expired_items()
         return id in self.kv_store
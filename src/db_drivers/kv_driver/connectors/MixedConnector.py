@@ -1,4 +1,5 @@
 from typing import Dict, List
+from collections import defaultdict
 
 import sys
 sys.path.insert(0, "../")
@@ -38,19 +39,30 @@ class MixedKVConnector(AbstractKVDatabaseConnection):
         self.mongo_conn.close_connection()
 
     def create(self, items: List[KeyValueDBInstance]):
-        self.mongo_conn.create(items)
+        self.mongo_conn.create_many(items)
+
+    def create_many(self, items: List[KeyValueDBInstance]) -> None:
+        self.mongo_conn.create_many(items)
 
     def read(self, ids: List[str]) -> List[KeyValueDBInstance]:
         # находим элементы, которых нет в оперативной памяти
         ram_items = self.redis_conn.read(ids)
         not_cached_item_ids = [ids[i] for i, item in enumerate(ram_items) if item is None]
 
+        # обращения к оперативной памяти учитываются и в оценках дискового хранилища,
+        # чтобы вытеснение из него опиралось на полную статистику использования
+        ram_item_scores = defaultdict(lambda: 0)
+        for item in ram_items:
+            if item is not None:
+                ram_item_scores[item.id] += 1
+        self.mongo_conn.update_item_scores(ram_item_scores)
+
         # получаем элементы из дискового хранилища
-        persistent_items = self.mongo_conn.read(not_cached_item_ids)
-        existing_p_items = [item for item in persistent_items if item is not None]
+        persistent_items = self.mongo_conn.read_many(not_cached_item_ids)
+        existing_p_items = list({item.id: item for item in persistent_items if item is not None}.values())
 
         # существующие элементы кешируем в оперативную память
-        self.redis_conn.create(existing_p_items)
+        self.redis_conn.create_many(existing_p_items)
 
         # объединяем элементы из оперативного и жёсткого хранилищ
         union_items = []
@@ -64,6 +76,14 @@ class MixedKVConnector(AbstractKVDatabaseConnection):
 
         return union_items
 
+    def exists_many(self, ids: List[str], storage_type: int = 0) -> List[bool]:
+        if storage_type == 0:
+            return self.mongo_conn.exists_many(ids)
+        elif storage_type == 1:
+            return self.redis_conn.exists_many(ids)
+        else:
+            raise ValueError
+
     def update(self, items: List[KeyValueDBInstance]) -> None:
         self.redis_conn.update(items)
         self.mongo_conn.update(items)
@@ -96,10 +116,19 @@ class MixedKVConnector(AbstractKVDatabaseConnection):
         self.mongo_conn.clear()
 
     def update_item_scores(self, mapping: Dict[str, int]) -> None:
-        pass
-
-    def delete_rare_items(self, num: int) -> None:
-        pass
+        self.redis_conn.update_item_scores(mapping)
+        self.mongo_conn.update_item_scores(mapping)
+
+    def delete_rare_items(self, num: int) -> List[str]:
+        # вытесняем из дискового хранилища, оперативное хранилище вытесняет элементы согласно собственной конфигурации
+        rare_ids = self.mongo_conn.delete_rare_items(num)
+        self.redis_conn.delete(rare_ids)
+        return rare_ids
+
+    def delete_expired_items(self) -> List[str]:
+        expired_ids = self.mongo_conn.delete_expired_items()
+        self.redis_conn.delete(expired_ids)
+        return expired_ids + self.redis_conn.delete_expired_items()
 
     def __del__(self):
         pass
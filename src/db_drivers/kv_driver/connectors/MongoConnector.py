@@ -3,17 +3,22 @@ from typing import List, Dict
 from collections import defaultdict
 import numpy as np
 import pickle
+import time
 
-from src.db_drivers.kv_driver.utils import AbstractKVDatabaseConnection, KVDBConnectionConfig, KeyValueDBInstance
+from src.db_drivers.kv_driver.utils import AbstractKVDatabaseConnection, KVDBConnectionConfig, KeyValueDBInstance, KVEvictionPolicy
 
 DEFAULT_MONGOKV_CONFIG = KVDBConnectionConfig(host='localhost', port=27017,
                                               db_info={'db': 'test_db', 'table': 'test_collection'},
                                               params={'username': 'user', 'password': 'pass', 'max_storage': -1})
 
+# идентификатор документа со счётчиком суммарного размера значений коллекции
+BYTES_COUNTER_ID = 'bytes'
+
 class MongoKVConnector(AbstractKVDatabaseConnection):
 
     def __init__(self, config: KVDBConnectionConfig = DEFAULT_MONGOKV_CONFIG) -> None:
         self.config = config
+        self.eviction = KVEvictionPolicy(self.config.params)
 
     def is_open(self) -> bool:
         try:
@@ -27,14 +32,40 @@ class MongoKVConnector(AbstractKVDatabaseConnection):
         self._client = pymongo.MongoClient(f'mongodb://{self.config.host}:{self.config.port}',
                                            username=self.config.params['username'], password=self.config.params['password'])
         self._collection = self._client[self.config.db_info['db']][self.config.db_info['table']]
+        # счётчик хранится в отдельной коллекции и обновляется при записи и удалении элементов,
+        # чтобы при ограничении по размеру не агрегировать всю коллекцию на каждую запись
+        self._counters = self._client[self.config.db_info['db']][f"{self.config.db_info['table']}_counters"]
 
         if self.config.need_to_clear:
             self.clear()
+        else:
+            self._create_indexes()
+            self._init_bytes_counter()
+
+    def _init_bytes_counter(self) -> None:
+        # коллекция могла изменяться без ограничения по размеру, поэтому счётчик пересчитывается при подключении
+        if self.eviction.max_bytes > 0:
+            self._counters.replace_one({'_id': BYTES_COUNTER_ID}, {'total': self._aggregate_bytes()}, upsert=True)
+
+    def _increment_bytes(self, n_bytes: int) -> None:
+        if self.eviction.max_bytes > 0 and n_bytes != 0:
+            self._counters.update_one({'_id': BYTES_COUNTER_ID}, {'$inc': {'total': n_bytes}}, upsert=True)
+
+    def _create_indexes(self) -> None:
+        # поиск по ключу обслуживается встроенным уникальным индексом по '_id',
+        # дополнительные индексы нужны только при включённом вытеснении
+        if self.eviction.max_items > 0 or self.eviction.max_bytes > 0:
+            self._collection.create_index('score')
+        if self.eviction.ttl is not None:
+            self._collection.create_index('created')
 
     def close_connection(self) -> None:
         self._client.close()
 
     def create(self, items: List[KeyValueDBInstance]) -> None:
+        self.create_many(items)
+
+    def create_many(self, items: List[KeyValueDBInstance]) -> None:
         for item in items:
             if item is None or item.id is None or item.value is None:
                 raise ValueError
@@ -46,29 +77,80 @@ class MongoKVConnector(AbstractKVDatabaseConnection):
         if len(items) != len(unique_ids):
             raise ValueError
 
+        if len(items) < 1:
+            return
+
+        self.delete_expired_items()
+
+        # существующие элементы определяются одним запросом по индексу '_id'
+        existing_ids = set(self._get_existing_ids([item.id for item in items]))
+
+        now = time.time()
         filtered_items = []
         for item in items:
-            if self._collection.find_one({'_id': item.id}) is None:
+            if item.id not in existing_ids:
                 if type(item.value) is bytes:
                     dumped_value = pickle.dumps((item.value, 'bytes'))
                 else:
                     dumped_value = pickle.dumps((item.value, 'notbytes'))
-                filtered_items.append({'_id': item.id, 'value': dumped_value, 'score': 0})
+                filtered_items.append({
+                    '_id': item.id, 'value': dumped_value, 'score': self.eviction.initial_score(now),
+                    'size': len(dumped_value), 'created': now})
 
         # находимся в фиксированном размере хранилища
-        if self.config.params['max_storage'] > 0:
-            n_items_to_delete = (self.count_items() + len(filtered_items)) - self.config.params['max_storage']
+        if self.eviction.max_items > 0:
+            n_items_to_delete = self.eviction.items_to_evict(self.count_items(), len(filtered_items))
             if n_items_to_delete > 0:
                 self.delete_rare_items(n_items_to_delete)
+        if self.eviction.max_bytes > 0:
+            n_bytes_to_delete = self.eviction.bytes_to_evict(self.count_bytes(), sum(item['size'] for item in filtered_items))
+            if n_bytes_to_delete > 0:
+                self._delete_rare_bytes(n_bytes_to_delete)
 
         if len(filtered_items) > 0:
-            self._collection.insert_many(filtered_items)
+            # $setOnInsert не затирает элементы, добавленные между проверкой и записью
+            result = self._collection.bulk_write([
+                pymongo.UpdateOne({'_id': item['_id']}, {'$setOnInsert': {k: v for k, v in item.items() if k != '_id'}}, upsert=True)
+                for item in filtered_items], ordered=False)
+            # учитываются только действительно вставленные элементы
+            self._increment_bytes(sum(filtered_items[idx]['size'] for idx in result.upserted_ids))
+
+    def _get_existing_ids(self, ids: List[str]) -> List[str]:
+        if len(ids) < 1:
+            return []
+        return [item['_id'] for item in self._collection.find({'_id': {'$in': ids}}, {'_id': 1})]
+
+    def delete_rare_items(self, num: int) -> List[str]:
+        if num < 1:
+            return []
+        rare_ids = [item['_id'] for item in self._collection.find({}, {'_id': 1}).sort('score', 1).limit(num)]
+        self.delete(rare_ids)
+        return rare_ids
+
+    def _delete_rare_bytes(self, n_bytes: int) -> List[str]:
+        rare_ids, freed_bytes = [], 0
+        for item in self._collection.find({}, {'_id': 1, 'size': 1}).sort('score', 1):
+            if freed_bytes >= n_bytes:
+                break
+            rare_ids.append(item['_id'])
+            freed_bytes += item.get('size', 0)
+
+        self.delete(rare_ids)
+        return rare_ids
+
+    def delete_expired_items(self) -> List[str]:
+        expiration_time = self.eviction.expiration_time(time.time())
+        if expiration_time is None:
+            return []
 
-    def delete_rare_items(self, num: int) -> None:
-        # TODO
-        pass
+        expired_ids = [item['_id'] for item in self._collection.find({'created': {'$lt': expiration_time}}, {'_id': 1})]
+        self.delete(expired_ids)
+        return expired_ids
 
     def read(self, ids: List[str]) -> List[KeyValueDBInstance]:
+        return self.read_many(ids)
+
+    def read_many(self, ids: List[str]) -> List[KeyValueDBInstance]:
         for id in ids:
             if (id is None) or (type(id) is not str):
                 raise ValueError
@@ -76,6 +158,7 @@ class MongoKVConnector(AbstractKVDatabaseConnection):
         if len(ids) < 1:
             return []
 
+        self.delete_expired_items()
         items = self._collection.find({"_id": {"$in": ids}})
         items_dict = {item['_id']: item for item in items}
 
@@ -96,8 +179,19 @@ class MongoKVConnector(AbstractKVDatabaseConnection):
         return sorted_items
 
     def update_item_scores(self, mapping: Dict[str, int]) -> None:
-        # TODO
-        pass
+        if len(mapping) < 1:
+            return
+
+        now = time.time()
+        if self.eviction.is_incremental():
+            # группируем элементы по количеству обращений, чтобы обновить их одним запросом на группу
+            ids_by_hits = defaultdict(list)
+            for id, hits in mapping.items():
+                ids_by_hits[hits].append(id)
+            for hits, ids in ids_by_hits.items():
+                self._collection.update_many({'_id': {'$in': ids}}, {'$inc': {'score': self.eviction.updated_score(hits, now)}})
+        else:
+            self._collection.update_many({'_id': {'$in': list(mapping.keys())}}, {'$set': {'score': self.eviction.updated_score(0, now)}})
 
     def update(self, items: List[KeyValueDBInstance]) -> None:
         for item in items:
@@ -110,20 +204,25 @@ class MongoKVConnector(AbstractKVDatabaseConnection):
         if len(items) < 1:
             return
 
-        existig_items = self._collection.find({"_id": {"$in": [item.id for item in items]}})
-        items_dict = {item.id: item for item in items}
+        requests, new_sizes = [], dict()
+        for item in items:
+            if type(item.value) is bytes:
+                dumped_value = pickle.dumps((item.value, 'bytes'))
+            else:
+                dumped_value = pickle.dumps((item.value, 'notbytes'))
 
-        for exist_item in existig_items:
-            if items_dict[exist_item['_id']] is not None:
-                cur_item = items_dict[exist_item['_id']]
+            # без upsert несуществующие элементы пропускаются
+            requests.append(pymongo.UpdateOne({'_id': item.id}, {"$set": { "value": dumped_value, "size": len(dumped_value)}}))
+            new_sizes[item.id] = len(dumped_value)
 
-                if type(item.value) is bytes:
-                    dumped_value = pickle.dumps((cur_item.value, 'bytes'))
-                else:
-                    dumped_value = pickle.dumps((cur_item.value, 'notbytes'))
-
-                self._collection.update_one({'_id': cur_item.id}, {"$set": { "value": dumped_value}})
+        old_sizes = self._get_sizes(list(new_sizes.keys()))
+        self._collection.bulk_write(requests, ordered=False)
+        self._increment_bytes(sum(new_sizes[id] - size for id, size in old_sizes.items()))
 
+    def _get_sizes(self, ids: List[str]) -> Dict[str, int]:
+        if self.eviction.max_bytes <= 0 or len(ids) < 1:
+            return dict()
+        return {item['_id']: item.get('size', 0) for item in self._collection.find({'_id': {'$in': ids}}, {'_id': 1, 'size': 1})}
 
     def delete(self, ids: List[str]) -> None:
         for id in ids:
@@ -131,17 +230,40 @@ class MongoKVConnector(AbstractKVDatabaseConnection):
                 raise ValueError
 
         if len(ids) > 0:
+            sizes = self._get_sizes(ids)
             self._collection.delete_many({'_id': {"$in": ids}})
+            self._increment_bytes(-sum(sizes.values()))
 
     def count_items(self) -> int:
         return self._collection.count_documents({})
 
+    def count_bytes(self) -> int:
+        if self.eviction.max_bytes > 0:
+            counter = self._counters.find_one({'_id': BYTES_COUNTER_ID})
+            return counter['total'] if counter is not None else 0
+        return self._aggregate_bytes()
+
+    def _aggregate_bytes(self) -> int:
+        result = list(self._collection.aggregate([{'$group': {'_id': None, 'total': {'$sum': '$size'}}}]))
+        return result[0]['total'] if len(result) > 0 else 0
+
     def item_exist(self, id: str) -> bool:
         if type(id) is not str:
             raise ValueError
 
-        item = self._collection.find_one({'_id': id})
+        item = self._collection.find_one({'_id': id}, {'_id': 1})
         return item is not None
 
+    def exists_many(self, ids: List[str]) -> List[bool]:
+        for id in ids:
+            if type(id) is not str:
+                raise ValueError
+
+        existing_ids = set(self._get_existing_ids(list(set(ids))))
+        return [id in existing_ids for id in ids]
+
     def clear(self) -> None:
         self._collection.drop()
+        self._counters.drop()
+        self._create_indexes()
+        self._init_bytes_counter()
@@ -1,24 +1,48 @@
 import redis
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from collections import defaultdict
 import numpy as np
 import pickle
+import time
 
-from src.db_drivers.kv_driver.utils import AbstractKVDatabaseConnection, KVDBConnectionConfig, KeyValueDBInstance
+from src.db_drivers.kv_driver.utils import AbstractKVDatabaseConnection, KVDBConnectionConfig, KeyValueDBInstance, KVEvictionPolicy
 
 DEFAULT_REDISKV_CONFIG = KVDBConnectionConfig(host='localhost', port=6380, need_to_clear=False, db_info={'db': 0, 'table': 'test_collection'},
                                               params={'ss_name': 'sorted_node_pairs', 'hs_name': 'node_pairs', 'max_storage': 5e+8})
 
+# удаляет размеры элементов (KEYS[1]) и уменьшает на их сумму счётчик суммарного размера (KEYS[2]) на стороне сервера,
+# чтобы не читать размеры отдельным обращением к бд перед удалением
+REMOVE_SIZES_SCRIPT = """
+local freed = 0
+for _, id in ipairs(ARGV) do
+    local size = redis.call('HGET', KEYS[1], id)
+    if size then
+        freed = freed + tonumber(size)
+        redis.call('HDEL', KEYS[1], id)
+    end
+end
+if freed ~= 0 then
+    redis.call('DECRBY', KEYS[2], freed)
+end
+return freed
+"""
+
 class RedisKVConnector(AbstractKVDatabaseConnection):
     def __init__(self, config: KVDBConnectionConfig = DEFAULT_REDISKV_CONFIG):
         self.config = config
         self.config.params['ss_name'] = f"{self.config.db_info['table']}_{self.config.params['ss_name']}"
         self.config.params['hs_name'] = f"{self.config.db_info['table']}_{self.config.params['hs_name']}"
+        # служебные структуры для вытеснения: время создания элементов, размеры значений и их суммарный размер
+        self.created_ss_name = f"{self.config.params['ss_name']}_created"
+        self.sizes_hs_name = f"{self.config.params['hs_name']}_sizes"
+        self.bytes_name = f"{self.config.params['hs_name']}_bytes"
+        self.eviction = KVEvictionPolicy(self.config.params)
 
     def open_connection(self):
         self.conn = redis.Redis(
             host=self.config.host, port=self.config.port,
             db=self.config.db_info['db'])
+        self.remove_sizes_script = self.conn.register_script(REMOVE_SIZES_SCRIPT)
 
         if self.config.need_to_clear:
             self.clear()
@@ -34,6 +58,9 @@ class RedisKVConnector(AbstractKVDatabaseConnection):
         self.conn.close()
 
     def create(self, items: List[KeyValueDBInstance]):
+        self.create_many(items)
+
+    def create_many(self, items: List[KeyValueDBInstance]) -> None:
         for item in items:
             if item is None or item.id is None or item.value is None:
                 raise ValueError
@@ -45,17 +72,21 @@ class RedisKVConnector(AbstractKVDatabaseConnection):
         if len(items) != len(unique_ids):
             raise ValueError
 
-        filtered_items = []
-        for item in items:
-            item_exists = self.conn.hexists(self.config.params['hs_name'], item.id)
-            if not item_exists:
-                filtered_items.append(item)
+        if len(items) < 1:
+            return
 
-        # находимся в фиксированном размере хранилища
-        if self.config.params['max_storage'] > 0:
-            n_items_to_delete = (self.count_items() + len(filtered_items)) - self.config.params['max_storage']
-            if n_items_to_delete > 0:
-                self.delete_rare_items(n_items_to_delete)
+        self.delete_expired_items()
+
+        # Note: без вытеснения и ttl элементы сохраняются за два обращения к бд: проверка существования
+        # элементов вместе с текущим размером хранилища (количество элементов и байт) и запись
+        pipe = self.conn.pipeline(transaction=False)
+        for item in items:
+            pipe.hexists(self.config.params['hs_name'], item.id)
+        pipe.hlen(self.config.params['hs_name'])
+        pipe.get(self.bytes_name)
+        *items_exist, n_items, n_bytes = pipe.execute()
+        n_bytes = int(n_bytes or 0)
+        filtered_items = [item for item, item_exists in zip(items, items_exist) if not item_exists]
 
         if len(filtered_items) > 0:
             formated_items = []
@@ -66,34 +97,72 @@ class RedisKVConnector(AbstractKVDatabaseConnection):
                     dumped_value = pickle.dumps((item.value, 'notbytes'))
                 formated_items.append((item.id, dumped_value))
 
-            self.conn.hset(self.config.params['hs_name'], mapping={item[0]: item[1] for item in formated_items})
-            self.conn.zadd(self.config.params['ss_name'], {item[0]: 0 for item in formated_items})
+            # находимся в фиксированном размере хранилища
+            n_items_to_delete = self.eviction.items_to_evict(n_items, len(formated_items))
+            if n_items_to_delete > 0:
+                n_bytes -= self._delete_rare_items(n_items_to_delete)[1]
+            if self.eviction.max_bytes > 0:
+                n_bytes_to_delete = self.eviction.bytes_to_evict(n_bytes, sum(len(item[1]) for item in formated_items))
+                if n_bytes_to_delete > 0:
+                    self._delete_rare_bytes(n_bytes_to_delete)
+
+            now = time.time()
+            pipe = self.conn.pipeline(transaction=False)
+            pipe.hset(self.config.params['hs_name'], mapping={item[0]: item[1] for item in formated_items})
+            pipe.zadd(self.config.params['ss_name'], {item[0]: self.eviction.initial_score(now) for item in formated_items})
+            if self.eviction.ttl is not None:
+                pipe.zadd(self.created_ss_name, {item[0]: now for item in formated_items})
+            if self.eviction.max_bytes > 0:
+                pipe.hset(self.sizes_hs_name, mapping={item[0]: len(item[1]) for item in formated_items})
+                pipe.incrby(self.bytes_name, sum(len(item[1]) for item in formated_items))
+            pipe.execute()
 
     def read(self, ids: List[str]):
+        return self.read_many(ids)
+
+    def read_many(self, ids: List[str]) -> List[KeyValueDBInstance]:
         for id in ids:
             if type(id) is not str:
                 raise ValueError
         if len(ids) < 1:
             return []
 
-        values = self.conn.hmget(self.config.params['hs_name'], ids)
-        formated_items = []
+        self.delete_expired_items()
+
         item_scores = defaultdict(lambda: 0)
+        for id in ids:
+            item_scores[id] += 1
+
+        # значения читаются вместе с обновлением метрики использования за одно обращение к бд:
+        # оценки обновляются только у существующих элементов (ZADD XX)
+        pipe = self.conn.pipeline(transaction=False)
+        pipe.hmget(self.config.params['hs_name'], ids)
+        self._add_score_updates(pipe, item_scores)
+        values = pipe.execute()[0]
+
+        formated_items = []
         for i, val in enumerate(values):
             if val is None:
                 formated_items.append(val)
             else:
-                item_scores[ids[i]] += 1
-
                 loaded_value = pickle.loads(val)[0]
                 formated_items.append(
                     KeyValueDBInstance(id=ids[i], value=loaded_value))
 
-        # Обновляем метрику использования элементов
-        self.update_item_scores(item_scores)
-
         return formated_items
 
+    def exists_many(self, ids: List[str]) -> List[bool]:
+        for id in ids:
+            if type(id) is not str:
+                raise ValueError
+        if len(ids) < 1:
+            return []
+
+        pipe = self.conn.pipeline(transaction=False)
+        for id in ids:
+            pipe.hexists(self.config.params['hs_name'], id)
+        return [bool(flag) for flag in pipe.execute()]
+
     def update(self, items: List[KeyValueDBInstance]):
         for item in items:
             if item is None or item.id is None or item.value is None:
@@ -102,53 +171,127 @@ class RedisKVConnector(AbstractKVDatabaseConnection):
             if type(item.id) is not str or type(item.value) not in [str, float, int]:
                 raise ValueError
 
-        filtered_items = [item for item in items if self.conn.hexists(self.config.params['hs_name'], item.id)]
+        if len(items) < 1:
+            return
+
+        # Note: элементы обновляются за два обращения к бд: проверка существования элементов
+        # вместе с чтением их прежних размеров и запись
+        pipe = self.conn.pipeline(transaction=False)
+        for item in items:
+            pipe.hexists(self.config.params['hs_name'], item.id)
+        if self.eviction.max_bytes > 0:
+            pipe.hmget(self.sizes_hs_name, [item.id for item in items])
+        outputs = pipe.execute()
+        items_exist = outputs[:len(items)]
+        old_sizes = outputs[len(items)] if self.eviction.max_bytes > 0 else [None] * len(items)
+
+        filtered_items = [(item, old_size) for item, item_exists, old_size in zip(items, items_exist, old_sizes) if item_exists]
 
         if len(filtered_items) > 0:
             formated_items = []
-            for item in filtered_items:
+            for item, _ in filtered_items:
                 if type(item.value) is bytes:
                     dumped_value = pickle.dumps((item.value, 'bytes'))
                 else:
                     dumped_value = pickle.dumps((item.value, 'notbytes'))
                 formated_items.append((item.id, dumped_value))
 
-            self.conn.hset(self.config.params['hs_name'], mapping={item[0]: item[1] for item in formated_items})
-            self.conn.zadd(self.config.params['ss_name'], {item[0]: 0 for item in formated_items})
+            pipe = self.conn.pipeline(transaction=False)
+            if self.eviction.max_bytes > 0:
+                pipe.incrby(self.bytes_name, sum(len(item[1]) for item in formated_items) - sum(int(old_size or 0) for _, old_size in filtered_items))
+                pipe.hset(self.sizes_hs_name, mapping={item[0]: len(item[1]) for item in formated_items})
+            pipe.hset(self.config.params['hs_name'], mapping={item[0]: item[1] for item in formated_items})
+            pipe.zadd(self.config.params['ss_name'], {item[0]: self.eviction.initial_score(time.time()) for item in formated_items})
+            pipe.execute()
 
     def delete(self, ids: List[str]):
         for id in ids:
             if type(id) is not str:
                 raise ValueError
 
-        filtered_ids = [id for id in ids if self.conn.hexists(self.config.params['hs_name'], id)]
+        filtered_ids = [id for id, item_exists in zip(ids, self.exists_many(ids)) if item_exists]
+        self._remove(filtered_ids)
 
-        if len(filtered_ids) > 0:
-            self.conn.hdel(self.config.params['hs_name'], *filtered_ids)
-            self.conn.zrem(self.config.params['ss_name'], *filtered_ids)
+    def _remove(self, ids: List[str]) -> int:
+        """Метод удаляет элементы одним пакетом команд и возвращает суммарный размер удалённых значений
+        (если размеры не учитываются, то 0). При учёте размеров redis-py перед выполнением пакета
+        дополнительно проверяет наличие Lua-скрипта на сервере (SCRIPT EXISTS), т.е. удаление занимает два обращения к бд."""
+        if len(ids) < 1:
+            return 0
+
+        pipe = self.conn.pipeline(transaction=False)
+        if self.eviction.max_bytes > 0:
+            self.remove_sizes_script(keys=[self.sizes_hs_name, self.bytes_name], args=ids, client=pipe)
+        pipe.hdel(self.config.params['hs_name'], *ids)
+        pipe.zrem(self.config.params['ss_name'], *ids)
+        if self.eviction.ttl is not None:
+            pipe.zrem(self.created_ss_name, *ids)
+        outputs = pipe.execute()
+        return int(outputs[0] or 0) if self.eviction.max_bytes > 0 else 0
+
+    def _add_score_updates(self, pipe, mapping: Dict[str, int]) -> None:
+        # элементы хеш-таблицы и ордер-сета совпадают, поэтому XX обновляет оценки только существующих элементов
+        now = time.time()
+        if self.eviction.is_incremental():
+            for k, v in mapping.items():
+                pipe.zadd(self.config.params['ss_name'], {k: self.eviction.updated_score(v, now)}, xx=True, incr=True)
+        else:
+            pipe.zadd(self.config.params['ss_name'], {k: self.eviction.updated_score(v, now) for k, v in mapping.items()}, xx=True)
 
     def update_item_scores(self, mapping: Dict[str, int]) -> None:
-        existed_keys = [id for id in list(mapping.keys()) if self.conn.hexists(self.config.params['hs_name'], id)]
-        filtered_mapping = {k: mapping[k] for k in existed_keys}
-
-        if len(existed_keys) > 0:
-            for k,v in filtered_mapping.items():
-                self.conn.zincrby(self.config.params['ss_name'], v, k)
+        if len(mapping) < 1:
+            return
+
+        pipe = self.conn.pipeline(transaction=False)
+        self._add_score_updates(pipe, mapping)
+        pipe.execute()
+
+    def delete_rare_items(self, num: int) -> List[str]:
+        return self._delete_rare_items(num)[0]
+
+    def _delete_rare_items(self, num: int) -> Tuple[List[str], int]:
+        if num < 1:
+            return [], 0
+        rarest_ids = [id.decode('utf-8') for id in self.conn.zrange(self.config.params['ss_name'], 0, num - 1)]
+        return rarest_ids, self._remove(rarest_ids)
+
+    def _delete_rare_bytes(self, n_bytes: int, chunk_size: int = 256) -> List[str]:
+        rarest_ids, freed_bytes, offset = [], 0, 0
+        while freed_bytes < n_bytes:
+            chunk_ids = [id.decode('utf-8') for id in self.conn.zrange(self.config.params['ss_name'], offset, offset + chunk_size - 1)]
+            if len(chunk_ids) < 1:
+                break
+            for id, size in zip(chunk_ids, self.conn.hmget(self.sizes_hs_name, chunk_ids)):
+                if freed_bytes >= n_bytes:
+                    break
+                rarest_ids.append(id)
+                freed_bytes += int(size or 0)
+            offset += chunk_size
+
+        self._remove(rarest_ids)
+        return rarest_ids
+
+    def delete_expired_items(self) -> List[str]:
+        expiration_time = self.eviction.expiration_time(time.time())
+        if expiration_time is None:
+            return []
 
-    def delete_rare_items(self, num: int) -> None:
-        rarest_values = self.conn.zrangebyscore(self.config.params['ss_name'], 0, "+inf", start=0, num=num)
-        if len(rarest_values) > 0:
-            self.conn.zrem(self.config.params['ss_name'], *rarest_values)
-            self.conn.hdel(self.config.params['hs_name'], *rarest_values)
+        expired_ids = [id.decode('utf-8') for id in self.conn.zrangebyscore(self.created_ss_name, "-inf", f"({expiration_time}")]
+        self._remove(expired_ids)
+        return expired_ids
 
     def count_items(self):
         return self.conn.hlen(self.config.params['hs_name'])
 
+    def count_bytes(self) -> int:
+        return int(self.conn.get(self.bytes_name) or 0)
+
     def item_exist(self, id: str):
         if type(id) is not str:
             raise ValueError
         return self.conn.hexists(self.config.params['hs_name'], id)
 
     def clear(self):
-        self.conn.delete(self.config.params['hs_name'])
-        self.conn.delete(self.config.params['ss_name'])
+        self.conn.delete(
+            self.config.params['hs_name'], self.config.params['ss_name'],
+            self.created_ss_name, self.sizes_hs_name, self.bytes_name)
@@ -1,5 +1,6 @@
-from typing import Dict, Union
+from typing import Dict, Union, List
 from dataclasses import dataclass
+import math
 
 from ..utils import AbstractDatabaseConnection, BaseDatabaseConfig
 
@@ -13,6 +14,61 @@ class KeyValueDBInstance:
     id: str
     value: Union[int, float, str, bytes]
 
+KV_EVICTION_POLICIES = ['lfu', 'lru']
+
+class KVEvictionPolicy:
+    """Общая для kv-коннекторов политика вытеснения элементов. Каждому элементу хранилища
+    сопоставляется оценка (score): для 'lfu' - количество обращений к элементу, для 'lru' - время
+    последнего обращения. При переполнении хранилища (по количеству элементов или по суммарному
+    размеру значений) удаляются элементы с наименьшей оценкой. Независимо от политики элементы,
+    созданные более ttl секунд назад, считаются устаревшими и удаляются.
+
+    Гиперпараметры задаются в params-словаре конфигурации коннектора: 'eviction_policy' - 'lfu' | 'lru' (по умолчанию 'lfu');
+    'max_storage' - максимальное количество элементов (по умолчанию -1, без ограничения); 'max_bytes' - максимальный суммарный размер
+    сериализованных значений (по умолчанию -1, без ограничения); 'ttl' - время жизни элемента в секундах (по умолчанию None);
+    'eviction_batch' - доля от лимита, которая дополнительно освобождается при переполнении, чтобы вытеснение не выполнялось на каждую запись (по умолчанию 0.05).
+
+    :param params: Набор гиперпараметров коннектора.
+    :type params: Dict
+    """
+    def __init__(self, params: Dict) -> None:
+        self.policy = params.get('eviction_policy', 'lfu')
+        if self.policy not in KV_EVICTION_POLICIES:
+            raise ValueError
+        self.max_items = params.get('max_storage', -1)
+        self.max_bytes = params.get('max_bytes', -1)
+        self.ttl = params.get('ttl', None)
+        self.eviction_batch = params.get('eviction_batch', 0.05)
+
+    def initial_score(self, now: float) -> float:
+        return 0 if self.policy == 'lfu' else now
+
+    def is_incremental(self) -> bool:
+        # для lfu оценка увеличивается на количество обращений, для lru - заменяется временем обращения
+        return self.policy == 'lfu'
+
+    def updated_score(self, hits: int, now: float) -> float:
+        return hits if self.policy == 'lfu' else now
+
+    def expiration_time(self, now: float) -> Union[float, None]:
+        return now - self.ttl if self.ttl is not None else None
+
+    def items_to_evict(self, n_items: int, n_new_items: int) -> int:
+        if self.max_items <= 0:
+            return 0
+        overflow = n_items + n_new_items - self.max_items
+        if overflow <= 0:
+            return 0
+        return min(n_items, int(overflow + math.ceil(self.max_items * self.eviction_batch)))
+
+    def bytes_to_evict(self, n_bytes: int, n_new_bytes: int) -> int:
+        if self.max_bytes <= 0:
+            return 0
+        overflow = n_bytes + n_new_bytes - self.max_bytes
+        if overflow <= 0:
+            return 0
+        return min(n_bytes, int(overflow + math.ceil(self.max_bytes * self.eviction_batch)))
+
 class AbstractKVDatabaseConnection(AbstractDatabaseConnection):
     def update_item_scores(self, mapping: Dict[str, int]) -> None:
         """Метод предназначен для обновления оценок у хранящихся элементов в ордер-сете (Sorted Set).
@@ -21,9 +77,49 @@ class AbstractKVDatabaseConnection(AbstractDatabaseConnection):
         :type mapping: Dict[str, int]
         """
 
-    def delete_rare_items(self, num: int) -> None:
-        """Метод предназначен для удаления элементов, к которым было сделано наименьшее количество обращений.
+    def delete_rare_items(self, num: int) -> List[str]:
+        """Метод предназначен для удаления элементов с наименьшей оценкой согласно политике вытеснения
+        (для 'lfu' - с наименьшим количеством обращений, для 'lru' - наиболее давно использованных).
 
         :param num: Количество элементов, которое нужно удалить.
         :type num: int
+        :return: Идентификаторы удалённых элементов.
+        :rtype: List[str]
+        """
+
+    def delete_expired_items(self) -> List[str]:
+        """Метод предназначен для удаления элементов, время жизни (ttl) которых истекло.
+
+        :return: Идентификаторы удалённых элементов.
+        :rtype: List[str]
+        """
+
+    def create_many(self, items: List[KeyValueDBInstance]) -> None:
+        """Метод предназначен для пакетного добавления элементов за минимальное количество обращений к бд.
+        Семантика совпадает с create: существующие элементы не затираются. Коннекторы, для которых
+        поэлементные операции дороги, переопределяют данный метод.
+
+        :param items: Элементы на добавление.
+        :type items: List[KeyValueDBInstance]
+        """
+        self.create(items)
+
+    def read_many(self, ids: List[str]) -> List[Union[KeyValueDBInstance, None]]:
+        """Метод предназначен для пакетного получения элементов (вместе с обновлением их оценок) за минимальное количество обращений к бд.
+
+        :param ids: Идентификаторы элементов.
+        :type ids: List[str]
+        :return: Элементы в порядке запрошенных идентификаторов (None для отсутствующих).
+        :rtype: List[Union[KeyValueDBInstance, None]]
+        """
+        return self.read(ids)
+
+    def exists_many(self, ids: List[str]) -> List[bool]:
+        """Метод предназначен для пакетной проверки существования элементов.
+
+        :param ids: Идентификаторы элементов.
+        :type ids: List[str]
+        :return: Флаги существования в порядке запрошенных идентификаторов.
+        :rtype: List[bool]
         """
+        return [self.item_exist(id) for id in ids]
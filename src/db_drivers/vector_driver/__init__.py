@@ -1,4 +1,4 @@
 from .connectors import ChromaConnection, DEFAULT_CHROMA_CONFIG
 from .VectorDriver import VectorDriverConfig, VectorDriver
 from .utils import VectorDBConnectionConfig, VectorDBInstance
-from .embedders import EmbedderModel, EmbedderModelConfig
+from .embedders import EmbedderModel, EmbedderModelConfig, EmbeddingCache
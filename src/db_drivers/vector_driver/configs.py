@@ -1,13 +1,16 @@
 from .connectors import ChromaConnection, DEFAULT_CHROMA_CONFIG
 from .connectors import MilvusConnector, DEFAULT_MILVUS_CONFIG
+from .connectors import NumpyVectorConnector, DEFAULT_NUMPY_CONFIG
 
 
 DEFAULT_VECTORDB_CONFIGS = {
     'chroma': DEFAULT_CHROMA_CONFIG,
-    'milvus': DEFAULT_MILVUS_CONFIG
+    'milvus': DEFAULT_MILVUS_CONFIG,
+    'numpy': DEFAULT_NUMPY_CONFIG
 }
 
 AVAILABLE_VECTORDB_CONNECTORS = {
     'chroma': ChromaConnection,
-    'milvus': MilvusConnector
+    'milvus': MilvusConnector,
+    'numpy': NumpyVectorConnector
 }
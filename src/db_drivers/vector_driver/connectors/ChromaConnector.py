@@ -1,4 +1,4 @@
-from typing import List, Tuple
+from typing import List, Tuple, Set
 
 # Try to use pysqlite3 if available (required for older ChromaDB versions)
 # On modern systems, regular sqlite3 should work fine
@@ -17,7 +17,7 @@ import torch
 import numpy as np
 
 from ....utils.errors import ReturnInfo
-from ..utils import VectorDBConnectionConfig, AbstractVectorDatabaseConnection, VectorDBInstance
+from ..utils import VectorDBConnectionConfig, AbstractVectorDatabaseConnection, VectorDBInstance, format_embedding, StoredEmbeddingsCache
 logging.getLogger("chromadb").setLevel(logging.CRITICAL)
 
 DEFAULT_CHROMA_CONFIG = VectorDBConnectionConfig(
@@ -30,6 +30,7 @@ class ChromaConnection(AbstractVectorDatabaseConnection):
         self.config = config
         self.collection = None
         self.client = None
+        self.stored_embeddings_cache = StoredEmbeddingsCache()
 
     def open_connection(self) -> ReturnInfo:
         self.client = chromadb.PersistentClient(path=self.config.conn['path'])
@@ -57,7 +58,7 @@ class ChromaConnection(AbstractVectorDatabaseConnection):
         for item in items:
             if type(item.id) is not str:
                 raise ValueError
-            if type(item.embedding) in [torch.Tensor, np.ndarray]:
+            if type(item.embedding) is torch.Tensor:
                 raise ValueError
         unique_ids = set(map(lambda item: item.id, items))
         if len(items) != len(unique_ids):
@@ -70,14 +71,14 @@ class ChromaConnection(AbstractVectorDatabaseConnection):
         if len(insts_with_md) > 0:
             self.collection.add(
                 documents=list(map(lambda idx: items[idx].document, insts_with_md)),
-                embeddings=list(map(lambda idx: items[idx].embedding, insts_with_md)),
+                embeddings=list(map(lambda idx: format_embedding(items[idx].embedding), insts_with_md)),
                 metadatas=list(map(lambda idx: items[idx].metadata, insts_with_md)),
                 ids=list(map(lambda idx: items[idx].id, insts_with_md)))
 
         if len(insts_wo_md) > 0:
             self.collection.add(
                 documents=list(map(lambda idx: items[idx].document, insts_wo_md)),
-                embeddings=list(map(lambda idx: items[idx].embedding, insts_wo_md)),
+                embeddings=list(map(lambda idx: format_embedding(items[idx].embedding), insts_wo_md)),
                 ids=list(map(lambda idx: items[idx].id, insts_wo_md)))
 
     def read(self, ids: List[str], includes: List[str] = ['embeddings', 'documents', 'metadatas']) -> List[VectorDBInstance]:
@@ -107,10 +108,9 @@ class ChromaConnection(AbstractVectorDatabaseConnection):
         if len(items) != len(unique_ids):
             raise ValueError
 
-        for item in items:
-            if self.item_exist(item.id):
-                self.delete([item.id])
-            self.create([item])
+        existed_ids = self.existing_ids([item.id for item in items])
+        self.delete(list(existed_ids))
+        self.create(items)
 
     def delete(self, ids: List[str]) -> None:
         # validation
@@ -119,6 +119,7 @@ class ChromaConnection(AbstractVectorDatabaseConnection):
                 raise ValueError
 
         if len(ids):
+            self.stored_embeddings_cache.drop(ids)
             self.collection.delete(ids=ids)
 
     def retrieve(
@@ -128,13 +129,13 @@ class ChromaConnection(AbstractVectorDatabaseConnection):
         if len(query_instances) < 1:
             return ValueError
         for inst in query_instances:
-            if type(inst.embedding) in [torch.Tensor, np.ndarray]:
+            if type(inst.embedding) is torch.Tensor:
                 raise ValueError
 
         collection_size = self.count_items()
         n_results = collection_size if collection_size < n_results else n_results
         if n_results < 1:
-            return [[]*len(query_instances)]
+            return [[] for _ in range(len(query_instances))]
 
         filtering_expr = dict()
         if subset_ids is not None:
@@ -143,7 +144,7 @@ class ChromaConnection(AbstractVectorDatabaseConnection):
         # Attention: в случае использования ip-метрики будут получены значения расстояний [distances] между векторами,
         # а не значения их семантической блозости [similarity]
         raw_retrieved_instances = self.collection.query(
-            query_embeddings=[inst.embedding for inst in query_instances],
+            query_embeddings=[format_embedding(inst.embedding) for inst in query_instances],
             include=includes + ['distances'], n_results=n_results, **filtering_expr)
 
         #
@@ -169,7 +170,19 @@ class ChromaConnection(AbstractVectorDatabaseConnection):
         output = self.collection.get(ids=[id])
         return len(output['ids']) > 0
 
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        # validation
+        for id in ids:
+            if type(id) is not str:
+                raise ValueError
+        if len(ids) < 1:
+            return set()
+
+        output = self.collection.get(ids=list(set(ids)), include=[])
+        return set(output['ids'])
+
     def clear(self) -> None:
+        self.stored_embeddings_cache.clear()
         self.client.delete_collection(name=self.config.db_info['table'])
         if self.config.params:
             self.collection = self.client.create_collection(
@@ -1,4 +1,4 @@
-from typing import List, Dict, Tuple, Union
+from typing import List, Dict, Tuple, Union, Set
 from pymilvus.orm.connections import ConnectionNotExistException
 from pymilvus import MilvusClient, DataType
 from time import sleep
@@ -6,7 +6,7 @@ import numpy as np
 import torch
 import ast
 
-from ..utils import AbstractVectorDatabaseConnection, VectorDBInstance, VectorDBConnectionConfig
+from ..utils import AbstractVectorDatabaseConnection, VectorDBInstance, VectorDBConnectionConfig, format_embedding, StoredEmbeddingsCache
 
 
 DEFAULT_MILVUS_CONFIG = VectorDBConnectionConfig(
@@ -19,6 +19,7 @@ class MilvusConnector(AbstractVectorDatabaseConnection):
     def __init__(self, config: VectorDBConnectionConfig):
         self.config = config
         self.client = None
+        self.stored_embeddings_cache = StoredEmbeddingsCache()
 
     def prepare_structure(self) -> None:
         # создать бд
@@ -98,19 +99,16 @@ class MilvusConnector(AbstractVectorDatabaseConnection):
         for item in items:
             if type(item.id) is not str:
                 raise ValueError
-            if type(item.embedding) in [torch.Tensor, np.ndarray]:
+            if type(item.embedding) is torch.Tensor:
                 raise ValueError
         unique_ids = set(map(lambda item: item.id, items))
         if len(items) != len(unique_ids):
             raise ValueError
 
-        filtered_items = []
-        for item in items:
-            item_exists = self.item_exist(item.id)
-            if not item_exists:
-                filtered_items.append(item)
+        existed_ids = self.existing_ids(list(unique_ids))
+        filtered_items = [item for item in items if item.id not in existed_ids]
 
-        formated_data = list(map(lambda item: item.dict(), filtered_items))
+        formated_data = list(map(lambda item: dict(item.dict(), embedding=format_embedding(item.embedding)), filtered_items))
 
         out = self.client.insert(
             collection_name=self.config.db_info['table'],
@@ -154,7 +152,8 @@ class MilvusConnector(AbstractVectorDatabaseConnection):
         if len(items) != len(unique_ids):
             raise ValueError
 
-        formated_data = list(map(lambda item: item.dict(), items))
+        formated_data = list(map(lambda item: dict(item.dict(), embedding=format_embedding(item.embedding)), items))
+        self.stored_embeddings_cache.drop(list(unique_ids))
         self.client.upsert(collection_name=self.config.db_info['table'], data=formated_data)
 
         # костыль
@@ -170,8 +169,10 @@ class MilvusConnector(AbstractVectorDatabaseConnection):
                 raise ValueError
 
         if len(ids):
-            filtered_ids = [id for id in ids if self.item_exist(id)]
+            existed_ids = self.existing_ids(ids)
+            filtered_ids = [id for id in ids if id in existed_ids]
             if len(filtered_ids):
+                self.stored_embeddings_cache.drop(filtered_ids)
                 self.client.delete(collection_name=self.config.db_info['table'], ids=filtered_ids)
 
                 # костыль
@@ -186,11 +187,11 @@ class MilvusConnector(AbstractVectorDatabaseConnection):
         if len(query_instances) < 1:
             return ValueError
         for inst in query_instances:
-            if type(inst.embedding) in [torch.Tensor, np.ndarray]:
+            if type(inst.embedding) is torch.Tensor:
                 raise ValueError
 
         if n_results < 1:
-            return [[]*len(query_instances)]
+            return [[] for _ in range(len(query_instances))]
 
         # костыль
         f_includes = list(map(lambda f_name: f_name[:-1],includes))
@@ -203,7 +204,7 @@ class MilvusConnector(AbstractVectorDatabaseConnection):
         #
         raw_output = self.client.search(
             collection_name=self.config.db_info['table'],
-            data=[inst.embedding for inst in query_instances],
+            data=[format_embedding(inst.embedding) for inst in query_instances],
             limit=n_results, output_fields=f_includes, **filtering_expr)
 
         formated_output = []
@@ -232,7 +233,22 @@ class MilvusConnector(AbstractVectorDatabaseConnection):
 
         return bool(len(res))
 
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        # validation
+        for id in ids:
+            if type(id) is not str:
+                raise ValueError
+        if len(ids) < 1:
+            return set()
+
+        res = self.client.get(
+            collection_name=self.config.db_info['table'],
+            ids=list(set(ids)), output_fields=['id'])
+
+        return set(map(lambda raw_item: raw_item['id'], res))
+
     def clear(self) -> None:
+        self.stored_embeddings_cache.clear()
         load_state = self.client.get_load_state(self.config.db_info['table'])['state'].value
         if load_state != 3:
             self.client.release_collection(collection_name=self.config.db_info['table'])
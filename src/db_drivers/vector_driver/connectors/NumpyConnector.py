@@ -0,0 +1,406 @@
+from typing import List, Tuple, Union, Set
+import threading
+import json
+import os
+
+import numpy as np
+import torch
+
+from ..utils import VectorDBConnectionConfig, AbstractVectorDatabaseConnection, VectorDBInstance
+
+DEFAULT_NUMPY_CONFIG = VectorDBConnectionConfig(
+    params={'ivf_nlist': 0, 'ivf_nprobe': 8, 'ivf_min_size': 50000, 'ivf_train_iters': 10,
+            'ivf_train_size': 256, 'seed': 42},
+    conn={'path': None})
+
+EMBEDDINGS_FILE = 'embeddings.npy'
+INDEX_FILE = 'index.json'
+
+class NumpyVectorConnector(AbstractVectorDatabaseConnection):
+    """Векторное хранилище внутри процесса: эмбеддинги хранятся в float32-матрице NumPy,
+    а идентификаторы, документы и метаданные - в таблице, выровненной по строкам матрицы.
+    Поиск выполняется по скалярному произведению: для небольших коллекций и запросов по подмножеству
+    идентификаторов - точным перебором, для больших коллекций (при ivf_nlist > 0) - через
+    IVF-квантователь (k-means центроиды + просмотр ivf_nprobe ближайших кластеров).
+    Если в conn указан 'path', то содержимое сохраняется на диск при закрытии соединения
+    (или вызове flush) и отображается в память (mmap) при открытии.
+
+    :param config: Конфигурация хранилища. В params можно указать: 'ivf_nlist' - количество кластеров IVF-индекса (0 - только точный поиск); 'ivf_nprobe' - количество просматриваемых кластеров на запрос; 'ivf_min_size' - минимальный размер коллекции, начиная с которого используется IVF-индекс; 'ivf_train_iters' - количество итераций k-means; 'ivf_train_size' - количество векторов обучающей выборки на один кластер; 'seed'. Значение по умолчанию DEFAULT_NUMPY_CONFIG.
+    :type config: VectorDBConnectionConfig
+    """
+
+    def __init__(self, config: VectorDBConnectionConfig = DEFAULT_NUMPY_CONFIG) -> None:
+        self.config = config
+        self.ivf_nlist = self.config.params.get('ivf_nlist', 0)
+        self.ivf_nprobe = self.config.params.get('ivf_nprobe', 8)
+        self.ivf_min_size = self.config.params.get('ivf_min_size', 50000)
+        self.ivf_train_iters = self.config.params.get('ivf_train_iters', 10)
+        self.ivf_train_size = self.config.params.get('ivf_train_size', 256)
+        self.seed = self.config.params.get('seed', 42)
+        self.lock = threading.RLock()
+        self.opened = False
+
+    def get_storage_dir(self) -> Union[str, None]:
+        if self.config.conn.get('path', None) is None:
+            return None
+        return os.path.join(self.config.conn['path'], self.config.db_info['table'])
+
+    def open_connection(self) -> None:
+        self._reset()
+
+        storage_dir = self.get_storage_dir()
+        if storage_dir is not None and not self.config.need_to_clear:
+            self._load(storage_dir)
+
+        self.opened = True
+
+    def _reset(self) -> None:
+        self.matrix = None
+        self.size = 0
+        self.ids = list()
+        self.id_index = dict()
+        self.documents = list()
+        self.metadatas = list()
+
+        # ivf-индекс
+        self.centroids = None
+        self.assignments = None
+        self.trained_size = 0
+
+    def _load(self, storage_dir: str) -> None:
+        embeddings_path = os.path.join(storage_dir, EMBEDDINGS_FILE)
+        index_path = os.path.join(storage_dir, INDEX_FILE)
+        if not (os.path.exists(embeddings_path) and os.path.exists(index_path)):
+            return
+
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+
+        if len(index['ids']) < 1:
+            return
+
+        # copy-on-write отображение: изменения не затрагивают файл до следующего flush
+        matrix = np.load(embeddings_path, mmap_mode='c')
+        if matrix.shape[0] != len(index['ids']):
+            raise ValueError
+
+        self.matrix = matrix
+        self.size = matrix.shape[0]
+        self.ids = index['ids']
+        self.id_index = {id: row for row, id in enumerate(self.ids)}
+        self.documents = index['documents']
+        self.metadatas = index['metadatas']
+
+    def flush(self) -> None:
+        """Метод предназначен для сохранения содержимого хранилища на диск.
+        Если в конфигурации не задан путь, то вызов ничего не делает.
+        """
+        storage_dir = self.get_storage_dir()
+        if storage_dir is None:
+            return
+
+        with self.lock:
+            os.makedirs(storage_dir, exist_ok=True)
+            embeddings_path = os.path.join(storage_dir, EMBEDDINGS_FILE)
+            index_path = os.path.join(storage_dir, INDEX_FILE)
+
+            matrix = self.matrix[:self.size] if self.matrix is not None else np.zeros((0, 1), dtype=np.float32)
+            # запись через временные файлы, чтобы прерванное сохранение не повредило предыдущую версию
+            with open(embeddings_path + '.tmp', 'wb') as f:
+                np.save(f, np.ascontiguousarray(matrix))
+            with open(index_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump({'ids': self.ids, 'documents': self.documents, 'metadatas': self.metadatas}, f, ensure_ascii=False)
+            os.replace(embeddings_path + '.tmp', embeddings_path)
+            os.replace(index_path + '.tmp', index_path)
+
+    def is_open(self) -> bool:
+        return self.opened
+
+    def close_connection(self) -> None:
+        self.flush()
+        self._reset()
+        self.opened = False
+
+    def _format_embeddings(self, embeddings: List[object]) -> np.ndarray:
+        # validating
+        for embedding in embeddings:
+            if type(embedding) is torch.Tensor:
+                raise ValueError
+        try:
+            formated = np.asarray(embeddings, dtype=np.float32)
+        except (TypeError, ValueError):
+            raise ValueError
+        if formated.ndim != 2 or formated.shape[1] < 1:
+            raise ValueError
+        if self.matrix is not None and self.matrix.shape[1] != formated.shape[1]:
+            raise ValueError
+
+        return formated
+
+    def _reserve(self, n_rows: int, dim: int) -> None:
+        if self.matrix is None:
+            self.matrix = np.zeros((max(n_rows, 16), dim), dtype=np.float32)
+        elif self.size + n_rows > self.matrix.shape[0]:
+            # отображённая с диска матрица не имеет запаса, поэтому при первом добавлении копируется в память
+            capacity = max(self.size + n_rows, 2 * self.matrix.shape[0], 16)
+            new_matrix = np.zeros((capacity, dim), dtype=np.float32)
+            new_matrix[:self.size] = self.matrix[:self.size]
+            self.matrix = new_matrix
+
+        if self.assignments is not None and self.assignments.shape[0] < self.matrix.shape[0]:
+            new_assignments = np.zeros(self.matrix.shape[0], dtype=np.int32)
+            new_assignments[:self.size] = self.assignments[:self.size]
+            self.assignments = new_assignments
+
+    def create(self, items: List[VectorDBInstance]) -> None:
+        # validating
+        for item in items:
+            if type(item.id) is not str:
+                raise ValueError
+        unique_ids = set(map(lambda item: item.id, items))
+        if len(items) != len(unique_ids):
+            raise ValueError
+
+        with self.lock:
+            filtered_items = [item for item in items if item.id not in self.id_index]
+            if len(filtered_items) < 1:
+                return
+
+            embeddings = self._format_embeddings([item.embedding for item in filtered_items])
+            self._reserve(len(filtered_items), embeddings.shape[1])
+
+            start, end = self.size, self.size + len(filtered_items)
+            self.matrix[start:end] = embeddings
+            for row, item in enumerate(filtered_items, start=start):
+                self.id_index[item.id] = row
+                self.ids.append(item.id)
+                self.documents.append(item.document)
+                self.metadatas.append(dict(item.metadata) if item.metadata else dict())
+            self.size = end
+
+            if self.centroids is not None:
+                self.assignments[start:end] = self._assign(embeddings)
+
+    def read(self, ids: List[str], includes: List[str] = ['embeddings', 'documents', 'metadatas']) -> List[VectorDBInstance]:
+        # validation
+        for id in ids:
+            if type(id) is not str:
+                raise ValueError
+
+        with self.lock:
+            rows = [self.id_index[id] for id in ids if id in self.id_index]
+            return [self._restore_instance(row, includes) for row in rows]
+
+    def _restore_instance(self, row: int, includes: List[str]) -> VectorDBInstance:
+        instance = VectorDBInstance(id=self.ids[row])
+        if 'embeddings' in includes:
+            instance.embedding = np.array(self.matrix[row], dtype=np.float32)
+        if 'documents' in includes:
+            instance.document = self.documents[row]
+        if 'metadatas' in includes:
+            instance.metadata = dict(self.metadatas[row])
+        return instance
+
+    def update(self, items: List[VectorDBInstance]) -> None:
+        # validation
+        for item in items:
+            if type(item.id) is not str:
+                raise ValueError
+        unique_ids = set(map(lambda item: item.id, items))
+        if len(items) != len(unique_ids):
+            raise ValueError
+
+        with self.lock:
+            # несуществующие объекты пропускаются, незаданные поля (embedding, document, metadata) не изменяются
+            existing_items = [item for item in items if item.id in self.id_index]
+            embedded_items = [item for item in existing_items if item.embedding is not None]
+            # эмбеддинги проверяются до изменения хранилища
+            embeddings = self._format_embeddings([item.embedding for item in embedded_items]) if len(embedded_items) > 0 else None
+
+            for item in existing_items:
+                row = self.id_index[item.id]
+                if item.document is not None:
+                    self.documents[row] = item.document
+                if item.metadata:
+                    self.metadatas[row] = dict(item.metadata)
+
+            if embeddings is not None:
+                rows = np.array([self.id_index[item.id] for item in embedded_items], dtype=np.int64)
+                self.matrix[rows] = embeddings
+                if self.centroids is not None:
+                    self.assignments[rows] = self._assign(embeddings)
+
+    def upsert(self, items: List[VectorDBInstance]) -> None:
+        # validation
+        for item in items:
+            if type(item.id) is not str:
+                raise ValueError
+        unique_ids = set(map(lambda item: item.id, items))
+        if len(items) != len(unique_ids):
+            raise ValueError
+
+        with self.lock:
+            # эмбеддинги проверяются до удаления, чтобы неверные данные не приводили к потере существующих объектов
+            self._format_embeddings([item.embedding for item in items])
+            self.delete(list(self.existing_ids(list(unique_ids))))
+            self.create(items)
+
+    def delete(self, ids: List[str]) -> None:
+        # validation
+        for id in ids:
+            if type(id) is not str:
+                raise ValueError
+
+        with self.lock:
+            for id in set(ids):
+                row = self.id_index.pop(id, None)
+                if row is None:
+                    continue
+
+                # удаляемая строка замещается последней, чтобы матрица оставалась плотной
+                last = self.size - 1
+                if row != last:
+                    self.matrix[row] = self.matrix[last]
+                    self.ids[row] = self.ids[last]
+                    self.documents[row] = self.documents[last]
+                    self.metadatas[row] = self.metadatas[last]
+                    self.id_index[self.ids[row]] = row
+                    if self.centroids is not None:
+                        self.assignments[row] = self.assignments[last]
+
+                self.ids.pop()
+                self.documents.pop()
+                self.metadatas.pop()
+                self.size = last
+
+    def _train_ivf(self) -> None:
+        rng = np.random.default_rng(self.seed)
+        data = self.matrix[:self.size]
+        nlist = min(self.ivf_nlist, self.size)
+
+        sample_size = min(self.size, nlist * self.ivf_train_size)
+        sample = data[np.sort(rng.choice(self.size, sample_size, replace=False))]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        # сферический k-means: кластеры определяются по максимуму скалярного произведения
+        for _ in range(self.ivf_train_iters):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()), replace=False)]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.maximum(norms, 1e-12)
+
+        self.centroids = centroids.astype(np.float32)
+        self.assignments = np.zeros(self.matrix.shape[0], dtype=np.int32)
+        self.assignments[:self.size] = self._assign(data)
+        self.trained_size = self.size
+
+    def _assign(self, embeddings: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+        labels = np.empty(embeddings.shape[0], dtype=np.int32)
+        for start in range(0, embeddings.shape[0], chunk_size):
+            labels[start:start+chunk_size] = np.argmax(embeddings[start:start+chunk_size] @ self.centroids.T, axis=1)
+        return labels
+
+    def _use_ivf(self) -> bool:
+        if self.ivf_nlist < 1 or self.size < self.ivf_min_size:
+            return False
+        # индекс переобучается, когда коллекция выросла более чем вдвое с момента обучения
+        if self.centroids is None or self.size > 2 * self.trained_size:
+            self._train_ivf()
+        return True
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, rows: np.ndarray, n_results: int) -> Tuple[np.ndarray, np.ndarray]:
+        if n_results < scores.shape[0]:
+            top_idxs = np.argpartition(-scores, n_results - 1)[:n_results]
+        else:
+            top_idxs = np.arange(scores.shape[0])
+        top_idxs = top_idxs[np.argsort(-scores[top_idxs], kind='stable')]
+        return rows[top_idxs], scores[top_idxs]
+
+    def retrieve(
+            self, query_instances: List[VectorDBInstance], n_results: int = 50, subset_ids: Union[None, List[str]] = None,
+            includes: List[str] = ['embeddings', 'documents', 'metadatas']) -> List[List[Tuple[float, VectorDBInstance]]]:
+        # validating
+        if len(query_instances) < 1:
+            raise ValueError
+        queries = self._format_embeddings([inst.embedding for inst in query_instances])
+
+        with self.lock:
+            if n_results < 1 or self.size < 1:
+                return [[] for _ in range(len(query_instances))]
+
+            if subset_ids is not None:
+                # точный перебор только по строкам заданного подмножества
+                candidate_rows = np.array(sorted(set(
+                    self.id_index[id] for id in subset_ids if id in self.id_index)), dtype=np.int64)
+                scores = queries @ self.matrix[candidate_rows].T
+                return self._format_output(
+                    [self._top_k(q_scores, candidate_rows, n_results) for q_scores in scores], includes)
+
+            if not self._use_ivf():
+                all_rows = np.arange(self.size)
+                scores = queries @ self.matrix[:self.size].T
+                return self._format_output(
+                    [self._top_k(q_scores, all_rows, n_results) for q_scores in scores], includes)
+
+            top_results = []
+            probes = np.argsort(-(queries @ self.centroids.T), axis=1)[:, :self.ivf_nprobe]
+            assignments = self.assignments[:self.size]
+            for query, q_probes in zip(queries, probes):
+                probe_mask = np.zeros(self.centroids.shape[0], dtype=bool)
+                probe_mask[q_probes] = True
+                candidate_rows = np.flatnonzero(probe_mask[assignments])
+                if candidate_rows.shape[0] < n_results:
+                    # в просмотренных кластерах недостаточно кандидатов: точный перебор
+                    candidate_rows = np.arange(self.size)
+                q_scores = self.matrix[candidate_rows] @ query
+                top_results.append(self._top_k(q_scores, candidate_rows, n_results))
+
+            return self._format_output(top_results, includes)
+
+    def get_embeddings_matrix(self, ids: List[str], batch_size: int = 512) -> Tuple[np.ndarray, np.ndarray]:
+        # эмбеддинги уже находятся в памяти: строки матрицы выбираются напрямую, без кэширования
+        for id in ids:
+            if type(id) is not str:
+                raise ValueError
+
+        with self.lock:
+            rows = np.array([self.id_index.get(id, -1) for id in ids], dtype=np.int64)
+            found = rows >= 0
+            dim = self.matrix.shape[1] if self.matrix is not None else 0
+            matrix = np.zeros((len(ids), dim), dtype=np.float32)
+            if found.any():
+                matrix[found] = self.matrix[rows[found]]
+            return matrix, found
+
+    def _format_output(self, top_results: List[Tuple[np.ndarray, np.ndarray]],
+                       includes: List[str]) -> List[List[Tuple[float, VectorDBInstance]]]:
+        # ip-сходство приводится к шкале расстояний [distances], как и в остальных коннекторах
+        return [[(1 - float(score), self._restore_instance(int(row), includes)) for row, score in zip(rows, scores)]
+                for rows, scores in top_results]
+
+    def count_items(self) -> int:
+        return self.size
+
+    def item_exist(self, id: str) -> bool:
+        # validation
+        if type(id) is not str:
+            raise ValueError
+        return id in self.id_index
+
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        # validation
+        for id in ids:
+            if type(id) is not str:
+                raise ValueError
+        return set(id for id in ids if id in self.id_index)
+
+    def clear(self) -> None:
+        with self.lock:
+            self._reset()
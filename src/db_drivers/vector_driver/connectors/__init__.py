@@ -1,2 +1,3 @@
 from .ChromaConnector import ChromaConnection, DEFAULT_CHROMA_CONFIG
 from .MilvusConnector import MilvusConnector, DEFAULT_MILVUS_CONFIG
+from .NumpyConnector import NumpyVectorConnector, DEFAULT_NUMPY_CONFIG
@@ -1,37 +1,282 @@
 from dataclasses import dataclass, field
 from sentence_transformers import SentenceTransformer
-from typing import Dict, List
+from typing import Dict, List, Tuple, Union
+from collections import OrderedDict
+import importlib.util
+import numpy as np
+import threading
+import torch
+import hashlib
+import json
+import os
 
 from src.utils.device_utils import get_device
 
+EMBEDDER_BACKENDS = ['torch', 'torch_int8', 'onnx']
+# параметры encode, которые не влияют на значения векторных представлений (и поэтому не входят в ключ кэша)
+CACHE_NEUTRAL_ENCODE_KWARGS = {'batch_size', 'show_progress_bar', 'device', 'convert_to_numpy', 'convert_to_tensor'}
+
 @dataclass
 class EmbedderModelConfig:
+    """Конфигурация embedder-модели.
+
+    :param model_name_or_path: Название/путь к embedder-модели (sentence-transformers). Значение по умолчанию 'intfloat/multilingual-e5-small'.
+    :type model_name_or_path: str
+    :param prompts: Префиксы-промпты, которые добавляются к запросам (query) и документам (document).
+    :type prompts: Dict
+    :param device: Устройство, на котором запускается модель. Значение по умолчанию определяется get_device-функцией.
+    :type device: str
+    :param normalize_embeddings: Если True, то векторные представления нормализуются. Значение по умолчанию True.
+    :type normalize_embeddings: bool
+    :param cache_size: Максимальное количество векторных представлений, которые хранятся в LRU-кэше в оперативной памяти. Если 0 и cache_path равен None, то кэш не используется. Значение по умолчанию 0.
+    :type cache_size: int
+    :param cache_path: Путь к директории, в которой хранятся (в формате float16) векторные представления, посчитанные ранее. Если None, то векторные представления хранятся только в оперативной памяти. Значение по умолчанию None.
+    :type cache_path: str
+    :param backend: Способ запуска модели: 'torch' - исходная модель; 'torch_int8' - модель с динамической int8-квантизацией линейных слоёв (только CPU); 'onnx' - ONNX Runtime (только CPU; если onnxruntime/optimum не установлены, то используется 'torch_int8'). Значение по умолчанию 'torch'.
+    :type backend: str
+    """
     model_name_or_path: str = 'intfloat/multilingual-e5-small'
     prompts: Dict = field(default_factory=lambda: {"query": "query: ", "document": "passage: "})
     device: str = field(default_factory=get_device)
     normalize_embeddings: bool = True
+    cache_size: int = 0
+    cache_path: str = None
+    backend: str = 'torch'
+
+class EmbeddingCache:
+    """Кэш векторных представлений текстов: LRU-кэш в оперативной памяти перед (опциональным) хранилищем на диске.
+    Хранилище на диске состоит из файла с векторами в формате float16 (читается через mmap) и jsonl-индекса с ключами строк.
+
+    :param max_size: Максимальное количество векторных представлений в LRU-кэше. Значение по умолчанию 100000.
+    :type max_size: int
+    :param path: Путь к директории хранилища на диске. Если None, то хранилище на диске не используется. Значение по умолчанию None.
+    :type path: str
+    """
+    DATA_FILE = 'embeddings.f16'
+    INDEX_FILE = 'index.jsonl'
+    META_FILE = 'meta.json'
+
+    def __init__(self, max_size: int = 100000, path: str = None) -> None:
+        self.max_size = max_size
+        self.path = path
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits, self.disk_hits, self.misses = 0, 0, 0
+
+        self.dim = None
+        self.disk_index = dict()
+        self.disk_data = None
+        if self.path is not None:
+            self._open_disk_store()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, text: str) -> Tuple[str, str, str]:
+        return model, prompt, hashlib.sha1(text.encode()).hexdigest()
+
+    def _open_disk_store(self) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        meta_path = os.path.join(self.path, self.META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r') as f:
+                self.dim = json.load(f)['dim']
+
+        index_path, data_path = os.path.join(self.path, self.INDEX_FILE), os.path.join(self.path, self.DATA_FILE)
+        if self.dim is not None and os.path.exists(index_path) and os.path.exists(data_path):
+            with open(index_path, 'r') as f:
+                lines = f.readlines()
+            stored_rows = os.path.getsize(data_path) // (2 * self.dim)
+
+            # после прерванной записи индекс и файл с векторами могут не совпадать по длине: лишнее отбрасывается
+            rows = min(len(lines), stored_rows)
+            if len(lines) != rows:
+                with open(index_path, 'w') as f:
+                    f.writelines(lines[:rows])
+            if os.path.getsize(data_path) != rows * 2 * self.dim:
+                os.truncate(data_path, rows * 2 * self.dim)
+
+            for row, line in enumerate(lines[:rows]):
+                self.disk_index[tuple(json.loads(line))] = row
+
+    def _read_disk_row(self, row: int) -> np.ndarray:
+        if self.disk_data is None or row >= self.disk_data.shape[0]:
+            self.disk_data = np.memmap(
+                os.path.join(self.path, self.DATA_FILE), dtype=np.float16, mode='r', shape=(len(self.disk_index), self.dim))
+        return np.array(self.disk_data[row], dtype=np.float32)
+
+    def _write_disk_rows(self, keys: List[Tuple[str, str, str]], embeddings: List[np.ndarray]) -> None:
+        if self.dim is None:
+            self.dim = len(embeddings[0])
+            with open(os.path.join(self.path, self.META_FILE), 'w') as f:
+                json.dump({'dim': self.dim}, f)
+
+        matrix = np.asarray(embeddings, dtype=np.float16)
+        if matrix.shape[1] != self.dim:
+            raise ValueError(matrix.shape)
+
+        # сначала дописываются векторы, затем индекс: так индекс не ссылается на несуществующие строки
+        with open(os.path.join(self.path, self.DATA_FILE), 'ab') as f:
+            f.write(matrix.tobytes())
+        with open(os.path.join(self.path, self.INDEX_FILE), 'a') as f:
+            for key in keys:
+                f.write(json.dumps(list(key)) + '\n')
+
+        for key in keys:
+            self.disk_index[key] = len(self.disk_index)
+
+    def _put_memory(self, key: Tuple[str, str, str], embedding: np.ndarray) -> None:
+        self.entries[key] = embedding
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def get_many(self, keys: List[Tuple[str, str, str]]) -> List[Union[None, np.ndarray]]:
+        output = []
+        with self.lock:
+            for key in keys:
+                embedding = self.entries.get(key, None)
+                if embedding is not None:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                elif key in self.disk_index:
+                    embedding = self._read_disk_row(self.disk_index[key])
+                    self._put_memory(key, embedding)
+                    self.disk_hits += 1
+                else:
+                    self.misses += 1
+                output.append(embedding)
+        return output
+
+    def put_many(self, keys: List[Tuple[str, str, str]], embeddings: List[np.ndarray]) -> None:
+        with self.lock:
+            new_keys, new_keys_set, new_embeddings = [], set(), []
+            for key, embedding in zip(keys, embeddings):
+                self._put_memory(key, embedding)
+                if self.path is not None and key not in self.disk_index and key not in new_keys_set:
+                    new_keys_set.add(key)
+                    new_keys.append(key)
+                    new_embeddings.append(embedding)
+            if len(new_keys):
+                self._write_disk_rows(new_keys, new_embeddings)
+
+    def get_stats(self) -> Dict[str, Union[int, float]]:
+        with self.lock:
+            requests = self.hits + self.disk_hits + self.misses
+            return {'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses,
+                    'hit_rate': (self.hits + self.disk_hits) / requests if requests > 0 else 0.0,
+                    'memory_size': len(self.entries), 'disk_size': len(self.disk_index)}
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.hits, self.disk_hits, self.misses = 0, 0, 0
 
 class EmbedderModel:
 
     def __init__(self, config: EmbedderModelConfig = None) -> None:
         self.config = EmbedderModelConfig() if config is None else config
-        self.model = SentenceTransformer(
-            config.model_name_or_path, device=config.device,
-            prompts=config.prompts
+        self.backend = None
+        self.model = self.load_model()
+
+        self.cache = None
+        if self.config.cache_size > 0 or self.config.cache_path is not None:
+            self.cache = EmbeddingCache(max_size=self.config.cache_size, path=self.config.cache_path)
+
+    def load_model(self) -> SentenceTransformer:
+        """Метод предназначен для загрузки embedder-модели в соответствии с текущей конфигурацией (в т.ч. с заданным backend).
+
+        :return: Загруженная модель.
+        :rtype: SentenceTransformer
+        """
+        backend = self.config.backend
+        if backend not in EMBEDDER_BACKENDS:
+            raise ValueError(backend)
+        if backend != 'torch' and self.config.device != 'cpu':
+            raise ValueError(f"backend '{backend}' is supported only on cpu, got device '{self.config.device}'")
+
+        if backend == 'onnx':
+            if importlib.util.find_spec('onnxruntime') is not None and importlib.util.find_spec('optimum') is not None:
+                self.backend = backend
+                return SentenceTransformer(
+                    self.config.model_name_or_path, device=self.config.device,
+                    prompts=self.config.prompts, backend='onnx')
+            print("onnxruntime/optimum are not available, 'torch_int8' backend is used instead of 'onnx'")
+            backend = 'torch_int8'
+
+        model = SentenceTransformer(
+            self.config.model_name_or_path, device=self.config.device,
+            prompts=self.config.prompts
         )
+        if backend == 'torch_int8':
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        self.backend = backend
+        return model
+
+    def _encode_matrix(self, texts: List[str], prompt_name: str = None, **kwargs) -> np.ndarray:
+        # векторные представления возвращаются одной float32-матрицей (строка - текст)
+        if prompt_name is not None:
+            kwargs['prompt_name'] = prompt_name
+        if len(texts) < 1:
+            return np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        kwargs['normalize_embeddings'] = kwargs.get('normalize_embeddings', self.config.normalize_embeddings)
+        if self.cache is None:
+            output = self.model.encode(texts, **kwargs)
+            return np.asarray(output, dtype=np.float32)
+
+        keys = [EmbeddingCache.make_key(*self._get_cache_key_prefix(kwargs), text) for text in texts]
+        embeddings = self.cache.get_many(keys)
+
+        # модель векторизует только промахи кэша (без повторов)
+        missed = OrderedDict()
+        for idx, embedding in enumerate(embeddings):
+            if embedding is None:
+                missed.setdefault(keys[idx], texts[idx])
+        if len(missed):
+            output = self.model.encode(list(missed.values()), **kwargs)
+            new_embeddings = dict(zip(missed.keys(), np.asarray(output, dtype=np.float32)))
+            self.cache.put_many(list(new_embeddings.keys()), list(new_embeddings.values()))
+            embeddings = [new_embeddings[key] if embedding is None else embedding for key, embedding in zip(keys, embeddings)]
+
+        return np.stack(embeddings).astype(np.float32, copy=False)
+
+    def _get_cache_key_prefix(self, encode_kwargs: Dict) -> Tuple[str, str]:
+        # в ключ входят модель (с учётом backend и параметров encode, влияющих на результат), префикс-промпт и хеш текста
+        key_kwargs = {'normalize_embeddings', 'prompt', 'prompt_name'}
+        options = {k: v for k, v in encode_kwargs.items() if k not in CACHE_NEUTRAL_ENCODE_KWARGS and k not in key_kwargs}
+        model_key = f"{self.config.model_name_or_path}:{int(encode_kwargs['normalize_embeddings'])}:{self.backend}"
+        if len(options):
+            model_key += ':' + json.dumps(options, sort_keys=True, default=str)
+
+        # явно заданный prompt заменяет префикс, выбранный по prompt_name
+        prompt_name = encode_kwargs.get('prompt_name', None)
+        prompt = encode_kwargs.get('prompt', self.config.prompts.get(prompt_name, '') if prompt_name is not None else '')
+        return model_key, prompt
+
+    @staticmethod
+    def _to_dtype(matrix: np.ndarray, dtype: type) -> np.ndarray:
+        if np.dtype(dtype) not in [np.dtype(np.float32), np.dtype(np.float16)]:
+            raise ValueError(dtype)
+        return np.ascontiguousarray(matrix, dtype=dtype)
 
     def encode(self, queries: List[str], **kwargs) -> List[List[float]]:
-        output = self.model.encode(
-            queries, normalize_embeddings=self.config.normalize_embeddings, **kwargs)
-        return [list(obj.astype(float)) for obj in output]
+        return [list(obj.astype(float)) for obj in self._encode_matrix(queries, **kwargs)]
 
     def encode_queries(self, queries: List[str], **kwargs) -> List[List[float]]:
-        output = self.model.encode(queries, prompt_name='query',
-                                 normalize_embeddings=self.config.normalize_embeddings, **kwargs)
-        return [list(obj.astype(float)) for obj in output]
+        return [list(obj.astype(float)) for obj in self._encode_matrix(queries, prompt_name='query', **kwargs)]
 
     def encode_passages(self, passages: List[str], **kwargs) -> List[List[float]]:
-        output = self.model.encode(passages, prompt_name='document',
-                                 normalize_embeddings=self.config.normalize_embeddings,
-                                 **kwargs)
-        return [list(obj.astype(float)) for obj in output]
+        return [list(obj.astype(float)) for obj in self._encode_matrix(passages, prompt_name='document', **kwargs)]
+
+    def encode_np(self, queries: List[str], dtype: type = np.float32, **kwargs) -> np.ndarray:
+        """Аналог encode-метода, который возвращает векторные представления в виде непрерывной numpy-матрицы (float32 или float16)."""
+        return self._to_dtype(self._encode_matrix(queries, **kwargs), dtype)
+
+    def encode_queries_np(self, queries: List[str], dtype: type = np.float32, **kwargs) -> np.ndarray:
+        """Аналог encode_queries-метода, который возвращает векторные представления в виде непрерывной numpy-матрицы (float32 или float16)."""
+        return self._to_dtype(self._encode_matrix(queries, prompt_name='query', **kwargs), dtype)
+
+    def encode_passages_np(self, passages: List[str], dtype: type = np.float32, **kwargs) -> np.ndarray:
+        """Аналог encode_passages-метода, который возвращает векторные представления в виде непрерывной numpy-матрицы (float32 или float16)."""
+        return self._to_dtype(self._encode_matrix(passages, prompt_name='document', **kwargs), dtype)
+
+    def get_cache_stats(self) -> Dict[str, Union[int, float]]:
+        return dict() if self.cache is None else self.cache.get_stats()
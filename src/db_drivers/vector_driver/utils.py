@@ -1,6 +1,9 @@
 from abc import  abstractmethod
 from dataclasses import dataclass, field, asdict
-from typing import Dict, List, Tuple, Union
+from typing import Dict, List, Tuple, Union, Set
+from collections import OrderedDict
+import threading
+import numpy as np
 
 from ..utils import AbstractDatabaseConnection, BaseDatabaseConfig
 
@@ -18,6 +21,51 @@ class VectorDBInstance:
     def dict(self):
         return {k: v for k, v in asdict(self).items()}
 
+def format_embedding(embedding: Union[List[float], np.ndarray]) -> Union[List[float], np.ndarray]:
+    # numpy-векторы (в т.ч. float16) приводятся к непрерывным float32-векторам, списки передаются без изменений
+    if isinstance(embedding, np.ndarray):
+        return np.ascontiguousarray(embedding, dtype=np.float32)
+    return embedding
+
+class StoredEmbeddingsCache:
+    """LRU-кэш эмбеддингов, уже сохранённых в векторной бд (ключ - идентификатор объекта).
+    Используется для повторного скоринга одних и тех же объектов без обращения к бд.
+
+    :param max_size: Максимальное количество хранимых эмбеддингов. Значение по умолчанию 20000.
+    :type max_size: int
+    """
+    def __init__(self, max_size: int = 20000) -> None:
+        self.max_size = max_size
+        self.storage = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_many(self, ids: List[str]) -> Dict[str, np.ndarray]:
+        found = dict()
+        with self.lock:
+            for id in ids:
+                embedding = self.storage.get(id, None)
+                if embedding is not None:
+                    self.storage.move_to_end(id)
+                    found[id] = embedding
+        return found
+
+    def put_many(self, embeddings: Dict[str, np.ndarray]) -> None:
+        with self.lock:
+            for id, embedding in embeddings.items():
+                self.storage[id] = embedding
+                self.storage.move_to_end(id)
+            while len(self.storage) > self.max_size:
+                self.storage.popitem(last=False)
+
+    def drop(self, ids: List[str]) -> None:
+        with self.lock:
+            for id in ids:
+                self.storage.pop(id, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.storage.clear()
+
 class AbstractVectorDatabaseConnection(AbstractDatabaseConnection):
     @abstractmethod
     def retrieve(self, query_instances: List[VectorDBInstance], n_results: int = 50, subset_ids: Union[None, List[str]] = None,
@@ -28,3 +76,111 @@ class AbstractVectorDatabaseConnection(AbstractDatabaseConnection):
     @abstractmethod
     def upsert(self, items: List[VectorDBInstance]) -> None:
         pass
+
+    @abstractmethod
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        """Метод предназначен для проверки на наличие набора объектов в бд за один запрос.
+
+        :param ids: Идентификаторы объектов.
+        :type ids: List[str]
+        :return: Подмножество идентификаторов из ids, которые присутствуют в бд.
+        :rtype: Set[str]
+        """
+        pass
+
+    def retrieve_batch(
+            self, queries: Union[np.ndarray, List[List[float]], List[VectorDBInstance]], n_results: int = 50,
+            subset_ids: Union[None, List[str]] = None, includes: List[str] = ['embeddings', 'documents', 'metadatas'],
+            batch_size: int = 256) -> List[List[Tuple[float, VectorDBInstance]]]:
+        """Метод предназначен для извлечения N ближайших сущностей сразу для набора query-векторов:
+        вместо отдельного обращения к бд на каждый query-вектор выполняется один многовекторный поиск на батч.
+
+        :param queries: Матрица query-векторов, список query-векторов или список VectorDBInstance-объектов.
+        :type queries: Union[np.ndarray, List[List[float]], List[VectorDBInstance]]
+        :param n_results: Количество извлекаемых сущностей на каждый query-вектор. Значение по умолчанию 50.
+        :type n_results: int
+        :param subset_ids: Идентификаторы объектов, среди которых выполняется поиск. Значение по умолчанию None (поиск по всей бд).
+        :type subset_ids: Union[None, List[str]]
+        :param includes: Поля, которые нужно вернуть для найденных объектов. Значение по умолчанию ['embeddings', 'documents', 'metadatas'].
+        :type includes: List[str]
+        :param batch_size: Максимальное количество query-векторов в одном запросе к бд. Значение по умолчанию 256.
+        :type batch_size: int
+        :return: Для каждого query-вектора (в исходном порядке) - список пар (расстояние, объект), отсортированный по возрастанию расстояния.
+        :rtype: List[List[Tuple[float, VectorDBInstance]]]
+        """
+        query_instances = [query if isinstance(query, VectorDBInstance) else VectorDBInstance(embedding=query)
+                           for query in queries]
+
+        output = []
+        for start in range(0, len(query_instances), batch_size):
+            output += self.retrieve(
+                query_instances[start:start+batch_size], n_results=n_results,
+                subset_ids=subset_ids, includes=includes)
+        return output
+
+    def get_embeddings_matrix(self, ids: List[str], batch_size: int = 512) -> Tuple[np.ndarray, np.ndarray]:
+        """Метод предназначен для получения сохранённых эмбеддингов объектов в виде float32-матрицы.
+        Эмбеддинги запрашиваются из бд батчами и кэшируются в памяти (если у коннектора есть stored_embeddings_cache).
+
+        :param ids: Идентификаторы объектов.
+        :type ids: List[str]
+        :param batch_size: Максимальное количество идентификаторов в одном запросе к бд. Значение по умолчанию 512.
+        :type batch_size: int
+        :return: Матрица эмбеддингов (строки выровнены по ids, для отсутствующих объектов - нулевые) и булева маска найденных объектов.
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        # validation
+        for id in ids:
+            if type(id) is not str:
+                raise ValueError
+
+        cache = getattr(self, 'stored_embeddings_cache', None)
+        embeddings = cache.get_many(ids) if cache is not None else dict()
+
+        missed_ids = list(dict.fromkeys(id for id in ids if id not in embeddings))
+        for start in range(0, len(missed_ids), batch_size):
+            fetched = {item.id: np.asarray(item.embedding, dtype=np.float32)
+                       for item in self.read(missed_ids[start:start+batch_size], includes=['embeddings'])}
+            embeddings.update(fetched)
+            if cache is not None:
+                cache.put_many(fetched)
+
+        dim = len(next(iter(embeddings.values()))) if len(embeddings) else 0
+        matrix = np.zeros((len(ids), dim), dtype=np.float32)
+        found = np.zeros(len(ids), dtype=bool)
+        for row, id in enumerate(ids):
+            embedding = embeddings.get(id, None)
+            if embedding is not None:
+                matrix[row] = embedding
+                found[row] = True
+
+        return matrix, found
+
+    def score_ids(self, query_vecs: Union[np.ndarray, List[List[float]]], ids: List[str]) -> np.ndarray:
+        """Метод предназначен для скоринга заданного набора объектов бд относительно query-векторов без обхода индекса:
+        сохранённые эмбеддинги объектов извлекаются по идентификаторам, после чего считается скалярное произведение.
+
+        :param query_vecs: Query-вектор или матрица query-векторов.
+        :type query_vecs: Union[np.ndarray, List[List[float]]]
+        :param ids: Идентификаторы объектов, которые нужно оценить.
+        :type ids: List[str]
+        :return: Матрица скалярных произведений [similarity] размера (количество query-векторов, len(ids)). Для отсутствующих в бд объектов значение равно np.nan.
+        :rtype: np.ndarray
+        """
+        # validation
+        if not isinstance(query_vecs, (np.ndarray, list, tuple)):
+            raise ValueError
+        queries = np.asarray(query_vecs, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        if queries.ndim != 2:
+            raise ValueError
+
+        matrix, found = self.get_embeddings_matrix(ids)
+        scores = np.full((queries.shape[0], len(ids)), np.nan, dtype=np.float32)
+        if found.any():
+            if matrix.shape[1] != queries.shape[1]:
+                raise ValueError
+            scores[:, found] = queries @ matrix[found].T
+
+        return scores
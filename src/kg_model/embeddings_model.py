@@ -1,5 +1,8 @@
 from dataclasses import dataclass, field
-from typing import List, Dict, Set, Union
+from typing import List, Dict, Set, Union, Iterator, Tuple
+from time import time
+import threading
+import queue
 import math
 from tqdm import tqdm
 import torch
@@ -34,12 +37,44 @@ class EmbeddingsModelConfig:
     :type log: Logger
     :param verbose: Если True, то информация о поведении класса будет сохраняться в stdout и файл-журналирования (log), иначе только в файл. Значение по умолчанию False.
     :type verbose: bool
+    :param encode_batch_size: Размер батча, с которым embedder-модель векторизует строковые представления объектов. Значение по умолчанию 16.
+    :type encode_batch_size: int
+    :param pipelined_ingestion: Если True, то подготовка строковых представлений, их векторизация и запись в векторные бд при добавлении квадруплетов выполняются конвейером (параллельно, в отдельных потоках), иначе последовательно. Значение по умолчанию False.
+    :type pipelined_ingestion: bool
+    :param pipeline_queue_size: Максимальное количество батчей в очереди между соседними стадиями конвейера. Значение по умолчанию 4.
+    :type pipeline_queue_size: int
     """
     nodesdb_driver_config: VectorDriverConfig = field(default_factory=lambda: NODES_DB_DEFAULT_DRIVER_CONFIG)
     quadrupletsdb_driver_config: VectorDriverConfig = field(default_factory=lambda: QUADRUPLETS_DB_DEFAULT_DRIVER_CONFIG)
     embedder_config: EmbedderModelConfig = field(default_factory=lambda: EmbedderModelConfig())
     log: Logger = field(default_factory=lambda: Logger(EMBEDDINGS_MODEL_LOG_PATH))
     verbose: bool = False
+    encode_batch_size: int = 16
+    pipelined_ingestion: bool = False
+    pipeline_queue_size: int = 4
+
+@dataclass
+class IngestionStageStats:
+    """Статистика одной стадии конвейера добавления данных в векторную структуру.
+
+    :param items: Количество обработанных объектов.
+    :type items: int
+    :param batches: Количество обработанных батчей.
+    :type batches: int
+    :param busy_time: Суммарное время работы стадии (без ожидания в очередях), в секундах.
+    :type busy_time: float
+    """
+    items: int = 0
+    batches: int = 0
+    busy_time: float = 0.0
+
+    def update(self, items: int, elapsed_time: float) -> None:
+        self.items += items
+        self.batches += 1
+        self.busy_time += elapsed_time
+
+    def items_per_second(self) -> float:
+        return self.items / self.busy_time if self.busy_time > 0 else 0.0
 
 class EmbeddingsModel:
     """Структура данных для хранения информации в векторном формате.
@@ -55,6 +90,7 @@ class EmbeddingsModel:
             'quadruplets': VectorDriver.connect(config.quadrupletsdb_driver_config)}
 
         self.embedder = EmbedderModel(config.embedder_config)
+        self.ingestion_stats = dict()
 
     def create_quadruplets(self, quadruplets:List[Quadruplet], create_nodes:bool=True, batch_size:int=128, status_bar: bool = True)-> Dict[str, Set[str]]:
         """Метод предназначен для добавления информации, представленной в виде списка квадруплетов, в векторную структуру.
@@ -73,22 +109,48 @@ class EmbeddingsModel:
         unique_relation_ids, unique_node_ids = set(), set()
         existed_relation_ids, existed_node_ids = set(), set()
 
+        prepared_batches = self._prepare_batches(
+            quadruplets, create_nodes, batch_size, status_bar,
+            unique_relation_ids, unique_node_ids, existed_relation_ids, existed_node_ids)
+        if self.config.pipelined_ingestion:
+            self.ingestion_stats = self._run_ingestion_pipeline(prepared_batches)
+        else:
+            for db_type, ids, stringified_instances, metadatas in prepared_batches:
+                self.create_instances(db_type, ids, stringified_instances, metadatas)
+
+        self.log(f"all/unique/existed relations - {len(quadruplets)}/{len(unique_relation_ids)}/{len(existed_relation_ids)}", verbose=self.config.verbose)
+        self.log(f"all/unique/existed nodes - {len(quadruplets)*2}/{len(unique_node_ids)}/{len(existed_node_ids)}", verbose=self.config.verbose)
+        self.log("Quadruplets were successfully added to vector-model!", verbose=self.config.verbose)
+        return {'nodes': existed_node_ids, 'quadruplets': existed_relation_ids}
+
+    def _prepare_batches(self, quadruplets: List[Quadruplet], create_nodes: bool, batch_size: int, status_bar: bool,
+                         unique_relation_ids: Set[str], unique_node_ids: Set[str],
+                         existed_relation_ids: Set[str], existed_node_ids: Set[str]) -> Iterator[Tuple[str, List[str], List[str], List[Dict[str,Union[str,int,float]]]]]:
+        # отбирает ещё не сохранённые в векторной структуре квадруплеты/вершины и формирует их строковые представления;
+        # переданные множества идентификаторов заполняются по ходу обработки батчей
         batch_count = math.ceil(len(quadruplets) / batch_size)
         process = tqdm(range(batch_count)) if status_bar else range(batch_count)
         for batch_idx in process:
             relation_ids, relation_strs, relation_metdatas = list(), list(), list()
             node_ids, node_strs, node_metadatas = list(), list(), list()
 
-            for quadruplet_idx in range(batch_idx*batch_size, (batch_idx+1)*batch_size):
-                if quadruplet_idx >= len(quadruplets):
-                    break
-
-                cur_quadruplet = quadruplets[quadruplet_idx]
+            # наличие объектов батча в векторных бд проверяется одним запросом на каждую бд
+            batch_quadruplets = quadruplets[batch_idx*batch_size:(batch_idx+1)*batch_size]
+            batch_stored_relation_ids = self.vectordbs['quadruplets'].existing_ids(
+                list({q.relation.id for q in batch_quadruplets} - unique_relation_ids))
+            batch_stored_node_ids = set()
+            if create_nodes:
+                batch_node_ids = set()
+                for q in batch_quadruplets:
+                    batch_node_ids.update([q.start_node.id, q.end_node.id] + ([q.time.id] if q.time is not None else []))
+                batch_stored_node_ids = self.vectordbs['nodes'].existing_ids(list(batch_node_ids - unique_node_ids))
+
+            for cur_quadruplet in batch_quadruplets:
                 cur_rel_id = cur_quadruplet.relation.id
-                _, quadruplet_str =  QuadrupletCreator.stringify(cur_quadruplet) if cur_quadruplet.stringified is None else (None, cur_quadruplet.stringified)
                 if cur_rel_id not in unique_relation_ids:
                     unique_relation_ids.add(cur_rel_id)
-                    if ((cur_rel_id not in existed_relation_ids) and (not self.vectordbs['quadruplets'].item_exist(cur_rel_id))):
+                    if ((cur_rel_id not in existed_relation_ids) and (cur_rel_id not in batch_stored_relation_ids)):
+                        _, quadruplet_str =  QuadrupletCreator.stringify(cur_quadruplet) if cur_quadruplet.stringified is None else (None, cur_quadruplet.stringified)
                         existed_relation_ids.add(cur_rel_id)
                         relation_ids.append(cur_quadruplet.relation.id)
                         relation_strs.append(quadruplet_str)
@@ -103,21 +165,17 @@ class EmbeddingsModel:
                     for node in nodes_to_add:
                         if node.id not in unique_node_ids:
                             unique_node_ids.add(node.id)
-                            _, node_str = NodeCreator.stringify(node) if node.stringified is None else (None, node.stringified)
-                            if ((node.id not in existed_node_ids) and (not self.vectordbs['nodes'].item_exist(node.id))):
+                            if ((node.id not in existed_node_ids) and (node.id not in batch_stored_node_ids)):
+                                _, node_str = NodeCreator.stringify(node) if node.stringified is None else (None, node.stringified)
                                 existed_node_ids.add(node.id)
                                 node_ids.append(node.id)
                                 node_strs.append(node_str)
                                 node_metadatas.append(dict())
 
-            self.create_stringified_quadruplets(
-                relation_ids, relation_strs, relation_metdatas,
-                node_ids, node_strs, node_metadatas)
-
-        self.log(f"all/unique/existed relations - {len(quadruplets)}/{len(unique_relation_ids)}/{len(existed_relation_ids)}", verbose=self.config.verbose)
-        self.log(f"all/unique/existed nodes - {len(quadruplets)*2}/{len(unique_node_ids)}/{len(existed_node_ids)}", verbose=self.config.verbose)
-        self.log("Quadruplets were successfully added to vector-model!", verbose=self.config.verbose)
-        return {'nodes': existed_node_ids, 'quadruplets': existed_relation_ids}
+            if len(relation_ids):
+                yield 'quadruplets', relation_ids, relation_strs, relation_metdatas
+            if create_nodes and len(node_ids):
+                yield 'nodes', node_ids, node_strs, node_metadatas
 
     def delete_quadruplets(self, quadruplets: List[Quadruplet], delete_info: Dict[int, Dict[str,bool]] = dict()) -> None:
         """Метод предназначен для удаления информации, представленной в виде списка квадруплетов, из векторной структуры.
@@ -187,15 +245,105 @@ class EmbeddingsModel:
         :param stringified_instances: Строковые представления объектов, которые будут сохранены в хранилище.
         :type stringified_instances: List[str]
         """
+        self._empty_device_cache()
+        formated_instances = self._encode_instances(ids, stringified_instances, metadatas)
+        self.vectordbs[db_type].create(formated_instances)
+
+    def _empty_device_cache(self) -> None:
         # Clear cache for different device types (CUDA/MPS/CPU)
         if torch.cuda.is_available():
             torch.cuda.empty_cache()
         elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
             torch.mps.empty_cache()
-        embs = self.embedder.encode_passages(stringified_instances, batch_size=16)
-        formated_instances = [VectorDBInstance(id=id, document=doc, embedding=emb, metadata={'id': id, **metad})
-                            for id, doc, emb, metad in zip(ids, stringified_instances, embs, metadatas)]
-        self.vectordbs[db_type].create(formated_instances)
+
+    def _encode_instances(self, ids: List[str], stringified_instances: List[str], metadatas: List[Dict[str,Union[str,int,float]]]) -> List[VectorDBInstance]:
+        embs = self.embedder.encode_passages_np(stringified_instances, batch_size=self.config.encode_batch_size)
+        return [VectorDBInstance(id=id, document=doc, embedding=emb, metadata={'id': id, **metad})
+                for id, doc, emb, metad in zip(ids, stringified_instances, embs, metadatas)]
+
+    def _run_ingestion_pipeline(self, prepared_batches: Iterator[Tuple[str, List[str], List[str], List[Dict[str,Union[str,int,float]]]]]) -> Dict[str, Dict[str, float]]:
+        """Метод предназначен для конвейерного добавления подготовленных батчей в векторную структуру.
+        Подготовка батчей (prepare) выполняется в отдельном потоке, векторизация (encode) - в текущем потоке,
+        запись в векторные бд (write) - в отдельном потоке. Стадии связаны ограниченными очередями,
+        поэтому быстрая стадия ожидает медленную, а не накапливает данные в памяти.
+
+        :param prepared_batches: Итератор по батчам вида (тип бд, идентификаторы, строковые представления, метаданные).
+        :type prepared_batches: Iterator[Tuple[str, List[str], List[str], List[Dict[str,Union[str,int,float]]]]]
+        :return: Статистика по стадиям конвейера: количество объектов/батчей, время работы и пропускная способность (объектов в секунду).
+        :rtype: Dict[str, Dict[str, float]]
+        """
+        encode_queue = queue.Queue(maxsize=self.config.pipeline_queue_size)
+        write_queue = queue.Queue(maxsize=self.config.pipeline_queue_size)
+        stats = {stage: IngestionStageStats() for stage in ['prepare', 'encode', 'write']}
+        errors = []
+
+        # при ошибке на любой стадии остальные стадии дочитывают свои очереди до маркера конца (None),
+        # чтобы ни один поток не остался заблокированным на put/get
+        def prepare() -> None:
+            try:
+                while not errors:
+                    s_time = time()
+                    batch = next(prepared_batches, None)
+                    if batch is None:
+                        break
+                    stats['prepare'].update(len(batch[1]), time() - s_time)
+                    encode_queue.put(batch)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                encode_queue.put(None)
+
+        def write() -> None:
+            while True:
+                item = write_queue.get()
+                if item is None:
+                    break
+                if errors:
+                    continue
+                try:
+                    s_time = time()
+                    db_type, formated_instances = item
+                    self.vectordbs[db_type].create(formated_instances)
+                    stats['write'].update(len(formated_instances), time() - s_time)
+                except Exception as e:
+                    errors.append(e)
+
+        s_time = time()
+        workers = [threading.Thread(target=prepare), threading.Thread(target=write)]
+        for worker in workers:
+            worker.start()
+
+        self._empty_device_cache()
+        while True:
+            batch = encode_queue.get()
+            if batch is None:
+                break
+            if errors:
+                continue
+            try:
+                enc_s_time = time()
+                db_type, ids, stringified_instances, metadatas = batch
+                formated_instances = self._encode_instances(ids, stringified_instances, metadatas)
+                stats['encode'].update(len(formated_instances), time() - enc_s_time)
+                write_queue.put((db_type, formated_instances))
+            except Exception as e:
+                errors.append(e)
+        write_queue.put(None)
+
+        for worker in workers:
+            worker.join()
+        total_time = time() - s_time
+
+        if errors:
+            raise errors[0]
+
+        formated_stats = {stage: {'items': stage_stats.items, 'batches': stage_stats.batches, 'time': stage_stats.busy_time,
+                                  'items_per_second': stage_stats.items_per_second()} for stage, stage_stats in stats.items()}
+        formated_stats['total'] = {'items': stats['write'].items, 'time': total_time,
+                                   'items_per_second': stats['write'].items / total_time if total_time > 0 else 0.0}
+        for stage, stage_stats in formated_stats.items():
+            self.log(f"ingestion stage '{stage}': {stage_stats['items']} items, {stage_stats['time']:.3f} s, {stage_stats['items_per_second']:.1f} items/s", verbose=self.config.verbose)
+        return formated_stats
 
     def delete_instances(self, db_type: str, ids: List[str]) -> None:
         """Метод предназначен для удаления набора объектов из определённой бд векторной структуры: из бд с квадруплетами или вершинами.
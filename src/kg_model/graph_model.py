@@ -20,10 +20,13 @@ class GraphModelConfig:
     :type log: Logger
     :param verbose: Если, True, то информация о поведении класса будет сохраняться в stdout и файл-журналирования (log), иначе только в файл. Значение по умолчанию False.
     :type verbose: bool
+    :param create_batch_size: Количество квадруплетов, которое по умолчанию сохраняется за одну create-операцию. Значение по умолчанию 64.
+    :type create_batch_size: int
     """
     driver_config: GraphDriverConfig = field(default_factory=lambda: GRAPH_DB_DEFAULT_DRIVER_CONFIG)
     log: Logger = field(default_factory=lambda: Logger(GRAPH_MODEL_LOG_PATH))
     verbose: bool = False
+    create_batch_size: int = 64
 
 class GraphModel:
     """Структура данных, предназначенная для хранения информации в формате графа.
@@ -36,12 +39,12 @@ class GraphModel:
         self.log = config.log
         self.db_conn = GraphDriver.connect(self.config.driver_config)
 
-    def create_quadruplets(self, quadruplets: List[Quadruplet], batch_size: int = 64, status_bar: bool = True) -> Dict[str, Set[str]]:
+    def create_quadruplets(self, quadruplets: List[Quadruplet], batch_size: int = None, status_bar: bool = True) -> Dict[str, Set[str]]:
         """Метод предназначен для сохранения информации, представленной в виде списка квадруплетов, в графовую структуру.
 
         :param quadruplets: Набор квадруплетов для добавления в графовую структуру.
         :type quadruplets: List[Quadruplet]
-        :param batch_size: Количество квадруплетов, которое будет сохраняться за одну create-операцию. Значение по умолчанию 64.
+        :param batch_size: Количество квадруплетов, которое будет сохраняться за одну create-операцию. Если None, то используется значение create_batch_size из конфигурации. Значение по умолчанию None.
         :type batch_size: int, optional
         :param status_bar: Если True, то во время исполнения операции в stdout будет выводиться статус её исполнения, иначе False. Значение по умолчанию True.
         :type status_bar: bool, optional
@@ -53,6 +56,8 @@ class GraphModel:
         existed_quadruplet_ids, existed_node_ids = set(), set()
         created_quadruplet_ids, created_node_ids = set(), set()
 
+        if batch_size is None:
+            batch_size = self.config.create_batch_size
         batches = math.ceil(len(quadruplets) / batch_size)
         process = tqdm(range(batches)) if status_bar else range(batches)
         for batch_idx in process:
@@ -60,19 +65,26 @@ class GraphModel:
             creation_info = dict()
             quadruplets_to_create = list()
             info_counter = -1
-            for quadruplet_idx in range(batch_idx*batch_size, (batch_idx+1)*batch_size, 1):
-                if quadruplet_idx >= len(quadruplets):
-                    break
 
-                cur_quadruplet = quadruplets[quadruplet_idx]
+            # существование квадруплетов/вершин батча проверяется двумя запросами к бд
+            batch_quadruplets = quadruplets[batch_idx*batch_size:(batch_idx+1)*batch_size]
+            batch_quadruplet_ids = [q.id for q in batch_quadruplets if q.id not in unique_quadruplet_ids]
+            batch_existed_quadruplet_ids = self.db_conn.items_exist(batch_quadruplet_ids, id_type='quadruplet')
+
+            batch_node_ids = set()
+            for q in batch_quadruplets:
+                if q.id in batch_existed_quadruplet_ids:
+                    continue
+                batch_node_ids.update([q.start_node.id, q.end_node.id] + ([q.time.id] if q.time is not None else []))
+            batch_existed_node_ids = self.db_conn.items_exist(list(batch_node_ids - unique_node_ids), id_type='node')
+
+            for cur_quadruplet in batch_quadruplets:
                 if cur_quadruplet.id in unique_quadruplet_ids:
                     continue
                 else:
                     unique_quadruplet_ids.add(cur_quadruplet.id)
 
-                if self.db_conn.item_exist(cur_quadruplet.id, id_type='quadruplet'): 
-                    # Note: underlying driver might validly accept 'quadruplet' if dynamic, or treat it same as 'triplet' logic
-                    # We assume driver is flexible or needs update. For now changing param to 'quadruplet'
+                if cur_quadruplet.id in batch_existed_quadruplet_ids:
                     existed_quadruplet_ids.add(cur_quadruplet.id)
                     continue
                 else:
@@ -85,7 +97,7 @@ class GraphModel:
                 s_node_id = cur_quadruplet.start_node.id
                 if (s_node_id not in unique_node_ids):
                     unique_node_ids.add(s_node_id)
-                    if not self.db_conn.item_exist(s_node_id, id_type='node'):
+                    if s_node_id not in batch_existed_node_ids:
                         creation_info[info_counter]['s_node'] = True
                         created_node_ids.add(s_node_id)
                     else:
@@ -95,7 +107,7 @@ class GraphModel:
                 e_node_id = cur_quadruplet.end_node.id
                 if (e_node_id not in unique_node_ids):
                     unique_node_ids.add(e_node_id)
-                    if not self.db_conn.item_exist(e_node_id, id_type='node'):
+                    if e_node_id not in batch_existed_node_ids:
                         creation_info[info_counter]['e_node'] = True
                         created_node_ids.add(e_node_id)
                     else:
@@ -106,7 +118,7 @@ class GraphModel:
                     t_node_id = cur_quadruplet.time.id
                     if (t_node_id not in unique_node_ids):
                         unique_node_ids.add(t_node_id)
-                        if not self.db_conn.item_exist(t_node_id, id_type='node'):
+                        if t_node_id not in batch_existed_node_ids:
                             creation_info[info_counter]['t_node'] = True
                             created_node_ids.add(t_node_id)
                         else:
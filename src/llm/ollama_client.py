@@ -1,17 +1,144 @@
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.exceptions import TimeoutError as Urllib3TimeoutError
+import threading
+import time
 import json
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple, Union
+
+from ..agents.connectors.OLlamaConnector import DEFAULT_OLLAMA_CONFIG
+
+# Retry only transient failures: connection errors and overloaded/unavailable server responses.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Generation of long answers may take minutes: the read timeout matches the one of OLlamaConnector.
+DEFAULT_TIMEOUT = (3.05, DEFAULT_OLLAMA_CONFIG.ext_params['timeout'])
+
+class CountingRetry(Retry):
+    """
+    Retry policy that counts the retries performed by the calling thread. urllib3 does not expose the retry
+    history when a request finally fails, so OllamaClient reads the number of retries from this counter.
+    """
+    local = threading.local()
+
+    @classmethod
+    def reset_count(cls) -> None:
+        cls.local.count = 0
+
+    @classmethod
+    def get_count(cls) -> int:
+        return getattr(cls.local, 'count', 0)
+
+    def increment(self, *args, **kwargs):
+        # raises MaxRetryError when retries are exhausted: the final failure is not a retry
+        new_retry = super().increment(*args, **kwargs)
+        CountingRetry.local.count = CountingRetry.get_count() + 1
+        return new_retry
 
 class OllamaClient:
-    def __init__(self, base_url: str = "http://localhost:11434", model: str = "llama3"):
+    """
+    HTTP client for the Ollama generate API. Requests go through a long-lived requests.Session whose
+    connection pool keeps connections to the server alive between calls.
+
+    pool_size: maximum number of pooled (keep-alive) connections; extra concurrent requests wait for a free one.
+    max_retries / backoff_factor: retries of connection errors and RETRY_STATUSES responses with exponential backoff.
+        Read errors and read timeouts are not retried: the server may already be generating an answer for
+        the (non-idempotent) POST request, so resending it would duplicate the work.
+    timeout: (connect, read) timeout in seconds. Timed out requests are logged and counted in the 'timeouts' metric.
+    """
+    def __init__(self, base_url: str = "http://localhost:11434", model: str = "llama3", pool_size: int = 4,
+                 max_retries: int = 2, backoff_factor: float = 0.5, timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT):
+        if pool_size < 1 or max_retries < 0:
+            raise ValueError
         self.base_url = base_url
         self.model = model
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
         self.logger = logging.getLogger(__name__)
 
+        self.stats_lock = threading.Lock()
+        self.in_flight = 0
+        self.stats = {'requests': 0, 'errors': 0, 'timeouts': 0, 'retries': 0, 'latency_sec': 0.0, 'max_latency_sec': 0.0,
+                      'max_in_flight': 0, 'saturated': 0}
+        self.open_connection()
+
+    def open_connection(self):
+        retry = CountingRetry(
+            total=self.max_retries, connect=self.max_retries, read=0, other=0, status=self.max_retries,
+            backoff_factor=self.backoff_factor, status_forcelist=RETRY_STATUSES,
+            # generation requests are POSTs, for which urllib3 does not retry RETRY_STATUSES responses by default
+            allowed_methods=None, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, pool_block=True, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close_connection(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close_connection()
+
+    def get_stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Returns request metrics: request/error/timeout/retry counts, total, mean and max latency (seconds),
+        current and max in-flight requests and the number of requests that had to wait for a pooled connection.
+        """
+        with self.stats_lock:
+            stats = {**self.stats, 'in_flight': self.in_flight, 'pool_size': self.pool_size}
+        stats['mean_latency_sec'] = stats['latency_sec'] / stats['requests'] if stats['requests'] > 0 else 0.0
+        return stats
+
+    def post(self, path: str, payload: Dict[str, Any]) -> requests.Response:
+        with self.stats_lock:
+            self.in_flight += 1
+            self.stats['requests'] += 1
+            self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self.in_flight)
+            # all pooled connections are busy: the request waits until one is released
+            if self.in_flight > self.pool_size:
+                self.stats['saturated'] += 1
+
+        failed, timed_out = True, False
+        s_time = time.monotonic()
+        CountingRetry.reset_count()
+        try:
+            response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+            failed = not response.ok
+            return response
+        except requests.exceptions.RequestException as e:
+            timed_out = self.is_timeout(e)
+            raise
+        finally:
+            retries = CountingRetry.get_count()
+            latency = time.monotonic() - s_time
+            with self.stats_lock:
+                self.in_flight -= 1
+                self.stats['errors'] += int(failed)
+                self.stats['timeouts'] += int(timed_out)
+                self.stats['retries'] += retries
+                self.stats['latency_sec'] += latency
+                self.stats['max_latency_sec'] = max(self.stats['max_latency_sec'], latency)
+
+    @staticmethod
+    def is_timeout(error: requests.exceptions.RequestException) -> bool:
+        """
+        Checks whether a request failed because of a connect or read timeout. Read timeouts are not retried,
+        so urllib3 reports them as MaxRetryError, which requests raises as ConnectionError rather than Timeout.
+        """
+        if isinstance(error, requests.exceptions.Timeout):
+            return True
+        reason = getattr(error.args[0], 'reason', None) if len(error.args) > 0 else None
+        return isinstance(reason, Urllib3TimeoutError)
+
     def generate(self, prompt: str, system: Optional[str] = None, json_mode: bool = False) -> str:
-        url = f"{self.base_url}/api/generate"
         payload = {
             "model": self.model,
             "prompt": prompt,
@@ -23,12 +150,15 @@ class OllamaClient:
             payload["format"] = "json"
 
         try:
-            response = requests.post(url, json=payload)
+            response = self.post("/api/generate", payload)
             response.raise_for_status()
             result = response.json()
             return result.get("response", "")
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"Error communicating with Ollama: {e}")
+            if self.is_timeout(e):
+                self.logger.error(f"Ollama request timed out (timeout={self.timeout}), returning an empty answer: {e}")
+            else:
+                self.logger.error(f"Error communicating with Ollama: {e}")
             return ""
 
     def extract_search_parameters(self, question: str) -> Dict[str, Any]:
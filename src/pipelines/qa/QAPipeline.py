@@ -1,5 +1,9 @@
 from dataclasses import dataclass, field
-from typing import Tuple, Union
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeoutError
+from typing import Tuple, Union, List, Iterable
+from time import monotonic
+import threading
+import queue
 
 from .configs import QA_MAIN_LOG_PATH
 from .kg_reasoning import KnowledgeGraphReasonerConfig, KnowledgeGraphReasoner
@@ -8,9 +12,18 @@ from .query_preprocessing.utils import QueryPreprocessingInfo
 from .answers_aggregation import AnswersAggregator, AnswersAggregatorConfig
 from ...kg_model import KnowledgeGraphModel
 from ...utils import Logger, ReturnStatus, ReturnInfo
+from ...utils.errors import STATUS_MESSAGE
 from ...utils.data_structs import create_id
 from ...db_drivers.kv_driver import KeyValueDriverConfig
 
+class SubQueryTask:
+    def __init__(self, sub_query: str) -> None:
+        self.sub_query = sub_query
+        self.future: Future = None
+        self.started = threading.Event()
+        self.start_time: float = None
+        self.cancel_event = threading.Event()
+
 @dataclass
 class QAPipelineConfig:
     """
@@ -22,6 +35,14 @@ class QAPipelineConfig:
     :type reasoner_config: KnowledgeGraphReasonerConfig, optional
     :param aggregator_config: ... Значение по умолчанию AnswersAggregatorConfig().
     :type aggregator_config: AnswersAggregatorConfig, optional
+    :param max_workers: Максимальное количество под-вопросов, обрабатываемых одновременно. Значение по умолчанию 1.
+    :type max_workers: int, optional
+    :param subquery_timeout: Максимальное время (в секундах) обработки одного под-вопроса, отсчитываемое с момента начала его обработки. Если None, то время не ограничивается. Значение по умолчанию None.
+    :type subquery_timeout: Union[float, None], optional
+    :param degrade_on_timeout: Если True, то для под-вопроса, не обработанного за subquery_timeout, используется ответ degraded_answer, иначе QA-конвейер завершается со статусом ReturnStatus.subquery_timeout. Значение по умолчанию False.
+    :type degrade_on_timeout: bool, optional
+    :param degraded_answer: Ответ, подставляемый вместо ответа на под-вопрос, не обработанный за subquery_timeout. Значение по умолчанию "".
+    :type degraded_answer: str, optional
     :param log: Отладочный класс для журналирования/мониторинга поведения инициализируемой компоненты. Значение по умолчанию Logger(LOG_PATH).
     :type log: Logger
     :param verbose: Если True, то информация о поведении класса будет сохраняться в stdout и файл-журналирования (log), иначе только в файл. Значение по умолчанию False.
@@ -31,6 +52,11 @@ class QAPipelineConfig:
     reasoner_config: KnowledgeGraphReasonerConfig = field(default_factory=lambda: KnowledgeGraphReasonerConfig())
     aggregator_config: AnswersAggregatorConfig = field(default_factory=lambda: AnswersAggregatorConfig())
 
+    max_workers: int = 1
+    subquery_timeout: Union[float, None] = None
+    degrade_on_timeout: bool = False
+    degraded_answer: str = ""
+
     log: Logger = field(default_factory=lambda: Logger(QA_MAIN_LOG_PATH))
     verbose: bool = False
 
@@ -47,6 +73,9 @@ class QAPipeline:
 
     def __init__(self, kg_model: KnowledgeGraphModel, config: QAPipelineConfig = QAPipelineConfig(),
                  cache_kvdriver_config: Union[KeyValueDriverConfig, None] = None) -> None:
+        if config.max_workers < 1:
+            raise ValueError
+
         self.config = config
         self.kg_model = kg_model
         self.log = config.log
@@ -59,6 +88,15 @@ class QAPipeline:
         self.kg_reasoner = KnowledgeGraphReasoner(kg_model, self.config.reasoner_config, cache_kvdriver_config)
         self.answers_aggregator = AnswersAggregator(self.config.aggregator_config, cache_kvdriver_config)
 
+        # компоненты KG-reasoner'а (kv-кеши, агенты) не потокобезопасны, поэтому каждый
+        # одновременно обрабатываемый под-вопрос получает свой экземпляр reasoner'а
+        self.cache_kvdriver_config = cache_kvdriver_config
+        self.kg_reasoners = [self.kg_reasoner]
+        self.idle_kg_reasoners = queue.SimpleQueue()
+        self.idle_kg_reasoners.put(self.kg_reasoner)
+        self.reasoners_lock = threading.Lock()
+        self.executor = None
+
         self.log = self.config.log
         self.verbose = self.config.verbose
 
@@ -67,9 +105,86 @@ class QAPipeline:
         """
         if self.config.preprocessor_config is not None:
             self.query_preprocessor.clear_kv_caches()
-        self.kg_reasoner.clear_kv_caches()
+        for kg_reasoner in self.kg_reasoners:
+            kg_reasoner.clear_kv_caches()
         self.answers_aggregator.clear_kv_caches()
 
+    def acquire_kg_reasoner(self) -> KnowledgeGraphReasoner:
+        try:
+            return self.idle_kg_reasoners.get_nowait()
+        except queue.Empty:
+            pass
+
+        # свободных reasoner'ов нет: одновременно выполняется не более max_workers задач,
+        # поэтому создаётся не более max_workers reasoner'ов
+        kg_reasoner = KnowledgeGraphReasoner(self.kg_model, self.config.reasoner_config, self.cache_kvdriver_config)
+        with self.reasoners_lock:
+            self.kg_reasoners.append(kg_reasoner)
+        return kg_reasoner
+
+    def get_executor(self) -> ThreadPoolExecutor:
+        with self.reasoners_lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.config.max_workers)
+            return self.executor
+
+    def reason_sub_queries(self, sub_queries: List[str]) -> Iterable[Tuple[str, ReturnInfo]]:
+        """Метод предназначен для генерации ответов на под-вопросы с помощью KG-reasoner'а. Если max_workers равен 1
+        и subquery_timeout не задан, то под-вопросы обрабатываются последовательно по мере итерирования по результату,
+        иначе - в пуле из max_workers потоков. Обработка под-вопроса, превысившего subquery_timeout, прерывается
+        на ближайшей контрольной точке reasoner'а. Порядок ответов совпадает с порядком под-вопросов.
+
+        :param sub_queries: Под-вопросы на естественном языке.
+        :type sub_queries: List[str]
+        :return: Ответы на под-вопросы и статусы их генерации.
+        :rtype: Iterable[Tuple[str, ReturnInfo]]
+        """
+        if len(sub_queries) < 1:
+            return []
+        if self.config.max_workers == 1 and self.config.subquery_timeout is None:
+            return map(self.kg_reasoner.perform, sub_queries)
+
+        executor = self.get_executor()
+        tasks = [SubQueryTask(sub_query) for sub_query in sub_queries]
+        for task in tasks:
+            task.future = executor.submit(self._perform_sub_query, task)
+
+        results = []
+        try:
+            for task in tasks:
+                results.append(self._wait_sub_query(task))
+        finally:
+            # при ошибке оставшиеся под-вопросы не обрабатываются
+            for task in tasks[len(results):]:
+                task.future.cancel()
+                task.cancel_event.set()
+        return results
+
+    def _perform_sub_query(self, task: SubQueryTask) -> Tuple[str, ReturnInfo]:
+        task.start_time = monotonic()
+        task.started.set()
+        kg_reasoner = self.acquire_kg_reasoner()
+        kg_reasoner.reasoner.cancel_event = task.cancel_event
+        try:
+            return kg_reasoner.perform(task.sub_query)
+        finally:
+            kg_reasoner.reasoner.cancel_event = None
+            self.idle_kg_reasoners.put(kg_reasoner)
+
+    def _wait_sub_query(self, task: SubQueryTask) -> Tuple[str, ReturnInfo]:
+        if self.config.subquery_timeout is None:
+            return task.future.result()
+
+        # время ожидания отсчитывается с момента начала обработки под-вопроса
+        task.started.wait()
+        remaining_time = task.start_time + self.config.subquery_timeout - monotonic()
+        try:
+            return task.future.result(timeout=max(remaining_time, 0))
+        except FutureTimeoutError:
+            task.cancel_event.set()
+            return None, ReturnInfo(status=ReturnStatus.subquery_timeout,
+                                    message=STATUS_MESSAGE[ReturnStatus.subquery_timeout])
+
     def answer(self, query: str) -> Tuple[str, ReturnInfo]:
         """Метод предназначен для генерации ответа на user-вопрос. Ответ обуславливается на информацию из имеющегося графа знаний.
 
@@ -113,11 +228,15 @@ class QAPipeline:
             else:
                 raise ValueError
 
-            for i, cur_sub_query in enumerate(sub_queries):
+            sub_results = self.reason_sub_queries(sub_queries)
+            for i, (cur_sub_query, (cur_sub_answer, reasoner_info)) in enumerate(zip(sub_queries, sub_results)):
                 self.log(f"Processing sub_query #{i}: {cur_sub_query}", verbose=self.config.verbose)
-                cur_sub_answer, reasoner_info = self.kg_reasoner.perform(cur_sub_query)
                 self.log(f"RESULT: {cur_sub_answer}", verbose=self.config.verbose)
-                if reasoner_info.status != ReturnStatus.success:
+                if reasoner_info.status == ReturnStatus.subquery_timeout and self.config.degrade_on_timeout:
+                    self.log("Operation timed out. Using degraded answer", verbose=self.verbose)
+                    info.occurred_warning.append(ReturnStatus.subquery_timeout)
+                    sub_answers.append(self.config.degraded_answer)
+                elif reasoner_info.status != ReturnStatus.success:
                     self.log("Operation ended with error!", verbose=self.verbose)
                     info = reasoner_info
                     break
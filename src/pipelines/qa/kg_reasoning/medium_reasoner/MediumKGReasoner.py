@@ -1,5 +1,7 @@
 from dataclasses import dataclass, field
-from typing import Tuple, List
+from typing import Tuple, List, Dict
+from time import monotonic
+import threading
 
 from .searchplan_enhancer import SearchPlanEnhancerConfig, SearchPlanEnhancer
 from .entities_extractor import EntitiesExtractorConfig, EntitiesExtractor
@@ -43,6 +45,8 @@ class MediumKGReasonerConfig(BaseKGReasonerConfig):
 
     :param max_searchplan_steps: ...
     :type max_searchplan_steps: int, optional
+    :param cluequeries_max_workers: Максимальное количество одновременных запросов к LLM-агенту при генерации ответов на clue-queries одного шага поиска. Значение по умолчанию 4.
+    :type cluequeries_max_workers: int, optional
 
     :param answer_something: ...
     :type answer_something: bool, optional
@@ -65,6 +69,7 @@ class MediumKGReasonerConfig(BaseKGReasonerConfig):
     answer_generator_config: AnswerGeneratorConfig = field(default_factory=lambda: AnswerGeneratorConfig())
 
     max_searchplan_steps: int = 5
+    cluequeries_max_workers: int = 4
     answer_something: bool = True
 
     log: Logger = field(default_factory=lambda: Logger(MDGR_MAIN_LOG_PATH))
@@ -103,38 +108,59 @@ class MediumKGReasoner(AbstractKGReasoner):
         self.log = config.log
         self.verbose = config.verbose
 
+        self.stats_lock = threading.Lock()
+        self.stats = {'queries': 0, 'iterations': 0, 'iterations_sec': 0.0, 'max_iteration_sec': 0.0}
+
+    def update_stats(self, iterations_sec: List[float]) -> None:
+        with self.stats_lock:
+            self.stats['queries'] += 1
+            self.stats['iterations'] += len(iterations_sec)
+            self.stats['iterations_sec'] += sum(iterations_sec)
+            self.stats['max_iteration_sec'] = max([self.stats['max_iteration_sec']] + iterations_sec)
+
+    def get_stats(self) -> Dict[str, float]:
+        """Метод предназначен для получения статистики по времени (wall-clock) выполнения итераций поиска.
+
+        :return: Количество обработанных вопросов, количество итераций поиска, суммарное, среднее и максимальное время итерации (в секундах).
+        :rtype: Dict[str, float]
+        """
+        with self.stats_lock:
+            stats = dict(self.stats)
+        stats['mean_iteration_sec'] = stats['iterations_sec'] / stats['iterations'] if stats['iterations'] > 0 else 0.0
+        return stats
+
     def clear_kv_caches(self):
         # planing
-        self.searchplan_enhancer.cachekv.kv_conn.clear()
-        self.searchplan_enhancer.plan_initialing_solver.cachekv.kv_conn.clear()
-        self.searchplan_enhancer.enhance_classify_solver.cachekv.kv_conn.clear()
-        self.searchplan_enhancer.plan_enhancing_solver.cachekv.kv_conn.clear()
+        self.searchplan_enhancer.cachekv.clear()
+        self.searchplan_enhancer.plan_initialing_solver.cachekv.clear()
+        self.searchplan_enhancer.enhance_classify_solver.cachekv.clear()
+        self.searchplan_enhancer.plan_enhancing_solver.cachekv.clear()
 
         # matching
-        self.entities_extractor.cachekv.kv_conn.clear()
-        self.entities_extractor.entities_extractor_solver.cachekv.kv_conn.clear()
+        self.entities_extractor.cachekv.clear()
+        self.entities_extractor.entities_extractor_solver.cachekv.clear()
         #
-        self.entities2nodes_matcher.cachekv.kv_conn.clear()
+        self.entities2nodes_matcher.cachekv.clear()
 
         # retrieving
-        self.cluequeries_generator.cachekv.kv_conn.clear()
-        self.cluequeries_generator.cluequery_gen_solver.cachekv.kv_conn.clear()
+        self.cluequeries_generator.cachekv.clear()
+        self.cluequeries_generator.cluequery_gen_solver.cachekv.clear()
         #
-        self.knowledge_retriever.cachekv.kv_conn.clear()
-        self.knowledge_retriever.graph_retriever.cachekv.kv_conn.clear()
+        self.knowledge_retriever.cachekv.clear()
+        self.knowledge_retriever.graph_retriever.cachekv.clear()
         if self.knowledge_retriever.triplets_filter is not None:
-            self.knowledge_retriever.triplets_filter.cachekv.kv_conn.clear()
+            self.knowledge_retriever.triplets_filter.cachekv.clear()
         #
-        self.clueanswer_generator.cachekv.kv_conn.clear()
-        self.clueanswer_generator.clueanswer_generator_solver.cachekv.kv_conn.clear()
+        self.clueanswer_generator.cachekv.clear()
+        self.clueanswer_generator.clueanswer_generator_solver.cachekv.clear()
         #
-        self.clueanswers_summariser.cachekv.kv_conn.clear()
-        self.clueanswers_summariser.clueanswers_summ_solver.cachekv.kv_conn.clear()
+        self.clueanswers_summariser.cachekv.clear()
+        self.clueanswers_summariser.clueanswers_summ_solver.cachekv.clear()
 
         # answering
-        self.answer_generator.cachekv.kv_conn.clear()
-        self.answer_generator.answer_classify_solver.cachekv.kv_conn.clear()
-        self.answer_generator.answer_gen_solver.cachekv.kv_conn.clear()
+        self.answer_generator.cachekv.clear()
+        self.answer_generator.answer_classify_solver.cachekv.clear()
+        self.answer_generator.answer_gen_solver.cachekv.clear()
 
     def perform(self, query: str) -> Tuple[str, ReturnInfo]:
         self.log("START MEDIUM KG-REASONING...", verbose=self.config.verbose)
@@ -144,7 +170,14 @@ class MediumKGReasoner(AbstractKGReasoner):
         search_plan = SearchPlanInfo(base_query=query)
 
         self.log("Start iterative search...", verbose=self.verbose)
+        iterations_bounds = []
         for search_step in range(self.config.max_searchplan_steps):
+            if self.is_cancelled():
+                self.log("Поиск прерван.", verbose=self.config.verbose)
+                info = self.get_cancelled_info()
+                break
+
+            iterations_bounds.append(monotonic())
             self.log(f"CURRENT SEARCH STEP: {search_step} / {self.config.max_searchplan_steps}", verbose=self.verbose)
 
             self.log("STAGE#1 - SEARCH PLAN INITING/ENHANCING", verbose=self.config.verbose)
@@ -182,22 +215,31 @@ class MediumKGReasoner(AbstractKGReasoner):
 
             self.log("STAGE#4 - RETRIEVING INFORMATION FROM KG BASED ON CLUE-QUERIES", verbose=self.config.verbose)
             clueanswers, error_occurred = [], False
+
+            self.log("STAGE#4.1 - KNOWLEDGE RETRIEVING", verbose=self.config.verbose)
+            retrieved_batch = self.knowledge_retriever.retrieve_batch(cluequeries)
+            # ответы генерируются для clue-queries, предшествующих первой ошибке извлечения (как при последовательной обработке)
+            retrieved_amount = next((j for j, (_, r_info) in enumerate(retrieved_batch) if r_info.status != ReturnStatus.success), len(retrieved_batch))
+
+            self.log("STAGE#4.2 - CLUE-ANSWERS GENERATION", verbose=self.config.verbose)
+            generated_batch = self.clueanswer_generator.perform_batch(
+                search_query, [retrieved_triplets for retrieved_triplets, _ in retrieved_batch[:retrieved_amount]],
+                max_workers=self.config.cluequeries_max_workers)
+
             for j, cur_cluequery in enumerate(cluequeries):
                 self.log(f"Current clue-query ({j} / {len(cluequeries)}): {cur_cluequery.query}", verbose=self.config.verbose)
                 self.log(f"Current clue-query id: {create_id(cur_cluequery.query)}", verbose=self.config.verbose)
 
-                self.log("STAGE#4.1 - KNOWLEDGE RETRIEVING", verbose=self.config.verbose)
-                retrieved_triplets, info = self.knowledge_retriever.retrieve(cur_cluequery)
-                self.log(f"RESULT: {len(retrieved_triplets)}", verbose=self.config.verbose)
+                retrieved_triplets, info = retrieved_batch[j]
+                self.log(f"RETRIEVED: {len(retrieved_triplets)}", verbose=self.config.verbose)
                 for triplet in retrieved_triplets:
                     self.log(f"* {triplet}", verbose=self.config.verbose)
                 if info.status != ReturnStatus.success:
                     error_occurred = True
                     break
 
-                self.log("STAGE#4.2 - CLUE-ANSWER GENERATION", verbose=self.config.verbose)
-                cur_clueanswer, info = self.clueanswer_generator.perform(search_query, retrieved_triplets)
-                self.log(f"RESULT: {cur_clueanswer}", verbose=self.config.verbose)
+                cur_clueanswer, info = generated_batch[j]
+                self.log(f"CLUE-ANSWER: {cur_clueanswer}", verbose=self.config.verbose)
                 if info.status != ReturnStatus.success:
                     error_occurred = True
                     break
@@ -229,6 +271,11 @@ class MediumKGReasoner(AbstractKGReasoner):
             else:
                 self.log("Недостаточно информации для генерации релевантного ответа на вопрос. Продолжаем поиск.", verbose=self.config.verbose)
 
+        iterations_bounds.append(monotonic())
+        iterations_sec = [end - start for start, end in zip(iterations_bounds, iterations_bounds[1:])]
+        self.update_stats(iterations_sec)
+        self.log(f"ITERATIONS_SEC: {', '.join([f'{sec:.3f}' for sec in iterations_sec])}", verbose=self.config.verbose)
+
         self.log("Завершаем поиск.", verbose=self.config.verbose)
         self.log(f"Информация по выполненному поиску: {search_plan}", verbose=self.config.verbose)
         if answer is None and info.status == ReturnStatus.success:
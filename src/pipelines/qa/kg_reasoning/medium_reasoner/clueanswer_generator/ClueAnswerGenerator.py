@@ -1,5 +1,6 @@
 from dataclasses import dataclass, field
 from typing import Tuple, Union, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from copy import deepcopy
 import hashlib
 
@@ -70,8 +71,8 @@ class ClueAnswerGenerator(CacheUtils):
 
         self.log("Выполнение условной генерации ответа на вопрос с помощью LLM-агента...", verbose=self.config.verbose)
         answer, status = self.cagen_solver.solve(
-            lang=self.config.lang, query=query, 
-            triplets=context_triplets)
+            lang=self.config.lang, query=query,
+            quadruplets=context_quadruplets)
 
         if status != ReturnStatus.success:
             info.occurred_warning.append(status)
@@ -84,3 +85,68 @@ class ClueAnswerGenerator(CacheUtils):
         self.log(f"STATUS: {info.status}", verbose=self.config.verbose)
 
         return answer, info
+
+    def perform_batch(self, query: str, context_quadruplets_batch: List[List[Quadruplet]], max_workers: int = 1) -> List[Tuple[str, ReturnInfo]]:
+        """Метод предназначен для генерации ответов на вопрос по нескольким наборам квадруплетов: запросы к LLM-агенту
+        выполняются одновременно (не более max_workers), результаты возвращаются в порядке наборов квадруплетов.
+        Как и при последовательной обработке, генерация останавливается на первом (в порядке наборов) неуспешном ответе:
+        ещё не начатые запросы по последующим наборам отменяются, а результаты обрезаются после него.
+        Одинаковые наборы квадруплетов обрабатываются один раз.
+
+        :param query: Вопрос к системе, для которого необходимо сгенерировать ответы.
+        :type query: str
+        :param context_quadruplets_batch: Наборы квадруплетов в качестве контекста.
+        :type context_quadruplets_batch: List[List[Quadruplet]]
+        :param max_workers: Максимальное количество одновременных запросов к LLM-агенту. Значение по умолчанию 1.
+        :type max_workers: int
+        :return: Для наборов квадруплетов до первого неуспешного ответа включительно кортеж из двух объектов: (1) сгенерированный ответ; (2) статус завершения операции с пояснительной информацией.
+        :rtype: List[Tuple[str, ReturnInfo]]
+        """
+        if max_workers < 1:
+            raise ValueError
+
+        # одинаковые (по ключу кеша) наборы квадруплетов обрабатываются один раз: при одновременной
+        # обработке они не нашли бы в кеше результатов друг друга
+        key_hashes = [CacheKV.get_hash(self.get_cache_key(query, context_quadruplets)) for context_quadruplets in context_quadruplets_batch]
+        unique_idxs, unique_batch = dict(), []
+        for key_hash, context_quadruplets in zip(key_hashes, context_quadruplets_batch):
+            if key_hash not in unique_idxs:
+                unique_idxs[key_hash] = len(unique_batch)
+                unique_batch.append(context_quadruplets)
+
+        unique_outputs = self._perform_unique_batch(query, unique_batch, max_workers)
+
+        outputs, used_idxs = [], set()
+        for key_hash in key_hashes:
+            idx = unique_idxs[key_hash]
+            # повторяющийся набор получает собственную копию результата, как при чтении из кеша
+            outputs.append(deepcopy(unique_outputs[idx]) if idx in used_idxs else unique_outputs[idx])
+            used_idxs.add(idx)
+            if outputs[-1][1].status != ReturnStatus.success:
+                break
+        return outputs
+
+    def _perform_unique_batch(self, query: str, context_quadruplets_batch: List[List[Quadruplet]], max_workers: int) -> List[Tuple[str, ReturnInfo]]:
+        if max_workers == 1 or len(context_quadruplets_batch) < 2:
+            outputs = []
+            for context_quadruplets in context_quadruplets_batch:
+                outputs.append(self.perform(query, context_quadruplets))
+                if outputs[-1][1].status != ReturnStatus.success:
+                    break
+            return outputs
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(context_quadruplets_batch))) as executor:
+            futures = [executor.submit(self.perform, query, context_quadruplets) for context_quadruplets in context_quadruplets_batch]
+            futures_idxs = {future: i for i, future in enumerate(futures)}
+
+            first_error_idx = len(futures)
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                idx = futures_idxs[future]
+                if future.result()[1].status != ReturnStatus.success and idx < first_error_idx:
+                    first_error_idx = idx
+                    for next_future in futures[idx + 1:]:
+                        next_future.cancel()
+
+            return [future.result() for future in futures[:first_error_idx + 1]]
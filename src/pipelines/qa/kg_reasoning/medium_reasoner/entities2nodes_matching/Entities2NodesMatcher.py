@@ -52,17 +52,36 @@ class Entities2NodesMatcher(CacheUtils):
             matched_objects = self.kg_model.nodestree_struct.match_entitie2objects(
                 entitie, distance_threshold=distance_threshold, fetch_k=fetch_k, max_n=max_n)
         else:
-            entitie_embedding = self.kg_model.embeddings_struct.embedder.encode_queries([entitie])[0]
-            entitie_vinstance = VectorDBInstance(embedding=entitie_embedding)
+            matched_objects = self.match_entities2nodes(
+                [entitie], distance_threshold=distance_threshold, max_n=max_n, fetch_k=fetch_k)[0]
 
-            raw_scored_nodes = self.kg_model.embeddings_struct.vectordbs['nodes'].retrieve(
-                query_instances=[entitie_vinstance],n_results=fetch_k, includes=['documents'])[0]
+        return matched_objects
+
+    def match_entities2nodes(self, entities: List[str], distance_threshold: float = 0.4,
+                             max_n: int = 3, fetch_k: int = 50) -> List[List[VectorDBInstance]]:
+        # все сущности кодируются за один проход модели и ищутся в векторной бд одним запросом
+        entities_embeddings = self.kg_model.embeddings_struct.embedder.encode_queries_np(entities)
+        entities_scored_nodes = self.kg_model.embeddings_struct.vectordbs['nodes'].retrieve_batch(
+            entities_embeddings, n_results=fetch_k, includes=['documents'])
+
+        entities_matched_objects = []
+        for raw_scored_nodes in entities_scored_nodes:
             filtered_nodes = list(filter(lambda pair: pair[0] <= distance_threshold, raw_scored_nodes))
 
-            object_nodes = list(filter(lambda pair: self.kg_model.graph_struct.db_conn.get_node_type(pair[1].id) == NodeType.object, filtered_nodes)) 
-            matched_objects = list(map(lambda pair: pair[1], sorted(object_nodes, key=lambda p: p[0], reverse=False)))[:max_n]
+            object_nodes = list(filter(lambda pair: self.kg_model.graph_struct.db_conn.get_node_type(pair[1].id) == NodeType.object, filtered_nodes))
+            entities_matched_objects.append(list(map(lambda pair: pair[1], sorted(object_nodes, key=lambda p: p[0], reverse=False)))[:max_n])
 
-        return matched_objects
+        return entities_matched_objects
+
+    def match_entities2knowledge(self, entities: List[str]) -> Dict[str, List[VectorDBInstance]]:
+        # результаты по сущностям, которых нет в кеше, вычисляются одним батчем и затем кешируются по отдельности
+        unique_entities = list(dict.fromkeys(entities))
+        matched_objects = self.cache_batch_output(
+            lambda args_batch: self.match_entities2nodes(
+                [args[0] for args in args_batch], distance_threshold=self.config.distance_threshold,
+                max_n=self.config.max_n, fetch_k=self.config.fetch_k),
+            [(entitie,) for entitie in unique_entities])
+        return dict(zip(unique_entities, matched_objects))
     
     def perform(self, entities: List[str]) -> Tuple[Dict[str,List[VectorDBInstance]], ReturnInfo]:
         self.log("START ENTITIES2NODES MATCHING...", verbose=self.config.verbose)
@@ -71,12 +90,17 @@ class Entities2NodesMatcher(CacheUtils):
         if len(entities) < 1:
             raise ValueError
         
-        matched_kg_objects = dict()
+        if self.config.use_tree:
+            matched_kg_objects = dict()
+            for entitie in entities:
+                matched_kg_objects[entitie] = self.match_entitie2knowledge(entitie, use_tree=self.config.use_tree,
+                    distance_threshold=self.config.distance_threshold,
+                    max_n=self.config.max_n, fetch_k=self.config.fetch_k)
+        else:
+            matched_kg_objects = self.match_entities2knowledge(entities)
+
         for i, entitie in enumerate(entities):
             self.log(f"Текушая сушность #{i}: {entitie}", verbose=self.verbose)
-            matched_kg_objects[entitie] = self.match_entitie2knowledge(entitie, use_tree=self.config.use_tree, 
-                distance_threshold=self.config.distance_threshold, 
-                max_n=self.config.max_n, fetch_k=self.config.fetch_k)
             str_matchedobjects = ', '.join(list(map(lambda obj: obj.document, matched_kg_objects[entitie])))
             self.log(f"RESULT: {str_matchedobjects}", verbose=self.verbose)
 
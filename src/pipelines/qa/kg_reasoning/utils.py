@@ -1,10 +1,21 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Tuple
+from typing import Tuple, Union
+import threading
 
-from ....utils import ReturnInfo
+from ....utils import ReturnInfo, ReturnStatus
+from ....utils.errors import STATUS_MESSAGE
 
 class AbstractKGReasoner(ABC):
+    # устанавливается QA-конвейером, если ответ на вопрос больше не нужен (например, истекло время ожидания):
+    # reasoner прекращает работу на ближайшей контрольной точке (см. is_cancelled)
+    cancel_event: Union[threading.Event, None] = None
+
+    def is_cancelled(self) -> bool:
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def get_cancelled_info(self) -> ReturnInfo:
+        return ReturnInfo(status=ReturnStatus.subquery_timeout, message=STATUS_MESSAGE[ReturnStatus.subquery_timeout])
 
     @abstractmethod
     def perform(self, query: str) -> Tuple[str, ReturnInfo]:
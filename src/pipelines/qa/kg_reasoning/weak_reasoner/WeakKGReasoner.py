@@ -78,19 +78,19 @@ class WeakKGReasoner(AbstractKGReasoner):
 
     def clear_kv_caches(self) -> None:
         if self.query_parser is not None:
-            self.query_parser.cachekv.kv_conn.clear()
-            self.query_parser.kw_extraction_solver.cachekv.kv_conn.clear()
+            self.query_parser.cachekv.clear()
+            self.query_parser.kw_extraction_solver.cachekv.clear()
 
-            self.knowledge_comparator.cachekv.kv_conn.clear()
+            self.knowledge_comparator.cachekv.clear()
 
-        self.knowledge_retriever.cachekv.kv_conn.clear()
-        self.knowledge_retriever.graph_retriever.cachekv.kv_conn.clear()
+        self.knowledge_retriever.cachekv.clear()
+        self.knowledge_retriever.graph_retriever.cachekv.clear()
 
         if self.knowledge_retriever.triplets_filter is not None:
-            self.knowledge_retriever.triplets_filter.cachekv.kv_conn.clear()
+            self.knowledge_retriever.triplets_filter.cachekv.clear()
 
-        self.answer_generator.cachekv.kv_conn.clear()
-        self.answer_generator.answer_generator_solver.cachekv.kv_conn.clear()
+        self.answer_generator.cachekv.clear()
+        self.answer_generator.answer_generator_solver.cachekv.clear()
 
     def perform(self, query: str) -> Tuple[str, ReturnInfo]:
         self.log("START WEAK KG-REASONING...", verbose=self.config.verbose)
@@ -114,7 +114,10 @@ class WeakKGReasoner(AbstractKGReasoner):
             for node in query_info.linked_nodes:
                 self.log(f"*[{node.id}] {node.document}", verbose=self.config.verbose)
 
-        if self.query_parser is None or info.status == ReturnStatus.success:
+        if self.is_cancelled():
+            self.log("Reasoning was cancelled.", verbose=self.config.verbose)
+            info = self.get_cancelled_info()
+        elif self.query_parser is None or info.status == ReturnStatus.success:
             self.log("STAGE#3 - RETRIEVING RELEVANT TRIPLETS FROM KG", verbose=self.config.verbose)
             retrieved_triplets, info = self.knowledge_retriever.retrieve(query_info)
 
@@ -122,6 +125,10 @@ class WeakKGReasoner(AbstractKGReasoner):
             for triplet in retrieved_triplets:
                 self.log(f"* {triplet}", verbose=self.config.verbose)
 
+        if info.status == ReturnStatus.success and self.is_cancelled():
+            self.log("Reasoning was cancelled.", verbose=self.config.verbose)
+            info = self.get_cancelled_info()
+
         if info.status == ReturnStatus.success:
             self.log("STAGE#4 - ANSWER GENERATION", verbose=self.config.verbose)
             answer, info = self.answer_generator.generate(query_info.query, retrieved_triplets)
@@ -85,12 +85,14 @@ class KnowledgeComparator(CacheUtils):
         info = ReturnInfo()
         linked_nodes_by_entities, linked_nodes, linked_scores = [], [], []
 
-        for entity in query_info.entities:
-            entity_embedding = self.kg_model.embeddings_struct.embedder.encode_queries([entity])[0]
-            entity_instance = VectorDBInstance(embedding=entity_embedding)
-
-            nodes_with_scores = self.kg_model.embeddings_struct.vectordbs['nodes'].retrieve(
-                [entity_instance], n_results=self.config.fetch_n)[0]
+        # все сущности кодируются за один проход модели и ищутся в векторной бд одним запросом
+        entities_nodes_with_scores = []
+        if len(query_info.entities) > 0:
+            entities_embeddings = self.kg_model.embeddings_struct.embedder.encode_queries_np(query_info.entities)
+            entities_nodes_with_scores = self.kg_model.embeddings_struct.vectordbs['nodes'].retrieve_batch(
+                entities_embeddings, n_results=self.config.fetch_n)
+
+        for entity, nodes_with_scores in zip(query_info.entities, entities_nodes_with_scores):
             filtered_nodes = list(filter(lambda node_item: node_item[0] < self.config.threshold, nodes_with_scores))
             cur_linked_nodes = list(map(lambda node_item: node_item[1], filtered_nodes))
             linked_nodes += cur_linked_nodes[:self.config.max_k]
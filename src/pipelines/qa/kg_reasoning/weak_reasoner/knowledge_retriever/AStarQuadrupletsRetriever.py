@@ -166,55 +166,57 @@ class AStarMetrics:
         parent = {s_node_id: None}
         neo4j_queries_counter, passed_nodes_counter = 0, 0
         while queue:
-            #print(len(queue))
-            vertex = queue.popleft()
-            neighbours = self.kg_model.graph_struct.db_conn.get_adjecent_nids(vertex, self.accepted_node_types)
+            # смежные вершины запрашиваются сразу для всего текущего фронта обхода
+            frontier = list(queue)
+            queue.clear()
+            frontier_neighbours = self.kg_model.graph_struct.db_conn.get_adjacent_nids_batch(frontier, self.accepted_node_types)
             neo4j_queries_counter += 1
-            for neighbour in neighbours:
-
-                if neighbour == parent[vertex]:
-                    # пропускаем вершину, из которой пришли
-                    continue
+            for vertex in frontier:
+                for neighbour in frontier_neighbours[vertex]:
+
+                    if neighbour == parent[vertex]:
+                        # пропускаем вершину, из которой пришли
+                        continue
+
+                    if neighbour not in visited:
+                        parent[neighbour] = vertex
+                        D[neighbour] = D[vertex] + 1
+                        visited.add(neighbour)
+                        passed_nodes_counter += 1
+
+                        if self.config.kvdriver_config is not None:
+                            # кешируем кратчайший bfs-путь от s_node_id-стартовой до текущей вершины
+                            pair_id = create_id_for_node_pair(s_node_id, neighbour)
+                            if not self.cache['bfs_short_path'].item_exist(pair_id):
+                                self.cache['bfs_short_path'].create([KeyValueDBInstance(id=pair_id, value=D[neighbour])])
+                                self.cache_info['bfs_short_path']['calc'] += 1
 
-                if neighbour not in visited:
-                    parent[neighbour] = vertex
-                    D[neighbour] = D[vertex] + 1
-                    visited.add(neighbour)
-                    passed_nodes_counter += 1
-
-                    if self.config.kvdriver_config is not None:
-                        # кешируем кратчайший bfs-путь от s_node_id-стартовой до текущей вершины
-                        pair_id = create_id_for_node_pair(s_node_id, neighbour)
-                        if not self.cache['bfs_short_path'].item_exist(pair_id):
-                            self.cache['bfs_short_path'].create([KeyValueDBInstance(id=pair_id, value=D[neighbour])])
-                            self.cache_info['bfs_short_path']['calc'] += 1
-
-                        # кешируем кратчайший bfs-путь от vertex-вершины до его соседа (путь равен 1)
-                        pair_id = create_id_for_node_pair(vertex, neighbour)
-                        if not self.cache['bfs_short_path'].item_exist(pair_id):
-                            self.cache['bfs_short_path'].create([KeyValueDBInstance(id=pair_id, value=1)])
-                            self.cache_info['bfs_short_path']['calc'] += 1
-
-                    if neighbour == e_node_id:
-                        self.log(f"bfs end-node found!", verbose=self.verbose)
-                        self.log(f"bfs graph-db queries: {neo4j_queries_counter}", verbose=self.verbose)
-                        self.log(f"passed nodes: {passed_nodes_counter}", verbose=self.verbose)
-
-                        # костыль
-                        self.cache_info['bfs_short_path']['calc'] -= 1
-
-                        # кешируем кратчайшие bfs-пути от e_node_id-вершины до вершин,
-                        # которые были в кратчайшем пути между s_node_id- и e_node_id-вершинами
-                        reverse_nodes_path = get_nodes_path(parent, neighbour)
-                        for i in range(1,len(reverse_nodes_path)-1):
-                            pair_id = create_id_for_node_pair(reverse_nodes_path[i], neighbour)
+                            # кешируем кратчайший bfs-путь от vertex-вершины до его соседа (путь равен 1)
+                            pair_id = create_id_for_node_pair(vertex, neighbour)
                             if not self.cache['bfs_short_path'].item_exist(pair_id):
-                                self.cache['bfs_short_path'].create([KeyValueDBInstance(id=pair_id, value=i)])
+                                self.cache['bfs_short_path'].create([KeyValueDBInstance(id=pair_id, value=1)])
                                 self.cache_info['bfs_short_path']['calc'] += 1
 
-                        return D[neighbour]
+                        if neighbour == e_node_id:
+                            self.log(f"bfs end-node found!", verbose=self.verbose)
+                            self.log(f"bfs graph-db queries: {neo4j_queries_counter}", verbose=self.verbose)
+                            self.log(f"passed nodes: {passed_nodes_counter}", verbose=self.verbose)
+
+                            # костыль
+                            self.cache_info['bfs_short_path']['calc'] -= 1
+
+                            # кешируем кратчайшие bfs-пути от e_node_id-вершины до вершин,
+                            # которые были в кратчайшем пути между s_node_id- и e_node_id-вершинами
+                            reverse_nodes_path = get_nodes_path(parent, neighbour)
+                            for i in range(1,len(reverse_nodes_path)-1):
+                                pair_id = create_id_for_node_pair(reverse_nodes_path[i], neighbour)
+                                if not self.cache['bfs_short_path'].item_exist(pair_id):
+                                    self.cache['bfs_short_path'].create([KeyValueDBInstance(id=pair_id, value=i)])
+                                    self.cache_info['bfs_short_path']['calc'] += 1
+
+                            return D[neighbour]
 
-                    queue.append(neighbour)
+                        queue.append(neighbour)
 
         # между вершинами нет пути
         self.log(f"bfs not found end-node", verbose=self.verbose)
@@ -236,6 +238,9 @@ class AStarGraphSearchConfig(BaseGraphSearchConfig):
     max_passed_nodes: int = 500
     accepted_node_types: List[NodeType] = field(default_factory=lambda:[NodeType.object, NodeType.hyper, NodeType.episodic, NodeType.time])
     cache_table_name: str = 'qa_astar_q_retriever_cache'
+    # количество вершин из начала очереди, для которых смежные вершины запрашиваются одним запросом
+    # (на результат поиска не влияет, поэтому не участвует в to_str)
+    adjacency_prefetch: int = 32
 
     def to_str(self):
         str_accepted_nodes = ";".join(sorted(list(map(lambda v: v.value, self.accepted_node_types))))
@@ -262,6 +267,7 @@ class AStarGraphSearch:
 
         spare_closest_node_id = start_node_id
         passed_nodes_counter = 0
+        adjacency = dict()
         while len(frontier):
             current_node_id = heapq.heappop(frontier)[1]
             passed_nodes_counter += 1
@@ -283,7 +289,14 @@ class AStarGraphSearch:
                 self.log("FOUND END-NODE", verbose=self.verbose)
                 break
 
-            adj_nodes = self.kg_model.graph_struct.db_conn.get_adjecent_nids(current_node_id, self.config.accepted_node_types)
+            if current_node_id not in adjacency:
+                # вместе с текущей вершиной запрашиваем смежные вершины для ближайших кандидатов из очереди
+                prefetch_ids = [current_node_id]
+                for _, node_id in heapq.nsmallest(max(self.config.adjacency_prefetch - 1, 0), frontier):
+                    if node_id not in adjacency and node_id not in prefetch_ids:
+                        prefetch_ids.append(node_id)
+                adjacency.update(self.kg_model.graph_struct.db_conn.get_adjacent_nids_batch(prefetch_ids, self.config.accepted_node_types))
+            adj_nodes = adjacency[current_node_id]
 
             for adj_n_id in adj_nodes:
 
@@ -387,16 +400,11 @@ class AStarTripletsRetriever(AbstractQuadrupletsRetriever, CacheUtils): # Keepin
         self.log("pair nodes formating...", verbose=self.verbose)
         s_time = time()
         unique_quadruplets = dict()
+        # квадруплеты для всех пар вершин извлекаются одним запросом
+        pairs_quadruplets = self.kg_model.graph_struct.db_conn.get_quadruplets_for_pairs(list(unique_nodes_pairs))
         for nodes_pair in unique_nodes_pairs:
-            # Updating method call
-            quadruplets = self.kg_model.graph_struct.db_conn.get_quadruplets(*nodes_pair)
-            for quadruplet in quadruplets:
-                unique_quadruplets[quadruplet.id] = quadruplet # Key by Quadruplet ID? Or Relation ID like before?
-                # Before: unique_triplets[triplet.relation.id]
-                # With Quadruplets, ID should be on the Quadruplet itself ideally.
-                # Assuming Quadruplet has 'id'. Default to 'id'. 
-                # If Quadruplet inherits or is similar to Triplet, I should check internal structure.
-                # In data_structs.py, I updated Quadruplet to have an ID.
+            for quadruplet in pairs_quadruplets[nodes_pair]:
+                unique_quadruplets[quadruplet.id] = quadruplet
 
         unique_quadruplets = list(unique_quadruplets.values())
 
@@ -105,12 +105,16 @@ class BeamSearchTripletsRetriever(AbstractQuadrupletsRetriever, CacheUtils): # K
         return -np.log(1.0 - raw_score)
 
     def get_available_nids(self, base_nid: str, cur_path_idx: int,
-            traversing_paths: List[TraversingPath], prev_nid: str = None) -> List[str]:
+            traversing_paths: List[TraversingPath], prev_nid: str = None,
+            adjacency: Dict[str, List[str]] = None) -> List[str]:
         if type(base_nid) is not str:
             raise ValueError(f"base_nid: {base_nid} {type(base_nid)}")
 
-        adj_nids = self.kg_model.graph_struct.db_conn.get_adjecent_nids(base_nid, self.config.accepted_node_types)
-        adj_nids = set(adj_nids)
+        # adjacency - заранее полученные (одним запросом для всех путей) смежные вершины
+        if adjacency is not None and base_nid in adjacency:
+            adj_nids = set(adjacency[base_nid])
+        else:
+            adj_nids = set(self.kg_model.graph_struct.db_conn.get_adjecent_nids(base_nid, self.config.accepted_node_types))
         if prev_nid is not None:
             if type(prev_nid) is not str:
                 raise ValueError(f"prev_nid: {prev_nid} {type(prev_nid)}")
@@ -166,15 +170,19 @@ class BeamSearchTripletsRetriever(AbstractQuadrupletsRetriever, CacheUtils): # K
         for step in range(batches):
             cur_rids_batch = r_ids[step * batch_size: (step+1)* batch_size]
 
-            # Use 'quadruplets' collection
-            scored_rels = self.kg_model.embeddings_struct.vectordbs['quadruplets'].retrieve(
-                [query_vinstance], n_results=len(cur_rids_batch), includes=[], subset_ids=cur_rids_batch)[0]
+            # Use 'quadruplets' collection: скоринг известных идентификаторов без обхода векторного индекса
+            similarities = self.kg_model.embeddings_struct.vectordbs['quadruplets'].score_ids(
+                query_vinstance.embedding, cur_rids_batch)[0]
+            # similarity приводится к шкале расстояний [distances], как в выдаче retrieve-метода
+            distances = 1 - similarities
 
-            for raw_score, quadruplet_info in scored_rels:
-                cur_r_id, cur_q_score = (quadruplet_info.id, BeamSearchTripletsRetriever.calculate_quadruplet_score(raw_score))
-                if cur_r_id in rids_to_qids_map: # Should be, given subset_ids
-                    for q_id in rids_to_qids_map[cur_r_id]:
-                        extended_scores_info.append((q_id, shared_q_info[q_id], cur_q_score))
+            for idx in np.argsort(distances, kind='stable'):
+                if np.isnan(distances[idx]):
+                    # отсутствующие в векторной бд идентификаторы пропускаются
+                    continue
+                cur_r_id, cur_q_score = (cur_rids_batch[idx], BeamSearchTripletsRetriever.calculate_quadruplet_score(float(distances[idx])))
+                for q_id in rids_to_qids_map[cur_r_id]:
+                    extended_scores_info.append((q_id, shared_q_info[q_id], cur_q_score))
 
         return extended_scores_info
 
@@ -230,7 +238,7 @@ class BeamSearchTripletsRetriever(AbstractQuadrupletsRetriever, CacheUtils): # K
             unique_qids=set(), accum_score=0.0)]
         ended_paths = []
 
-        query_emb = self.kg_model.embeddings_struct.embedder.encode_queries([query])[0]
+        query_emb = self.kg_model.embeddings_struct.embedder.encode_queries_np([query])[0]
         query_vinstance = VectorDBInstance(embedding=query_emb)
 
         for cur_depth in range(self.config.max_depth):
@@ -243,13 +251,16 @@ class BeamSearchTripletsRetriever(AbstractQuadrupletsRetriever, CacheUtils): # K
                 break
 
             opext_s_time = time()
+            # смежные вершины для tail-вершин всех путей запрашиваются одним запросом
+            tail_nids = list(dict.fromkeys([path_info.path[-1][2] for path_info in traversing_paths]))
+            adjacency = self.kg_model.graph_struct.db_conn.get_adjacent_nids_batch(tail_nids, self.config.accepted_node_types)
             for i in range(len(traversing_paths)):
                 curp_s_time = time()
                 cur_path_info = traversing_paths[i]
                 prev_nid, tail_nid = cur_path_info.path[-1][0], cur_path_info.path[-1][2]
                 self.log(f"Информация по текущему пути:\n* номер: {i}\n* len: {len(cur_path_info.path)}\n* tail_nid: {tail_nid}\n* prev_nid: {prev_nid}", verbose=self.verbose)
 
-                adj_nids = self.get_available_nids(tail_nid, i, traversing_paths, prev_nid=prev_nid)
+                adj_nids = self.get_available_nids(tail_nid, i, traversing_paths, prev_nid=prev_nid, adjacency=adjacency)
                 self.log(f"Смежные вершины: {len(adj_nids)}\n", verbose=self.verbose)
 
                 if len(adj_nids) < 1:
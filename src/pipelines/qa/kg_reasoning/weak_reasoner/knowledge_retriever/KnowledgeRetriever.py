@@ -113,3 +113,45 @@ class KnowledgeRetriever(CacheUtils):
         self.log(f"STATUS: {STATUS_MESSAGE[info.status]}", verbose=self.config.verbose)
 
         return filtered_quadruplets, info
+
+    def retrieve_batch(self, queries_info: List[QueryInfo]) -> List[Tuple[List[Quadruplet], ReturnInfo]]:
+        """Метод предназначен для извлечения релевантных квадруплетов сразу для набора user-вопросов: извлечение и фильтрация
+        выполняются пакетно (векторные представления вопросов вычисляются за один проход модели), результаты кешируются по отдельности.
+
+        :param queries_info: Структуры данных, которые хранят user-вопросы и связанную с ними информацию.
+        :type queries_info: List[QueryInfo]
+        :return: Для каждого вопроса (в исходном порядке) кортеж из двух объектов: (1) список релевантных квадруплетов; (2) статус завершения операции с пояснительной информацией.
+        :rtype: List[Tuple[List[Quadruplet], ReturnInfo]]
+        """
+        if len(queries_info) < 1:
+            return []
+
+        return self.cache_batch_output(
+            lambda args_batch: self._retrieve_batch([args[0] for args in args_batch]),
+            [(query_info,) for query_info in queries_info])
+
+    def _retrieve_batch(self, queries_info: List[QueryInfo]) -> List[Tuple[List[Quadruplet], ReturnInfo]]:
+        self.log("START BATCH KNOWLEDGE RETRIEVING ...", verbose=self.config.verbose)
+        self.log(f"BASE_QUESTIONS: {len(queries_info)}", verbose=self.config.verbose)
+
+        self.log("STAGE #3.1 - QUADRUPLETS EXTRACTION...", verbose=self.config.verbose)
+        quadruplets_batch = self.graph_retriever.get_relevant_quadruplets_batch(queries_info)
+        self.log(f"RESULT: {list(map(len, quadruplets_batch))}", verbose=self.config.verbose)
+
+        self.log("STAGE #3.2 - QUADRUPLETS FILTERING...", verbose=self.config.verbose)
+        if self.quadruplets_filter is not None:
+            filtered_quadruplets_batch = self.quadruplets_filter.apply_filter_batch(queries_info, quadruplets_batch)
+            self.log(f"RESULT: {list(map(len, filtered_quadruplets_batch))}", verbose=self.config.verbose)
+        else:
+            filtered_quadruplets_batch = quadruplets_batch
+            self.log("Stage was omited!", verbose=self.config.verbose)
+
+        outputs = []
+        for filtered_quadruplets in filtered_quadruplets_batch:
+            info = ReturnInfo()
+            if len(filtered_quadruplets) == 0:
+                info.status = ReturnStatus.zero_retrieved_triplets
+                info.message = STATUS_MESSAGE[info.status]
+            outputs.append((filtered_quadruplets, info))
+
+        return outputs
@@ -67,49 +67,59 @@ class NaiveBFSTripletsRetriever(AbstractQuadrupletsRetriever, CacheUtils): # Kee
 
     def search(self, node_id: str) -> List[Quadruplet]:
         traversed_quadruplets = []
-        visited, queue = set(), collections.deque([node_id])
-        visited.add(node_id)
+        visited, frontier = set([node_id]), [node_id]
         D = {node_id: 0}
         parent = {node_id: None}
         neo4j_queries_counter, passed_nodes_counter = 0, 0
         max_pnodes_flag = False
-        while queue:
-            if max_pnodes_flag:
+        while frontier and not max_pnodes_flag:
+            # смежные вершины запрашиваются сразу для всего текущего фронта обхода
+            frontier = [vertex for vertex in frontier if not (self.config.max_depth >= 0 and D[vertex] >= self.config.max_depth)]
+            if not frontier:
+                # ограничиваем глубину обхода
                 break
 
-            vertex = queue.popleft()
+            frontier_neighbours = self.kg_model.graph_struct.db_conn.get_adjacent_nids_batch(frontier, self.config.accepted_node_types)
+            neo4j_queries_counter += 1
 
-            if self.config.max_depth >= 0 and D[vertex] >= self.config.max_depth:
-                # ограничиваем глубину обхода
-                continue
+            next_frontier, traversed_pairs = [], []
+            for vertex in frontier:
+                if max_pnodes_flag:
+                    break
 
-            neighbours = self.kg_model.graph_struct.db_conn.get_adjecent_nids(vertex, self.config.accepted_node_types)
-            neo4j_queries_counter += 1
+                neighbours = frontier_neighbours[vertex]
+                if self.config.max_width >= 0:
+                    # Ограничиваем ширину обхода
+                    neighbours = neighbours[:self.config.max_width]
 
-            if self.config.max_width >= 0:
-                # Ограничиваем ширину обхода
-                neighbours = neighbours[:self.config.max_width]
+                for neighbour in neighbours:
 
-            for neighbour in neighbours:
+                    if neighbour == parent[vertex]:
+                        # пропускаем вершину, из которой пришли
+                        continue
 
-                if neighbour == parent[vertex]:
-                    # пропускаем вершину, из которой пришли
-                    continue
+                    if self.config.max_passed_nodes >= 0 and passed_nodes_counter >= self.config.max_passed_nodes:
+                        # Ограничиваем количество вершин, которое можно обойти
+                        max_pnodes_flag = True
+                        break
 
-                if self.config.max_passed_nodes >= 0 and passed_nodes_counter >= self.config.max_passed_nodes:
-                    # Ограничиваем количество вершин, которое можно обойти
-                    max_pnodes_flag = True
-                    break
+                    if neighbour not in visited:
+                        passed_nodes_counter += 1
+                        parent[neighbour] = vertex
+                        D[neighbour] = D[vertex] + 1
+                        visited.add(neighbour)
+
+                        traversed_pairs.append((vertex, neighbour))
+                        next_frontier.append(neighbour)
 
-                if neighbour not in visited:
-                    passed_nodes_counter += 1
-                    parent[neighbour] = vertex
-                    D[neighbour] = D[vertex] + 1
-                    visited.add(neighbour)
+            if traversed_pairs:
+                # квадруплеты для всех пройденных на текущем слое пар вершин извлекаются одним запросом
+                pairs_quadruplets = self.kg_model.graph_struct.db_conn.get_quadruplets_for_pairs(traversed_pairs)
+                neo4j_queries_counter += 1
+                for pair in traversed_pairs:
+                    traversed_quadruplets += pairs_quadruplets[pair]
 
-                    traversed_quadruplets += self.kg_model.graph_struct.db_conn.get_quadruplets(vertex, neighbour)
-                    neo4j_queries_counter += 1
-                    queue.append(neighbour)
+            frontier = next_frontier
 
         self.log(f"bfs graph-db queries: {neo4j_queries_counter}", verbose=self.verbose)
         self.log(f"passed nodes counter: {passed_nodes_counter}", verbose=self.verbose)
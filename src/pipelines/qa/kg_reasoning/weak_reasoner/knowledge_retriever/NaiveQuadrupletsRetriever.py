@@ -1,4 +1,4 @@
-from typing import List, Dict, Union
+from typing import List, Dict, Union, Tuple
 from dataclasses import dataclass
 from collections import Counter
 from copy import deepcopy
@@ -48,7 +48,7 @@ class NaiveTripletsRetriever(AbstractQuadrupletsRetriever, CacheUtils): # Keepin
         self.log(f"BASE_QUESTION ID: {create_id(query_info.query)}", verbose=self.verbose)
         self.log(f"BASE_QUESTION: {query_info.query}", verbose=self.verbose)
 
-        query_embd = self.kg_model.embeddings_struct.embedder.encode_queries([query_info.query])[0]
+        query_embd = self.kg_model.embeddings_struct.embedder.encode_queries_np([query_info.query])[0]
         query_instance = VectorDBInstance(embedding=query_embd)
 
         # Using 'quadruplets' collection
@@ -67,6 +67,26 @@ class NaiveTripletsRetriever(AbstractQuadrupletsRetriever, CacheUtils): # Keepin
         # VectorDB returns metadata.
         
         # Assumption: The ID in vector DB IS the Quadruplet ID.
+        return self.read_quadruplets(raw_relevant_quadruplets)
+
+    def get_relevant_quadruplets_batch(self, queries_info: List[QueryInfo]) -> List[List[Quadruplet]]:
+        return self.cache_batch_output(
+            lambda args_batch: self._get_relevant_quadruplets_batch([args[0] for args in args_batch]),
+            [(query_info,) for query_info in queries_info])
+
+    def _get_relevant_quadruplets_batch(self, queries_info: List[QueryInfo]) -> List[List[Quadruplet]]:
+        self.log("START BATCH KNOWLEDGE RETRIEVING ...", verbose=self.verbose)
+        self.log("RETRIEVER: NaiveQuadrupletsRetriever", verbose=self.verbose)
+        self.log(f"BASE_QUESTIONS: {len(queries_info)}", verbose=self.verbose)
+
+        # все вопросы кодируются за один проход модели и ищутся в векторной бд одним запросом
+        queries_embds = self.kg_model.embeddings_struct.embedder.encode_queries_np([query_info.query for query_info in queries_info])
+        raw_relevant_quadruplets_batch = self.kg_model.embeddings_struct.vectordbs['quadruplets'].retrieve_batch(
+            queries_embds, self.config.max_k, includes=['metadatas'])
+
+        return [self.read_quadruplets(raw_relevant_quadruplets) for raw_relevant_quadruplets in raw_relevant_quadruplets_batch]
+
+    def read_quadruplets(self, raw_relevant_quadruplets: List[Tuple[float, VectorDBInstance]]) -> List[Quadruplet]:
         quadruplet_ids = list(map(lambda item: item[1].id, raw_relevant_quadruplets))
         self.log(f"Количество извлечённых объектов из векторной бд (quadruplets): {len(quadruplet_ids)}", verbose=self.verbose)
 
@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from typing import List, Union, Dict
 from copy import deepcopy
 import hashlib
+import numpy as np
 
 from .utils import AbstractQuadrupletsFilter, BaseQuadrupletsFilterConfig
 from ......utils.data_structs import Quadruplet, QueryInfo, create_id, QuadrupletCreator
@@ -69,32 +70,58 @@ class QuadrupletsFilter(AbstractQuadrupletsFilter, CacheUtils):
         self.log(f"BASE_QUESTION: {query_info.query}", verbose=self.verbose)
 
         unique_relations_map = {q.relation.id: q for q in quadruplets}
-        filtered_quadruplets = []
 
         self.log(f"Всего квадруплетов: {len(quadruplets)}", verbose=self.verbose)
         self.log(f"Количество уникальных квадруплетов (по строковому представлению): {len(set(unique_relations_map))}", verbose=self.verbose)
         self.log(f"base ids: {list(unique_relations_map.keys())}", verbose=self.verbose)
 
-        if len(unique_relations_map) <= self.config.max_k:
-            filtered_quadruplets = list(unique_relations_map.values())
-        else:
-            query_embd = self.kg_model.embeddings_struct.embedder.encode_queries([query_info.query])[0]
-            query_instance = VectorDBInstance(embedding=query_embd)
+        query_embd = None
+        if len(unique_relations_map) > self.config.max_k:
+            query_embd = self.kg_model.embeddings_struct.embedder.encode_queries_np([query_info.query])[0]
+        filtered_quadruplets = self.select_quadruplets(unique_relations_map, query_embd)
 
-            relation_ids = list(unique_relations_map.keys())
+        self.log(f"Количество квадруплетов после фильтрации: {len(filtered_quadruplets)}", verbose=self.verbose)
 
-            # Retrieving from 'quadruplets' collection in vector DB
-            raw_relevant_quadruplets = self.kg_model.embeddings_struct.vectordbs['quadruplets'].retrieve(
-                [query_instance], self.config.max_k, subset_ids=relation_ids)[0]
+        return filtered_quadruplets
 
-            accepted_relation_ids = list(map(lambda item: item[1].id, raw_relevant_quadruplets))
+    def apply_filter_batch(self, queries_info: List[QueryInfo], quadruplets_batch: List[List[Quadruplet]]) -> List[List[Quadruplet]]:
+        return self.cache_batch_output(
+            lambda args_batch: self._apply_filter_batch([args[0] for args in args_batch], [args[1] for args in args_batch]),
+            list(zip(queries_info, quadruplets_batch)))
 
-            self.log(f"Количество accepted ids: {len(accepted_relation_ids)}", verbose=self.verbose)
-            self.log(f"Количество уникальных accepted ids: {len(set(accepted_relation_ids))}", verbose=self.verbose)
-            self.log(f"accepted ids: {accepted_relation_ids}", verbose=self.verbose)
+    def _apply_filter_batch(self, queries_info: List[QueryInfo], quadruplets_batch: List[List[Quadruplet]]) -> List[List[Quadruplet]]:
+        self.log("START BATCH KNOWLEDGE FILTERING...", verbose=self.verbose)
+        self.log("FILTER: NaiveQuadrupletFilter", verbose=self.verbose)
+        self.log(f"BASE_QUESTIONS: {len(queries_info)}", verbose=self.verbose)
 
-            filtered_quadruplets = list(map(lambda rel_id: unique_relations_map[rel_id], accepted_relation_ids))
+        unique_relations_maps = [{q.relation.id: q for q in quadruplets} for quadruplets in quadruplets_batch]
 
-        self.log(f"Количество квадруплетов после фильтрации: {len(filtered_quadruplets)}", verbose=self.verbose)
+        # за один проход модели кодируются только те вопросы, квадруплеты которых необходимо ранжировать
+        ranked_idxs = [i for i, unique_relations_map in enumerate(unique_relations_maps) if len(unique_relations_map) > self.config.max_k]
+        queries_embds = dict()
+        if len(ranked_idxs) > 0:
+            queries_embds = dict(zip(ranked_idxs, self.kg_model.embeddings_struct.embedder.encode_queries_np(
+                [queries_info[i].query for i in ranked_idxs])))
+        self.log(f"Количество вопросов, для которых выполняется ранжирование: {len(ranked_idxs)}", verbose=self.verbose)
 
-        return filtered_quadruplets
+        return [self.select_quadruplets(unique_relations_map, queries_embds.get(i, None))
+                for i, unique_relations_map in enumerate(unique_relations_maps)]
+
+    def select_quadruplets(self, unique_relations_map: Dict[str, Quadruplet], query_embd: Union[np.ndarray, None]) -> List[Quadruplet]:
+        if len(unique_relations_map) <= self.config.max_k:
+            return list(unique_relations_map.values())
+
+        relation_ids = list(unique_relations_map.keys())
+
+        # Scoring known ids from 'quadruplets' collection in vector DB
+        similarities = self.kg_model.embeddings_struct.vectordbs['quadruplets'].score_ids(
+            query_embd, relation_ids)[0]
+        ranked_idxs = [idx for idx in np.argsort(-similarities, kind='stable') if not np.isnan(similarities[idx])]
+
+        accepted_relation_ids = [relation_ids[idx] for idx in ranked_idxs[:self.config.max_k]]
+
+        self.log(f"Количество accepted ids: {len(accepted_relation_ids)}", verbose=self.verbose)
+        self.log(f"Количество уникальных accepted ids: {len(set(accepted_relation_ids))}", verbose=self.verbose)
+        self.log(f"accepted ids: {accepted_relation_ids}", verbose=self.verbose)
+
+        return list(map(lambda rel_id: unique_relations_map[rel_id], accepted_relation_ids))
@@ -48,6 +48,18 @@ class AbstractQuadrupletsFilter(ABC):
         """
         pass
 
+    def apply_filter_batch(self, queries_info: List[QueryInfo], quadruplets_batch: List[List[Quadruplet]]) -> List[List[Quadruplet]]:
+        """Метод предназначен для ранжирования/фильтрации квадруплетов сразу для набора user-вопросов. По умолчанию вопросы обрабатываются последовательно.
+
+        :param queries_info: Структуры данных с user-вопросами.
+        :type queries_info: List[QueryInfo]
+        :param quadruplets_batch: Наборы квадруплетов для ранжирования/отбора (по одному на каждый вопрос).
+        :type quadruplets_batch: List[List[Quadruplet]]
+        :return: Наборы квадруплетов, релевантных вопросам, в порядке вопросов.
+        :rtype: List[List[Quadruplet]]
+        """
+        return [self.apply_filter(query_info, quadruplets) for query_info, quadruplets in zip(queries_info, quadruplets_batch)]
+
 class AbstractQuadrupletsRetriever(ABC):
     """Интерфейс алгоритмов извлечения квадруплетов из графа знаний."""
     @abstractmethod
@@ -61,6 +73,16 @@ class AbstractQuadrupletsRetriever(ABC):
         """
         pass
 
+    def get_relevant_quadruplets_batch(self, queries_info: List[QueryInfo]) -> List[List[Quadruplet]]:
+        """Метод предназначен для извлечения квадруплетов из графа знаний сразу для набора user-вопросов. По умолчанию вопросы обрабатываются последовательно.
+
+        :param queries_info: Структуры данных с информацией о user-вопросах.
+        :type queries_info: List[QueryInfo]
+        :return: Наборы квадруплетов, извлечённые из графа знаний, в порядке вопросов.
+        :rtype: List[List[Quadruplet]]
+        """
+        return [self.get_relevant_quadruplets(query_info) for query_info in queries_info]
+
 @dataclass
 class BaseGraphSearchConfig:
     """Базовая конфигурация алгоритмов по извлечению квадруплетов из графа знаний."""
@@ -32,6 +32,8 @@ class QAEngine:
             finetuned_model_path, 
             device=device
         )
+        # the finetuned model always runs in fp32; keep the embedding cache key in sync with it
+        self.kg_model.embeddings_struct.embedder.backend = 'torch'
 
         self.entities_extractor = EntitiesExtractor()
         self.nodes_matcher = Entities2NodesMatcher(self.kg_model)
@@ -68,6 +70,18 @@ class QAEngine:
             print(f"Warning: Could not initialize OllamaClient: {e}")
             self.ollama_client = None
 
+    def close(self) -> None:
+        """Release the pooled connections of the Ollama client."""
+        if self.ollama_client is not None:
+            self.ollama_client.close_connection()
+            self.ollama_client = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def get_ranked_results(self, query: str, top_k: int = 5) -> List[Dict]:
         """Process query and return ranked quadruplets with confidence scores."""
         # 1. Extract entities with fallback
@@ -154,7 +168,7 @@ class QAEngine:
                 # Handling Neo4jConnector which doesn't expose internal index
                 if hasattr(connector, 'execute_query'):
                     # Fetch by str_id (which is Wikidata ID)
-                    raw_output = connector.execute_query(f'MATCH (n) WHERE n.str_id = "{mid}" RETURN n')
+                    raw_output = connector.execute_query('MATCH (n) WHERE n.str_id = $id RETURN n', {'id': mid}, mode='read')
                     if raw_output:
                          matched_nodes = connector.parse_query_nodes_output(raw_output)
                          for node in matched_nodes:
@@ -208,7 +222,7 @@ class QAEngine:
             # Last resort: try to find anything in the vector DB that matches the query significantly
             # We bypass the matcher and go straight to the vector DB
             print(f"DEBUG: Triggering vector fallback for query: '{query}'")
-            query_emb = self.kg_model.embeddings_struct.embedder.encode_queries([query])[0]
+            query_emb = self.kg_model.embeddings_struct.embedder.encode_queries_np([query])[0]
             raw_node_search = self.kg_model.embeddings_struct.vectordbs['nodes'].retrieve(
                 query_instances=[VectorDBInstance(embedding=query_emb)],
                 n_results=10, includes=['documents'])[0]
@@ -247,7 +261,7 @@ class QAEngine:
                 seen_q_ids.add(q.id)
 
         # 4. Rank using E5
-        query_emb = self.kg_model.embeddings_struct.embedder.encode_queries([query])[0]
+        query_emb = self.kg_model.embeddings_struct.embedder.encode_queries_np([query])[0]
         
         # Stringify quadruplets for ranking
         quadruplet_texts = []
@@ -255,7 +269,9 @@ class QAEngine:
             _, text = QuadrupletCreator.stringify(q)
             quadruplet_texts.append(text)
             
-        quadruplet_embs = self.kg_model.embeddings_struct.embedder.encode_passages(quadruplet_texts)
+        quadruplet_embs = self.kg_model.embeddings_struct.embedder.encode_passages_np(quadruplet_texts)
+        # Cosine similarity for all candidates at once
+        scores = (quadruplet_embs @ query_emb) / (np.linalg.norm(quadruplet_embs, axis=1) * np.linalg.norm(query_emb))
         
         results = []
         
@@ -263,9 +279,7 @@ class QAEngine:
         def sigmoid(x):
             return 1 / (1 + np.exp(-x))
 
-        for q, text, emb in zip(unique_candidates, quadruplet_texts, quadruplet_embs):
-            # Cosine similarity
-            score = np.dot(query_emb, emb) / (np.linalg.norm(query_emb) * np.linalg.norm(emb))
+        for q, text, score in zip(unique_candidates, quadruplet_texts, scores):
             e5_confidence = float(max(0, score))
             
             final_confidence = e5_confidence
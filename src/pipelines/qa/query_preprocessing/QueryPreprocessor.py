@@ -70,10 +70,10 @@ class QueryPreprocessor(CacheUtils):
     def clear_kv_caches(self) -> None:
         """_summary_
         """
-        self.cachekv.kv_conn.clear()
-        #self.denoiser.cachekv.kv_conn.clear()
-        #self.enhancer.cachekv.kv_conn.clear()
-        self.decomposer.cachekv.kv_conn.clear()
+        self.cachekv.clear()
+        #self.denoiser.cachekv.clear()
+        #self.enhancer.cachekv.clear()
+        self.decomposer.cachekv.clear()
 
     def get_cache_key(self, query: str) -> List[str]:
         """_summary_
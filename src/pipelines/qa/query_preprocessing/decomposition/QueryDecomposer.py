@@ -77,7 +77,7 @@ class QueryDecomposer(CacheUtils):
         if status == ReturnStatus.success:
             if need_to_decompose:
                 self.log("Выполнение разбиения вопроса на независимые под-вопросы с помощью LLM-агента...", verbose=self.config.verbose)
-                decomposed_query, status = self.q_decomposition_solver(lang=self.config.lang, query=query)
+                decomposed_query, status = self.q_decomposition_solver.solve(lang=self.config.lang, query=query)
                 if status != ReturnStatus.success:
                     info.occurred_warning.append(status)
             else:
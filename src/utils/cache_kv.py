@@ -1,7 +1,12 @@
 from ..db_drivers.kv_driver.KeyValueDriver import KeyValueDriver, KeyValueDriverConfig
 from ..db_drivers.kv_driver.utils import KeyValueDBInstance, KVDBConnectionConfig
 
-from typing import List, Union, Tuple
+from typing import List, Union, Tuple, Dict, Callable
+from dataclasses import dataclass
+from collections import OrderedDict
+from time import monotonic
+import threading
+import weakref
 import pickle
 import hashlib
 
@@ -12,6 +17,43 @@ DEFAULT_CACHEKV_CONFIG = KeyValueDriverConfig(
         host='localhost', port=27018, params={'username': 'user', 'password': 'pass', 'max_storage': -1},
         need_to_clear=False))
 
+CACHE_WRITE_MODES = ['write_through', 'write_back']
+
+@dataclass
+class CacheKVConfig:
+    """Конфигурация in-process уровня кеша, который располагается перед kv-хранилищем.
+
+    :param memory_max_bytes: Максимальный суммарный размер (в байтах сериализованного представления) объектов данного кеша, хранящихся в памяти процесса. Дополнительно действует общий для всех экземпляров CacheKV бюджет (см. CacheKV.set_process_memory_budget). Если 0, то in-process уровень отключён. Значение по умолчанию 64 Мб.
+    :type memory_max_bytes: int
+    :param memory_max_items: Максимальное количество объектов данного кеша, хранящихся в памяти процесса. Значение по умолчанию 100000.
+    :type memory_max_items: int
+    :param write_mode: Режим записи: 'write_through' - значение сразу сохраняется в kv-хранилище; 'write_back' - значение сохраняется в kv-хранилище при вытеснении из памяти, переполнении буфера несохранённых значений, вызове flush/close, удалении экземпляра сборщиком мусора или завершении процесса. Значение по умолчанию 'write_through'.
+    :type write_mode: str
+    :param ttl: Время жизни (в секундах) объекта в памяти процесса, после которого значение повторно читается из kv-хранилища. Если None, то время жизни не ограничено. Значение по умолчанию None.
+    :type ttl: Union[float, None]
+    :param write_back_max_dirty: Максимальное количество несохранённых в kv-хранилище значений в режиме 'write_back'. Значение по умолчанию 256.
+    :type write_back_max_dirty: int
+    """
+    memory_max_bytes: int = 64 * 1024**2
+    memory_max_items: int = 100000
+    write_mode: str = 'write_through'
+    ttl: Union[float, None] = None
+    write_back_max_dirty: int = 256
+
+@dataclass
+class CacheNamespaceStats:
+    memory_hits: int = 0
+    backend_hits: int = 0
+    misses: int = 0
+
+    def hit_ratio(self) -> float:
+        total = self.memory_hits + self.backend_hits + self.misses
+        return (self.memory_hits + self.backend_hits) / total if total > 0 else 0.0
+
+    def dict(self) -> Dict[str, float]:
+        return {'memory_hits': self.memory_hits, 'backend_hits': self.backend_hits,
+                'misses': self.misses, 'hit_ratio': self.hit_ratio()}
+
 from abc import ABC, abstractmethod
 from typing import Tuple
 
@@ -38,6 +80,7 @@ class CacheUtils(AbstractCacheUtils):
                     self.log(f"* CACHE_HASH_KEY: {key_hash}.", verbose=self.verbose)
                     self.log(f"* HASH_SEEDS: {cache_key}.", verbose=self.verbose)
                     self.log(f"* CACHED_VALUE: {cached_result}.", verbose=self.verbose)
+                    self.log(f"* CACHE_HIT_RATIO: {self.cachekv.get_stats()['hit_ratio']:.3f}.", verbose=self.verbose)
 
 
                     cached_flag = True
@@ -47,6 +90,7 @@ class CacheUtils(AbstractCacheUtils):
                     self.log(f"* CACHE_TABLE_NAME {self.cachekv.kv_conn.config.db_info['table']}", verbose=self.verbose)
                     self.log(f"* CACHE_HASH_KEY: {key_hash}.", verbose=self.verbose)
                     self.log(f"* HASH_SEEDS: {cache_key}.", verbose=self.verbose)
+                    self.log(f"* CACHE_HIT_RATIO: {self.cachekv.get_stats()['hit_ratio']:.3f}.", verbose=self.verbose)
 
             if not cached_flag:
                 self.log("Получем результат с нуля...", verbose=self.verbose)
@@ -61,9 +105,190 @@ class CacheUtils(AbstractCacheUtils):
             return output
         return wrapper
 
+    def cache_batch_output(self, function: Callable[[List[Tuple]], List[object]], args_batch: List[Tuple]) -> List[object]:
+        """Метод предназначен для пакетного получения результатов с кешированием каждого результата по отдельности
+        (по ключам get_cache_key, как в cache_method_output): результаты загружаются из кеша одним запросом,
+        а function вызывается один раз для наборов аргументов, результатов по которым в кеше нет (без дубликатов).
+        Если кеш не используется, то function вызывается для всех наборов аргументов.
+
+        :param function: Функция, которая принимает список наборов позиционных аргументов и возвращает список результатов в том же порядке.
+        :type function: Callable[[List[Tuple]], List[object]]
+        :param args_batch: Наборы позиционных аргументов.
+        :type args_batch: List[Tuple]
+        :return: Результаты в порядке наборов аргументов.
+        :rtype: List[object]
+        """
+        if self.cachekv is None:
+            return function(list(args_batch))
+
+        key_hashes = [CacheKV.prepare_key(key=self.get_cache_key(*args)) for args in args_batch]
+        outputs = dict()
+        for cstatus, key_hash, cached_result in self.cachekv.load_values(key_hashes=list(dict.fromkeys(key_hashes))):
+            if cstatus == 0:
+                outputs[key_hash] = cached_result
+
+        missed_args = dict()
+        for args, key_hash in zip(args_batch, key_hashes):
+            if key_hash not in outputs and key_hash not in missed_args:
+                missed_args[key_hash] = args
+        self.log(f"Результатов из кеша: {len(outputs)}; наборов аргументов на обработку: {len(missed_args)}", verbose=self.verbose)
+
+        if len(missed_args) > 0:
+            missed_outputs = function(list(missed_args.values()))
+            outputs.update(zip(missed_args.keys(), missed_outputs))
+            self.cachekv.save_values(values=missed_outputs, key_hashes=list(missed_args.keys()))
+
+        return [outputs[key_hash] for key_hash in key_hashes]
+
 class CacheKV:
-    def __init__(self, kvdriver_config: KeyValueDriverConfig = DEFAULT_CACHEKV_CONFIG):
+    """Двухуровневый кеш: ограниченный по количеству объектов и суммарному размеру LRU-кеш
+    сериализованных объектов в памяти процесса, расположенный перед заданным kv-хранилищем.
+    Объекты десериализуются при каждом получении, поэтому вызывающая сторона может изменять полученные значения.
+    Статистика попаданий ведётся отдельно для каждого пространства имён (таблицы kv-хранилища).
+    Помимо ограничений отдельного кеша (CacheKVConfig) память процесса ограничена общим для всех экземпляров
+    бюджетом: при его превышении вытесняются наиболее давно использованные объекты всех кешей.
+
+    :param kvdriver_config: Конфигурация kv-хранилища. Значение по умолчанию DEFAULT_CACHEKV_CONFIG.
+    :type kvdriver_config: KeyValueDriverConfig
+    :param config: Конфигурация in-process уровня кеша. Значение по умолчанию CacheKVConfig().
+    :type config: CacheKVConfig
+    """
+    namespaces_stats: Dict[str, CacheNamespaceStats] = dict()
+    stats_lock = threading.Lock()
+
+    # общий бюджет памяти процесса: (id экземпляра, key_hash) -> (weakref экземпляра, размер в байтах);
+    # порядок элементов - порядок использования объектов всеми экземплярами
+    process_memory_max_bytes = 64 * 1024**2
+    process_memory_max_items = 100000
+    process_memory = OrderedDict()
+    process_memory_bytes = 0
+    memory_lock = threading.RLock()
+
+    def __init__(self, kvdriver_config: KeyValueDriverConfig = DEFAULT_CACHEKV_CONFIG, config: CacheKVConfig = None):
+        self.config = CacheKVConfig() if config is None else config
+        if self.config.write_mode not in CACHE_WRITE_MODES:
+            raise ValueError
+
         self.kv_conn = KeyValueDriver.connect(kvdriver_config)
+        self.namespace = kvdriver_config.db_config.db_info['table']
+        with CacheKV.stats_lock:
+            self.stats = CacheKV.namespaces_stats.setdefault(self.namespace, CacheNamespaceStats())
+
+        # key_hash -> [dumped_value, size_in_bytes, expiration_time]
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.dirty_keys = set()
+        self.lock = threading.RLock()
+        self.ref = weakref.ref(self)
+
+        # finalize не удерживает экземпляр (в отличие от atexit.register(self.flush)) и сохраняет
+        # несохранённые значения при удалении экземпляра сборщиком мусора или завершении процесса
+        self.finalizer = weakref.finalize(self, CacheKV._flush_dirty, self.kv_conn, self.memory, self.dirty_keys)
+
+    @staticmethod
+    def set_process_memory_budget(max_bytes: int, max_items: int) -> None:
+        """Метод предназначен для задания общего для всех экземпляров CacheKV бюджета памяти процесса.
+
+        :param max_bytes: Максимальный суммарный размер (в байтах сериализованного представления) объектов всех кешей. Значение по умолчанию 64 Мб.
+        :type max_bytes: int
+        :param max_items: Максимальное количество объектов всех кешей. Значение по умолчанию 100000.
+        :type max_items: int
+        """
+        with CacheKV.memory_lock:
+            CacheKV.process_memory_max_bytes = max_bytes
+            CacheKV.process_memory_max_items = max_items
+
+    @staticmethod
+    def _flush_dirty(kv_conn: object, memory: OrderedDict, dirty_keys: set) -> None:
+        dirty_items = [KeyValueDBInstance(id=key_hash, value=memory[key_hash][0]) for key_hash in list(dirty_keys) if key_hash in memory]
+        dirty_keys.clear()
+        if len(dirty_items) > 0:
+            kv_conn.create_many(dirty_items)
+
+    @staticmethod
+    def _persist(evicted_items: List[Tuple[object, KeyValueDBInstance]]) -> None:
+        # вытесненные несохранённые значения записываются вне memory_lock, чтобы не блокировать другие кеши
+        items_by_conn = dict()
+        for kv_conn, item in evicted_items:
+            items_by_conn.setdefault(id(kv_conn), (kv_conn, []))[1].append(item)
+        for kv_conn, items in items_by_conn.values():
+            kv_conn.create_many(items)
+
+    def _fits_in_memory(self, size: int) -> bool:
+        return self.config.memory_max_bytes > 0 and size <= min(self.config.memory_max_bytes, CacheKV.process_memory_max_bytes)
+
+    def _memory_get(self, key_hash: str) -> Tuple[bool, object]:
+        with CacheKV.memory_lock:
+            entry = self.memory.get(key_hash, None)
+            if entry is None:
+                return (False, None)
+
+            if entry[2] is None or entry[2] >= monotonic():
+                self.memory.move_to_end(key_hash)
+                CacheKV.process_memory.move_to_end((id(self), key_hash))
+                dumped_value = entry[0]
+            else:
+                dumped_value = None
+                # истёкшее значение удаляется из памяти (несохранённое предварительно записывается в kv-хранилище)
+                dirty_item = self._memory_pop(key_hash)
+
+        if dumped_value is None:
+            if dirty_item is not None:
+                self.kv_conn.create([dirty_item])
+            return (False, None)
+        # каждый вызов получает собственную копию объекта
+        return (True, pickle.loads(dumped_value))
+
+    def _memory_put(self, key_hash: str, dumped_value: bytes, dirty: bool = False) -> None:
+        evicted_items = []
+        with CacheKV.memory_lock:
+            if key_hash in self.memory:
+                self._memory_pop(key_hash)
+
+            expiration_time = monotonic() + self.config.ttl if self.config.ttl is not None else None
+            self.memory[key_hash] = [dumped_value, len(dumped_value), expiration_time]
+            self.memory_bytes += len(dumped_value)
+            CacheKV.process_memory[(id(self), key_hash)] = (self.ref, len(dumped_value))
+            CacheKV.process_memory_bytes += len(dumped_value)
+            if dirty:
+                self.dirty_keys.add(key_hash)
+
+            # вытеснение наиболее давно использованных объектов данного кеша
+            while len(self.memory) > 0 and (self.memory_bytes > self.config.memory_max_bytes or len(self.memory) > self.config.memory_max_items):
+                dirty_item = self._memory_pop(next(iter(self.memory)))
+                if dirty_item is not None:
+                    evicted_items.append((self.kv_conn, dirty_item))
+
+            # вытеснение наиболее давно использованных объектов всех кешей процесса
+            while len(CacheKV.process_memory) > 0 and (CacheKV.process_memory_bytes > CacheKV.process_memory_max_bytes or len(CacheKV.process_memory) > CacheKV.process_memory_max_items):
+                (_, evicted_hash), (owner_ref, size) = next(iter(CacheKV.process_memory.items()))
+                owner = owner_ref()
+                if owner is None:
+                    # объекты удалённого сборщиком мусора экземпляра учитываются до их вытеснения
+                    CacheKV.process_memory.popitem(last=False)
+                    CacheKV.process_memory_bytes -= size
+                    continue
+                dirty_item = owner._memory_pop(evicted_hash)
+                if dirty_item is not None:
+                    evicted_items.append((owner.kv_conn, dirty_item))
+
+        CacheKV._persist(evicted_items)
+
+    def _memory_pop(self, key_hash: str) -> Union[KeyValueDBInstance, None]:
+        """Метод удаляет объект из памяти процесса (вызывается под memory_lock).
+        Если значение ещё не сохранено в kv-хранилище, то оно возвращается для последующей записи."""
+        entry = self.memory.pop(key_hash)
+        self.memory_bytes -= entry[1]
+        CacheKV.process_memory.pop((id(self), key_hash))
+        CacheKV.process_memory_bytes -= entry[1]
+        if key_hash in self.dirty_keys:
+            self.dirty_keys.discard(key_hash)
+            return KeyValueDBInstance(id=key_hash, value=entry[0])
+        return None
+
+    def _update_stats(self, field_name: str) -> None:
+        with CacheKV.stats_lock:
+            setattr(self.stats, field_name, getattr(self.stats, field_name) + 1)
 
     @staticmethod
     def prepare_key(key: List[object] = None, key_hash: str = None) -> str:
@@ -98,25 +323,202 @@ class CacheKV:
     def load_value(self, key: List[str] = None, key_hash: str = None) -> Tuple[int, str, Union[str, object]]:
         key_hash = CacheKV.prepare_key(key, key_hash)
 
+        if self.config.memory_max_bytes > 0:
+            found, value = self._memory_get(key_hash)
+            if found:
+                self._update_stats('memory_hits')
+                return (0, key_hash, value)
+
         output = self.kv_conn.read([key_hash])
         filtered_output = list(filter(lambda item: item is not None, output))
 
         if len(filtered_output) < 1:
+            self._update_stats('misses')
             return (-1, key_hash, None)
 
         raw_value = filtered_output[0].value
         formated_value = pickle.loads(raw_value)
+        self._update_stats('backend_hits')
+
+        if self._fits_in_memory(len(raw_value)):
+            self._memory_put(key_hash, raw_value)
         return (0, key_hash, formated_value)
 
     def save_value(self, value: object, key: List[str] = None, key_hash: str = None) -> str:
         key_hash = CacheKV.prepare_key(key, key_hash)
-        if self.kv_conn.item_exist(key_hash):
-            raise ValueError
+        with self.lock:
+            # значение могло быть сохранено другим экземпляром кеша с тем же kv-хранилищем (например, при
+            # одновременной обработке под-вопросов): повторное сохранение не перезаписывает его
+            if key_hash in self.dirty_keys or self.kv_conn.item_exist(key_hash):
+                return key_hash
+
+            dumped_value = pickle.dumps(value)
+            fits_in_memory = self._fits_in_memory(len(dumped_value))
+            if self.config.write_mode == 'write_back' and fits_in_memory:
+                self._memory_put(key_hash, dumped_value, dirty=True)
+                if len(self.dirty_keys) >= self.config.write_back_max_dirty:
+                    self.flush()
+            else:
+                self.kv_conn.create([KeyValueDBInstance(id=key_hash, value=dumped_value)])
+                if fits_in_memory:
+                    self._memory_put(key_hash, dumped_value)
 
-        new_item = KeyValueDBInstance(id=key_hash, value=pickle.dumps(value))
-        self.kv_conn.create([new_item])
         return key_hash
 
+    def load_values(self, keys: List[List[str]] = None, key_hashes: List[str] = None) -> List[Tuple[int, str, Union[str, object]]]:
+        """Метод предназначен для пакетного получения значений: объекты, которых нет в памяти процесса,
+        читаются из kv-хранилища одним запросом.
+
+        :param keys: Ключи значений. Должен быть указан либо keys, либо key_hashes.
+        :type keys: List[List[str]]
+        :param key_hashes: Хеши ключей значений.
+        :type key_hashes: List[str]
+        :return: Для каждого ключа (в исходном порядке) тройка аналогично load_value: статус (0 - значение найдено, -1 - нет), хеш ключа и значение.
+        :rtype: List[Tuple[int, str, Union[str, object]]]
+        """
+        if keys is not None:
+            key_hashes = [CacheKV.prepare_key(key=key) for key in keys]
+        elif key_hashes is None:
+            raise ValueError
+
+        outputs = [None] * len(key_hashes)
+        missed_idxs = []
+        for i, key_hash in enumerate(key_hashes):
+            if self.config.memory_max_bytes > 0:
+                found, value = self._memory_get(key_hash)
+                if found:
+                    self._update_stats('memory_hits')
+                    outputs[i] = (0, key_hash, value)
+                    continue
+            missed_idxs.append(i)
+
+        if len(missed_idxs) > 0:
+            missed_hashes = list(dict.fromkeys(key_hashes[i] for i in missed_idxs))
+            raw_values = {item.id: item.value for item in self.kv_conn.read_many(missed_hashes) if item is not None}
+            formated_values = {key_hash: pickle.loads(raw_value) for key_hash, raw_value in raw_values.items()}
+
+            for i in missed_idxs:
+                key_hash = key_hashes[i]
+                if key_hash not in formated_values:
+                    self._update_stats('misses')
+                    outputs[i] = (-1, key_hash, None)
+                    continue
+
+                self._update_stats('backend_hits')
+                outputs[i] = (0, key_hash, formated_values[key_hash])
+
+            for key_hash, raw_value in raw_values.items():
+                if self._fits_in_memory(len(raw_value)):
+                    self._memory_put(key_hash, raw_value)
+
+        return outputs
+
+    def save_values(self, values: List[object], keys: List[List[str]] = None, key_hashes: List[str] = None) -> List[str]:
+        """Метод предназначен для пакетного сохранения значений: новые значения записываются в kv-хранилище одним запросом.
+        Значения по ключам, которые уже есть в кеше, не перезаписываются.
+
+        :param values: Сохраняемые значения.
+        :type values: List[object]
+        :param keys: Ключи значений. Должен быть указан либо keys, либо key_hashes.
+        :type keys: List[List[str]]
+        :param key_hashes: Хеши ключей значений.
+        :type key_hashes: List[str]
+        :return: Хеши ключей сохранённых значений.
+        :rtype: List[str]
+        """
+        if keys is not None:
+            key_hashes = [CacheKV.prepare_key(key=key) for key in keys]
+        elif key_hashes is None:
+            raise ValueError
+
+        if len(values) != len(key_hashes) or len(set(key_hashes)) != len(key_hashes):
+            raise ValueError
+        if len(key_hashes) < 1:
+            return []
+
+        with self.lock:
+            items_exist = self.kv_conn.exists_many(key_hashes)
+            new_hashes, new_values = [], []
+            for key_hash, value, item_exists in zip(key_hashes, values, items_exist):
+                if not item_exists and key_hash not in self.dirty_keys:
+                    new_hashes.append(key_hash)
+                    new_values.append(value)
+
+            dumped_values = [pickle.dumps(value) for value in new_values]
+            fits_in_memory = [self._fits_in_memory(len(dumped_value)) for dumped_value in dumped_values]
+
+            new_items = []
+            for key_hash, dumped_value, fits in zip(new_hashes, dumped_values, fits_in_memory):
+                if self.config.write_mode == 'write_back' and fits:
+                    self._memory_put(key_hash, dumped_value, dirty=True)
+                else:
+                    new_items.append(KeyValueDBInstance(id=key_hash, value=dumped_value))
+
+            if len(new_items) > 0:
+                self.kv_conn.create_many(new_items)
+                if self.config.write_mode == 'write_through':
+                    for key_hash, dumped_value, fits in zip(new_hashes, dumped_values, fits_in_memory):
+                        if fits:
+                            self._memory_put(key_hash, dumped_value)
+
+            if len(self.dirty_keys) >= self.config.write_back_max_dirty:
+                self.flush()
+
+        return key_hashes
+
+    def flush(self) -> None:
+        """Метод предназначен для сохранения в kv-хранилище всех значений, которые в режиме 'write_back'
+        пока находятся только в памяти процесса.
+        """
+        with self.lock:
+            with CacheKV.memory_lock:
+                dirty_items = [KeyValueDBInstance(id=key_hash, value=self.memory[key_hash][0]) for key_hash in self.dirty_keys]
+                self.dirty_keys.clear()
+
+            if len(dirty_items) > 0:
+                self.kv_conn.create_many(dirty_items)
+
+    def _memory_clear(self) -> None:
+        with CacheKV.memory_lock:
+            self.dirty_keys.clear()
+            for key_hash in list(self.memory.keys()):
+                self._memory_pop(key_hash)
+
+    def close(self) -> None:
+        """Метод предназначен для сохранения в kv-хранилище несохранённых значений и освобождения
+        занимаемой кешем памяти процесса. После закрытия экземпляр можно продолжать использовать.
+        """
+        with self.lock:
+            self.flush()
+            self._memory_clear()
+
+    def clear(self) -> None:
+        """Метод предназначен для удаления всех значений из памяти процесса и kv-хранилища."""
+        with self.lock:
+            self._memory_clear()
+            self.kv_conn.clear()
+
+    def get_stats(self) -> Dict[str, float]:
+        """Метод предназначен для получения статистики попаданий в кеш по пространству имён (таблице) данного кеша.
+
+        :return: Количество попаданий в память процесса и kv-хранилище, количество промахов, доля попаданий, а также текущий размер in-process уровня.
+        :rtype: Dict[str, float]
+        """
+        with CacheKV.stats_lock:
+            stats = self.stats.dict()
+        stats.update({'memory_items': len(self.memory), 'memory_bytes': self.memory_bytes})
+        return stats
+
+    @staticmethod
+    def get_namespaces_stats() -> Dict[str, Dict[str, float]]:
+        """Метод предназначен для получения статистики попаданий в кеш по всем пространствам имён процесса.
+
+        :return: Статистика попаданий для каждого пространства имён (таблицы kv-хранилища).
+        :rtype: Dict[str, Dict[str, float]]
+        """
+        with CacheKV.stats_lock:
+            return {namespace: stats.dict() for namespace, stats in CacheKV.namespaces_stats.items()}
+
     def check_key_exist(self, key: List[object] = None, key_hash: str = None) -> bool:
         key_hash = CacheKV.prepare_key(key, key_hash)
-        return self.kv_conn.item_exist(key_hash)
+        return key_hash in self.dirty_keys or self.kv_conn.item_exist(key_hash)
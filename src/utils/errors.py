@@ -18,6 +18,7 @@ class ReturnStatus(Enum):
     bad_user_prompt_maping = 12
     already_exist = 13
     decompose_noneed = 14
+    subquery_timeout = 15
 
 STATUS_MESSAGE = {
     ReturnStatus.success: "Операция выполнена успешно.",
@@ -32,6 +33,7 @@ STATUS_MESSAGE = {
     ReturnStatus.unknown_lang: "Не удалось распознать язык входного текста.",
     # qa-pipeline (answer generation)
     ReturnStatus.empty_answer: 'Не удалось получить ответ на вопрос.',
+    ReturnStatus.subquery_timeout: 'Превышено время ожидания ответа на под-вопрос.',
     # qa-pipeline (query parser)
     ReturnStatus.zero_entities: 'Из вопроса было извлечено нуль сущностей.',
     # qa-pipeline (knowledge comparator)
@@ -42,6 +42,7 @@ def hydrate_in_memory_graph(kg_model: KnowledgeGraphModel, mapper: WikidataMappe
                     
                     internal_node_ids[s_id] = new_id
                     connector.nodes[new_id] = s_node
+                    connector.index_node(new_id, s_node)
                     # Index by both Wikidata ID and MD5 ID
                     connector.strid_nodes_index[s_id].add(new_id)
                     connector.strid_nodes_index[s_node.id].add(new_id)
@@ -56,6 +57,7 @@ def hydrate_in_memory_graph(kg_model: KnowledgeGraphModel, mapper: WikidataMappe
                     
                     internal_node_ids[o_id] = new_id
                     connector.nodes[new_id] = o_node
+                    connector.index_node(new_id, o_node)
                     connector.strid_nodes_index[o_id].add(new_id)
                     connector.strid_nodes_index[o_node.id].add(new_id)
 
@@ -77,6 +79,7 @@ def hydrate_in_memory_graph(kg_model: KnowledgeGraphModel, mapper: WikidataMappe
                 # Updated to use 'connector.quadruplets' and 'qid_quadruplets_index'
                 t_internal_id = connector.generate_id()
                 connector.quadruplets[t_internal_id] = quadruplet
+                connector.index_quadruplet(t_internal_id, quadruplet)
                 connector.qid_quadruplets_index[quadruplet.id].add(t_internal_id)
                 
                 # Add relationship to edges
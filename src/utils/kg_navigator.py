@@ -18,35 +18,68 @@ class KGNavigator:
         
         for d in range(depth):
             next_layer = set()
+            # Fetch adjacency for the whole layer in a single round-trip
+            layer_adjacency = self._get_layer_adjacency(list(current_layer))
+            layer_pairs = []
             for node_id in current_layer:
-                # Get adjacent node IDs
-                try:
-                    adj_ids = self.kg_model.graph_struct.db_conn.get_adjecent_nids(node_id)
-                    # print(f"DEBUG: [KGNavigator] Node {node_id} has {len(adj_ids)} adjacent nodes")
-                except Exception as e:
-                    print(f"DEBUG: [KGNavigator] Error getting adjacent nodes for {node_id}: {e}")
-                    adj_ids = []
+                adj_ids = layer_adjacency.get(node_id, [])
 
                 # Apply limit per node if specified
                 if limit > 0 and len(adj_ids) > limit:
                      adj_ids = list(adj_ids)[:limit]
 
                 for adj_id in adj_ids:
-                    # Get quadruplets between node_id and adj_id
-                    try:
-                        quadruplets = self.kg_model.graph_struct.db_conn.get_quadruplets(node_id, adj_id)
-                        all_quadruplets.extend(quadruplets)
-                    except Exception as e:
-                        print(f"DEBUG: [KGNavigator] Error getting quadruplets between {node_id} and {adj_id}: {e}")
-                    
+                    layer_pairs.append((node_id, adj_id))
+
                     if adj_id not in visited_nodes:
                         next_layer.add(adj_id)
                         visited_nodes.add(adj_id)
+
+            # Get quadruplets for all (node_id, adj_id) pairs of the layer in a single round-trip
+            layer_quadruplets = self._get_layer_quadruplets(layer_pairs)
+            for pair in layer_pairs:
+                all_quadruplets.extend(layer_quadruplets.get(pair, []))
             current_layer = next_layer
         
         # print(f"DEBUG: [KGNavigator] Total quadruplets found: {len(all_quadruplets)}")
         return all_quadruplets
 
+    def _get_layer_adjacency(self, node_ids: List[str]) -> Dict[str, List[str]]:
+        """Fetch adjacent node IDs for a whole traversal layer, falling back to per-node lookups on failure."""
+        db_conn = self.kg_model.graph_struct.db_conn
+        try:
+            return db_conn.get_adjacent_nids_batch(node_ids)
+        except Exception as e:
+            print(f"DEBUG: [KGNavigator] Error getting adjacent nodes for layer of {len(node_ids)} nodes: {e}")
+
+        layer_adjacency = dict()
+        for node_id in node_ids:
+            try:
+                layer_adjacency[node_id] = db_conn.get_adjecent_nids(node_id)
+                # print(f"DEBUG: [KGNavigator] Node {node_id} has {len(layer_adjacency[node_id])} adjacent nodes")
+            except Exception as e:
+                print(f"DEBUG: [KGNavigator] Error getting adjacent nodes for {node_id}: {e}")
+                layer_adjacency[node_id] = []
+        return layer_adjacency
+
+    def _get_layer_quadruplets(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], List[Quadruplet]]:
+        """Fetch quadruplets for all node pairs of a traversal layer, falling back to per-pair lookups on failure."""
+        db_conn = self.kg_model.graph_struct.db_conn
+        if not pairs:
+            return dict()
+        try:
+            return db_conn.get_quadruplets_for_pairs(pairs)
+        except Exception as e:
+            print(f"DEBUG: [KGNavigator] Error getting quadruplets for layer of {len(pairs)} node pairs: {e}")
+
+        layer_quadruplets = dict()
+        for node_id, adj_id in pairs:
+            try:
+                layer_quadruplets[(node_id, adj_id)] = db_conn.get_quadruplets(node_id, adj_id)
+            except Exception as e:
+                print(f"DEBUG: [KGNavigator] Error getting quadruplets between {node_id} and {adj_id}: {e}")
+        return layer_quadruplets
+
     def quadruplets_to_nx(self, quadruplets: List[Quadruplet]) -> nx.MultiDiGraph:
         """Convert a list of Quadruplets to a NetworkX graph."""
         G = nx.MultiDiGraph()
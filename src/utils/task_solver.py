@@ -1,5 +1,8 @@
 from dataclasses import dataclass, field
-from typing import Tuple, Dict, Union
+from typing import Tuple, Dict, Union, List
+from concurrent.futures import Future
+import threading
+import asyncio
 import json
 from copy import deepcopy
 import hashlib 
@@ -52,6 +55,8 @@ class AgentTaskSolverConfig:
     :type log: Logger
     :param verbose: Если True, то информация о поведении класса будет сохраняться в stdout и файл-журналирования (log), иначе только в файл. Значение по умолчанию False.
     :type verbose: bool
+    :param coalesce_requests: Если True, то идентичные запросы к LLM-агенту (с одинаковым ключом кеша), поступившие до завершения первого из них, не отправляются повторно, а ожидают его результат (блокирующие вызовы solve из запущенного event loop'а не объединяются). Значение по умолчанию True.
+    :type coalesce_requests: bool
     """
     version: str
     suites: Dict[str, AgentTaskSuite]
@@ -62,6 +67,53 @@ class AgentTaskSolverConfig:
 
     log: Logger
     verbose: bool = False
+    coalesce_requests: bool = True
+
+def is_event_loop_running() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+class InflightRequests:
+    """Реестр выполняющихся (in-flight) запросов к LLM-агентам (single-flight): первый запрос с заданным ключом
+    выполняется, а идентичные запросы, поступившие до его завершения, ожидают его результат (или ошибку).
+    Реестр общий для блокирующих вызовов из разных потоков и для корутин из любых event loop'ов.
+    """
+    def __init__(self) -> None:
+        self.futures: Dict[str, Future] = dict()
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'coalesced': 0}
+
+    def join(self, key: str) -> Tuple[Future, bool]:
+        """Метод предназначен для регистрации запроса с заданным ключом.
+
+        :return: Кортеж из двух объектов: (1) future с результатом запроса; (2) флаг того, что запрос должен быть выполнен вызывающей стороной (иначе нужно дождаться future).
+        :rtype: Tuple[Future, bool]
+        """
+        with self.lock:
+            self.stats['requests'] += 1
+            future = self.futures.get(key, None)
+            if future is not None:
+                self.stats['coalesced'] += 1
+                return future, False
+
+            future = Future()
+            self.futures[key] = future
+            return future, True
+
+    def complete(self, key: str, future: Future, result: object = None, exception: BaseException = None) -> None:
+        with self.lock:
+            del self.futures[key]
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {**self.stats, 'in_flight': len(self.futures)}
 
 class AgentTaskSolver:
     """Класс-обёртка, предназначенный для решения атомарной задачи на базе инференса LLM-агента.
@@ -71,6 +123,7 @@ class AgentTaskSolver:
     :param config: Конфигурация решения конкретной атомарной задачи.
     :type config: AgentTaskSolverConfig
     """
+    inflight = InflightRequests()
 
     def __init__(self, agent: AbstractAgentConnector, config: AgentTaskSolverConfig,
                  cache_kvdriver_config: KeyValueDriverConfig = None) -> None:
@@ -94,7 +147,134 @@ class AgentTaskSolver:
         :return: Кортеж из двух объектов: (1) результат работы agent-солвера; (2) статус завершения операции с пояснительной информацией.
         :rtype: Tuple[object, ReturnStatus]
         """
-        task_result, status = None, ReturnStatus.success
+        task_result = None
+        detected_lang, enriched_user_prompt, status = self.prepare_prompt(lang, **kwargs)
+
+        # Если удалось добавить дополнительную инофрмациб в user-prompt
+        if status == ReturnStatus.success:
+            if self.config.coalesce_requests:
+                raw_answer = self.get_coalesced_answer(detected_lang, enriched_user_prompt)
+            else:
+                raw_answer = self.get_raw_answer(detected_lang, enriched_user_prompt)
+
+            self.log(f"Результат:\n{raw_answer}", verbose=self.config.verbose)
+            self.log("Статус: " + STATUS_MESSAGE[status], verbose=self.config.verbose)
+
+            task_result, status = self.process_answer(raw_answer, detected_lang, **kwargs)
+
+        return task_result, status
+
+    async def asolve(self, lang: str = 'en', **kwargs) -> Tuple[object, ReturnStatus]:
+        """Асинхронный вариант метода solve: инференс LLM-агента выполняется через agenerate, а обращения
+        к кешу - в пуле потоков, поэтому несколько вызовов asolve могут выполняться одновременно в одном event loop'е.
+
+        :param lang: Язык промптов, которые будут использоваться на этапе инференса LLM-агента. Значение по умолчанию 'auto'.
+        :type lang: str, optional
+        :return: Кортеж из двух объектов: (1) результат работы agent-солвера; (2) статус завершения операции с пояснительной информацией.
+        :rtype: Tuple[object, ReturnStatus]
+        """
+        task_result = None
+        detected_lang, enriched_user_prompt, status = self.prepare_prompt(lang, **kwargs)
+
+        if status == ReturnStatus.success:
+            if self.config.coalesce_requests:
+                raw_answer = await self.aget_coalesced_answer(detected_lang, enriched_user_prompt)
+            else:
+                raw_answer = await self.aget_raw_answer(detected_lang, enriched_user_prompt)
+
+            self.log(f"Результат:\n{raw_answer}", verbose=self.config.verbose)
+            self.log("Статус: " + STATUS_MESSAGE[status], verbose=self.config.verbose)
+
+            task_result, status = self.process_answer(raw_answer, detected_lang, **kwargs)
+
+        return task_result, status
+
+    def get_raw_answer(self, detected_lang: str, enriched_user_prompt: str) -> str:
+        """Метод предназначен для получения ответа LLM-агента: из кеша или с помощью инференса (с последующим кешированием).
+        """
+        cache_key, key_hash, raw_answer, gen_flag = self.load_cached_answer(detected_lang, enriched_user_prompt)
+
+        if gen_flag:
+            self.log("Выполняем инференс llm...", verbose=self.config.verbose)
+
+            raw_answer = self.agent.generate(
+                system_prompt=self.config.suites[detected_lang].system_prompt,
+                user_prompt=enriched_user_prompt,
+                assistant_prompt=self.config.suites[detected_lang].assistant_prompt)
+
+            self.save_answer(raw_answer, key_hash)
+
+        return raw_answer
+
+    async def aget_raw_answer(self, detected_lang: str, enriched_user_prompt: str) -> str:
+        cache_key, key_hash, raw_answer, gen_flag = await asyncio.to_thread(
+            self.load_cached_answer, detected_lang, enriched_user_prompt)
+
+        if gen_flag:
+            self.log("Выполняем инференс llm...", verbose=self.config.verbose)
+
+            raw_answer = await self.agent.agenerate(
+                system_prompt=self.config.suites[detected_lang].system_prompt,
+                user_prompt=enriched_user_prompt,
+                assistant_prompt=self.config.suites[detected_lang].assistant_prompt)
+
+            await asyncio.to_thread(self.save_answer, raw_answer, key_hash)
+
+        return raw_answer
+
+    def get_inflight_key(self, detected_lang: str, enriched_user_prompt: str) -> str:
+        # запросы к разным бэкендам не объединяются; коннекторы без общего бэкенда (get_backend_key() is None) - отдельные бэкенды
+        backend_key = self.agent.get_backend_key()
+        if backend_key is None:
+            backend_key = f"{type(self.agent).__name__}|{id(self.agent)}"
+        return CacheKV.prepare_key(key=[backend_key, str(self.config.cache_table_name)] + self.get_cache_key(detected_lang, enriched_user_prompt))
+
+    def get_coalesced_answer(self, detected_lang: str, enriched_user_prompt: str) -> str:
+        """Метод предназначен для получения ответа LLM-агента с объединением идентичных одновременных запросов:
+        ответ (вместе с поиском в кеше и кешированием) получает первый запрос, остальные ожидают его результат.
+        """
+        if is_event_loop_running():
+            # блокирующий вызов из корутины: ожидание future остановило бы event loop, в котором может
+            # выполняться запрос-лидер (asolve), поэтому запрос выполняется без объединения
+            return self.get_raw_answer(detected_lang, enriched_user_prompt)
+
+        inflight_key = self.get_inflight_key(detected_lang, enriched_user_prompt)
+        future, is_leader = self.inflight.join(inflight_key)
+        if not is_leader:
+            self.log("Идентичный запрос уже выполняется: ожидаем его результат...", verbose=self.config.verbose)
+            return future.result()
+
+        try:
+            raw_answer = self.get_raw_answer(detected_lang, enriched_user_prompt)
+        except BaseException as e:
+            self.inflight.complete(inflight_key, future, exception=e)
+            raise
+        self.inflight.complete(inflight_key, future, result=raw_answer)
+        return raw_answer
+
+    async def aget_coalesced_answer(self, detected_lang: str, enriched_user_prompt: str) -> str:
+        inflight_key = self.get_inflight_key(detected_lang, enriched_user_prompt)
+        future, is_leader = self.inflight.join(inflight_key)
+        if not is_leader:
+            self.log("Идентичный запрос уже выполняется: ожидаем его результат...", verbose=self.config.verbose)
+            # отмена ожидающей корутины не должна отменять общий future
+            return await asyncio.shield(asyncio.wrap_future(future))
+
+        try:
+            raw_answer = await self.aget_raw_answer(detected_lang, enriched_user_prompt)
+        except BaseException as e:
+            self.inflight.complete(inflight_key, future, exception=e)
+            raise
+        self.inflight.complete(inflight_key, future, result=raw_answer)
+        return raw_answer
+
+    def prepare_prompt(self, lang: str = 'en', **kwargs) -> Tuple[Union[str, None], Union[str, None], ReturnStatus]:
+        """Метод предназначен для подготовки user-промпта: предобработки входных данных, детекции языка и вставки данных в промпт.
+
+        :return: Кортеж из трёх объектов: (1) язык промптов; (2) user-промпт с добавленной информацией; (3) статус завершения операции.
+        :rtype: Tuple[Union[str, None], Union[str, None], ReturnStatus]
+        """
+        detected_lang, enriched_user_prompt, status = None, None, ReturnStatus.success
         self.log("="*20, verbose=self.config.verbose)
         self.log("1. Предобработка данных для их дальнейшней вставки в user-prompt...", verbose=self.config.verbose)
 
@@ -133,72 +313,75 @@ class AgentTaskSolver:
             finally:
                 self.log("Статус: " + STATUS_MESSAGE[status], verbose=self.config.verbose)
 
-        # Если удалось добавить дополнительную инофрмациб в user-prompt
-        if status == ReturnStatus.success:
-            self.log("-"*20, verbose=self.config.verbose)
-            self.log("4. Генерация ответа с помощью LLM-агента.", verbose=self.config.verbose)
-
-            raw_answer = None
-            gen_flag = True
-            
-            # preparing cache key
-            str_genstrat = ";".join(list(map(lambda p: f"{p[0]}={p[1]}", sorted([(k, str(v)) for k, v in self.agent.config.gen_strategy.items()], key=lambda p: p[0]))))
-            str_creds = ";".join(list(map(lambda p: f"{p[0]}={p[1]}", sorted([(k, str(v)) for k, v in self.agent.config.credentials.items()], key=lambda p: p[0]))))
-            sprompt_hash = hashlib.sha1(self.config.suites[detected_lang].system_prompt.encode()).hexdigest()
-            uprompt_hash = hashlib.sha1(enriched_user_prompt.encode()).hexdigest()
-            aprompt_hash = hashlib.sha1(self.config.suites[detected_lang].assistant_prompt.encode()).hexdigest()
-            cache_key = [sprompt_hash, uprompt_hash, aprompt_hash, str_genstrat, str_creds]
-
-            key_hash = None
-
-            if self.cachekv is not None:
-                self.log("Поиск ответа в кеше...", verbose=self.config.verbose)
-                cstatus, key_hash, cached_result = self.cachekv.load_value(key=cache_key)
-                if cstatus == 0:
-                    self.log("Результат по заданной конфигурации гиперпараметров уже был получен.", verbose=self.config.verbose)
-                    self.log(f"* CACHE_TABLE_NAME {self.cachekv.kv_conn.config.db_info['table']}", verbose=self.verbose)
-                    self.log(f"* CACHE_HASH_KEY: {key_hash}", verbose=self.verbose)
-                    formated_log_cachekey = '\n-'.join(cache_key)
-                    self.log(f"* HASH_SEEDS:\n-{formated_log_cachekey}", verbose=self.verbose)
-
-                    gen_flag = False
-                    raw_answer = cached_result
-                else:
-                    self.log("Результата по заданной конфигурации гиперпараметров в кеше нет.", verbose=self.config.verbose)
-                    self.log(f"* CACHE_TABLE_NAME {self.cachekv.kv_conn.config.db_info['table']}", verbose=self.verbose)
-                    self.log(f"* CACHE_HASH_KEY: {key_hash}.", verbose=self.verbose)
-                    formated_log_cachekey = '\n-'.join(cache_key)
-                    self.log(f"* HASH_SEEDS:\n-{formated_log_cachekey }", verbose=self.verbose)
-
-            if gen_flag:
-                self.log("Выполняем инференс llm...", verbose=self.config.verbose)
-                
-                raw_answer = self.agent.generate(
-                    system_prompt=self.config.suites[detected_lang].system_prompt,
-                    user_prompt=enriched_user_prompt,
-                    assistant_prompt=self.config.suites[detected_lang].assistant_prompt)
-
-                if self.cachekv is not None:
-                    self.log("Кешируем полученный результат.", verbose=self.config.verbose)
-                    self.cachekv.save_value(value=raw_answer, key_hash=key_hash)
+        return detected_lang, enriched_user_prompt, status
 
-            self.log(f"Результат:\n{raw_answer}", verbose=self.config.verbose)
-            self.log("Статус: " + STATUS_MESSAGE[status], verbose=self.config.verbose)
+    def get_cache_key(self, detected_lang: str, enriched_user_prompt: str) -> List[str]:
+        str_genstrat = ";".join(list(map(lambda p: f"{p[0]}={p[1]}", sorted([(k, str(v)) for k, v in self.agent.config.gen_strategy.items()], key=lambda p: p[0]))))
+        str_creds = ";".join(list(map(lambda p: f"{p[0]}={p[1]}", sorted([(k, str(v)) for k, v in self.agent.config.credentials.items()], key=lambda p: p[0]))))
+        sprompt_hash = hashlib.sha1(self.config.suites[detected_lang].system_prompt.encode()).hexdigest()
+        uprompt_hash = hashlib.sha1(enriched_user_prompt.encode()).hexdigest()
+        aprompt_hash = hashlib.sha1(self.config.suites[detected_lang].assistant_prompt.encode()).hexdigest()
+        return [sprompt_hash, uprompt_hash, aprompt_hash, str_genstrat, str_creds]
 
-        # Если сгенрированная raw-строка не является пустой
-        if status == ReturnStatus.success:
-            self.log("-"*20, verbose=self.config.verbose)
-            self.log("5. Разбор ответа, сгенерированного LLM-агентом.", verbose=self.config.verbose)
+    def load_cached_answer(self, detected_lang: str, enriched_user_prompt: str) -> Tuple[List[str], Union[str, None], object, bool]:
+        """Метод предназначен для поиска ответа LLM-агента в кеше.
 
-            try:
-                formated_answer = self.config.suites[detected_lang].parse_answer_func(raw_answer, **kwargs)
-            except (KeyError, ValueError) as e:
-                self.log(str(e), verbose=self.config.verbose)
-                status = ReturnStatus.bad_parser
+        :return: Кортеж из четырёх объектов: (1) ключ кеша; (2) хеш ключа кеша; (3) закешированный ответ; (4) флаг необходимости инференса LLM-агента.
+        :rtype: Tuple[List[str], Union[str, None], object, bool]
+        """
+        self.log("-"*20, verbose=self.config.verbose)
+        self.log("4. Генерация ответа с помощью LLM-агента.", verbose=self.config.verbose)
+
+        raw_answer = None
+        gen_flag = True
+        cache_key = self.get_cache_key(detected_lang, enriched_user_prompt)
+        key_hash = None
+
+        if self.cachekv is not None:
+            self.log("Поиск ответа в кеше...", verbose=self.config.verbose)
+            cstatus, key_hash, cached_result = self.cachekv.load_value(key=cache_key)
+            if cstatus == 0:
+                self.log("Результат по заданной конфигурации гиперпараметров уже был получен.", verbose=self.config.verbose)
+                self.log(f"* CACHE_TABLE_NAME {self.cachekv.kv_conn.config.db_info['table']}", verbose=self.verbose)
+                self.log(f"* CACHE_HASH_KEY: {key_hash}", verbose=self.verbose)
+                formated_log_cachekey = '\n-'.join(cache_key)
+                self.log(f"* HASH_SEEDS:\n-{formated_log_cachekey}", verbose=self.verbose)
+
+                gen_flag = False
+                raw_answer = cached_result
             else:
-                self.log(f"Результат:\n{formated_answer}", verbose=self.config.verbose)
-            finally:
-                self.log("Статус: " + STATUS_MESSAGE[status], verbose=self.config.verbose)
+                self.log("Результата по заданной конфигурации гиперпараметров в кеше нет.", verbose=self.config.verbose)
+                self.log(f"* CACHE_TABLE_NAME {self.cachekv.kv_conn.config.db_info['table']}", verbose=self.verbose)
+                self.log(f"* CACHE_HASH_KEY: {key_hash}.", verbose=self.verbose)
+                formated_log_cachekey = '\n-'.join(cache_key)
+                self.log(f"* HASH_SEEDS:\n-{formated_log_cachekey }", verbose=self.verbose)
+
+        return cache_key, key_hash, raw_answer, gen_flag
+
+    def save_answer(self, raw_answer: str, key_hash: Union[str, None]) -> None:
+        if self.cachekv is not None:
+            self.log("Кешируем полученный результат.", verbose=self.config.verbose)
+            self.cachekv.save_value(value=raw_answer, key_hash=key_hash)
+
+    def process_answer(self, raw_answer: str, detected_lang: str, **kwargs) -> Tuple[object, ReturnStatus]:
+        """Метод предназначен для разбора и постобработки ответа LLM-агента.
+
+        :return: Кортеж из двух объектов: (1) результат работы agent-солвера; (2) статус завершения операции с пояснительной информацией.
+        :rtype: Tuple[object, ReturnStatus]
+        """
+        task_result, status = None, ReturnStatus.success
+        self.log("-"*20, verbose=self.config.verbose)
+        self.log("5. Разбор ответа, сгенерированного LLM-агентом.", verbose=self.config.verbose)
+
+        try:
+            formated_answer = self.config.suites[detected_lang].parse_answer_func(raw_answer, **kwargs)
+        except (KeyError, ValueError) as e:
+            self.log(str(e), verbose=self.config.verbose)
+            status = ReturnStatus.bad_parser
+        else:
+            self.log(f"Результат:\n{formated_answer}", verbose=self.config.verbose)
+        finally:
+            self.log("Статус: " + STATUS_MESSAGE[status], verbose=self.config.verbose)
 
         #  Если не было ошибок при разборе raw-строки
         if status == ReturnStatus.success:
@@ -92,6 +92,8 @@ def test_pipeline():
         print(f"\n[CRITICAL ERROR] Pipeline failed: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        qa_engine.close()
 
 if __name__ == "__main__":
     test_pipeline()
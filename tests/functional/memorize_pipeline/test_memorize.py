@@ -43,10 +43,10 @@ def test_mem_pipeline(mem_config: MemPipelineConfig, raw_texts: List[str],
 
     if use_kv_cache:
         if clear_kv_cache:
-            mem_pipeline.extractor.thesises_extraction_solver.cachekv.kv_conn.clear()
-            mem_pipeline.extractor.triplets_extraction_solver.cachekv.kv_conn.clear()
-            mem_pipeline.updator.replace_hyper_solver.cachekv.kv_conn.clear()
-            mem_pipeline.updator.replace_simple_solver.cachekv.kv_conn.clear()
+            mem_pipeline.extractor.thesises_extraction_solver.cachekv.clear()
+            mem_pipeline.extractor.triplets_extraction_solver.cachekv.clear()
+            mem_pipeline.updator.replace_hyper_solver.cachekv.clear()
+            mem_pipeline.updator.replace_simple_solver.cachekv.clear()
 
         mem_pipeline.extractor.thesises_extraction_solver.cachekv.kv_conn.close_connection()
         mem_pipeline.extractor.triplets_extraction_solver.cachekv.kv_conn.close_connection()
@@ -7,7 +7,7 @@ sys.path.insert(0, PROJECT_BASE_DIR)
 from src.utils.data_structs import NodeCreator, Relation, RelationType, NodeType, TripletCreator
 
 # TO CHANGE
-AVAILABLE_GRAPH_DBS = ['neo4j', 'kuzu', 'inmemory_graph'] # 'neo4j', 'kuzu', 'inmemory_graph'
+AVAILABLE_GRAPH_DBS = ['neo4j', 'kuzu', 'inmemory_graph', 'compact_graph'] # 'neo4j', 'kuzu', 'inmemory_graph', 'compact_graph'
 
 ###############################################################################################
 
@@ -244,6 +244,26 @@ for db_vendor in AVAILABLE_GRAPH_DBS:
 
 ###############################################################################################
 
+GRAPHDB_ITEMS_EXIST_TEST_CASES = [
+    # 1. часть квадруплетов существует
+    [[SIMPLE_TRIPLET1, EPISODIC_TRIPLET3], [SIMPLE_TRIPLET1.id, 'unknown_id', EPISODIC_TRIPLET3.id], {'exception': False, 'exist': {SIMPLE_TRIPLET1.id, EPISODIC_TRIPLET3.id}, 'type': 'quadruplet'}],
+    # 2. часть вершин существует
+    [[SIMPLE_TRIPLET1, EPISODIC_TRIPLET3], [OBJECT_NODE1.id, OBJECT_NODE4.id], {'exception': False, 'exist': {OBJECT_NODE1.id}, 'type': 'node'}],
+    # 3. пустой набор идентификаторов
+    [[SIMPLE_TRIPLET1, EPISODIC_TRIPLET3], [], {'exception': False, 'exist': set(), 'type': 'node'}],
+    # 4. неверный формат идентификатора
+    [[SIMPLE_TRIPLET1, EPISODIC_TRIPLET3], [OBJECT_NODE1.id, 789], {'exception': True, 'exist': set(), 'type': 'node'}],
+    # 5. неверный тип объектов
+    [[SIMPLE_TRIPLET1, EPISODIC_TRIPLET3], [OBJECT_NODE1.id], {'exception': True, 'exist': set(), 'type': 'unknown'}]
+]
+
+GRAPHDB_POPULATED_ITEMS_EXIST_TEST_CASES = []
+for db_vendor in AVAILABLE_GRAPH_DBS:
+    for i in range(len(GRAPHDB_ITEMS_EXIST_TEST_CASES)):
+        GRAPHDB_POPULATED_ITEMS_EXIST_TEST_CASES.append(GRAPHDB_ITEMS_EXIST_TEST_CASES[i] + [db_vendor])
+
+###############################################################################################
+
 GRAPHDB_CLEAR_TEST_CASES = [
     # 1. чистка пустой бд
     [[], {'triplets_count': 0, 'nodes_count': 0}],
@@ -289,6 +309,24 @@ for db_vendor in AVAILABLE_GRAPH_DBS:
 
 ###############################################################################################
 
+GRAPHDB_GET_ADJECENT_BATCH_TEST_CASES = [
+    # 1. несколько вершин за один запрос
+    [[SIMPLE_TRIPLET1, SIMPLE_TRIPLET2],{0:FULL_CREATION_INFO, 1:WO_SN_CREATION_INFO}, [OBJECT_NODE1.id, OBJECT_NODE2.id], ALL_N_TYPES, {'exception': False, 'output_ids': {OBJECT_NODE1.id: {OBJECT_NODE2.id}, OBJECT_NODE2.id: {OBJECT_NODE1.id, OBJECT_NODE3.id}}}],
+    # 2. несуществующий идентифкатор
+    [[SIMPLE_TRIPLET1, SIMPLE_TRIPLET2],{0:FULL_CREATION_INFO, 1:WO_SN_CREATION_INFO}, [OBJECT_NODE3.id, OBJECT_NODE4.id], ALL_N_TYPES, {'exception': False, 'output_ids': {OBJECT_NODE3.id: {OBJECT_NODE2.id}, OBJECT_NODE4.id: set()}}],
+    # 3. пустой набор вершин
+    [[SIMPLE_TRIPLET1, SIMPLE_TRIPLET2],{0:FULL_CREATION_INFO, 1:WO_SN_CREATION_INFO}, [], ALL_N_TYPES, {'exception': False, 'output_ids': dict()}],
+    # 4. неверный формат идентификатора
+    [[SIMPLE_TRIPLET1, SIMPLE_TRIPLET2],{0:FULL_CREATION_INFO, 1:WO_SN_CREATION_INFO}, [OBJECT_NODE1.id, None], ALL_N_TYPES, {'exception': True, 'output_ids': dict()}]
+]
+
+GRAPHDB_POPULATED_GET_ADJECENT_BATCH_TEST_CASES = []
+for db_vendor in AVAILABLE_GRAPH_DBS:
+    for i in range(len(GRAPHDB_GET_ADJECENT_BATCH_TEST_CASES)):
+        GRAPHDB_POPULATED_GET_ADJECENT_BATCH_TEST_CASES.append(GRAPHDB_GET_ADJECENT_BATCH_TEST_CASES[i] + [db_vendor])
+
+###############################################################################################
+
 GRAPHDB_GET_TRIPLETS_TEST_CASES = [
     # 1. между нодами нет связей
     [[SIMPLE_TRIPLET1, SIMPLE_TRIPLET4],{0:FULL_CREATION_INFO, 1:FULL_CREATION_INFO}, (OBJECT_NODE1.id,OBJECT_NODE3.id), {
@@ -331,6 +369,30 @@ for db_vendor in AVAILABLE_GRAPH_DBS:
 
 ###############################################################################################
 
+GRAPHDB_GET_QUADRUPLETS_FOR_PAIRS_TEST_CASES = [
+    # 1. несколько пар вершин за один запрос
+    [[SIMPLE_TRIPLET1, SIMPLE_TRIPLET1_2, SIMPLE_TRIPLET4], {0:FULL_CREATION_INFO, 1:ONLY_REL_CREATION_INFO, 2:FULL_CREATION_INFO},
+     [(OBJECT_NODE1.id, OBJECT_NODE2.id), (OBJECT_NODE1.id, OBJECT_NODE3.id)], {
+        'exception': False, 'output_ids': {(OBJECT_NODE1.id, OBJECT_NODE2.id): {SIMPLE_TRIPLET1.id, SIMPLE_TRIPLET1_2.id}, (OBJECT_NODE1.id, OBJECT_NODE3.id): set()}}],
+    # 2. циклическая связь
+    [[SIMPLE_TRIPLET5],{0:WO_EN_CREATION_INFO}, [(OBJECT_NODE1.id,OBJECT_NODE1.id)], {
+        'exception': False, 'output_ids': {(OBJECT_NODE1.id, OBJECT_NODE1.id): {SIMPLE_TRIPLET5.id}}}],
+    # 3. несуществующий идентифкатор
+    [[SIMPLE_TRIPLET1],{0:FULL_CREATION_INFO}, [('unknown_id', OBJECT_NODE1.id), (OBJECT_NODE2.id, OBJECT_NODE1.id)], {
+        'exception': False, 'output_ids': {('unknown_id', OBJECT_NODE1.id): set(), (OBJECT_NODE2.id, OBJECT_NODE1.id): {SIMPLE_TRIPLET1.id}}}],
+    # 4. пустой набор пар
+    [[SIMPLE_TRIPLET1],{0:FULL_CREATION_INFO}, [], {'exception': False, 'output_ids': dict()}],
+    # 5. неверный формат идентификатора
+    [[SIMPLE_TRIPLET1],{0:FULL_CREATION_INFO}, [(OBJECT_NODE1.id, None)], {'exception': True, 'output_ids': dict()}]
+]
+
+GRAPHDB_POPULATED_GET_QUADRUPLETS_FOR_PAIRS_TEST_CASES = []
+for db_vendor in AVAILABLE_GRAPH_DBS:
+    for i in range(len(GRAPHDB_GET_QUADRUPLETS_FOR_PAIRS_TEST_CASES)):
+        GRAPHDB_POPULATED_GET_QUADRUPLETS_FOR_PAIRS_TEST_CASES.append(GRAPHDB_GET_QUADRUPLETS_FOR_PAIRS_TEST_CASES[i] + [db_vendor])
+
+###############################################################################################
+
 # instances, create_info, init_count, name, type, object, expected_output, exception
 
 from src.utils.data_structs import NodeType, RelationType
@@ -17,6 +17,12 @@ def inmemory_graph_conn():
         db_info={'db': 'testing', 'table': 'testing'}, need_to_clear=True))
     return GraphDriver.connect(config)
 
+@pytest.fixture(scope='package')
+def compact_graph_conn():
+    config = GraphDriverConfig(db_vendor='compact_graph', db_config=GraphDBConnectionConfig(
+        db_info={'db': 'testing', 'table': 'testing'}, params={'delta_buffer_size': 8}, need_to_clear=True))
+    return GraphDriver.connect(config)
+
 @pytest.fixture(scope='package')
 def neo4j_conn():
     config = GraphDriverConfig(db_vendor='neo4j', db_config=GraphDBConnectionConfig(
@@ -50,12 +56,14 @@ def kuzu_conn():
 @pytest.fixture(scope='package')
 def available_graph_connections(
     inmemory_graph_conn,
+    compact_graph_conn,
     neo4j_conn,
    kuzu_conn
 ):
     return {
         'neo4j': neo4j_conn,
         'inmemory_graph': inmemory_graph_conn,
+        'compact_graph': compact_graph_conn,
         'kuzu': kuzu_conn
     }
 
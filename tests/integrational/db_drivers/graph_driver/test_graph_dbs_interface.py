@@ -10,7 +10,8 @@ sys.path.insert(0, PROJECT_BASE_DIR)
 from cases import GRAPHDB_POPULATED_CREATE_TEST_CASES, GRAPHDB_POPULATED_DELETE_TEST_CASES, \
     GRAPHDB_POPULATED_READ_TEST_CASES, GRAPHDB_POPULATED_COUNT_TEST_CASES, GRAPHDB_POPULATED_EXIST_TEST_CASES, \
     GRAPHDB_POPULATED_CLEAR_TEST_CASES, GRAPHDB_POPULATED_GET_TRIPLETS_TEST_CASES, GRAPHDB_POPULATED_GET_ADJECENT_TEST_CASES, \
-        GRAPHDB_POPULATED_READ_BY_NAME_TEST_CASES, GRAPHDB_POPULATED_GET_NSHARED_IDS_TEST_CASES
+        GRAPHDB_POPULATED_READ_BY_NAME_TEST_CASES, GRAPHDB_POPULATED_GET_NSHARED_IDS_TEST_CASES, GRAPHDB_POPULATED_GET_ADJECENT_BATCH_TEST_CASES, \
+        GRAPHDB_POPULATED_GET_QUADRUPLETS_FOR_PAIRS_TEST_CASES, GRAPHDB_POPULATED_ITEMS_EXIST_TEST_CASES
 
 from src.utils import Triplet, RelationType, NodeType
 from src.utils.data_structs import Node
@@ -94,6 +95,21 @@ def test_exist(instances, inputs, expected, graphdb_conn):
     if not expected['exception']:
         assert real == expected['exist']
 
+@pytest.mark.parametrize("instances, inputs, expected, graphdb_conn", GRAPHDB_POPULATED_ITEMS_EXIST_TEST_CASES, indirect=['graphdb_conn'])
+def test_items_exist(instances, inputs, expected, graphdb_conn):
+    graphdb_conn.clear()
+    graphdb_conn.create(instances)
+
+    try:
+        real = graphdb_conn.items_exist(inputs, expected['type'])
+    except ValueError as e:
+        print(str(e))
+        assert expected['exception']
+    else:
+        assert not expected['exception']
+
+    if not expected['exception']:
+        assert real == expected['exist']
 
 @pytest.mark.parametrize("instances, base_info, graphdb_conn", GRAPHDB_POPULATED_CLEAR_TEST_CASES, indirect=['graphdb_conn'])
 def test_clear(instances, base_info, graphdb_conn):
@@ -124,6 +140,20 @@ def test_get_adjecent_nids(instances, create_info, node, accepted_n_types, expec
         assert not expected['exception']
         assert expected['output_ids'] == set(output)
 
+@pytest.mark.parametrize("instances, create_info, nodes, accepted_n_types, expected, graphdb_conn", GRAPHDB_POPULATED_GET_ADJECENT_BATCH_TEST_CASES, indirect=['graphdb_conn'])
+def test_get_adjacent_nids_batch(instances, create_info, nodes, accepted_n_types, expected, graphdb_conn):
+    graphdb_conn.clear()
+    graphdb_conn.create(instances, create_info)
+
+    try:
+        output = graphdb_conn.get_adjacent_nids_batch(nodes, accepted_n_types=accepted_n_types)
+    except ValueError as e:
+        print(str(e))
+        assert expected['exception']
+    else:
+        assert not expected['exception']
+        assert expected['output_ids'] == {node_id: set(adj_ids) for node_id, adj_ids in output.items()}
+
 @pytest.mark.parametrize("instances, create_info, nodes, expected, graphdb_conn", GRAPHDB_POPULATED_GET_TRIPLETS_TEST_CASES, indirect=['graphdb_conn'])
 def test_get_triplets(instances: List[Triplet], create_info: Dict, nodes: List[str],
                       expected: Dict, graphdb_conn: AbstractGraphDatabaseConnection):
@@ -150,6 +180,21 @@ def test_get_triplets(instances: List[Triplet], create_info: Dict, nodes: List[s
         assert expected['output_ids'] == set(list(map(lambda triplet: triplet.id, output)))
         assert expected['count'] == len(output)
 
+@pytest.mark.parametrize("instances, create_info, pairs, expected, graphdb_conn", GRAPHDB_POPULATED_GET_QUADRUPLETS_FOR_PAIRS_TEST_CASES, indirect=['graphdb_conn'])
+def test_get_quadruplets_for_pairs(instances: List[Triplet], create_info: Dict, pairs: List[Tuple[str, str]],
+                                   expected: Dict, graphdb_conn: AbstractGraphDatabaseConnection):
+    graphdb_conn.clear()
+    graphdb_conn.create(instances, create_info)
+
+    try:
+        output = graphdb_conn.get_quadruplets_for_pairs(pairs)
+    except ValueError as e:
+        print(str(e))
+        assert expected['exception']
+    else:
+        assert not expected['exception']
+        assert expected['output_ids'] == {pair: set(map(lambda quadruplet: quadruplet.id, quadruplets)) for pair, quadruplets in output.items()}
+
 @pytest.mark.parametrize("instances, create_info, init_count, name, type, object, expected_output, exception, graphdb_conn", GRAPHDB_POPULATED_READ_BY_NAME_TEST_CASES, indirect=['graphdb_conn'])
 def test_read_by_name(instances: List[Triplet], create_info: Dict, init_count: Dict, name: str,
                       type: Union[RelationType,NodeType], object: str, expected_output: List[Union[Triplet,Node]],
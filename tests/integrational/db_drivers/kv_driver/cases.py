@@ -146,3 +146,54 @@ KVDB_POPULATED_CLEAR_TEST_CASES = []
 for db_vendor in AVAILABLE_KV_DBS:
     for i in range(len(KVDB_CLEAR_TEST_CASES)):
         KVDB_POPULATED_CLEAR_TEST_CASES.append(KVDB_CLEAR_TEST_CASES[i] + [db_vendor])
+
+###############################################################################################
+
+FULL_INSTANCE3 = KeyValueDBInstance(id='789', value='v3')
+
+KVDB_DELETE_RARE_TEST_CASES = [
+    # 1. удаление нуля элементов
+    [[FULL_INSTANCE1, FULL_INSTANCE2, FULL_INSTANCE3], [['123'], ['123'], ['456']], 0, {'deleted_ids': [], 'db_size': 3}],
+    # 2. удаление элемента без обращений
+    [[FULL_INSTANCE1, FULL_INSTANCE2, FULL_INSTANCE3], [['123'], ['123'], ['456']], 1, {'deleted_ids': ['789'], 'db_size': 2}],
+    # 3. удаление двух наименее используемых элементов
+    [[FULL_INSTANCE1, FULL_INSTANCE2, FULL_INSTANCE3], [['123'], ['123'], ['456']], 2, {'deleted_ids': ['456', '789'], 'db_size': 1}],
+    # 4. количество больше размера хранилища
+    [[FULL_INSTANCE1, FULL_INSTANCE2, FULL_INSTANCE3], [['123']], 5, {'deleted_ids': ['123', '456', '789'], 'db_size': 0}]
+]
+
+KVDB_POPULATED_DELETE_RARE_TEST_CASES = []
+for db_vendor in AVAILABLE_KV_DBS:
+    for i in range(len(KVDB_DELETE_RARE_TEST_CASES)):
+        KVDB_POPULATED_DELETE_RARE_TEST_CASES.append(KVDB_DELETE_RARE_TEST_CASES[i] + [db_vendor])
+
+###############################################################################################
+
+KVDB_EVICTION_POLICY_TEST_CASES = [
+    # 1. lfu: при переполнении вытесняется элемент без обращений
+    [{'eviction_policy': 'lfu', 'max_storage': 2, 'eviction_batch': 0}, [[FULL_INSTANCE1, FULL_INSTANCE2], ['123'], [FULL_INSTANCE3]], {'exception': False, 'ids': ['123', '789']}],
+    # 2. lru: при переполнении вытесняется наиболее давно использованный элемент
+    [{'eviction_policy': 'lru', 'max_storage': 2, 'eviction_batch': 0}, [[FULL_INSTANCE1], [FULL_INSTANCE2], ['123'], [FULL_INSTANCE3]], {'exception': False, 'ids': ['123', '789']}],
+    # 3. ограничение по суммарному размеру значений
+    [{'eviction_policy': 'lfu', 'max_bytes': 70, 'eviction_batch': 0}, [[FULL_INSTANCE1], ['123'], [FULL_INSTANCE2], [FULL_INSTANCE3]], {'exception': False, 'ids': ['123', '789']}],
+    # 4. устаревшие элементы удаляются
+    [{'ttl': 0}, [[FULL_INSTANCE1, FULL_INSTANCE2]], {'exception': False, 'ids': []}],
+    # 5. неизвестная политика вытеснения
+    [{'eviction_policy': 'fifo'}, [], {'exception': True, 'ids': []}]
+]
+
+###############################################################################################
+
+KVDB_BULK_TEST_CASES = [
+    # 1. пустой список
+    [[FULL_INSTANCE1, FULL_INSTANCE2], [], {'output_ids': [], 'exist': []}],
+    # 2. существующие и несуществующие элементы
+    [[FULL_INSTANCE1, FULL_INSTANCE2], ['123', '789', '456'], {'output_ids': ['123', None, '456'], 'exist': [True, False, True]}],
+    # 3. повторяющиеся идентификаторы
+    [[FULL_INSTANCE1, FULL_INSTANCE2], ['456', '456'], {'output_ids': ['456', '456'], 'exist': [True, True]}]
+]
+
+KVDB_POPULATED_BULK_TEST_CASES = []
+for db_vendor in AVAILABLE_KV_DBS:
+    for i in range(len(KVDB_BULK_TEST_CASES)):
+        KVDB_POPULATED_BULK_TEST_CASES.append(KVDB_BULK_TEST_CASES[i] + [db_vendor])
@@ -1,4 +1,5 @@
 import pytest
+import redis
 from chromadb.errors import ChromaError
 
 import sys
@@ -6,7 +7,13 @@ sys.path.insert(0, "../")
 
 from cases import KVDB_POPULATED_CREATE_TEST_CASES, KVDB_POPULATED_DELETE_TEST_CASES, \
     KVDB_POPULATED_READ_TEST_CASES, KVDB_POPULATED_COUNT_TEST_CASES, KVDB_POPULATED_EXIST_TEST_CASES, \
-    KVDB_POPULATED_CLEAR_TEST_CASES
+    KVDB_POPULATED_CLEAR_TEST_CASES, KVDB_POPULATED_DELETE_RARE_TEST_CASES, KVDB_EVICTION_POLICY_TEST_CASES, \
+    KVDB_POPULATED_BULK_TEST_CASES
+
+from cases import FULL_INSTANCE1, FULL_INSTANCE2
+
+from src.db_drivers.kv_driver import KVDBConnectionConfig, KeyValueDBInstance
+from src.db_drivers.kv_driver.connectors import InMemoryKVConnector, RedisKVConnector
 
 @pytest.mark.parametrize("input, expected, keyvaluedb_conn", KVDB_POPULATED_CREATE_TEST_CASES, indirect=['keyvaluedb_conn'])
 def test_create(input, expected, keyvaluedb_conn):
@@ -89,3 +96,133 @@ def test_clear(instances, keyvaluedb_conn):
     assert keyvaluedb_conn.count_items() == len(instances)
     keyvaluedb_conn.clear()
     assert keyvaluedb_conn.count_items() == 0
+
+
+@pytest.mark.parametrize("instances, input, expected, keyvaluedb_conn", KVDB_POPULATED_BULK_TEST_CASES, indirect=['keyvaluedb_conn'])
+def test_bulk_operations(instances, input, expected, keyvaluedb_conn):
+    keyvaluedb_conn.clear()
+    keyvaluedb_conn.create_many(instances)
+    assert keyvaluedb_conn.count_items() == len(instances)
+
+    output = keyvaluedb_conn.read_many(input)
+    assert list(map(lambda item: None if item is None else item.id, output)) == expected['output_ids']
+    assert keyvaluedb_conn.exists_many(input) == expected['exist']
+
+@pytest.mark.parametrize("instances, reads, num, expected, keyvaluedb_conn", KVDB_POPULATED_DELETE_RARE_TEST_CASES, indirect=['keyvaluedb_conn'])
+def test_delete_rare_items(instances, reads, num, expected, keyvaluedb_conn):
+    keyvaluedb_conn.clear()
+    keyvaluedb_conn.create(instances)
+    for ids in reads:
+        keyvaluedb_conn.read(ids)
+
+    deleted_ids = keyvaluedb_conn.delete_rare_items(num)
+
+    assert sorted(deleted_ids) == expected['deleted_ids']
+    assert keyvaluedb_conn.count_items() == expected['db_size']
+
+
+@pytest.mark.parametrize("params, steps, expected", KVDB_EVICTION_POLICY_TEST_CASES)
+def test_eviction_policy(params, steps, expected):
+    config = KVDBConnectionConfig(params={
+        'kvstore_dump_name': 'inmemory_store', 'load_from_disk': False, 'save_on_disk': False, **params})
+
+    try:
+        conn = InMemoryKVConnector(config)
+        conn.open_connection()
+    except ValueError as e:
+        print(str(e))
+        assert expected['exception']
+        return
+    else:
+        assert not expected['exception']
+
+    all_ids = set()
+    for step in steps:
+        if len(step) > 0 and type(step[0]) is str:
+            conn.read(step)
+        else:
+            conn.create(step)
+            all_ids.update(item.id for item in step)
+
+    assert sorted(id for id in all_ids if conn.item_exist(id)) == expected['ids']
+
+
+def test_redis_bulk_pipeline(redis_conn):
+    redis_conn.clear()
+    redis_conn.create_many([FULL_INSTANCE1])
+
+    # существующий элемент не перезаписывается, новый добавляется
+    redis_conn.create_many([KeyValueDBInstance(id=FULL_INSTANCE1.id, value='new'), FULL_INSTANCE2])
+    output = redis_conn.read_many([FULL_INSTANCE1.id, '789', FULL_INSTANCE2.id, FULL_INSTANCE1.id])
+
+    assert [None if item is None else item.value for item in output] == ['v1', None, 'v2', 'v1']
+    assert redis_conn.exists_many([FULL_INSTANCE1.id, '789', FULL_INSTANCE2.id]) == [True, False, True]
+    # чтение несуществующего элемента не добавляет его в ордер-сет
+    assert redis_conn.conn.zcard(redis_conn.config.params['ss_name']) == 2
+    assert redis_conn.conn.zscore(redis_conn.config.params['ss_name'], '789') is None
+
+def test_redis_bytes_counter():
+    config = KVDBConnectionConfig(host='localhost', port=6370, need_to_clear=True, db_info={'db': 0, 'table': 'test_bytes_collection'},
+        params={'ss_name': 'sorted_node_pairs', 'hs_name': 'node_pairs', 'max_bytes': 1e+6})
+    conn = RedisKVConnector(config)
+    conn.open_connection()
+
+    conn.create_many([FULL_INSTANCE1, FULL_INSTANCE2, KeyValueDBInstance(id='789', value='v3')])
+    conn.delete([FULL_INSTANCE1.id, '000'])
+
+    sizes = conn.conn.hgetall(conn.sizes_hs_name)
+    assert sorted(sizes.keys()) == [FULL_INSTANCE2.id.encode(), b'789']
+    assert conn.count_bytes() == sum(int(size) for size in sizes.values())
+
+    conn.update([KeyValueDBInstance(id='789', value='v3' * 100), KeyValueDBInstance(id='000', value='v4')])
+    sizes = conn.conn.hgetall(conn.sizes_hs_name)
+    assert sorted(sizes.keys()) == [FULL_INSTANCE2.id.encode(), b'789']
+    assert conn.count_bytes() == sum(int(size) for size in sizes.values())
+    assert conn.read(['789'])[0].value == 'v3' * 100
+    conn.clear()
+
+def test_redis_round_trips(monkeypatch):
+    config = KVDBConnectionConfig(host='localhost', port=6370, need_to_clear=True, db_info={'db': 0, 'table': 'test_round_trips_collection'},
+        params={'ss_name': 'sorted_node_pairs', 'hs_name': 'node_pairs', 'max_bytes': 1e+6})
+    conn = RedisKVConnector(config)
+    conn.open_connection()
+    conn.create_many([FULL_INSTANCE1])
+
+    round_trips = []
+    execute_command, execute = redis.Redis.execute_command, redis.client.Pipeline.execute
+    monkeypatch.setattr(redis.Redis, 'execute_command', lambda self, *args, **kwargs: round_trips.append(args[0]) or execute_command(self, *args, **kwargs))
+    monkeypatch.setattr(redis.client.Pipeline, 'execute', lambda self, *args, **kwargs: round_trips.append('PIPELINE') or execute(self, *args, **kwargs))
+
+    # проверка существования и размер хранилища читаются одним пакетом, запись - вторым
+    conn.create_many([KeyValueDBInstance(id=FULL_INSTANCE1.id, value='new'), FULL_INSTANCE2])
+    assert round_trips == ['PIPELINE', 'PIPELINE']
+
+    round_trips.clear()
+    conn.update([KeyValueDBInstance(id=FULL_INSTANCE1.id, value='new'), KeyValueDBInstance(id='789', value='v3')])
+    assert round_trips == ['PIPELINE', 'PIPELINE']
+    assert conn.count_bytes() == sum(int(size) for size in conn.conn.hgetall(conn.sizes_hs_name).values())
+    conn.clear()
+
+def test_mongo_create_does_not_overwrite(mongo_conn, monkeypatch):
+    mongo_conn.clear()
+    mongo_conn.create_many([FULL_INSTANCE1])
+
+    # элемент добавлен другим клиентом между проверкой существования и записью
+    monkeypatch.setattr(mongo_conn, '_get_existing_ids', lambda ids: [])
+    mongo_conn.create_many([KeyValueDBInstance(id=FULL_INSTANCE1.id, value='new'), FULL_INSTANCE2])
+
+    assert mongo_conn.count_items() == 2
+    assert [item.value for item in mongo_conn.read_many([FULL_INSTANCE1.id, FULL_INSTANCE2.id])] == ['v1', 'v2']
+
+def test_mixed_read_warms_cache_once(mixed_conn):
+    mixed_conn.clear()
+    mixed_conn.create_many([FULL_INSTANCE1, FULL_INSTANCE2])
+    assert mixed_conn.count_items(storage_type=1) == 0
+
+    # повторяющиеся идентификаторы кешируются в оперативную память один раз
+    output = mixed_conn.read([FULL_INSTANCE1.id, FULL_INSTANCE1.id, '789', FULL_INSTANCE2.id])
+
+    assert [None if item is None else item.value for item in output] == ['v1', 'v1', None, 'v2']
+    assert mixed_conn.count_items(storage_type=1) == 2
+    assert mixed_conn.exists_many([FULL_INSTANCE1.id, '789'], storage_type=1) == [True, False]
+    assert [item.value for item in mixed_conn.read([FULL_INSTANCE1.id, FULL_INSTANCE1.id])] == ['v1', 'v1']
@@ -10,7 +10,9 @@ sys.path.insert(0, PROJECT_BASE_DIR)
 from src.db_drivers.vector_driver import VectorDBInstance
 
 # TO CHANGE
-AVAILABLE_VECTOR_DBS = ['chroma', 'milvus'] # 'chroma', 'milvus'
+AVAILABLE_VECTOR_DBS = ['chroma', 'milvus', 'numpy', 'numpy_ivf'] # 'chroma', 'milvus', 'numpy', 'numpy_ivf'
+# коннекторы, в которых реализовано обновление объектов
+UPDATABLE_VECTOR_DBS = ['numpy', 'numpy_ivf']
 
 ###############################################################################################
 
@@ -56,8 +58,8 @@ VECTORDB_CREATE_TEST_CASES = [
     [[[FULL_INSTANCE1],[FULL_INSTANCE1]], {'exception': False, 'db_size': 1}],
     # 9. torch-тип данных эмбеддинга
     [[[INSTANCE_WITH_TORCH_EMB]], {'exception': True, 'db_size': 0}],
-    # 10. numpy-тип данных эмбеддинга
-    [[[INSTANCE_WITH_NUMPY_EMB]], {'exception': True, 'db_size': 0}],
+    # 10. numpy-тип данных эмбеддинга (numpy-векторы принимаются напрямую)
+    [[[INSTANCE_WITH_NUMPY_EMB]], {'exception': False, 'db_size': 1}],
     # 11. неверный формат идентикатора 1
     [[[INSTANCE_WITH_BAD_ID1]],{'exception': True, 'db_size': 0}],
     # 12. неверный формат идентификатора 2
@@ -148,6 +150,28 @@ for db_vendor in AVAILABLE_VECTOR_DBS:
 
 ###############################################################################################
 
+VECTORDB_UPDATE_TEST_CASES = [
+    # 1. обновление одного элемента
+    [[FULL_INSTANCE1,FULL_INSTANCE2],[UPDATE_FULL_INSTANCE1],False,{FULL_INSTANCE1.id: UPDATE_FULL_INSTANCE1, FULL_INSTANCE2.id: FULL_INSTANCE2}],
+    # 2. обновление нескольких элементов
+    [[FULL_INSTANCE1,FULL_INSTANCE2],[UPDATE_FULL_INSTANCE1,UPDATE_FULL_INSTANCE2],False,{FULL_INSTANCE1.id: UPDATE_FULL_INSTANCE1, FULL_INSTANCE2.id: UPDATE_FULL_INSTANCE2}],
+    # 3. несуществующий элемент не добавляется
+    [[FULL_INSTANCE1],[UPDATE_FULL_INSTANCE2],False,{FULL_INSTANCE1.id: FULL_INSTANCE1}],
+    # 4. незаданный эмбеддинг не изменяется
+    [[FULL_INSTANCE2],[INSTANCE_WO_EMBEDDING],False,{FULL_INSTANCE2.id: FULL_INSTANCE2}],
+    # 5. неверный формат эмбеддинга: хранилище не изменяется
+    [[FULL_INSTANCE1],[VectorDBInstance(id=FULL_INSTANCE1.id, document='new', embedding=[0.1,0.2])],True,{FULL_INSTANCE1.id: FULL_INSTANCE1}],
+    # 6. неверный идентификатор
+    [[FULL_INSTANCE1],[INSTANCE_WITH_BAD_ID1],True,{FULL_INSTANCE1.id: FULL_INSTANCE1}]
+]
+
+VECTORDB_POPULATED_UPDATE_TEST_CASES = []
+for db_vendor in UPDATABLE_VECTOR_DBS:
+    for i in range(len(VECTORDB_UPDATE_TEST_CASES)):
+        VECTORDB_POPULATED_UPDATE_TEST_CASES.append(VECTORDB_UPDATE_TEST_CASES[i] + [db_vendor])
+
+###############################################################################################
+
 VECTORDB_RETRIEVE_TEST_CASES = [
     # 1.1 ретрив по одному квери
     [[FULL_INSTANCE1,FULL_INSTANCE2], [FULL_INSTANCE1], 1, None, {'exception': False, 'output_size': 1}],
@@ -159,8 +183,8 @@ VECTORDB_RETRIEVE_TEST_CASES = [
     [[FULL_INSTANCE1], [FULL_INSTANCE1], 2, None, {'exception': False, 'output_size': 1}],
     # 4. torch-тип данных эмбеддинга
     [[FULL_INSTANCE1,FULL_INSTANCE2], [INSTANCE_WITH_TORCH_EMB], 2, None, {'exception': True, 'output_size': -1}],
-    # 5. numpy-тип данных эмбеддинга
-    [[FULL_INSTANCE1,FULL_INSTANCE2], [INSTANCE_WITH_NUMPY_EMB], 2, None, {'exception': True, 'output_size': -1}],
+    # 5. numpy-тип данных эмбеддинга (numpy-векторы принимаются напрямую)
+    [[FULL_INSTANCE1,FULL_INSTANCE2], [INSTANCE_WITH_NUMPY_EMB], 2, None, {'exception': False, 'output_size': 2}],
     # 6. неверный формат ембеддинга квери # 1
     [[FULL_INSTANCE1,FULL_INSTANCE2], [INSTANCE_WITH_BAD_EMB1], 2, None, {'exception': True, 'output_size': -1}],
     # 7. неверный формат ембеддинга квери # 2
@@ -178,6 +202,26 @@ for db_vendor in AVAILABLE_VECTOR_DBS:
 
 ###############################################################################################
 
+VECTORDB_RETRIEVE_BATCH_TEST_CASES = [
+    # 1. несколько query-векторов
+    [[FULL_INSTANCE1,FULL_INSTANCE2], [[0.1,0.2,0.3], [0.4,0.5,0.6], [0.6,0.5,0.4]], 1, None, {'exception': False, 'output_sizes': [1, 1, 1]}],
+    # 2. query-векторы в виде numpy-матрицы
+    [[FULL_INSTANCE1,FULL_INSTANCE2], numpy.array([[0.1,0.2,0.3], [0.4,0.5,0.6]]), 2, None, {'exception': False, 'output_sizes': [2, 2]}],
+    # 3. query-векторы в виде VectorDBInstance-объектов (из подмножества)
+    [[FULL_INSTANCE1,FULL_INSTANCE2], [FULL_INSTANCE1, FULL_INSTANCE2], 2, [FULL_INSTANCE2.id], {'exception': False, 'output_sizes': [1, 1]}],
+    # 4. в векторной бд нуль объектов
+    [[], [[0.1,0.2,0.3], [0.4,0.5,0.6]], 2, None, {'exception': False, 'output_sizes': [0, 0]}],
+    # 5. torch-тип данных эмбеддинга
+    [[FULL_INSTANCE1,FULL_INSTANCE2], [torch.tensor([0.1,0.2,0.3])], 2, None, {'exception': True, 'output_sizes': []}]
+]
+
+VECTORDB_POPULATED_RETRIEVE_BATCH_TEST_CASES = []
+for db_vendor in AVAILABLE_VECTOR_DBS:
+    for i in range(len(VECTORDB_RETRIEVE_BATCH_TEST_CASES)):
+        VECTORDB_POPULATED_RETRIEVE_BATCH_TEST_CASES.append(VECTORDB_RETRIEVE_BATCH_TEST_CASES[i] + [db_vendor])
+
+###############################################################################################
+
 VECTORDB_COUNT_TEST_CASES = [
     # 1. нуль элементов
     [[], 0],
@@ -214,6 +258,44 @@ for db_vendor in AVAILABLE_VECTOR_DBS:
 
 ###############################################################################################
 
+VECTORDB_EXISTING_IDS_TEST_CASES = [
+    # 1. часть элементов существует
+    [[FULL_INSTANCE1,FULL_INSTANCE2], ['123', '789'], {'exception': False, 'existing': {'123'}}],
+    # 2. пустой набор идентификаторов
+    [[FULL_INSTANCE1,FULL_INSTANCE2], [], {'exception': False, 'existing': set()}],
+    # 3. идентификаторы-дубликаты
+    [[FULL_INSTANCE1,FULL_INSTANCE2], ['123', '123'], {'exception': False, 'existing': {'123'}}],
+    # 4. неверный формат идентификатора
+    [[FULL_INSTANCE1,FULL_INSTANCE2], ['123', 789], {'exception': True, 'existing': set()}]
+]
+
+VECTORDB_POPULATED_EXISTING_IDS_TEST_CASES = []
+for db_vendor in AVAILABLE_VECTOR_DBS:
+    for i in range(len(VECTORDB_EXISTING_IDS_TEST_CASES)):
+        VECTORDB_POPULATED_EXISTING_IDS_TEST_CASES.append(VECTORDB_EXISTING_IDS_TEST_CASES[i] + [db_vendor])
+
+###############################################################################################
+
+VECTORDB_SCORE_IDS_TEST_CASES = [
+    # 1. все элементы существуют
+    [[FULL_INSTANCE1,FULL_INSTANCE2], [[0.1,0.2,0.3]], ['123', '456'], {'exception': False, 'scores': [[0.14, 0.32]]}],
+    # 2. несуществующий элемент (nan)
+    [[FULL_INSTANCE1,FULL_INSTANCE2], [[0.1,0.2,0.3]], ['789', '456'], {'exception': False, 'scores': [[None, 0.32]]}],
+    # 3. несколько query-векторов
+    [[FULL_INSTANCE1,FULL_INSTANCE2], [[0.1,0.2,0.3], [1.0,0.0,0.0]], ['456'], {'exception': False, 'scores': [[0.32], [0.4]]}],
+    # 4. пустой набор идентификаторов
+    [[FULL_INSTANCE1,FULL_INSTANCE2], [[0.1,0.2,0.3]], [], {'exception': False, 'scores': [[]]}],
+    # 5. неверный формат идентификатора
+    [[FULL_INSTANCE1,FULL_INSTANCE2], [[0.1,0.2,0.3]], [123], {'exception': True, 'scores': None}]
+]
+
+VECTORDB_POPULATED_SCORE_IDS_TEST_CASES = []
+for db_vendor in AVAILABLE_VECTOR_DBS:
+    for i in range(len(VECTORDB_SCORE_IDS_TEST_CASES)):
+        VECTORDB_POPULATED_SCORE_IDS_TEST_CASES.append(VECTORDB_SCORE_IDS_TEST_CASES[i] + [db_vendor])
+
+###############################################################################################
+
 VECTORDB_CLEAR_TEST_CASES = [
     # 1. чистка пустой бд
     [[]],
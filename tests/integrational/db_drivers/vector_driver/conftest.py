@@ -26,14 +26,31 @@ def milvusdb_conn():
                 'load': True, 'flush': True, 'create_sleep': 1, 'search_metric': 'IP'}))
     return VectorDriver.connect(config)
 
+@pytest.fixture(scope='package')
+def numpydb_conn():
+    config = VectorDriverConfig(db_vendor='numpy', db_config=VectorDBConnectionConfig(
+        conn={'path': f"{TEST_VOLUME_DIR}/numpy"}, db_info={'db': 'testing', 'table': 'testing'},
+        params={'ivf_nlist': 0}, need_to_clear=True))
+    return VectorDriver.connect(config)
+
+@pytest.fixture(scope='package')
+def numpyivfdb_conn():
+    # ivf-индекс строится с первого элемента; просматриваются все кластеры, поэтому результаты совпадают с точным поиском
+    config = VectorDriverConfig(db_vendor='numpy', db_config=VectorDBConnectionConfig(
+        conn={'path': f"{TEST_VOLUME_DIR}/numpy_ivf"}, db_info={'db': 'testing', 'table': 'testing'},
+        params={'ivf_nlist': 2, 'ivf_nprobe': 2, 'ivf_min_size': 1}, need_to_clear=True))
+    return VectorDriver.connect(config)
+
 #------------------------------#
 
 @pytest.fixture(scope='package')
 def available_vector_connections(
-    chromadb_conn, milvusdb_conn):
+    chromadb_conn, milvusdb_conn, numpydb_conn, numpyivfdb_conn):
     return {
         'chroma': chromadb_conn,
-        'milvus': milvusdb_conn}
+        'milvus': milvusdb_conn,
+        'numpy': numpydb_conn,
+        'numpy_ivf': numpyivfdb_conn}
 
 @pytest.fixture(scope='function')
 def vectordb_conn(available_vector_connections, request):
@@ -0,0 +1,47 @@
+import pytest
+import numpy as np
+import sys
+sys.path.insert(0, "../")
+
+# тесты загружают исходную embedder-модель
+pytest.importorskip('sentence_transformers')
+
+from src.db_drivers.vector_driver.embedders import EmbedderModel, EmbedderModelConfig
+
+# допустимое отклонение векторных представлений квантизованной модели от исходной (fp32)
+MIN_MEAN_COSINE = 0.99
+MIN_COSINE = 0.97
+
+PARITY_TEXTS = [
+    "Каждый охотник желает знать, где сидит фазан.",
+    "Every hunter wants to know where the pheasant sits.",
+    "Albert Einstein was born in Ulm in 1879.",
+    "Столица Франции - Париж.",
+    "The Eiffel Tower is located in Paris.",
+    "Moscow",
+    "Лев Толстой написал роман «Война и мир».",
+    "Python is a programming language."
+]
+
+@pytest.fixture(scope='module')
+def fp32_embeddings():
+    embedder = EmbedderModel(EmbedderModelConfig(device='cpu', backend='torch'))
+    return {'queries': embedder.encode_queries_np(PARITY_TEXTS), 'passages': embedder.encode_passages_np(PARITY_TEXTS)}
+
+@pytest.mark.parametrize("backend", ['torch_int8', 'onnx'])
+def test_backend_parity(backend, fp32_embeddings):
+    if backend == 'onnx':
+        # без onnxruntime/optimum используется 'torch_int8', который проверяется отдельно
+        pytest.importorskip('onnxruntime')
+        pytest.importorskip('optimum')
+    embedder = EmbedderModel(EmbedderModelConfig(device='cpu', backend=backend))
+    assert embedder.backend == backend
+
+    for encode, kind in [(embedder.encode_queries_np, 'queries'), (embedder.encode_passages_np, 'passages')]:
+        real = encode(PARITY_TEXTS)
+        expected = fp32_embeddings[kind]
+        assert real.shape == expected.shape
+
+        cosines = np.sum(real * expected, axis=1) / (np.linalg.norm(real, axis=1) * np.linalg.norm(expected, axis=1))
+        assert cosines.mean() >= MIN_MEAN_COSINE
+        assert cosines.min() >= MIN_COSINE
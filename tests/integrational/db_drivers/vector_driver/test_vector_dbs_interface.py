@@ -12,7 +12,8 @@ from src.db_drivers.vector_driver.utils import AbstractVectorDatabaseConnection
 from cases import VECTORDB_POPULATED_CREATE_TEST_CASES, VECTORDB_POPULATED_DELETE_TEST_CASES, \
     VECTORDB_POPULATED_READ_TEST_CASES, VECTORDB_POPULATED_RETRIEVE_TEST_CASES, \
     VECTORDB_POPULATED_COUNT_TEST_CASES, VECTORDB_POPULATED_EXIST_TEST_CASES, \
-    VECTORDB_POPULATED_CLEAR_TEST_CASES, VECTORDB_POPULATED_UPSERT_TEST_CASES
+    VECTORDB_POPULATED_CLEAR_TEST_CASES, VECTORDB_POPULATED_UPSERT_TEST_CASES, VECTORDB_POPULATED_EXISTING_IDS_TEST_CASES, \
+    VECTORDB_POPULATED_SCORE_IDS_TEST_CASES, VECTORDB_POPULATED_RETRIEVE_BATCH_TEST_CASES, VECTORDB_POPULATED_UPDATE_TEST_CASES
 
 @pytest.mark.parametrize("input, expected, vectordb_conn", VECTORDB_POPULATED_CREATE_TEST_CASES, indirect=['vectordb_conn'])
 def test_create(input: List[List[VectorDBInstance]], expected: Dict[str, object],
@@ -75,6 +76,33 @@ def test_upsert(init_instance: List[VectorDBInstance], new_instances: Dict[str,
         real_count = vectordb_conn.count_items()
         assert real_count == expected_count
 
+@pytest.mark.parametrize("init_instances, new_instances, exception, expected_contents, vectordb_conn", VECTORDB_POPULATED_UPDATE_TEST_CASES, indirect=['vectordb_conn'])
+def test_update(init_instances: List[VectorDBInstance], new_instances: List[VectorDBInstance], exception: bool,
+                expected_contents: Dict[str, VectorDBInstance], vectordb_conn: AbstractVectorDatabaseConnection):
+    vectordb_conn.clear()
+    vectordb_conn.create(init_instances)
+
+    try:
+        vectordb_conn.update(new_instances)
+    except ValueError as e:
+        print(str(e))
+        assert exception
+    else:
+        assert not exception
+
+    real_contents = vectordb_conn.read(list(expected_contents.keys()))
+    assert len(real_contents) == len(expected_contents)
+    for item in real_contents:
+        assert item.document == expected_contents[item.id].document
+        assert np.sum(np.abs(np.array(item.embedding) -  np.array(expected_contents[item.id].embedding))) < 1e-5
+        assert item.metadata == expected_contents[item.id].metadata
+    assert vectordb_conn.count_items() == len(init_instances)
+
+    # поиск учитывает обновлённые эмбеддинги
+    for item in real_contents:
+        output = {instance.id: dist for dist, instance in vectordb_conn.retrieve([item], n_results=len(init_instances))[0]}
+        assert abs(output[item.id] - (1 - np.dot(item.embedding, item.embedding))) < 1e-5
+
 @pytest.mark.parametrize("instances, delete_ids, expected, vectordb_conn", VECTORDB_POPULATED_DELETE_TEST_CASES, indirect=['vectordb_conn'])
 def test_delete(instances, delete_ids, expected, vectordb_conn: AbstractVectorDatabaseConnection):
     vectordb_conn.clear()
@@ -112,6 +140,21 @@ def test_retrieve(instances: List[VectorDBInstance], queries: List[str], n_resul
         for query_output in output:
             assert expected['output_size'] == len(query_output)
 
+@pytest.mark.parametrize("instances, queries, n_results, subset_ids, expected, vectordb_conn", VECTORDB_POPULATED_RETRIEVE_BATCH_TEST_CASES, indirect=['vectordb_conn'])
+def test_retrieve_batch(instances: List[VectorDBInstance], queries: List[object], n_results: int, subset_ids: List[str],
+                        expected: Dict[str, object], vectordb_conn: AbstractVectorDatabaseConnection):
+    vectordb_conn.clear()
+    vectordb_conn.create(instances)
+
+    try:
+        output = vectordb_conn.retrieve_batch(queries, n_results=n_results, subset_ids=subset_ids)
+    except (ValueError, AssertionError, ParamError, MilvusException) as e:
+        print(str(e))
+        assert expected['exception']
+    else:
+        assert not expected['exception']
+        assert list(map(len, output)) == expected['output_sizes']
+
 @pytest.mark.parametrize("instances, expected, vectordb_conn", VECTORDB_POPULATED_COUNT_TEST_CASES, indirect=['vectordb_conn'])
 def test_count_items(instances: List[VectorDBInstance], expected: Dict[str, int],
                      vectordb_conn: AbstractVectorDatabaseConnection):
@@ -135,6 +178,38 @@ def test_item_exist(instances: List[VectorDBInstance], input_id: object, expecte
         assert not expected['exception']
         assert real == expected['exist']
 
+@pytest.mark.parametrize("instances, input_ids, expected, vectordb_conn", VECTORDB_POPULATED_EXISTING_IDS_TEST_CASES, indirect=['vectordb_conn'])
+def test_existing_ids(instances: List[VectorDBInstance], input_ids: List[object], expected: Dict[str, object],
+                      vectordb_conn: AbstractVectorDatabaseConnection):
+    vectordb_conn.clear()
+    vectordb_conn.create(instances)
+
+    try:
+        real = vectordb_conn.existing_ids(input_ids)
+    except ValueError as e:
+        print(str(e))
+        assert expected['exception']
+    else:
+        assert not expected['exception']
+        assert real == expected['existing']
+
+@pytest.mark.parametrize("instances, queries, input_ids, expected, vectordb_conn", VECTORDB_POPULATED_SCORE_IDS_TEST_CASES, indirect=['vectordb_conn'])
+def test_score_ids(instances: List[VectorDBInstance], queries: List[List[float]], input_ids: List[object],
+                   expected: Dict[str, object], vectordb_conn: AbstractVectorDatabaseConnection):
+    vectordb_conn.clear()
+    vectordb_conn.create(instances)
+
+    try:
+        real = vectordb_conn.score_ids(queries, input_ids)
+    except ValueError as e:
+        print(str(e))
+        assert expected['exception']
+    else:
+        assert not expected['exception']
+        expected_scores = np.array(expected['scores'], dtype=np.float32).reshape(len(queries), len(input_ids))
+        assert real.shape == expected_scores.shape
+        assert np.allclose(real, expected_scores, atol=1e-5, equal_nan=True)
+
 @pytest.mark.parametrize("instances, vectordb_conn", VECTORDB_POPULATED_CLEAR_TEST_CASES, indirect=['vectordb_conn'])
 def test_clear(instances: List[VectorDBInstance], vectordb_conn: AbstractVectorDatabaseConnection):
     vectordb_conn.clear()
@@ -67,8 +67,8 @@ CACHEKV_SAVE_TEST_CASES = [
     (CACHED_INSTANCES, VALUE3, KEY1_OBJECT_MODIF2, None, KEY_HASH1_OBJECT_MODIF2, False),
     # 4. непустое key_hash-значение (values-отсутствует)
     (CACHED_INSTANCES, VALUE3, None, KEY_HASH1_OBJECT_MODIF2, KEY_HASH1_OBJECT_MODIF2, False),
-    # 5. key-значение уже содержится в кеше
-    (CACHED_INSTANCES, VALUE3, KEY1, None, None, True)
+    # 5. key-значение уже содержится в кеше (сохранённое значение не перезаписывается)
+    (CACHED_INSTANCES, VALUE3, KEY1, None, KEY_HASH1, False)
 ]
 
 CACHEKV_POPULATED_SAVE_TEST_CASES = []
@@ -1,11 +1,14 @@
 import sys
+import gc
 import pickle
+import weakref
 # TO CHANGE
 PROJECT_BASE_DIR = '../'
 sys.path.insert(0, PROJECT_BASE_DIR)
 
-from src.db_drivers.kv_driver.utils import AbstractKVDatabaseConnection, KeyValueDBInstance
-from src.utils.cache_kv import CacheKV
+from src.db_drivers.kv_driver.utils import AbstractKVDatabaseConnection, KeyValueDBInstance, KVDBConnectionConfig
+from src.db_drivers.kv_driver import KeyValueDriverConfig
+from src.utils.cache_kv import CacheKV, CacheKVConfig
 import pytest
 from typing import List
 
@@ -30,7 +33,7 @@ def test_gethash(key: List[object], expected: str, exception: bool, key2: List[o
 @pytest.mark.parametrize("cache_instances, key, key_hash, expected_status, expected_value, exception, cachekv_conn", CACHEKV_POPULATED_LOAD_TEST_CASES, indirect=['cachekv_conn'])
 def test_load_value(cache_instances: List[KeyValueDBInstance], key: List[object], key_hash: str,
                     expected_status: bool, expected_value: object, exception: bool, cachekv_conn: CacheKV):
-    cachekv_conn.kv_conn.clear()
+    cachekv_conn.clear()
     cachekv_conn.kv_conn.create(cache_instances)
 
     try:
@@ -47,7 +50,7 @@ def test_load_value(cache_instances: List[KeyValueDBInstance], key: List[object]
 @pytest.mark.parametrize("cache_instances, value, key, key_hash, expected, exception, cachekv_conn", CACHEKV_POPULATED_SAVE_TEST_CASES, indirect=['cachekv_conn'])
 def test_save_value(cache_instances: List[KeyValueDBInstance], value: object, key: List[object], key_hash: str,
                     expected: str, exception: bool, cachekv_conn: CacheKV):
-    cachekv_conn.kv_conn.clear()
+    cachekv_conn.clear()
     cachekv_conn.kv_conn.create(cache_instances)
 
     try:
@@ -60,4 +63,147 @@ def test_save_value(cache_instances: List[KeyValueDBInstance], value: object, ke
 
         assert cachekv_conn.kv_conn.item_exist(real_key_hash)
         real_value = pickle.loads(cachekv_conn.kv_conn.read([real_key_hash])[0].value)
-        assert real_value == value
+        cached_values = {instance.id: pickle.loads(instance.value) for instance in cache_instances}
+        assert real_value == cached_values.get(real_key_hash, value)
+
+def get_inmemory_cachekv(config: CacheKVConfig, table: str) -> CacheKV:
+    inmemorykv_config = KVDBConnectionConfig(
+        db_info={'db': 'test_cache_db', 'table': table},
+        params={'kvstore_dump_name': 'inmemory_tiers_store', 'load_from_disk': False, 'max_storage': -1,
+                'load_dump_dir': '.', 'save_on_disk': False, 'save_dump_dir': '.'}, need_to_clear=True)
+    return CacheKV(KeyValueDriverConfig(db_vendor='inmemory_kv', db_config=inmemorykv_config), config)
+
+def test_memory_tier_hits():
+    cachekv = get_inmemory_cachekv(CacheKVConfig(), 'test_memory_tier_hits')
+    key_hash = cachekv.save_value("value", key=["k1"])
+
+    # значение удаляется только из kv-хранилища: повторное чтение обслуживается памятью процесса
+    cachekv.kv_conn.delete([key_hash])
+    assert cachekv.load_value(key=["k1"]) == (0, key_hash, "value")
+    assert cachekv.load_value(key=["k2"])[0] == -1
+
+    stats = CacheKV.get_namespaces_stats()['test_memory_tier_hits']
+    assert (stats['memory_hits'], stats['backend_hits'], stats['misses']) == (1, 0, 1)
+    assert stats['hit_ratio'] == 0.5
+
+@pytest.mark.parametrize("load_many", [False, True])
+def test_memory_tier_returns_copies(load_many: bool):
+    cachekv = get_inmemory_cachekv(CacheKVConfig(), f'test_memory_tier_returns_copies_{load_many}')
+    value = {'steps_answers': ['a1']}
+    key_hash = cachekv.save_value(value, key=["k1"])
+    # изменение сохранённого объекта не затрагивает кеш
+    value['steps_answers'].append('a2')
+
+    load = (lambda: cachekv.load_values(keys=[["k1"]])[0]) if load_many else (lambda: cachekv.load_value(key=["k1"]))
+    loaded = load()[2]
+    loaded['steps_answers'].append('a3')
+
+    # повторная загрузка из памяти процесса возвращает исходное значение
+    assert load() == (0, key_hash, {'steps_answers': ['a1']})
+    assert CacheKV.get_namespaces_stats()[f'test_memory_tier_returns_copies_{load_many}']['memory_hits'] == 2
+
+def test_memory_tier_byte_budget():
+    value = "v" * 1000
+    item_size = len(pickle.dumps(value))
+    cachekv = get_inmemory_cachekv(CacheKVConfig(memory_max_bytes=3 * item_size), 'test_memory_tier_byte_budget')
+    for i in range(10):
+        cachekv.save_value(value, key=[str(i)])
+
+    stats = cachekv.get_stats()
+    assert stats['memory_items'] == 3
+    assert stats['memory_bytes'] <= 3 * item_size
+    assert cachekv.kv_conn.count_items() == 10
+
+def test_memory_tier_ttl():
+    cachekv = get_inmemory_cachekv(CacheKVConfig(ttl=0.0), 'test_memory_tier_ttl')
+    key_hash = cachekv.save_value("value", key=["k1"])
+
+    cachekv.kv_conn.delete([key_hash])
+    assert cachekv.load_value(key=["k1"])[0] == -1
+
+def test_write_back():
+    cachekv = get_inmemory_cachekv(CacheKVConfig(write_mode='write_back', write_back_max_dirty=3), 'test_write_back')
+    key_hash1 = cachekv.save_value("value1", key=["k1"])
+    cachekv.save_value("value2", key=["k2"])
+
+    assert cachekv.kv_conn.count_items() == 0
+    assert cachekv.check_key_exist(key_hash=key_hash1)
+    # повторное сохранение несохранённого в kv-хранилище значения не изменяет его
+    assert cachekv.save_value("other", key=["k1"]) == key_hash1
+    assert cachekv.load_value(key=["k1"])[2] == "value1"
+
+    # переполнение буфера несохранённых значений
+    cachekv.save_value("value3", key=["k3"])
+    assert cachekv.kv_conn.count_items() == 3
+
+    cachekv.save_value("value4", key=["k4"])
+    cachekv.flush()
+    assert cachekv.kv_conn.count_items() == 4
+    assert pickle.loads(cachekv.kv_conn.read([key_hash1])[0].value) == "value1"
+
+@pytest.fixture
+def process_memory_budget():
+    default_budget = (CacheKV.process_memory_max_bytes, CacheKV.process_memory_max_items)
+    yield CacheKV.set_process_memory_budget
+    CacheKV.set_process_memory_budget(*default_budget)
+
+def test_process_memory_budget(process_memory_budget):
+    process_memory_budget(64 * 1024**2, 3)
+    through_cachekv = get_inmemory_cachekv(CacheKVConfig(), 'test_process_memory_budget_through')
+    back_cachekv = get_inmemory_cachekv(CacheKVConfig(write_mode='write_back'), 'test_process_memory_budget_back')
+
+    back_hash = back_cachekv.save_value("value1", key=["k1"])
+    through_cachekv.save_value("value2", key=["k2"])
+    through_cachekv.save_value("value3", key=["k3"])
+    assert back_cachekv.kv_conn.count_items() == 0
+
+    # бюджет общий для всех кешей: вытесняется наиболее давно использованный объект другого кеша,
+    # несохранённое значение при этом записывается в kv-хранилище
+    through_cachekv.save_value("value4", key=["k4"])
+    assert (back_cachekv.get_stats()['memory_items'], through_cachekv.get_stats()['memory_items']) == (0, 3)
+    assert pickle.loads(back_cachekv.kv_conn.read([back_hash])[0].value) == "value1"
+
+    # обращение к объекту обновляет его положение в общей очереди вытеснения
+    through_cachekv.load_value(key=["k2"])
+    back_cachekv.load_value(key=["k1"])
+    assert through_cachekv.load_value(key=["k3"])[0] == 0
+    assert set(through_cachekv.memory.keys()) == {CacheKV.get_hash(["k2"]), CacheKV.get_hash(["k3"])}
+
+    through_cachekv.close()
+    assert through_cachekv.get_stats()['memory_items'] == 0
+    assert len([key for key in CacheKV.process_memory if key[0] == id(through_cachekv)]) == 0
+
+def test_write_back_garbage_collected():
+    cachekv = get_inmemory_cachekv(CacheKVConfig(write_mode='write_back'), 'test_write_back_garbage_collected')
+    key_hash = cachekv.save_value("value", key=["k1"])
+    kv_conn, cachekv_ref = cachekv.kv_conn, weakref.ref(cachekv)
+
+    # кеш не удерживается обработчиком завершения процесса, а несохранённые значения записываются при его удалении
+    del cachekv
+    gc.collect()
+    assert cachekv_ref() is None
+    assert pickle.loads(kv_conn.read([key_hash])[0].value) == "value"
+
+def test_invalid_write_mode():
+    with pytest.raises(ValueError):
+        get_inmemory_cachekv(CacheKVConfig(write_mode='write_around'), 'test_invalid_write_mode')
+
+def test_bulk_load_save():
+    cachekv = get_inmemory_cachekv(CacheKVConfig(), 'test_bulk_load_save')
+    key_hashes = cachekv.save_values(["value1", "value2"], keys=[["k1"], ["k2"]])
+    assert key_hashes == [CacheKV.get_hash(["k1"]), CacheKV.get_hash(["k2"])]
+    assert cachekv.kv_conn.count_items() == 2
+
+    # значения по существующим ключам не перезаписываются, дубликаты в пакете недопустимы
+    assert cachekv.save_values(["other", "value4"], keys=[["k1"], ["k4"]]) == [key_hashes[0], CacheKV.get_hash(["k4"])]
+    assert cachekv.kv_conn.count_items() == 3
+    with pytest.raises(ValueError):
+        cachekv.save_values(["value3", "value3"], keys=[["k3"], ["k3"]])
+
+    # первое значение читается из памяти процесса, второе - из kv-хранилища
+    cachekv._memory_pop(key_hashes[1])
+    outputs = cachekv.load_values(keys=[["k1"], ["k2"], ["k3"]])
+    assert outputs == [(0, key_hashes[0], "value1"), (0, key_hashes[1], "value2"), (-1, CacheKV.get_hash(["k3"]), None)]
+
+    stats = CacheKV.get_namespaces_stats()['test_bulk_load_save']
+    assert (stats['memory_hits'], stats['backend_hits'], stats['misses']) == (1, 1, 1)
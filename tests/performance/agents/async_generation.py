@@ -0,0 +1,48 @@
+import sys
+import asyncio
+from time import time
+
+import yaml
+
+# TO CHANGE
+PROJECT_BASE_DIR = '../../../'
+sys.path.insert(0, PROJECT_BASE_DIR)
+
+from src.agents.utils import AgentConnectorConfig
+from src.agents.connectors.StubAgentConnector import StubAgentConnector
+from src.utils import AgentTaskSolver, AgentTaskSolverConfig, AgentTaskSuite
+
+PARAMS_PATH = 'params.yaml'
+
+def get_solver(latency: float, max_concurrency: int) -> AgentTaskSolver:
+    agent = StubAgentConnector(AgentConnectorConfig(ext_params={'latency': latency, 'max_concurrency': max_concurrency}), ['answer'])
+    config = AgentTaskSolverConfig(
+        version='v1', suites={'en': AgentTaskSuite(system_prompt='system', user_prompt='{text}', assistant_prompt='',
+                                                   parse_answer_func=lambda raw_answer, **kwargs: raw_answer)},
+        formate_context_func=lambda text: {'text': text}, postprocess_answer_func=lambda answer, **kwargs: answer,
+        cache_table_name=None, log=lambda *args, **kwargs: None)
+    return AgentTaskSolver(agent, config)
+
+async def run_async(solver: AgentTaskSolver, n_requests: int):
+    return await asyncio.gather(*[solver.asolve(lang='en', text=str(i)) for i in range(n_requests)])
+
+if __name__ == "__main__":
+    with open(PARAMS_PATH, 'r') as f:
+        params = yaml.safe_load(f)['async_generation']
+    print(f"requests: {params['requests']}, latency: {params['latency']}")
+
+    solver = get_solver(params['latency'], 1)
+    s_time = time()
+    for i in range(params['requests']):
+        solver.solve(lang='en', text=str(i))
+    sync_time = time() - s_time
+    print('solve', ' | '.join([f"max_concurrency: 1", f"total_sec: {sync_time:.4f}", f"requests_per_sec: {params['requests'] / sync_time:.4f}"]))
+
+    for max_concurrency in params['max_concurrency']:
+        solver = get_solver(params['latency'], max_concurrency)
+        s_time = time()
+        asyncio.run(run_async(solver, params['requests']))
+        async_time = time() - s_time
+        print('asolve', ' | '.join([f"max_concurrency: {max_concurrency}", f"total_sec: {async_time:.4f}",
+                                    f"requests_per_sec: {params['requests'] / async_time:.4f}", f"speedup: {sync_time / async_time:.2f}",
+                                    f"max_in_flight: {solver.agent.limiter.get_stats()['max_in_flight']}"]))
@@ -0,0 +1,51 @@
+import sys
+from time import time
+
+import numpy as np
+import torch
+import yaml
+
+# TO CHANGE
+PROJECT_BASE_DIR = '../../../'
+sys.path.insert(0, PROJECT_BASE_DIR)
+
+from src.db_drivers.vector_driver.embedders import EmbedderModel, EmbedderModelConfig
+
+from np_allocation import generate_passages
+
+PARAMS_PATH = 'params.yaml'
+
+def run(config: dict, params: dict, backend: str, passages, reference: np.ndarray = None):
+    s_time = time()
+    embedder = EmbedderModel(EmbedderModelConfig(model_name_or_path=config['model_name_or_path'], device='cpu', backend=backend))
+    load_time = time() - s_time
+
+    # прогрев модели
+    embedder.encode_passages_np(passages[:params['batch_size']], batch_size=params['batch_size'])
+
+    s_time = time()
+    embeddings = embedder.encode_passages_np(passages, batch_size=params['batch_size'])
+    elapsed = time() - s_time
+
+    stats = {'backend': embedder.backend, 'load_sec': load_time, 'encode_sec': elapsed, 'passages_per_sec': len(passages) / elapsed}
+    if reference is not None:
+        cosines = np.sum(embeddings * reference, axis=1) / (np.linalg.norm(embeddings, axis=1) * np.linalg.norm(reference, axis=1))
+        stats.update({'mean_cosine': float(cosines.mean()), 'min_cosine': float(cosines.min())})
+    return stats, embeddings
+
+if __name__ == "__main__":
+    with open(PARAMS_PATH, 'r') as f:
+        config = yaml.safe_load(f)
+    params = config['backends_throughput']
+    if params['threads'] is not None:
+        torch.set_num_threads(params['threads'])
+
+    passages = generate_passages(params)
+    print(f"passages: {len(passages)}, batch_size: {params['batch_size']}, torch threads: {torch.get_num_threads()}")
+
+    reference = None
+    for backend in params['backends']:
+        stats, embeddings = run(config, params, backend, passages, reference)
+        if backend == 'torch':
+            reference = embeddings
+        print(backend, ' | '.join([f"{k}: {v:.4f}" if type(v) is float else f"{k}: {v}" for k, v in stats.items()]))
@@ -0,0 +1,51 @@
+import sys
+import random
+import tracemalloc
+from time import time
+
+import numpy as np
+import yaml
+
+# TO CHANGE
+PROJECT_BASE_DIR = '../../../'
+sys.path.insert(0, PROJECT_BASE_DIR)
+
+from src.db_drivers.vector_driver.embedders import EmbedderModel, EmbedderModelConfig
+
+PARAMS_PATH = 'params.yaml'
+
+def generate_passages(params: dict):
+    random.seed(params['seed'])
+    return [f"entity_{random.randint(0, 10**6)} relation_{random.randint(0, 100)} entity_{random.randint(0, 10**6)}"
+            for _ in range(params['passages'])]
+
+def measure(encode, passages, batch_size):
+    # tracemalloc учитывает python-объекты и numpy-буферы, но не память, выделенную torch
+    tracemalloc.start()
+    s_time = time()
+    output = encode(passages, batch_size=batch_size)
+    elapsed = time() - s_time
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del output
+    return {'sec': elapsed, 'retained_mb': current / 2**20, 'peak_mb': peak / 2**20}
+
+if __name__ == "__main__":
+    with open(PARAMS_PATH, 'r') as f:
+        config = yaml.safe_load(f)
+    params = config['np_allocation']
+
+    embedder = EmbedderModel(EmbedderModelConfig(model_name_or_path=config['model_name_or_path'], device=config['device']))
+    passages = generate_passages(params)
+    print(f"passages: {len(passages)}, dim: {embedder.model.get_sentence_embedding_dimension()}")
+
+    # прогрев модели
+    embedder.encode_passages_np(passages[:params['batch_size']])
+
+    modes = {
+        'list_float': embedder.encode_passages,
+        'np_float32': lambda texts, **kwargs: embedder.encode_passages_np(texts, dtype=np.float32, **kwargs),
+        'np_float16': lambda texts, **kwargs: embedder.encode_passages_np(texts, dtype=np.float16, **kwargs)}
+    for mode, encode in modes.items():
+        stats = measure(encode, passages, params['batch_size'])
+        print(mode, ' | '.join([f"{k}: {v:.4f}" for k, v in stats.items()]))
@@ -0,0 +1,65 @@
+import sys
+from time import time
+
+import numpy as np
+import yaml
+
+# TO CHANGE
+PROJECT_BASE_DIR = '../../../'
+sys.path.insert(0, PROJECT_BASE_DIR)
+
+from src.db_drivers.vector_driver.embedders import EmbedderModel, EmbedderModelConfig
+
+PARAMS_PATH = 'params.yaml'
+
+class EncodeCounter:
+    """Считает количество строк, которые дошли до embedder-модели."""
+    def __init__(self, model):
+        self.model = model
+        self.texts = 0
+
+    def encode(self, texts, **kwargs):
+        self.texts += len(texts)
+        return self.model.encode(texts, **kwargs)
+
+def generate_workload(params: dict):
+    rng = np.random.default_rng(params['seed'])
+    pool = [f"entity_{i // 3} relation_{i % 17} entity_{(i * 7) % 1000}" for i in range(params['candidates_pool'])]
+    questions = []
+    for i in range(params['questions']):
+        ranks = rng.zipf(params['zipf_a'], size=params['candidates_per_question'])
+        candidates = [pool[(rank - 1) % len(pool)] for rank in ranks]
+        questions.append((f"question number {i}", candidates))
+    return questions
+
+def run(config: dict, params: dict, questions, use_cache: bool):
+    embedder = EmbedderModel(EmbedderModelConfig(
+        model_name_or_path=config['model_name_or_path'], device=config['device'],
+        cache_size=params['cache_size'] if use_cache else 0,
+        cache_path=params['cache_path'] if use_cache else None))
+    counter = EncodeCounter(embedder.model)
+    embedder.model = counter
+
+    s_time = time()
+    requested = 0
+    for _ in range(params['repeats']):
+        for question, candidates in questions:
+            embedder.encode_queries([question])
+            embedder.encode_passages(candidates)
+            requested += 1 + len(candidates)
+
+    stats = {'requested_texts': requested, 'encoded_texts': counter.texts, 'sec': time() - s_time}
+    stats.update(embedder.get_cache_stats())
+    return stats
+
+if __name__ == "__main__":
+    with open(PARAMS_PATH, 'r') as f:
+        config = yaml.safe_load(f)
+    params = config['repeated_qa']
+
+    questions = generate_workload(params)
+    print(f"questions: {params['questions']}, repeats: {params['repeats']}, candidates per question: {params['candidates_per_question']}")
+
+    for mode, use_cache in [('wo_cache', False), ('with_cache', True)]:
+        stats = run(config, params, questions, use_cache)
+        print(mode, ' | '.join([f"{k}: {v:.4f}" if type(v) is float else f"{k}: {v}" for k, v in stats.items()]))
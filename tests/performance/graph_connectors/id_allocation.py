@@ -0,0 +1,44 @@
+import sys
+import hashlib
+from time import time
+
+import yaml
+
+# TO CHANGE
+PROJECT_BASE_DIR = '../../../'
+sys.path.insert(0, PROJECT_BASE_DIR)
+
+from src.db_drivers.graph_driver import GraphDriver, GraphDriverConfig, GraphDBConnectionConfig
+from src.db_drivers.graph_driver.utils import IdAllocator
+from memory_latency import generate_quadruplets, get_creation_info
+
+PARAMS_PATH = 'params.yaml'
+
+def md5_time_ids(n: int):
+    ids = [hashlib.md5(str(time()).encode()).hexdigest() for _ in range(n)]
+    return ids, n - len(set(ids))
+
+def allocator_ids(n: int):
+    allocator = IdAllocator()
+    ids = [allocator.allocate() for _ in range(n)]
+    return ids, n - len(set(ids))
+
+def reserved_ids(n: int):
+    ids = list(IdAllocator().reserve(n))
+    return ids, n - len(set(ids))
+
+if __name__ == "__main__":
+    with open(PARAMS_PATH, 'r') as f:
+        params = yaml.safe_load(f)['id_allocation']
+
+    for name, func in [('md5(time())', md5_time_ids), ('allocate', allocator_ids), ('reserve', reserved_ids)]:
+        s_time = time()
+        _, collisions = func(params['ids'])
+        print(f"{name}: {params['ids']} ids | elapsed: {time() - s_time:.4f} sec | collisions: {collisions}")
+
+    nodes, quadruplets = generate_quadruplets(params['nodes'], params['quadruplets'], params['seed'])
+    creation_info = get_creation_info(quadruplets)
+    conn = GraphDriver.connect(GraphDriverConfig(db_vendor='inmemory_graph', db_config=GraphDBConnectionConfig()))
+    s_time = time()
+    conn.create(quadruplets, creation_info)
+    print(f"inmemory_graph hydration: {len(quadruplets)} quadruplets | elapsed: {time() - s_time:.4f} sec | {conn.count_items()}")
@@ -0,0 +1,78 @@
+import sys
+import random
+import tracemalloc
+from time import time
+
+import yaml
+
+# TO CHANGE
+PROJECT_BASE_DIR = '../../../'
+sys.path.insert(0, PROJECT_BASE_DIR)
+
+from src.utils.data_structs import NodeCreator, RelationCreator, QuadrupletCreator, NodeType
+from src.db_drivers.graph_driver import GraphDriver, GraphDriverConfig, GraphDBConnectionConfig
+
+PARAMS_PATH = 'params.yaml'
+
+def generate_quadruplets(n_nodes: int, n_quadruplets: int, seed: int):
+    random.seed(seed)
+    nodes = [NodeCreator.create(NodeType.object, f"node_{i}", add_stringified_node=False) for i in range(n_nodes)]
+    quadruplets = dict()
+    for i in range(n_quadruplets):
+        s_node, e_node = random.sample(nodes, 2)
+        relation = RelationCreator.create('simple', f"relation_{i % 500}")
+        quadruplet = QuadrupletCreator.create(s_node, relation, e_node, add_stringified_quadruplet=False)
+        quadruplets[quadruplet.id] = quadruplet
+    return nodes, list(quadruplets.values())
+
+def get_creation_info(quadruplets):
+    creation_info, created_nodes = dict(), set()
+    for i, quadruplet in enumerate(quadruplets):
+        cur_info = dict()
+        for key, node in [('s_node', quadruplet.start_node), ('e_node', quadruplet.end_node), ('t_node', quadruplet.time)]:
+            cur_info[key] = node.id not in created_nodes
+            created_nodes.add(node.id)
+        creation_info[i] = cur_info
+    return creation_info
+
+def run(connector: str, params: dict, nodes, quadruplets, creation_info):
+    config = GraphDriverConfig(db_vendor=connector, db_config=GraphDBConnectionConfig(
+        params={'delta_buffer_size': params['delta_buffer_size']}))
+
+    tracemalloc.start()
+    s_time = time()
+    conn = GraphDriver.connect(config)
+    conn.create(quadruplets, creation_info)
+    hydration_time = time() - s_time
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    random.seed(params['seed'])
+    sample_nodes = [random.choice(nodes).id for _ in range(params['adjacency_queries'])]
+    s_time = time()
+    for node_id in sample_nodes:
+        conn.get_adjecent_nids(node_id)
+    adjacency_latency = (time() - s_time) / len(sample_nodes)
+
+    sample_pairs = [(q.start_node.id, q.end_node.id) for q in random.sample(quadruplets, params['pair_queries'])]
+    s_time = time()
+    for node1_id, node2_id in sample_pairs:
+        conn.get_quadruplets(node1_id, node2_id)
+    pair_latency = (time() - s_time) / len(sample_pairs)
+
+    conn.close_connection()
+    return {'memory_mb': memory / 1024**2, 'hydration_sec': hydration_time,
+            'adjacency_ms': adjacency_latency * 1000, 'get_quadruplets_ms': pair_latency * 1000}
+
+if __name__ == "__main__":
+    with open(PARAMS_PATH, 'r') as f:
+        config = yaml.safe_load(f)
+    params = config['memory_latency']
+
+    nodes, quadruplets = generate_quadruplets(params['nodes'], params['quadruplets'], params['seed'])
+    creation_info = get_creation_info(quadruplets)
+    print(f"nodes: {len(nodes)}, quadruplets: {len(quadruplets)}")
+
+    for connector in config['connectors']:
+        stats = run(connector, params, nodes, quadruplets, creation_info)
+        print(connector, ' | '.join([f"{k}: {v:.4f}" for k, v in stats.items()]))
@@ -0,0 +1,71 @@
+import sys
+import random
+from time import time, sleep
+
+import yaml
+
+# TO CHANGE
+PROJECT_BASE_DIR = '../../../'
+sys.path.insert(0, PROJECT_BASE_DIR)
+
+from src.db_drivers.graph_driver import GraphDriver, GraphDriverConfig, GraphDBConnectionConfig
+
+from memory_latency import generate_quadruplets, get_creation_info
+
+PARAMS_PATH = 'params.yaml'
+
+class RoundTripCounter:
+    """Считает обращения к коннектору и эмулирует сетевую задержку на каждое обращение."""
+    def __init__(self, conn, rtt_ms: float):
+        self.conn = conn
+        self.rtt = rtt_ms / 1000
+        self.round_trips = 0
+
+    def __getattr__(self, name):
+        method = getattr(self.conn, name)
+        def wrapper(*args, **kwargs):
+            self.round_trips += 1
+            if self.rtt > 0:
+                sleep(self.rtt)
+            return method(*args, **kwargs)
+        return wrapper
+
+def run(connector: str, params: dict, quadruplets, creation_info):
+    conn = GraphDriver.connect(GraphDriverConfig(db_vendor=connector, db_config=GraphDBConnectionConfig()))
+    conn.create(quadruplets, creation_info)
+
+    random.seed(params['seed'])
+    sample_pairs = [(q.start_node.id, q.end_node.id) for q in random.sample(quadruplets, params['pairs'])]
+
+    stats = dict()
+    counter = RoundTripCounter(conn, params['rtt_ms'])
+    s_time = time()
+    per_pair_count = 0
+    for node1_id, node2_id in sample_pairs:
+        per_pair_count += len(counter.get_quadruplets(node1_id, node2_id))
+    stats['per_pair'] = {'round_trips': counter.round_trips, 'sec': time() - s_time, 'quadruplets': per_pair_count}
+
+    counter = RoundTripCounter(conn, params['rtt_ms'])
+    s_time = time()
+    batched_count = 0
+    for i in range(0, len(sample_pairs), params['batch_size']):
+        output = counter.get_quadruplets_for_pairs(sample_pairs[i:i+params['batch_size']])
+        batched_count += sum(map(len, output.values()))
+    stats['batched'] = {'round_trips': counter.round_trips, 'sec': time() - s_time, 'quadruplets': batched_count}
+
+    conn.close_connection()
+    return stats
+
+if __name__ == "__main__":
+    with open(PARAMS_PATH, 'r') as f:
+        config = yaml.safe_load(f)
+    params = config['pairs_roundtrips']
+
+    nodes, quadruplets = generate_quadruplets(params['nodes'], params['quadruplets'], params['seed'])
+    creation_info = get_creation_info(quadruplets)
+    print(f"nodes: {len(nodes)}, quadruplets: {len(quadruplets)}, pairs: {params['pairs']}, rtt_ms: {params['rtt_ms']}")
+
+    for connector in config['connectors']:
+        stats = run(connector, params, quadruplets, creation_info)
+        for mode, mode_stats in stats.items():
+            print(connector, mode, ' | '.join([f"{k}: {v:.4f}" if type(v) is float else f"{k}: {v}" for k, v in mode_stats.items()]))
@@ -0,0 +1,64 @@
+import sys
+from time import time
+
+import numpy as np
+import yaml
+
+# TO CHANGE
+PROJECT_BASE_DIR = '../../../'
+sys.path.insert(0, PROJECT_BASE_DIR)
+
+from src.db_drivers.kv_driver import KeyValueDriver, KeyValueDriverConfig, KVDBConnectionConfig, KeyValueDBInstance
+
+PARAMS_PATH = 'params.yaml'
+
+def get_config(connector: str, params: dict, config: dict) -> KeyValueDriverConfig:
+    eviction_params = {k: params[k] for k in ['eviction_policy', 'max_storage', 'max_bytes', 'ttl', 'eviction_batch']}
+
+    if connector == 'inmemory_kv':
+        db_config = KVDBConnectionConfig(params={
+            'kvstore_dump_name': 'eviction_soak', 'load_from_disk': False, 'save_on_disk': False, **eviction_params})
+    elif connector == 'redis':
+        db_config = KVDBConnectionConfig(
+            host='localhost', port=config['redis_port'], need_to_clear=True, db_info={'db': 0, 'table': 'eviction_soak'},
+            params={'ss_name': 'sorted_node_pairs', 'hs_name': 'node_pairs', **eviction_params})
+    elif connector == 'mongo':
+        db_config = KVDBConnectionConfig(
+            host='localhost', port=config['mongo_port'], need_to_clear=True, db_info={'db': 'benchmark', 'table': 'eviction_soak'},
+            params={'username': 'user', 'password': 'pass', **eviction_params})
+    else:
+        raise ValueError
+
+    return KeyValueDriverConfig(db_vendor=connector, db_config=db_config)
+
+def run(connector: str, params: dict, config: dict):
+    conn = KeyValueDriver.connect(get_config(connector, params, config))
+    rng = np.random.default_rng(params['seed'])
+    # поток ключей с распределением Ципфа: небольшая часть ключей запрашивается большую часть времени
+    keys = (rng.zipf(params['zipf_a'], params['operations']) - 1) % params['keys']
+    value = 'v' * params['value_size']
+
+    hits, s_time = 0, time()
+    for i, key in enumerate(keys):
+        # cache-aside: читаем элемент и записываем его при промахе
+        id = str(key)
+        if conn.read([id])[0] is not None:
+            hits += 1
+        else:
+            conn.create([KeyValueDBInstance(id=id, value=value)])
+
+        if (i + 1) % params['report_every'] == 0:
+            stats = {'items': conn.count_items(), 'bytes': conn.count_bytes(),
+                     'hit_ratio': hits / (i + 1), 'ops_per_sec': (i + 1) / (time() - s_time)}
+            print(f"{connector} ops: {i + 1}", ' | '.join([f"{k}: {v:.4f}" if type(v) is float else f"{k}: {v}" for k, v in stats.items()]))
+
+    conn.close_connection()
+
+if __name__ == "__main__":
+    with open(PARAMS_PATH, 'r') as f:
+        config = yaml.safe_load(f)
+    params = config['eviction_soak']
+
+    print(f"operations: {params['operations']}, keys: {params['keys']}, policy: {params['eviction_policy']}, "
+          f"max_storage: {params['max_storage']}, max_bytes: {params['max_bytes']}")
+    run(config['connector'], params, config)
@@ -0,0 +1,63 @@
+import sys
+from time import time
+from typing import Callable, Dict, List
+
+import yaml
+
+# TO CHANGE
+PROJECT_BASE_DIR = '../../../../'
+sys.path.insert(0, PROJECT_BASE_DIR)
+
+from src.db_drivers.kv_driver import KeyValueDriver, KeyValueDriverConfig, KVDBConnectionConfig, KeyValueDBInstance
+from src.db_drivers.kv_driver.utils import AbstractKVDatabaseConnection
+
+PARAMS_PATH = '../params.yaml'
+
+def load_config() -> Dict:
+    with open(PARAMS_PATH, 'r') as f:
+        return yaml.safe_load(f)
+
+def get_connection(config: Dict) -> AbstractKVDatabaseConnection:
+    redis_config = KVDBConnectionConfig(
+        host='localhost', port=config['redis_port'], need_to_clear=True, db_info={'db': 0, 'table': 'loading'},
+        params={'ss_name': 'sorted_node_pairs', 'hs_name': 'node_pairs', 'max_storage': -1})
+    mongo_config = KVDBConnectionConfig(
+        host='localhost', port=config['mongo_port'], need_to_clear=True, db_info={'db': 'benchmark', 'table': 'loading'},
+        params={'username': 'user', 'password': 'pass', 'max_storage': -1})
+
+    if config['connector'] == 'redis':
+        db_config = redis_config
+    elif config['connector'] == 'mongo':
+        db_config = mongo_config
+    elif config['connector'] == 'mixed_kv':
+        db_config = KVDBConnectionConfig(db_info={'db': 'benchmark', 'table': 'loading'}, need_to_clear=True,
+                                         params={'redis_config': redis_config, 'mongo_config': mongo_config})
+    elif config['connector'] == 'inmemory_kv':
+        db_config = KVDBConnectionConfig(
+            params={'kvstore_dump_name': 'loading', 'load_from_disk': False, 'save_on_disk': False, 'max_storage': -1}, need_to_clear=True)
+    else:
+        raise ValueError
+
+    return KeyValueDriver.connect(KeyValueDriverConfig(db_vendor=config['connector'], db_config=db_config))
+
+def get_range(range_config: Dict) -> range:
+    return range(range_config['from'], range_config['to'] + 1, range_config['step'])
+
+def get_modes(mode: str) -> List[str]:
+    return ['single', 'bulk'] if mode == 'all' else [mode]
+
+def fill(conn: AbstractKVDatabaseConnection, db_size: int, value: str, batch_size: int = 5000) -> None:
+    # элементы с идентификаторами 0..db_size-1; уже существующие пропускаются
+    for start in range(conn.count_items(), db_size, batch_size):
+        conn.create_many([KeyValueDBInstance(id=str(i), value=value) for i in range(start, min(start + batch_size, db_size))])
+
+def measure(function: Callable, trials: int) -> float:
+    elapsed = 0.
+    for _ in range(trials):
+        s_time = time()
+        function()
+        elapsed += time() - s_time
+    return elapsed / trials
+
+def report(name: str, stats: Dict) -> None:
+    print(name, ' | '.join([f"{k}: {v:.4f}" if type(v) is float else f"{k}: {v}" for k, v in stats.items()]))
@@ -0,0 +1,14 @@
+from common import load_config, get_connection, get_range, fill, measure, report
+
+if __name__ == "__main__":
+    config = load_config()
+    params = config['count_items']
+    conn = get_connection(config)
+
+    value = 'v' * config['value_size']
+    for db_size in get_range(params['db_size']):
+        fill(conn, db_size, value)
+        latency = measure(conn.count_items, params['trials'])
+        report(config['connector'], {'db_size': db_size, 'latency_ms': latency * 1000})
+
+    conn.close_connection()
@@ -0,0 +1,29 @@
+from common import load_config, get_connection, get_range, get_modes, fill, measure, report
+
+def run(conn, mode: str, ids):
+    if mode == 'single':
+        return lambda: [conn.item_exist(id) for id in ids]
+    return lambda: conn.exists_many(ids)
+
+if __name__ == "__main__":
+    config = load_config()
+    params = config['item_exist']
+    conn = get_connection(config)
+
+    value = 'v' * config['value_size']
+    for db_size in get_range(params['db_size']):
+        fill(conn, db_size, value)
+
+        cases = []
+        if params['existing'] and db_size > 0:
+            cases.append(('existing', [str(i % db_size) for i in range(params['input_size'])]))
+        if params['not_existing']:
+            cases.append(('not_existing', [f"missing_{i}" for i in range(params['input_size'])]))
+
+        for case_name, ids in cases:
+            for mode in get_modes(params['mode']):
+                elapsed = measure(run(conn, mode, ids), params['trials'])
+                report(f"{config['connector']} {mode} {case_name}", {
+                    'db_size': db_size, 'input_size': len(ids), 'ops_per_sec': len(ids) / elapsed})
+
+    conn.close_connection()
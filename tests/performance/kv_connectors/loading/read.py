@@ -0,0 +1,35 @@
+import random
+
+from common import load_config, get_connection, get_range, get_modes, fill, measure, report
+
+def run(conn, mode: str, ids):
+    if mode == 'single':
+        return lambda: [conn.read([id]) for id in ids]
+    return lambda: conn.read_many(ids)
+
+if __name__ == "__main__":
+    config = load_config()
+    params = config['read']
+    conn = get_connection(config)
+    random.seed(42)
+
+    value = 'v' * config['value_size']
+    for db_size in get_range(params['db_size']):
+        fill(conn, db_size, value)
+        if db_size < 1:
+            continue
+
+        for input_size in get_range(params['input_size']):
+            if input_size < 1:
+                continue
+            n_not_existing = int(input_size * params['not_existing_ids_prcnt'] / 100)
+            ids = [str(random.randrange(db_size)) for _ in range(input_size - n_not_existing)] + \
+                [f"missing_{i}" for i in range(n_not_existing)]
+            random.shuffle(ids)
+
+            for mode in get_modes(params['mode']):
+                elapsed = measure(run(conn, mode, ids), params['trials'])
+                report(f"{config['connector']} {mode}", {
+                    'db_size': db_size, 'input_size': input_size, 'ops_per_sec': input_size / elapsed})
+
+    conn.close_connection()
@@ -0,0 +1,37 @@
+from time import time
+
+from common import load_config, get_connection, get_range, get_modes, fill, report, KeyValueDBInstance
+
+if __name__ == "__main__":
+    config = load_config()
+    params = config['write']
+    conn = get_connection(config)
+
+    value = 'v' * config['value_size']
+    for db_size in get_range(params['db_size']):
+        fill(conn, db_size, value)
+
+        for input_size in get_range(params['input_size']):
+            if input_size < 1:
+                continue
+
+            for mode in get_modes(params['mode']):
+                elapsed = 0.
+                for trial in range(params['trials']):
+                    items = [KeyValueDBInstance(id=f"new_{trial}_{i}", value=value) for i in range(input_size)]
+
+                    s_time = time()
+                    if mode == 'single':
+                        for item in items:
+                            conn.create([item])
+                    else:
+                        conn.create_many(items)
+                    elapsed += time() - s_time
+
+                    # возвращаем хранилище к исходному размеру
+                    conn.delete([item.id for item in items])
+
+                report(f"{config['connector']} {mode}", {
+                    'db_size': db_size, 'input_size': input_size, 'ops_per_sec': input_size * params['trials'] / elapsed})
+
+    conn.close_connection()
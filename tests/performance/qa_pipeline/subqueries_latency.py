@@ -0,0 +1,95 @@
+import sys
+from collections import deque
+from time import time
+from typing import Tuple
+
+import yaml
+
+# TO CHANGE
+PROJECT_BASE_DIR = '../../../'
+sys.path.insert(0, PROJECT_BASE_DIR)
+
+from src.pipelines.qa import QAPipeline, QAPipelineConfig
+from src.pipelines.qa.kg_reasoning import KnowledgeGraphReasonerConfig
+from src.pipelines.qa.kg_reasoning.config import AVAILABLE_KG_REASONERS
+from src.pipelines.qa.kg_reasoning.utils import AbstractKGReasoner, BaseKGReasonerConfig
+from src.pipelines.qa.query_preprocessing import QueryPreprocessorConfig
+from src.pipelines.qa.query_preprocessing.decomposition import QueryDecomposerConfig
+from src.pipelines.qa.answers_aggregation import AnswersAggregatorConfig
+from src.agents import AgentDriverConfig
+from src.agents.utils import AgentConnectorConfig
+from src.agents.connectors.StubAgentConnector import StubAgentConnector
+from src.utils import AgentTaskSolver, AgentTaskSolverConfig, AgentTaskSuite, ReturnInfo, ReturnStatus
+
+PARAMS_PATH = 'params.yaml'
+
+class StubKGReasoner(AbstractKGReasoner):
+    """KG-reasoner, ответ которого генерируется StubAgentConnector'ом с искусственной задержкой.
+    Под-вопросы, содержащие "slow", обрабатываются с задержкой slow_latency.
+    """
+    latency = 0
+    slow_latency = 0
+
+    def __init__(self, kg_model, config, cache_kvdriver_config) -> None:
+        task_config = AgentTaskSolverConfig(
+            version='v1', suites={'en': AgentTaskSuite(system_prompt='system', user_prompt='{query}', assistant_prompt='',
+                                                       parse_answer_func=lambda raw_answer, **kwargs: raw_answer)},
+            formate_context_func=lambda query: {'query': query}, postprocess_answer_func=lambda answer, **kwargs: answer,
+            cache_table_name=None, log=lambda *args, **kwargs: None)
+        self.solvers = {
+            latency: AgentTaskSolver(StubAgentConnector(
+                AgentConnectorConfig(ext_params={'latency': latency, 'max_concurrency': 64}), ['sub_answer']), task_config)
+            for latency in [StubKGReasoner.latency, StubKGReasoner.slow_latency]}
+
+    def perform(self, query: str) -> Tuple[str, ReturnInfo]:
+        latency = StubKGReasoner.slow_latency if 'slow' in query else StubKGReasoner.latency
+        answer, status = self.solvers[latency].solve(lang='en', query=query)
+        return answer, ReturnInfo(status=status)
+
+    def clear_kv_caches(self) -> None:
+        pass
+
+def get_pipeline(params: dict, with_slow: bool, **kwargs) -> QAPipeline:
+    stub_driver_config = AgentDriverConfig(name='stub', agent_config=AgentConnectorConfig(ext_params={'latency': params['latency']}))
+    config = QAPipelineConfig(
+        preprocessor_config=QueryPreprocessorConfig(decomposition_config=QueryDecomposerConfig(
+            lang='en', adriver_config=stub_driver_config, cache_table_name=None)),
+        reasoner_config=KnowledgeGraphReasonerConfig(reasoner_name='stub', reasoner_hyperparameters=BaseKGReasonerConfig()),
+        aggregator_config=AnswersAggregatorConfig(lang='en', adriver_config=stub_driver_config),
+        **kwargs)
+    qa_pipeline = QAPipeline(None, config)
+
+    sub_queries = "\n".join([f"- sub_query {i}{' slow' if with_slow and i == 0 else ''}" for i in range(params['sub_queries'])])
+    qa_pipeline.query_preprocessor.decomposer.agent.looped_answers = deque(["[answer] Yes", sub_queries])
+    qa_pipeline.answers_aggregator.agent.looped_answers = deque(["[answer] final_answer"])
+    return qa_pipeline
+
+def run(qa_pipeline: QAPipeline, n_questions: int) -> Tuple[float, int]:
+    s_time, n_degraded = time(), 0
+    for i in range(n_questions):
+        _, info = qa_pipeline.answer(f"question {i}")
+        if info.status != ReturnStatus.success:
+            raise ValueError
+        n_degraded += info.occurred_warning.count(ReturnStatus.subquery_timeout)
+    return (time() - s_time) / n_questions, n_degraded
+
+if __name__ == "__main__":
+    with open(PARAMS_PATH, 'r') as f:
+        params = yaml.safe_load(f)['subqueries_latency']
+    print(f"questions: {params['questions']}, sub_queries: {params['sub_queries']}, latency: {params['latency']}, slow_latency: {params['slow_latency']}")
+
+    AVAILABLE_KG_REASONERS['stub'] = StubKGReasoner
+    StubKGReasoner.latency, StubKGReasoner.slow_latency = params['latency'], params['slow_latency']
+
+    # 1) все под-вопросы одинаковой длительности; 2) один из под-вопросов "медленный" и ограничивается subquery_timeout
+    for subquery_timeout in [None, params['subquery_timeout']]:
+        base_latency = None
+        for max_workers in params['max_workers']:
+            qa_pipeline = get_pipeline(params, subquery_timeout is not None, max_workers=max_workers,
+                                       subquery_timeout=subquery_timeout, degrade_on_timeout=True)
+            mean_latency, n_degraded = run(qa_pipeline, params['questions'])
+            if base_latency is None:
+                base_latency = mean_latency
+            print('answer', ' | '.join([f"max_workers: {max_workers}", f"subquery_timeout: {subquery_timeout}",
+                                        f"mean_latency_sec: {mean_latency:.4f}", f"speedup: {base_latency / mean_latency:.2f}",
+                                        f"degraded_sub_answers: {n_degraded}"]))
@@ -0,0 +1,80 @@
+import sys
+from time import time
+
+import numpy as np
+import yaml
+
+# TO CHANGE
+PROJECT_BASE_DIR = '../../../'
+sys.path.insert(0, PROJECT_BASE_DIR)
+
+from src.db_drivers.vector_driver import VectorDriver, VectorDriverConfig, VectorDBConnectionConfig, VectorDBInstance
+
+PARAMS_PATH = 'params.yaml'
+
+def generate_items(params: dict):
+    rng = np.random.default_rng(params['seed'])
+    centers = rng.normal(size=(params['clusters'], params['dim']))
+    embeddings = centers[rng.integers(0, params['clusters'], params['items'])] + 0.7 * rng.normal(size=(params['items'], params['dim']))
+    embeddings = (embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)).astype(np.float32)
+
+    items = [VectorDBInstance(id=str(i), document=f"document_{i}", embedding=embeddings[i]) for i in range(params['items'])]
+    queries = [VectorDBInstance(embedding=embeddings[i]) for i in rng.choice(params['items'], params['queries'], replace=False)]
+    subset_ids = [str(i) for i in rng.choice(params['items'], params['subset_size'], replace=False)]
+    return items, queries, subset_ids
+
+def get_config(connector: str, params: dict) -> VectorDriverConfig:
+    if connector == 'chroma':
+        return VectorDriverConfig(db_vendor='chroma', db_config=VectorDBConnectionConfig(
+            conn={'path': params['chroma_path']}, db_info={'db': 'benchmark', 'table': 'benchmark'},
+            params={"hnsw:space": "ip", "hnsw:M": 4096}, need_to_clear=True))
+
+    ivf_nlist = params['ivf_nlist'] if connector == 'numpy_ivf' else 0
+    return VectorDriverConfig(db_vendor='numpy', db_config=VectorDBConnectionConfig(
+        db_info={'db': 'benchmark', 'table': 'benchmark'},
+        params={'ivf_nlist': ivf_nlist, 'ivf_nprobe': params['ivf_nprobe'], 'ivf_min_size': 0}))
+
+def run(connector: str, params: dict, items, queries, subset_ids):
+    conn = VectorDriver.connect(get_config(connector, params))
+
+    s_time = time()
+    for i in range(0, len(items), params['insert_batch_size']):
+        conn.create(items[i:i+params['insert_batch_size']])
+    insert_time = time() - s_time
+
+    # первый запрос включает обучение ivf-индекса
+    s_time = time()
+    conn.retrieve(queries[:1], n_results=params['n_results'], includes=[])
+    warmup_time = time() - s_time
+
+    s_time = time()
+    outputs = [conn.retrieve([query], n_results=params['n_results'], includes=[])[0] for query in queries]
+    query_latency = (time() - s_time) / len(queries)
+
+    s_time = time()
+    for query in queries:
+        conn.retrieve([query], n_results=params['n_results'], subset_ids=subset_ids, includes=[])
+    subset_latency = (time() - s_time) / len(queries)
+
+    conn.close_connection()
+    stats = {'insert_sec': insert_time, 'warmup_sec': warmup_time,
+             'query_ms': query_latency * 1000, 'subset_query_ms': subset_latency * 1000}
+    return stats, [set(item.id for _, item in output) for output in outputs]
+
+if __name__ == "__main__":
+    with open(PARAMS_PATH, 'r') as f:
+        config = yaml.safe_load(f)
+    params = config['retrieve_latency']
+
+    items, queries, subset_ids = generate_items(params)
+    print(f"items: {len(items)}, dim: {params['dim']}, queries: {len(queries)}")
+
+    exact_ids = None
+    for connector in config['connectors']:
+        stats, retrieved_ids = run(connector, params, items, queries, subset_ids)
+        if connector == 'numpy_exact':
+            exact_ids = retrieved_ids
+        if exact_ids is not None:
+            # полнота относительно точного перебора
+            stats['recall'] = np.mean([len(a & b) / params['n_results'] for a, b in zip(exact_ids, retrieved_ids)])
+        print(connector, ' | '.join([f"{k}: {v:.4f}" for k, v in stats.items()]))
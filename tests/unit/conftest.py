@@ -0,0 +1,44 @@
+import pytest
+import hashlib
+import numpy as np
+
+import sys
+sys.path.insert(0, "../")
+from src.db_drivers.vector_driver.embedders import EmbedderModel, EmbedderModelConfig
+
+class FakeSentenceTransformer:
+    """Заглушка модели: вектор зависит от текста с префиксом-промптом и от параметров encode."""
+    def __init__(self, prompts: dict) -> None:
+        self.prompts = prompts
+        self.encoded_texts = []
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return 8
+
+    def encode(self, texts, normalize_embeddings: bool = False, prompt_name: str = None, prompt: str = None,
+               truncate_dim: int = None, batch_size: int = 32):
+        if prompt is None:
+            prompt = self.prompts.get(prompt_name, '') if prompt_name is not None else ''
+        self.encoded_texts += texts
+
+        embeddings = []
+        for text in texts:
+            seed = int(hashlib.sha1((prompt + text).encode()).hexdigest()[:8], 16)
+            embedding = np.random.default_rng(seed).normal(size=8) * 3
+            if truncate_dim is not None:
+                embedding[truncate_dim:] = 0
+            if normalize_embeddings:
+                embedding = embedding / np.linalg.norm(embedding)
+            embeddings.append(embedding)
+        return np.array(embeddings).reshape(len(texts), 8)
+
+@pytest.fixture
+def fake_sentence_transformer(monkeypatch):
+    """Подменяет загрузку embedder-модели заглушкой FakeSentenceTransformer."""
+    monkeypatch.setattr(EmbedderModel, 'load_model', lambda self: FakeSentenceTransformer(self.config.prompts))
+
+@pytest.fixture
+def get_embedder(fake_sentence_transformer):
+    def get(**kwargs) -> EmbedderModel:
+        return EmbedderModel(EmbedderModelConfig(device='cpu', **kwargs))
+    return get
@@ -0,0 +1,129 @@
+import pytest
+
+import sys
+sys.path.insert(0, "../")
+
+from src.db_drivers.graph_driver import GraphDriver, GraphDriverConfig, GraphDBConnectionConfig
+from src.utils.data_structs import QuadrupletCreator, NodeCreator, RelationCreator, NodeType, RelationType
+
+def get_conn(db_vendor: str):
+    config = GraphDriverConfig(db_vendor=db_vendor, db_config=GraphDBConnectionConfig(
+        db_info={'db': 'testing', 'table': 'testing'}, params={'delta_buffer_size': 4}, need_to_clear=True))
+    return GraphDriver.connect(config)
+
+def get_quadruplet(subj: str, rel: str, obj: str, obj_type: NodeType = NodeType.object):
+    return QuadrupletCreator.create(
+        NodeCreator.create(NodeType.object, subj), RelationCreator.create(RelationType.simple, rel), NodeCreator.create(obj_type, obj))
+
+QUADRUPLETS = [
+    get_quadruplet("Alice", "knows", "Bob"),
+    get_quadruplet("Alice", "likes", "Carol"),
+    get_quadruplet("Bob", "knows", "Carol"),
+    get_quadruplet("Dave", "wrote", "thesis", NodeType.hyper)]
+# вершина Alice общая для первых двух квадруплетов: при повторном появлении она не создаётся заново
+CREATION_INFO = {1: {'s_node': False, 'e_node': True}, 2: {'s_node': False, 'e_node': False}}
+
+@pytest.mark.parametrize("db_vendor", ['inmemory_graph', 'compact_graph'])
+def test_search_by_name(db_vendor: str):
+    conn = get_conn(db_vendor)
+    conn.create(QUADRUPLETS, CREATION_INFO)
+
+    assert {q.id for q in conn.read_by_name("knows", RelationType.simple)} == {QUADRUPLETS[0].id, QUADRUPLETS[2].id}
+    assert conn.read_by_name("missing", RelationType.simple) == []
+    assert {n.id for n in conn.read_by_name("Carol", NodeType.object, object='node')} == {QUADRUPLETS[1].end_node.id}
+    assert conn.read_by_name("thesis", NodeType.object, object='node') == []
+
+    assert {q.id for q in conn.get_quadruplets_by_name(["Alice"], [], 'object')} == {QUADRUPLETS[0].id, QUADRUPLETS[1].id}
+    assert {q.id for q in conn.get_quadruplets_by_name([], ["Carol"], 'object')} == {QUADRUPLETS[1].id, QUADRUPLETS[2].id}
+    assert {q.id for q in conn.get_quadruplets_by_name(["Dave"], ["Bob"], 'hyper')} == {QUADRUPLETS[3].id}
+
+# при удалении квадруплета без delete_info InMemoryGraphConnector удаляет его вершины безусловно,
+# а CompactGraphConnector - только если у вершины не осталось других рёбер
+@pytest.mark.parametrize("db_vendor, shared_node_kept", [('inmemory_graph', False), ('compact_graph', True)])
+def test_delete_shared_node(db_vendor: str, shared_node_kept: bool):
+    conn = get_conn(db_vendor)
+    conn.create(QUADRUPLETS[:2], CREATION_INFO)
+
+    conn.delete([QUADRUPLETS[0].id])
+
+    assert conn.item_exist(QUADRUPLETS[1].id, id_type='quadruplet')
+    assert not conn.item_exist(QUADRUPLETS[0].end_node.id, id_type='node')
+    assert conn.item_exist(QUADRUPLETS[0].start_node.id, id_type='node') == shared_node_kept
+    assert conn.read_by_name("knows", RelationType.simple) == []
+
+@pytest.mark.parametrize("db_vendor", ['inmemory_graph', 'compact_graph'])
+def test_delete_cleans_indexes(db_vendor: str):
+    conn = get_conn(db_vendor)
+    conn.create(QUADRUPLETS, CREATION_INFO)
+
+    # вершина удаляется вместе с последним квадруплетом, в котором она встречается
+    delete_info = {0: {'s_node': False, 'e_node': False}, 1: {'s_node': True, 'e_node': False}}
+    conn.delete([quadruplet.id for quadruplet in QUADRUPLETS], delete_info)
+
+    # остаются только временные вершины: вершины времени при удалении квадруплетов не удаляются
+    assert conn.count_items()['quadruplets'] == 0
+    assert list(conn.name_nodes_index.keys()) == [(NodeType.time, QUADRUPLETS[0].time.name)]
+    assert len(conn.name_nodes_index[(NodeType.time, QUADRUPLETS[0].time.name)]) == conn.count_items()['nodes']
+    assert len(conn.name_relations_index) == 0
+    assert len(conn.subj_name_quadruplets_index) == 0 and len(conn.obj_name_quadruplets_index) == 0
+
+def test_compact_update():
+    conn = get_conn('compact_graph')
+    conn.create(QUADRUPLETS)
+
+    updated = get_quadruplet("Alice", "loves", "Carol")
+    updated.id = QUADRUPLETS[1].id
+    updated.start_node.prop = {'age': 30}
+    missing = get_quadruplet("Eve", "knows", "Bob")
+    conn.update([updated, missing])
+
+    assert conn.count_items() == {'quadruplets': 4, 'nodes': 6}
+    assert not conn.item_exist(missing.id, id_type='quadruplet')
+    assert conn.read_by_name("likes", RelationType.simple) == []
+    assert [q.id for q in conn.read_by_name("loves", RelationType.simple)] == [updated.id]
+
+    [quadruplet] = conn.read([updated.id])
+    assert quadruplet.relation.name == "loves"
+    assert quadruplet.start_node.prop == {'age': 30}
+    assert sorted(conn.get_adjecent_nids(updated.start_node.id)) == sorted([QUADRUPLETS[0].end_node.id, QUADRUPLETS[1].end_node.id])
+
+    with pytest.raises(ValueError):
+        conn.update([updated, updated])
+
+def test_compact_adjacency(monkeypatch):
+    conn = get_conn('compact_graph')
+    compactions = []
+    compact = conn._compact
+    monkeypatch.setattr(conn, '_compact', lambda: compactions.append(len(conn.indices)) or compact())
+
+    # звезда с центром hub и цепочка между её лучами, загружаемые несколькими пакетами
+    quadruplets = [get_quadruplet("hub", "links", f"node {i}") for i in range(40)]
+    quadruplets += [get_quadruplet(f"node {i}", "next", f"node {i + 1}") for i in range(39)]
+    for i in range(0, len(quadruplets), 7):
+        conn.create(quadruplets[i:i + 7])
+
+    # порог слияния растёт вместе с CSR-массивами: их размер при каждом слиянии как минимум удваивается
+    assert len(compactions) > 2
+    assert all(2 * prev <= cur for prev, cur in zip(compactions[1:], compactions[2:]))
+
+    def expected_adjacency(alive):
+        adjacency = dict()
+        for quadruplet in alive:
+            adjacency.setdefault(quadruplet.start_node.id, set()).add(quadruplet.end_node.id)
+            adjacency.setdefault(quadruplet.end_node.id, set()).add(quadruplet.start_node.id)
+        return adjacency
+
+    for n_id, nbrs in expected_adjacency(quadruplets).items():
+        assert set(conn.get_adjecent_nids(n_id)) == nbrs
+
+    # удаление звезды и начала цепочки с последующим слиянием помеченных на удаление рёбер
+    n_compactions = len(compactions)
+    conn.delete([quadruplet.id for quadruplet in quadruplets[:40:2]])
+    conn.delete([quadruplet.id for quadruplet in quadruplets[1:40:2]])
+    assert len(compactions) == n_compactions
+    conn.delete([quadruplet.id for quadruplet in quadruplets[40:64]])
+    assert len(compactions) == n_compactions + 1
+    assert not conn.item_exist(quadruplets[0].start_node.id, id_type='node')
+
+    for n_id, nbrs in expected_adjacency(quadruplets[64:]).items():
+        assert set(conn.get_adjecent_nids(n_id)) == nbrs
@@ -0,0 +1,15 @@
+import pytest
+import sys
+sys.path.insert(0, "../")
+
+from src.db_drivers.vector_driver.embedders import EmbedderModel, EmbedderModelConfig
+
+# конфигурация проверяется до загрузки модели; сравнение векторов разных backend -
+# в tests/integrational/db_drivers/vector_driver/test_embedder_backends.py
+@pytest.mark.parametrize("config", [
+    EmbedderModelConfig(device='cpu', backend='unknown'),
+    EmbedderModelConfig(device='cuda', backend='torch_int8')
+])
+def test_backend_validation(config):
+    with pytest.raises(ValueError):
+        EmbedderModel(config)
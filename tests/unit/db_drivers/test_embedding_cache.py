@@ -0,0 +1,44 @@
+import pytest
+import numpy as np
+
+# get_embedder - фикстура из tests/unit/conftest.py
+
+def test_cache_hits_and_misses(get_embedder):
+    embedder = get_embedder(cache_size=100)
+
+    first = embedder.encode_queries_np(["a", "b", "a"])
+    second = embedder.encode_queries_np(["b", "c"])
+
+    # повторы внутри вызова и между вызовами не векторизуются повторно
+    assert embedder.model.encoded_texts == ["a", "b", "c"]
+    assert np.allclose(first[0], first[2]) and np.allclose(first[1], second[0])
+    stats = embedder.get_cache_stats()
+    assert stats['hits'] == 1 and stats['misses'] == 4 and stats['memory_size'] == 3
+
+def test_cache_matches_uncached(get_embedder):
+    cached, uncached = get_embedder(cache_size=100), get_embedder()
+    texts = ["a", "b", "c"]
+
+    for encode_kwargs in [dict(), {'normalize_embeddings': False}, {'prompt': 'custom: '}, {'truncate_dim': 4}]:
+        for _ in range(2):
+            assert np.allclose(cached.encode_queries_np(texts, **encode_kwargs), uncached.encode_queries_np(texts, **encode_kwargs))
+            assert np.allclose(cached.encode_passages_np(texts, **encode_kwargs), uncached.encode_passages_np(texts, **encode_kwargs))
+
+@pytest.mark.parametrize("first_kwargs, second_kwargs, same_key", [
+    # промпт выбирается по типу текста или задаётся явно
+    ({'prompt_name': 'query'}, {'prompt_name': 'document'}, False),
+    ({'prompt_name': 'query'}, {'prompt': 'query: '}, True),
+    ({'prompt_name': 'query'}, {'prompt_name': 'query', 'prompt': 'other: '}, False),
+    # параметры, влияющие на значения векторов
+    (dict(), {'normalize_embeddings': False}, False),
+    (dict(), {'truncate_dim': 4}, False),
+    # параметры, не влияющие на значения векторов
+    (dict(), {'batch_size': 4}, True)])
+def test_cache_key_separation(get_embedder, first_kwargs: dict, second_kwargs: dict, same_key: bool):
+    embedder = get_embedder(cache_size=100)
+
+    embedder.encode_np(["a"], **first_kwargs)
+    embedder.encode_np(["a"], **second_kwargs)
+
+    assert len(embedder.model.encoded_texts) == (1 if same_key else 2)
+    assert embedder.get_cache_stats()['hits'] == int(same_key)
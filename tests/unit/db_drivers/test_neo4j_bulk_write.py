@@ -0,0 +1,94 @@
+import pytest
+import threading
+from types import SimpleNamespace
+
+import sys
+sys.path.insert(0, "../")
+from src.db_drivers.graph_driver.connectors.Neo4jConnector import Neo4jConnector
+from src.db_drivers.graph_driver.utils import GraphDBConnectionConfig
+from src.utils.data_structs import QuadrupletCreator, NodeCreator, RelationCreator, NodeType, RelationType
+from src.utils import Logger
+
+class FakeSession:
+    def __init__(self, fail_on_call: int = None) -> None:
+        self.calls = 0
+        self.fail_on_call = fail_on_call
+        self.committed = []
+
+    def execute_write(self, func, statements):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise RuntimeError("transaction failed")
+        self.committed.extend(statements)
+        return [[] for _ in statements]
+
+    def close(self):
+        pass
+
+def get_connector(session: FakeSession) -> Neo4jConnector:
+    config = GraphDBConnectionConfig(host='localhost', port=7687, db_info={'db': 'neo4j'}, params={
+        'user': 'neo4j', 'pwd': 'password', 'bulk_write': True, 'bulk_batch_size': 2, 'bulk_tx_size': 2})
+    connector = Neo4jConnector(config)
+    connector.log = Logger("log/db_drivers/graph_driver/neo4j")
+    # соединение с сервером не открывается: транзакции выполняются заглушкой сессии
+    connector.driver = SimpleNamespace(close=lambda: None, session=lambda **kwargs: FakeSession())
+    connector.sessions, connector.sessions_lock, connector.stats_lock = dict(), threading.Lock(), threading.Lock()
+    connector.reset_query_stats()
+    if session is not None:
+        connector._get_session = lambda db_flag=True: session
+    return connector
+
+def get_quadruplets(n: int):
+    return [QuadrupletCreator.create(
+        NodeCreator.create(NodeType.object, f"subject {i}"), RelationCreator.create(RelationType.simple, f"relation {i}"),
+        NodeCreator.create(NodeType.object, f"object {i}")) for i in range(n)]
+
+def test_bulk_create():
+    session = FakeSession()
+    connector = get_connector(session)
+    connector.create(get_quadruplets(3))
+
+    # не более 2 строк в запросе и в транзакции
+    assert all(len(params['rows']) <= 2 for _, params in session.committed)
+    assert session.calls > 1
+    assert sum(len(params['rows']) for query, params in session.committed if 'MERGE (subj)' in query) == 3
+    stats = connector.get_query_stats()
+    assert stats['errors'] == 0
+    # пакеты одного вида отправляются одним и тем же текстом запроса
+    assert stats['repeated_queries'] > 0
+    assert stats['repeated_query_rate'] == stats['repeated_queries'] / stats['queries']
+
+def test_bulk_create_failed_transaction():
+    session = FakeSession(fail_on_call=2)
+    connector = get_connector(session)
+
+    # ошибка пакета не должна теряться: вызывающая сторона получает исключение
+    with pytest.raises(RuntimeError):
+        connector.create(get_quadruplets(3))
+    assert session.calls == 2
+    assert connector.get_query_stats()['errors'] > 0
+
+def test_sessions_of_finished_threads_are_closed():
+    connector = get_connector(None)
+    closed = []
+    connector.driver.session = lambda **kwargs: SimpleNamespace(close=lambda: closed.append(kwargs))
+
+    # потоки работают одновременно, поэтому у каждого из них своя сессия
+    barrier = threading.Barrier(5, timeout=5)
+    def work():
+        connector._get_session()
+        barrier.wait()
+    threads = [threading.Thread(target=work) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(connector.sessions) == 5 and len(closed) == 0
+
+    # сессии завершившихся потоков закрываются при создании следующей сессии
+    session = connector._get_session()
+    assert connector._get_session() is session
+    assert len(closed) == 5 and list(connector.sessions.values()) == [session]
+
+    connector.close_connection()
+    assert len(closed) == 6 and connector.sessions == dict()
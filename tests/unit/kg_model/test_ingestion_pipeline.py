@@ -0,0 +1,78 @@
+import pytest
+import threading
+import numpy as np
+
+import sys
+sys.path.insert(0, "../")
+from src.db_drivers.vector_driver import VectorDriverConfig, VectorDBConnectionConfig
+from src.db_drivers.vector_driver.embedders import EmbedderModelConfig
+from src.kg_model import EmbeddingsModel, EmbeddingsModelConfig
+from src.utils.data_structs import QuadrupletCreator, NodeCreator, RelationCreator, NodeType, RelationType
+
+QUADRUPLETS = [
+    QuadrupletCreator.create(NodeCreator.create(NodeType.object, f"subj{i}"), RelationCreator.create(RelationType.simple, "rel"),
+                             NodeCreator.create(NodeType.object, f"obj{i % 3}"))
+    for i in range(12)]
+
+@pytest.fixture
+def get_embeddings_model(fake_sentence_transformer, tmp_path):
+    def get(pipelined_ingestion: bool) -> EmbeddingsModel:
+        def get_driver_config(table: str) -> VectorDriverConfig:
+            return VectorDriverConfig(db_vendor='numpy', db_config=VectorDBConnectionConfig(
+                conn={'path': str(tmp_path / str(pipelined_ingestion))}, db_info={'db': 'testing', 'table': table},
+                params={'ivf_nlist': 0}, need_to_clear=True))
+        return EmbeddingsModel(EmbeddingsModelConfig(
+            nodesdb_driver_config=get_driver_config('nodes'), quadrupletsdb_driver_config=get_driver_config('quadruplets'),
+            embedder_config=EmbedderModelConfig(device='cpu'), pipelined_ingestion=pipelined_ingestion, pipeline_queue_size=1))
+    return get
+
+def run_with_timeout(func, timeout: float = 10):
+    # конвейер не должен зависать при ошибке: вызов выполняется в отдельном потоке с ограничением по времени
+    outputs, errors = [], []
+    def target():
+        try:
+            outputs.append(func())
+        except Exception as e:
+            errors.append(e)
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout=timeout)
+    assert not thread.is_alive()
+    return outputs, errors
+
+def test_pipelined_matches_sequential(get_embeddings_model):
+    sequential, pipelined = get_embeddings_model(False), get_embeddings_model(True)
+
+    expected = sequential.create_quadruplets(QUADRUPLETS, batch_size=2, status_bar=False)
+    [output], errors = run_with_timeout(lambda: pipelined.create_quadruplets(QUADRUPLETS, batch_size=2, status_bar=False))
+
+    assert errors == []
+    assert output == expected
+    assert pipelined.count_items() == sequential.count_items()
+    n_items = pipelined.count_items()['quadruplets'] + pipelined.count_items()['nodes']
+    assert all(pipelined.ingestion_stats[stage]['items'] == n_items for stage in ['prepare', 'encode', 'write', 'total'])
+
+@pytest.mark.parametrize("failed_stage", ['prepare', 'encode', 'write'])
+def test_pipeline_error_propagation(get_embeddings_model, failed_stage: str):
+    model = get_embeddings_model(True)
+    calls = []
+
+    def fail_on_second_call(func):
+        def wrapper(*args, **kwargs):
+            calls.append(failed_stage)
+            if len(calls) == 2:
+                raise RuntimeError(f"{failed_stage} error")
+            return func(*args, **kwargs)
+        return wrapper
+
+    if failed_stage == 'prepare':
+        model.vectordbs['quadruplets'].existing_ids = fail_on_second_call(model.vectordbs['quadruplets'].existing_ids)
+    elif failed_stage == 'encode':
+        model.embedder.encode_passages_np = fail_on_second_call(model.embedder.encode_passages_np)
+    else:
+        model.vectordbs['nodes'].create = fail_on_second_call(model.vectordbs['nodes'].create)
+
+    outputs, errors = run_with_timeout(lambda: model.create_quadruplets(QUADRUPLETS, batch_size=2, status_bar=False))
+
+    assert outputs == []
+    assert [str(error) for error in errors] == [f"{failed_stage} error"]
@@ -0,0 +1,150 @@
+import pytest
+import json
+import socket
+import threading
+from time import time, sleep
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+
+import sys
+sys.path.insert(0, "../")
+from src.llm.ollama_client import OllamaClient
+from src.agents.connectors.OLlamaConnector import DEFAULT_OLLAMA_CONFIG
+
+class MockOllamaHandler(BaseHTTPRequestHandler):
+    # keep-alive соединения: клиент может переиспользовать соединение между запросами
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with server.lock:
+            server.requests += 1
+            server.connections.add(self.client_address)
+            failed = server.requests <= server.failures
+
+        sleep(server.latency)
+        if failed:
+            self.send_json(503, {'error': 'unavailable'})
+        else:
+            self.send_json(200, {'response': server.answer or payload['prompt']})
+
+    def send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def mock_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockOllamaHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests, server.connections = 0, set()
+    server.failures, server.latency, server.answer = 0, 0, None
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def get_client(server, **kwargs) -> OllamaClient:
+    return OllamaClient(base_url=f"http://127.0.0.1:{server.server_address[1]}", backoff_factor=0, **kwargs)
+
+def test_connection_reuse(mock_server):
+    with get_client(mock_server) as client:
+        answers = [client.generate(f"prompt {i}") for i in range(5)]
+        stats = client.get_stats()
+
+    assert answers == [f"prompt {i}" for i in range(5)]
+    assert len(mock_server.connections) == 1
+    assert stats['requests'] == 5 and stats['errors'] == 0 and stats['retries'] == 0
+    assert stats['mean_latency_sec'] > 0 and stats['in_flight'] == 0
+
+@pytest.mark.parametrize("failures, max_retries, expected_answer, expected_retries, expected_errors", [
+    (2, 2, "prompt", 2, 0),
+    (5, 1, "", 1, 1)])
+def test_retries(mock_server, failures: int, max_retries: int, expected_answer: str, expected_retries: int, expected_errors: int):
+    mock_server.failures = failures
+    with get_client(mock_server, max_retries=max_retries) as client:
+        answer = client.generate("prompt")
+        stats = client.get_stats()
+
+    assert answer == expected_answer
+    assert mock_server.requests == max_retries + 1
+    assert stats['requests'] == 1
+    assert stats['retries'] == expected_retries
+    assert stats['errors'] == expected_errors
+
+def test_read_timeout(mock_server, caplog):
+    mock_server.latency = 0.5
+    with get_client(mock_server, max_retries=0, timeout=(1, 0.1)) as client:
+        s_time = time()
+        answer = client.generate("prompt")
+        elapsed = time() - s_time
+        stats = client.get_stats()
+
+    assert answer == ""
+    assert elapsed < 0.4
+    assert stats['errors'] == 1 and stats['timeouts'] == 1
+    assert any("timed out" in record.message for record in caplog.records)
+
+def test_default_timeout():
+    # таймаут чтения совпадает с таймаутом OLlamaConnector: генерация длинного ответа может занимать минуты
+    with OllamaClient() as client:
+        assert client.timeout[1] == DEFAULT_OLLAMA_CONFIG.ext_params['timeout']
+
+def test_read_timeout_not_retried(mock_server):
+    # сервер мог начать генерацию: POST-запрос не отправляется повторно после таймаута чтения
+    mock_server.latency = 0.3
+    with get_client(mock_server, max_retries=2, timeout=(1, 0.1)) as client:
+        answer = client.generate("prompt")
+        stats = client.get_stats()
+
+    assert answer == ""
+    assert mock_server.requests == 1
+    assert stats['retries'] == 0 and stats['errors'] == 1 and stats['timeouts'] == 1
+
+def test_connect_error_retries():
+    # порт, на котором никто не принимает соединения
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    with OllamaClient(base_url=f"http://127.0.0.1:{port}", backoff_factor=0, max_retries=2) as client:
+        answer = client.generate("prompt")
+        stats = client.get_stats()
+
+    assert answer == ""
+    assert stats['retries'] == 2 and stats['errors'] == 1
+
+def test_pool_saturation(mock_server):
+    mock_server.latency = 0.1
+    with get_client(mock_server, pool_size=2) as client:
+        with ThreadPoolExecutor(6) as executor:
+            answers = list(executor.map(lambda i: client.generate(f"prompt {i}"), range(6)))
+        stats = client.get_stats()
+
+    assert answers == [f"prompt {i}" for i in range(6)]
+    # соединений не больше размера пула, остальные запросы ожидают свободное соединение
+    assert len(mock_server.connections) <= 2
+    assert stats['max_in_flight'] > 2
+    assert stats['saturated'] > 0
+
+def test_extract_search_parameters(mock_server):
+    mock_server.answer = json.dumps({'entities': ['Apple'], 'relation': 'CEO', 'time': '2011'})
+    with get_client(mock_server) as client:
+        params = client.extract_search_parameters("Who was the CEO of Apple in 2011?")
+
+    assert params == {'entities': ['Apple'], 'relation': 'CEO', 'time': '2011'}
+
+def test_invalid_pool_size():
+    with pytest.raises(ValueError):
+        OllamaClient(pool_size=0)
@@ -0,0 +1,184 @@
+import pytest
+import hashlib
+import threading
+import numpy as np
+from types import SimpleNamespace
+from typing import List
+
+import sys
+sys.path.insert(0, "../")
+
+from src.pipelines.qa.kg_reasoning.weak_reasoner.knowledge_retriever import KnowledgeRetriever, KnowledgeRetrieverConfig
+from src.pipelines.qa.kg_reasoning.weak_reasoner.knowledge_retriever.NaiveQuadrupletsRetriever import NaiveGraphSearchConfig
+from src.pipelines.qa.kg_reasoning.weak_reasoner.knowledge_retriever.QuadrupletsFilter import QuadrupletsFilterConfig
+from src.pipelines.qa.kg_reasoning.medium_reasoner.clueanswer_generator import ClueAnswerGenerator, ClueAnswerGeneratorConfig
+from src.agents import AgentDriverConfig
+from src.agents.utils import AgentConnectorConfig
+from src.db_drivers.kv_driver import KeyValueDriverConfig, KVDBConnectionConfig
+from src.db_drivers.vector_driver import VectorDBInstance
+from src.utils.data_structs import QueryInfo, QuadrupletCreator, NodeCreator, RelationCreator, NodeType, RelationType
+from src.utils import ReturnInfo, ReturnStatus, Logger
+
+def get_vector(text: str) -> np.ndarray:
+    seed = int(hashlib.sha1(text.encode()).hexdigest()[:8], 16)
+    vector = np.random.default_rng(seed).normal(size=8).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+class FakeEmbedder:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def encode_queries_np(self, queries: List[str]) -> np.ndarray:
+        self.calls += 1
+        return np.stack([get_vector(query) for query in queries])
+
+class FakeVectorDB:
+    def __init__(self, quadruplets) -> None:
+        # квадруплеты ищутся по своему идентификатору, а ранжируются по идентификатору связи
+        self.vectors = dict()
+        for quadruplet in quadruplets:
+            self.vectors[quadruplet.id] = self.vectors[quadruplet.relation.id] = get_vector(quadruplet.stringified)
+        self.ids = [quadruplet.id for quadruplet in quadruplets]
+
+    def search(self, query: np.ndarray, n_results: int):
+        scored = sorted([(1 - float(np.dot(query, self.vectors[q_id])), q_id) for q_id in self.ids])[:n_results]
+        return [(dist, VectorDBInstance(id=q_id)) for dist, q_id in scored]
+
+    def retrieve(self, query_instances, n_results: int = 50, includes=None):
+        return [self.search(np.asarray(instance.embedding), n_results) for instance in query_instances]
+
+    def retrieve_batch(self, queries, n_results: int = 50, includes=None):
+        return [self.search(query, n_results) for query in queries]
+
+    def score_ids(self, query_vecs, ids):
+        return np.array([[np.dot(query_vecs, self.vectors[i]) if i in self.vectors else np.nan for i in ids]])
+
+def get_quadruplets(n: int):
+    return [QuadrupletCreator.create(
+        NodeCreator.create(NodeType.object, f"subject {i % 5}"), RelationCreator.create(RelationType.simple, f"relation {i}"),
+        NodeCreator.create(NodeType.object, f"object {i}")) for i in range(n)]
+
+@pytest.fixture
+def kg_model():
+    quadruplets = get_quadruplets(40)
+    quadruplets_map = {quadruplet.id: quadruplet for quadruplet in quadruplets}
+
+    return SimpleNamespace(
+        embeddings_struct=SimpleNamespace(embedder=FakeEmbedder(), vectordbs={'quadruplets': FakeVectorDB(quadruplets)}),
+        graph_struct=SimpleNamespace(db_conn=SimpleNamespace(read=lambda ids: [quadruplets_map[q_id] for q_id in ids])))
+
+def get_retriever(kg_model, cache_kvdriver_config=None) -> KnowledgeRetriever:
+    config = KnowledgeRetrieverConfig(
+        retriever_method='naive', retriever_config=NaiveGraphSearchConfig(max_k=20),
+        filter_method='naive', filter_config=QuadrupletsFilterConfig(max_k=5), log=Logger("log/knowledge_retriever"))
+    return KnowledgeRetriever(kg_model, config, cache_kvdriver_config)
+
+def get_cluequeries(n: int) -> List[QueryInfo]:
+    return [QueryInfo(query=f"clue-query {i}", entities=[f"entity {i}"]) for i in range(n)]
+
+def test_retrieve_batch_matches_retrieve(kg_model):
+    retriever = get_retriever(kg_model)
+    cluequeries = get_cluequeries(6)
+
+    expected = [retriever.retrieve(cluequery) for cluequery in cluequeries]
+    sequential_calls = kg_model.embeddings_struct.embedder.calls
+
+    kg_model.embeddings_struct.embedder.calls = 0
+    real = retriever.retrieve_batch(cluequeries)
+
+    assert [[q.id for q in quadruplets] for quadruplets, _ in real] == [[q.id for q in quadruplets] for quadruplets, _ in expected]
+    assert all(info.status == ReturnStatus.success for _, info in real)
+    # извлечение и фильтрация кодируют все clue-queries за один проход модели
+    assert sequential_calls == 2 * len(cluequeries)
+    assert kg_model.embeddings_struct.embedder.calls == 2
+    assert retriever.retrieve_batch([]) == []
+
+def test_retrieve_batch_cache(kg_model):
+    cache_config = KeyValueDriverConfig(db_vendor='inmemory_kv', db_config=KVDBConnectionConfig(
+        db_info={'db': 'default_db', 'table': 'default_table'},
+        params={'kvstore_dump_name': 'cluequeries_batch_cache', 'load_from_disk': False, 'save_on_disk': False, 'max_storage': -1}))
+    retriever = get_retriever(kg_model, cache_config)
+    cluequeries = get_cluequeries(4)
+
+    first = retriever.retrieve_batch(cluequeries[:2])
+    calls = kg_model.embeddings_struct.embedder.calls
+    # результаты кешируются по отдельности: в батче обрабатываются только новые clue-queries
+    second = retriever.retrieve_batch(cluequeries)
+    assert kg_model.embeddings_struct.embedder.calls == calls + 2
+    assert [q.id for q in second[0][0]] == [q.id for q in first[0][0]]
+
+    calls = kg_model.embeddings_struct.embedder.calls
+    third = retriever.retrieve_batch(list(reversed(cluequeries)))
+    assert kg_model.embeddings_struct.embedder.calls == calls
+    assert [[q.id for q in quadruplets] for quadruplets, _ in third] == [[q.id for q in quadruplets] for quadruplets, _ in reversed(second)]
+
+def get_clueanswer_generator(solve, cache_kvdriver_config=None) -> ClueAnswerGenerator:
+    generator = ClueAnswerGenerator(ClueAnswerGeneratorConfig(
+        lang='en', adriver_config=AgentDriverConfig(name='stub', agent_config=AgentConnectorConfig())),
+        cache_kvdriver_config, cache_llm_inference=False)
+    generator.cagen_solver = SimpleNamespace(solve=solve)
+    return generator
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_clueanswers_perform_batch(max_workers: int):
+    # при max_workers=4 все 4 запроса должны выполняться одновременно, иначе барьер не будет пройден
+    barrier = threading.Barrier(max_workers, timeout=5)
+
+    def solve(lang: str, query: str, quadruplets: list):
+        barrier.wait()
+        return f"{query}: {len(quadruplets)}", ReturnStatus.success
+    generator = get_clueanswer_generator(solve)
+
+    answers = generator.perform_batch("query", [get_quadruplets(i) for i in range(4)], max_workers=max_workers)
+
+    assert answers == [(f"query: {i}", ReturnInfo()) for i in range(4)]
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_clueanswers_stop_on_error(max_workers: int):
+    calls, lock = [], threading.Lock()
+    error_generated = threading.Event()
+
+    def solve(lang: str, query: str, quadruplets: list):
+        with lock:
+            calls.append(len(quadruplets))
+        if len(quadruplets) == 1:
+            error_generated.set()
+            return "", ReturnStatus.success
+        # первый запрос завершается после неуспешного второго
+        if len(quadruplets) == 0 and max_workers > 1:
+            error_generated.wait(timeout=5)
+        return f"{query}: {len(quadruplets)}", ReturnStatus.success
+    generator = get_clueanswer_generator(solve)
+
+    answers = generator.perform_batch("query", [get_quadruplets(i) for i in range(8)], max_workers=max_workers)
+
+    # результаты обрезаются на первом неуспешном ответе, последующие запросы не выполняются
+    assert [answer for answer, _ in answers] == ["query: 0", ""]
+    assert answers[1][1].status == ReturnStatus.empty_answer
+    assert len(calls) <= 2 * max_workers
+
+def test_clueanswers_invalid_max_workers():
+    generator = get_clueanswer_generator(None)
+    with pytest.raises(ValueError):
+        generator.perform_batch("query", [[]], max_workers=0)
+
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_clueanswers_duplicate_contexts(max_workers: int):
+    cache_config = KeyValueDriverConfig(db_vendor='inmemory_kv', db_config=KVDBConnectionConfig(
+        db_info={'db': 'default_db', 'table': 'default_table'},
+        params={'kvstore_dump_name': 'clueanswers_batch_cache', 'load_from_disk': False, 'save_on_disk': False, 'max_storage': -1}))
+    calls, lock = [], threading.Lock()
+
+    def solve(lang: str, query: str, quadruplets: list):
+        with lock:
+            calls.append(len(quadruplets))
+        return f"{query}: {len(quadruplets)}", ReturnStatus.success
+    generator = get_clueanswer_generator(solve, cache_config)
+
+    # наборы с одинаковым ключом кеша (порядок квадруплетов не важен) обрабатываются один раз
+    contexts = [get_quadruplets(2), get_quadruplets(3), list(reversed(get_quadruplets(2))), get_quadruplets(2)]
+    answers = generator.perform_batch("query", contexts, max_workers=max_workers)
+
+    assert [answer for answer, _ in answers] == ["query: 2", "query: 3", "query: 2", "query: 2"]
+    assert sorted(calls) == [2, 3]
+    assert generator.cachekv.kv_conn.count_items() == 2
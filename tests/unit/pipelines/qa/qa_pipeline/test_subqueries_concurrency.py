@@ -0,0 +1,200 @@
+import pytest
+import threading
+from time import sleep
+from typing import Tuple, List
+
+import sys
+sys.path.insert(0, "../")
+
+from src.pipelines.qa import QAPipeline, QAPipelineConfig
+from src.pipelines.qa.kg_reasoning import KnowledgeGraphReasonerConfig
+from src.pipelines.qa.kg_reasoning.config import AVAILABLE_KG_REASONERS
+from src.pipelines.qa.kg_reasoning.utils import AbstractKGReasoner
+from src.pipelines.qa.answers_aggregation import AnswersAggregatorConfig
+from src.agents import AgentDriverConfig
+from src.agents.utils import AgentConnectorConfig
+from src.utils import ReturnInfo, ReturnStatus
+from src.utils.cache_kv import CacheKV, CacheUtils
+from src.db_drivers.kv_driver import KeyValueDriverConfig, KVDBConnectionConfig
+from src.db_drivers.kv_driver.connectors import InMemoryKVConnector
+
+class SleepKGReasoner(AbstractKGReasoner):
+    """Заглушка KG-reasoner'а: под-вопрос имеет вид "<задержка в секундах>|<ответ>".
+    Ожидание прерывается, если QA-конвейер отменил обработку под-вопроса.
+    """
+    lock = threading.Lock()
+    in_flight, max_in_flight, cancelled = 0, 0, 0
+    instances = []
+
+    def __init__(self, kg_model, config, cache_kvdriver_config) -> None:
+        self.instance_in_flight = 0
+        self.instance_max_in_flight = 0
+        with SleepKGReasoner.lock:
+            SleepKGReasoner.instances.append(self)
+
+    def perform(self, query: str) -> Tuple[str, ReturnInfo]:
+        latency, answer = query.split('|')
+        with SleepKGReasoner.lock:
+            SleepKGReasoner.in_flight += 1
+            SleepKGReasoner.max_in_flight = max(SleepKGReasoner.max_in_flight, SleepKGReasoner.in_flight)
+            self.instance_in_flight += 1
+            self.instance_max_in_flight = max(self.instance_max_in_flight, self.instance_in_flight)
+
+        if self.cancel_event is not None:
+            cancelled = self.cancel_event.wait(float(latency))
+        else:
+            sleep(float(latency))
+            cancelled = False
+
+        with SleepKGReasoner.lock:
+            SleepKGReasoner.in_flight -= 1
+            SleepKGReasoner.cancelled += int(cancelled)
+            self.instance_in_flight -= 1
+
+        if cancelled:
+            return None, self.get_cancelled_info()
+        if answer == 'error':
+            return None, ReturnInfo(status=ReturnStatus.empty_answer)
+        return answer, ReturnInfo()
+
+    def clear_kv_caches(self) -> None:
+        pass
+
+class CachingKGReasoner(AbstractKGReasoner, CacheUtils):
+    """Заглушка KG-reasoner'а, кеширующая ответы на под-вопросы. Каждый экземпляр создаёт свой kv-кеш,
+    но все они работают с одним kv-хранилищем. Ответ на под-вопрос формируется только после того,
+    как barrier_size под-вопросов не нашли ответ в кеше.
+    """
+    barrier: threading.Barrier = None
+
+    def __init__(self, kg_model, config, cache_kvdriver_config) -> None:
+        self.cachekv = CacheKV(cache_kvdriver_config)
+        self.log = lambda *args, **kwargs: None
+        self.verbose = False
+
+    def get_cache_key(self, query: str) -> List[str]:
+        return [query]
+
+    @CacheUtils.cache_method_output
+    def get_answer(self, query: str) -> str:
+        CachingKGReasoner.barrier.wait(timeout=5)
+        return f"answer to {query}"
+
+    def perform(self, query: str) -> Tuple[str, ReturnInfo]:
+        return self.get_answer(query), ReturnInfo()
+
+    def clear_kv_caches(self) -> None:
+        self.cachekv.clear()
+
+@pytest.fixture
+def shared_cache_kvdriver_config(monkeypatch):
+    # kv-кеши разных reasoner'ов подключаются к одному хранилищу, как к общей внешней бд
+    shared_conns = dict()
+    def connect(config: KeyValueDriverConfig):
+        table = config.db_config.db_info['table']
+        if table not in shared_conns:
+            shared_conns[table] = InMemoryKVConnector(config.db_config)
+            shared_conns[table].open_connection()
+        return shared_conns[table]
+    monkeypatch.setattr('src.utils.cache_kv.KeyValueDriver.connect', connect)
+
+    return KeyValueDriverConfig(db_vendor='inmemory_kv', db_config=KVDBConnectionConfig(
+        db_info={'db': 'test_cache_db', 'table': 'test_subqueries_cache'},
+        params={'kvstore_dump_name': 'subqueries_cache_store', 'load_from_disk': False, 'max_storage': -1,
+                'load_dump_dir': '.', 'save_on_disk': False, 'save_dump_dir': '.'}, need_to_clear=True))
+
+@pytest.fixture
+def get_pipeline(monkeypatch):
+    monkeypatch.setitem(AVAILABLE_KG_REASONERS, 'sleep', SleepKGReasoner)
+    monkeypatch.setitem(AVAILABLE_KG_REASONERS, 'caching', CachingKGReasoner)
+    SleepKGReasoner.in_flight, SleepKGReasoner.max_in_flight, SleepKGReasoner.cancelled = 0, 0, 0
+    SleepKGReasoner.instances = []
+
+    def get(reasoner_name: str = 'sleep', cache_kvdriver_config: KeyValueDriverConfig = None, **kwargs) -> QAPipeline:
+        config = QAPipelineConfig(
+            reasoner_config=KnowledgeGraphReasonerConfig(reasoner_name=reasoner_name),
+            aggregator_config=AnswersAggregatorConfig(adriver_config=AgentDriverConfig(name='stub', agent_config=AgentConnectorConfig())),
+            **kwargs)
+        return QAPipeline(None, config, cache_kvdriver_config)
+    return get
+
+# max_workers, latencies, expected_max_in_flight
+SUBQUERIES_ORDER_TEST_CASES = [
+    (1, [0.01, 0.01, 0.01], 1),
+    # позже отправленные под-вопросы завершаются раньше
+    (3, [0.15, 0.1, 0.05], 3),
+    (2, [0.1, 0.05, 0.1, 0.05, 0.01], 2)
+]
+
+@pytest.mark.parametrize("max_workers, latencies, expected_max_in_flight", SUBQUERIES_ORDER_TEST_CASES)
+def test_subqueries_order(get_pipeline, max_workers: int, latencies: list, expected_max_in_flight: int):
+    qa_pipeline = get_pipeline(max_workers=max_workers)
+    sub_queries = [f"{latency}|answer_{i}" for i, latency in enumerate(latencies)]
+
+    results = list(qa_pipeline.reason_sub_queries(sub_queries))
+
+    assert [answer for answer, _ in results] == [f"answer_{i}" for i in range(len(latencies))]
+    assert all(info.status == ReturnStatus.success for _, info in results)
+    assert SleepKGReasoner.max_in_flight == expected_max_in_flight
+
+def test_subqueries_separate_reasoners(get_pipeline):
+    qa_pipeline = get_pipeline(max_workers=4)
+
+    for _ in range(3):
+        list(qa_pipeline.reason_sub_queries(["0.05|answer"] * 8))
+
+    # каждый одновременно обрабатываемый под-вопрос использует свой reasoner; reasoner'ы переиспользуются
+    assert SleepKGReasoner.max_in_flight == 4
+    assert len(SleepKGReasoner.instances) == 4
+    assert all(reasoner.instance_max_in_flight == 1 for reasoner in SleepKGReasoner.instances)
+    assert len(qa_pipeline.kg_reasoners) == 4
+
+def test_empty_subqueries(get_pipeline):
+    qa_pipeline = get_pipeline(max_workers=2, subquery_timeout=1)
+    assert list(qa_pipeline.reason_sub_queries([])) == []
+
+def test_subquery_timeout(get_pipeline):
+    qa_pipeline = get_pipeline(max_workers=1, subquery_timeout=0.1)
+
+    results = list(qa_pipeline.reason_sub_queries(["60|slow", "0.01|fast"]))
+
+    assert results[0][0] is None and results[0][1].status == ReturnStatus.subquery_timeout
+    # обработка под-вопроса, превысившего время ожидания, прерывается и освобождает поток
+    assert results[1] == ("fast", ReturnInfo())
+    assert SleepKGReasoner.cancelled == 1
+
+@pytest.mark.parametrize("degrade_on_timeout, expected_answer, expected_status", [
+    (False, None, ReturnStatus.subquery_timeout),
+    (True, "degraded", ReturnStatus.success)])
+def test_answer_degrade_on_timeout(get_pipeline, degrade_on_timeout: bool, expected_answer: str, expected_status: ReturnStatus):
+    qa_pipeline = get_pipeline(subquery_timeout=0.05, degrade_on_timeout=degrade_on_timeout, degraded_answer="degraded")
+
+    answer, info = qa_pipeline.answer("60|slow")
+
+    assert answer == expected_answer
+    assert info.status == expected_status
+    if degrade_on_timeout:
+        assert ReturnStatus.subquery_timeout in info.occurred_warning
+
+def test_answer_subquery_error(get_pipeline):
+    qa_pipeline = get_pipeline(max_workers=2)
+    answer, info = qa_pipeline.answer("0.01|error")
+    assert answer is None
+    assert info.status == ReturnStatus.empty_answer
+
+def test_invalid_max_workers(get_pipeline):
+    with pytest.raises(ValueError):
+        get_pipeline(max_workers=0)
+
+def test_subqueries_shared_cache(get_pipeline, shared_cache_kvdriver_config):
+    qa_pipeline = get_pipeline('caching', shared_cache_kvdriver_config, max_workers=2)
+    # оба одинаковых под-вопроса не находят ответ в кеше и сохраняют его одновременно
+    CachingKGReasoner.barrier = threading.Barrier(2)
+
+    results = list(qa_pipeline.reason_sub_queries(["q", "q"]))
+
+    assert results == [("answer to q", ReturnInfo())] * 2
+    assert qa_pipeline.kg_reasoners[0].reasoner.cachekv.kv_conn.count_items() == 1
+    # повторный под-вопрос обслуживается кешем
+    CachingKGReasoner.barrier = None
+    assert list(qa_pipeline.reason_sub_queries(["q", "q"])) == [("answer to q", ReturnInfo())] * 2
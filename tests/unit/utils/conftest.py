@@ -0,0 +1,54 @@
+import pytest
+import asyncio
+import threading
+
+import sys
+sys.path.insert(0, "../")
+from src.agents.utils import AgentConnectorConfig
+from src.agents.connectors.StubAgentConnector import StubAgentConnector
+from src.utils import AgentTaskSolver, AgentTaskSolverConfig, AgentTaskSuite
+
+class CountingAgentConnector(StubAgentConnector):
+    """Заглушка LLM-агента, считающая обращения к бэкенду. Если задано событие release,
+    то ответ возвращается только после его установки (вызов при этом уже учтён в calls).
+    """
+    def __init__(self, config: AgentConnectorConfig, fail: bool = False, release: threading.Event = None) -> None:
+        super().__init__(config, ['answer'])
+        self.fail = fail
+        self.release = release
+        self.calls = 0
+
+    def start_call(self) -> None:
+        with self.lock:
+            self.calls += 1
+
+    def finish_call(self) -> str:
+        if self.fail:
+            raise RuntimeError("backend error")
+        return self.next_answer()
+
+    def _generate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
+        self.start_call()
+        if self.release is not None:
+            self.release.wait(timeout=5)
+        return self.finish_call()
+
+    async def _agenerate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
+        self.start_call()
+        if self.release is not None:
+            await asyncio.to_thread(self.release.wait, 5)
+        return self.finish_call()
+
+@pytest.fixture
+def get_solver():
+    def get(max_concurrency: int = None, coalesce_requests: bool = True, fail: bool = False,
+            release: threading.Event = None) -> AgentTaskSolver:
+        ext_params = {'max_concurrency': max_concurrency} if max_concurrency is not None else dict()
+        agent = CountingAgentConnector(AgentConnectorConfig(ext_params=ext_params), fail=fail, release=release)
+        config = AgentTaskSolverConfig(
+            version='v1', suites={'en': AgentTaskSuite(system_prompt='system', user_prompt='{text}', assistant_prompt='',
+                                                       parse_answer_func=lambda raw_answer, **kwargs: raw_answer.upper())},
+            formate_context_func=lambda text: {'text': text}, postprocess_answer_func=lambda answer, **kwargs: answer,
+            cache_table_name=None, log=lambda *args, **kwargs: None, coalesce_requests=coalesce_requests)
+        return AgentTaskSolver(agent, config)
+    return get
@@ -0,0 +1,126 @@
+import pytest
+import asyncio
+import threading
+
+import sys
+sys.path.insert(0, "../")
+from src.agents.utils import AgentConnectorConfig, AgentConcurrencyLimiter
+from src.agents.connectors.StubAgentConnector import StubAgentConnector
+from src.utils import ReturnStatus
+
+async def wait_for_calls(agent, n_calls: int) -> None:
+    while agent.calls < n_calls:
+        await asyncio.sleep(0.001)
+
+def test_asolve_matches_solve(get_solver):
+    solver = get_solver(max_concurrency=1)
+    assert solver.solve(lang='en', text='q') == ('ANSWER', ReturnStatus.success)
+    assert asyncio.run(solver.asolve(lang='en', text='q')) == ('ANSWER', ReturnStatus.success)
+    # ошибки предобработки обрабатываются так же, как в solve
+    assert asyncio.run(solver.asolve(lang='en')) == (None, ReturnStatus.bad_formater)
+
+@pytest.mark.parametrize("max_concurrency, n_requests", [(1, 4), (3, 9), (8, 8)])
+def test_asolve_concurrency_limit(get_solver, max_concurrency: int, n_requests: int):
+    release = threading.Event()
+    solver = get_solver(max_concurrency=max_concurrency, release=release)
+
+    async def run():
+        tasks = [asyncio.create_task(solver.asolve(lang='en', text=str(i))) for i in range(n_requests)]
+        await asyncio.wait_for(wait_for_calls(solver.agent, max_concurrency), timeout=5)
+        # все слоты заняты: остальные запросы ожидают освобождения слота, не обращаясь к бэкенду
+        await asyncio.sleep(0.01)
+        blocked_calls = solver.agent.calls
+        release.set()
+        return blocked_calls, await asyncio.gather(*tasks)
+
+    blocked_calls, outputs = asyncio.run(run())
+
+    assert outputs == [('ANSWER', ReturnStatus.success)] * n_requests
+    assert blocked_calls == max_concurrency
+    assert solver.agent.calls == n_requests
+    assert solver.agent.limiter.get_stats()['max_in_flight'] == max_concurrency
+
+def test_limiter_shared_by_threads_and_coroutines():
+    limiter = AgentConcurrencyLimiter(max_concurrency=2)
+    in_flight, max_in_flight, lock = [0], [0], threading.Lock()
+
+    def enter():
+        with lock:
+            in_flight[0] += 1
+            max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+
+    def leave():
+        with lock:
+            in_flight[0] -= 1
+
+    def sync_request():
+        with limiter.slot():
+            enter()
+            threading.Event().wait(0.02)
+            leave()
+
+    async def async_request():
+        async with limiter.aslot():
+            enter()
+            await asyncio.sleep(0.02)
+            leave()
+
+    async def run():
+        await asyncio.gather(*[async_request() for _ in range(5)])
+
+    threads = [threading.Thread(target=sync_request) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    asyncio.run(run())
+    for thread in threads:
+        thread.join()
+
+    assert max_in_flight[0] <= 2
+    assert limiter.get_stats()['in_flight'] == 0
+    assert limiter.get_stats()['requests'] == 10
+
+def test_limiter_cancelled_waiter():
+    limiter = AgentConcurrencyLimiter(max_concurrency=1)
+
+    async def hold():
+        async with limiter.aslot():
+            await asyncio.sleep(0.05)
+
+    async def run():
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await holder
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        # отменённый запрос не занимает слот
+        await asyncio.wait_for(hold(), timeout=1)
+
+    asyncio.run(run())
+    assert limiter.get_stats()['in_flight'] == 0
+
+def test_invalid_max_concurrency():
+    with pytest.raises(ValueError):
+        AgentConcurrencyLimiter(max_concurrency=0)
+
+def test_no_limit_by_default():
+    n_threads = 6
+    barrier = threading.Barrier(n_threads, timeout=5)
+
+    class BarrierAgentConnector(StubAgentConnector):
+        def _generate(self, system_prompt: str, user_prompt: str, assistant_prompt: str = None) -> str:
+            # все запросы должны выполняться одновременно, иначе барьер не будет пройден
+            barrier.wait()
+            return 'answer'
+
+    agent = BarrierAgentConnector(AgentConnectorConfig())
+    assert agent.limiter is None
+
+    threads = [threading.Thread(target=agent.generate, args=('system', 'user')) for _ in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not barrier.broken
@@ -0,0 +1,150 @@
+import pytest
+import asyncio
+import threading
+from time import monotonic, sleep
+from concurrent.futures import ThreadPoolExecutor
+
+import sys
+sys.path.insert(0, "../")
+from src.utils import AgentTaskSolver, ReturnStatus
+
+def wait_for_coalesced(n_coalesced: int, timeout: float = 5) -> None:
+    # ожидаем, пока заданное количество запросов присоединится к уже выполняющимся
+    deadline = monotonic() + timeout
+    while AgentTaskSolver.inflight.get_stats()['coalesced'] < n_coalesced:
+        if monotonic() > deadline:
+            raise TimeoutError
+        sleep(0.001)
+
+async def await_coalesced(n_coalesced: int) -> None:
+    while AgentTaskSolver.inflight.get_stats()['coalesced'] < n_coalesced:
+        await asyncio.sleep(0.001)
+
+@pytest.mark.parametrize("coalesce_requests, expected_calls", [(True, 1), (False, 6)])
+def test_solve_coalescing_threads(get_solver, coalesce_requests: bool, expected_calls: int):
+    release = threading.Event()
+    solver = get_solver(coalesce_requests=coalesce_requests, release=release)
+    coalesced_before = AgentTaskSolver.inflight.get_stats()['coalesced']
+
+    with ThreadPoolExecutor(6) as executor:
+        futures = [executor.submit(solver.solve, lang='en', text='q') for _ in range(6)]
+        # ответ бэкенда задерживается, пока все запросы не будут отправлены или объединены
+        if coalesce_requests:
+            wait_for_coalesced(coalesced_before + 5)
+        release.set()
+        outputs = [future.result() for future in futures]
+
+    assert outputs == [('ANSWER', ReturnStatus.success)] * 6
+    assert solver.agent.calls == expected_calls
+    stats = AgentTaskSolver.inflight.get_stats()
+    assert stats['coalesced'] - coalesced_before == 6 - expected_calls
+    assert stats['in_flight'] == 0
+
+def test_asolve_coalescing(get_solver):
+    release = threading.Event()
+    solver = get_solver(release=release)
+    coalesced_before = AgentTaskSolver.inflight.get_stats()['coalesced']
+
+    async def run():
+        tasks = [asyncio.create_task(solver.asolve(lang='en', text=text)) for text in ['a', 'b', 'a', 'a', 'b']]
+        await asyncio.wait_for(await_coalesced(coalesced_before + 3), timeout=5)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    outputs = asyncio.run(run())
+
+    assert outputs == [('ANSWER', ReturnStatus.success)] * 5
+    # одновременно выполняются только различающиеся запросы
+    assert solver.agent.calls == 2
+    # завершённые запросы не объединяются с последующими
+    solver.solve(lang='en', text='a')
+    assert solver.agent.calls == 3
+
+def test_coalescing_threads_and_coroutines(get_solver):
+    release = threading.Event()
+    solver = get_solver(release=release)
+    coalesced_before = AgentTaskSolver.inflight.get_stats()['coalesced']
+
+    async def run():
+        tasks = [asyncio.create_task(solver.asolve(lang='en', text='q')) for _ in range(3)]
+        await asyncio.wait_for(await_coalesced(coalesced_before + 5), timeout=5)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    threads = [threading.Thread(target=solver.solve, kwargs={'lang': 'en', 'text': 'q'}) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    outputs = asyncio.run(run())
+    for thread in threads:
+        thread.join()
+
+    assert outputs == [('ANSWER', ReturnStatus.success)] * 3
+    assert solver.agent.calls == 1
+
+def test_coalescing_separate_agents(get_solver):
+    # одинаковые промпты к разным бэкендам не объединяются
+    release = threading.Event()
+    solvers = [get_solver(release=release), get_solver(release=release)]
+    with ThreadPoolExecutor(2) as executor:
+        futures = [executor.submit(solver.solve, lang='en', text='q') for solver in solvers]
+        release.set()
+        [future.result() for future in futures]
+    assert [solver.agent.calls for solver in solvers] == [1, 1]
+
+def test_coalescing_error_propagation(get_solver):
+    release = threading.Event()
+    solver = get_solver(fail=True, release=release)
+    coalesced_before = AgentTaskSolver.inflight.get_stats()['coalesced']
+
+    async def run():
+        tasks = [asyncio.create_task(solver.asolve(lang='en', text='q')) for _ in range(3)]
+        await asyncio.wait_for(await_coalesced(coalesced_before + 2), timeout=5)
+        release.set()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    outputs = asyncio.run(run())
+
+    assert all(isinstance(output, RuntimeError) for output in outputs)
+    assert solver.agent.calls == 1
+    assert AgentTaskSolver.inflight.get_stats()['in_flight'] == 0
+
+def test_cancelled_follower(get_solver):
+    release = threading.Event()
+    solver = get_solver(release=release)
+    coalesced_before = AgentTaskSolver.inflight.get_stats()['coalesced']
+
+    async def run():
+        leader = asyncio.create_task(solver.asolve(lang='en', text='q'))
+        follower = asyncio.create_task(solver.asolve(lang='en', text='q'))
+        await asyncio.wait_for(await_coalesced(coalesced_before + 1), timeout=5)
+        follower.cancel()
+        release.set()
+        return await leader, await asyncio.gather(follower, return_exceptions=True)
+
+    leader_output, follower_output = asyncio.run(run())
+
+    assert leader_output == ('ANSWER', ReturnStatus.success)
+    assert isinstance(follower_output[0], asyncio.CancelledError)
+    assert solver.agent.calls == 1
+
+def test_sync_solve_inside_event_loop(get_solver):
+    release = threading.Event()
+    solver = get_solver(release=release)
+
+    async def run():
+        leader = asyncio.create_task(solver.asolve(lang='en', text='q'))
+        while solver.agent.calls < 1:
+            await asyncio.sleep(0.001)
+        # блокирующий вызов из корутины не ожидает запрос-лидера того же event loop'а, а выполняется отдельно
+        release.set()
+        output = solver.solve(lang='en', text='q')
+        return output, await leader
+
+    outputs = []
+    thread = threading.Thread(target=lambda: outputs.extend(asyncio.run(run())), daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert outputs == [('ANSWER', ReturnStatus.success)] * 2
+    assert solver.agent.calls == 2